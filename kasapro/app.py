@@ -18,26 +18,25 @@ from typing import Any, Optional, List, Dict, Tuple
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
-from .config import APP_TITLE, HAS_OPENPYXL, APP_BASE_DIR, DB_FILENAME
+from .config import (
+    APP_TITLE,
+    HAS_OPENPYXL,
+    APP_BASE_DIR,
+    DB_FILENAME,
+    COMPANY_POOL_SIZE,
+    COMPANY_PREWARM,
+    UI_PREFETCH_SCREENS,
+)
 from .utils import _safe_slug, fmt_amount
 from .db.main_db import DB
 from .db.users_db import UsersDB
-from .services import Services
+from .services import CompanyPool, Services
+from .services.backup_service import BACKUP_PREFIX, COMPRESSIONS, BackupService, backup_suffixes
+from .services.export_service import ExportCancelled
 from .ui.style import apply_modern_style
 from .ui.ui_logging import log_ui_event, wrap_callback
 from .ui.windows import LoginWindow, SettingsWindow, HelpWindow, ImportWizard
-from .ui.frames import (
-    KasaFrame,
-    TanimlarHubFrame,
-    RaporAraclarHubFrame,
-    KullanicilarFrame,
-    MessagesFrame,
-    IntegrationsHubFrame,
-    CreateCenterFrame,
-    SatisRaporlariFrame,
-    StockWmsFrame,
-)
-from .ui.plugins.loader import discover_ui_plugins
+from .ui.plugins.loader import discover_ui_plugins, read_manifest, update_manifest
 from .modules.notes_reminders.scheduler import ReminderScheduler
 
 # Import HRContext for typing
@@ -125,9 +124,9 @@ class App:
             self.active_company_id = None
             self.active_company_name = "1. Şirket"
 
-        self.db = DB(db_path)
-        # Servis katmanı (UI -> services -> DB)
-        self.services = Services.build(self.db, self.usersdb, context_provider=self._hr_context)
+        # Servis katmanı (UI -> services -> DB); şirket DB'leri havuzda açık tutulur
+        self.company_pool = CompanyPool(self._open_company, capacity=COMPANY_POOL_SIZE)
+        self._activate_company_db(db_path)
         from .modules.integrations.worker import IntegrationWorker
         self.integrations_worker = IntegrationWorker(self.services.integrations)
         try:
@@ -163,6 +162,49 @@ class App:
             self.root.after(300, self._start_reminder_scheduler)
         except Exception:
             pass
+        try:
+            self.root.after(1500, self._prewarm_companies)
+        except Exception:
+            pass
+        try:
+            self.root.after(800, self._prefetch_screens)
+        except Exception:
+            pass
+
+    def _prefetch_screens(self) -> None:
+        """En sık açılan ekranların modüllerini boşta önceden yükler."""
+        reg = getattr(self, "screen_registry", None)
+        if reg is None or UI_PREFETCH_SCREENS <= 0:
+            return
+        reg.prefetch(reg.most_used(UI_PREFETCH_SCREENS, default=("tanimlar", "create_center", "rapor_araclar")))
+
+    def _on_screen_created(self, key: str, frame: Any) -> None:
+        # Tanımlar ilk açılışta verisini yükler (eskiden açılışta oluşturulup tazeleniyordu)
+        if key == "tanimlar" and hasattr(frame, "refresh"):
+            frame.refresh()
+
+    def _open_company(self, path: str) -> Tuple[DB, Services]:
+        db = DB(path)
+        return db, Services.build(db, self.usersdb, context_provider=self._hr_context)
+
+    def _activate_company_db(self, path: str) -> None:
+        """Şirket DB'si + servisleri havuzdan alır (yoksa açar)."""
+        handle = self.company_pool.acquire(path)
+        self.db = handle.db
+        self.services = handle.services
+
+    def _prewarm_companies(self) -> None:
+        """Son kullanılan şirketleri arka planda açar (hızlı şirket geçişi)."""
+        if not COMPANY_PREWARM or self.company_pool.capacity <= 1:
+            return
+        try:
+            u = self.get_active_user_row()
+            if not u:
+                return
+            rows = self.usersdb.recent_companies(int(u["id"]), self.company_pool.capacity)
+            self.company_pool.prewarm([self.usersdb.get_company_db_path(c) for c in rows])
+        except Exception:
+            logging.getLogger(__name__).exception("Company prewarm failed")
 
     def _schedule_sales_order_summary(self) -> None:
         try:
@@ -371,6 +413,15 @@ class App:
         except Exception:
             pass
 
+    def _sync_reminder_scheduler(self) -> None:
+        # Şirket/veri sahibi değişti: zamanlayıcı yeni servise geçip yığını yeniden yükler
+        try:
+            if hasattr(self, "_reminder_scheduler") and self._reminder_scheduler:
+                self._reminder_scheduler.service = self.services.notes_reminders
+                self._reminder_scheduler.reset_context()
+        except Exception:
+            pass
+
     def _refresh_message_badge(self):
         uid = self.get_active_user_id()
         if not uid:
@@ -417,6 +468,36 @@ class App:
         except Exception:
             return None
 
+    def delete_company(self, company_id: int) -> None:
+        """Şirketi ve DB dosyasını siler; aktif şirketse kullanıcının başka şirketine geçer.
+
+        Havuzdaki (ön yüklenmiş olabilecek) açık bağlantı dosya silinmeden önce
+        kapatılır: Windows'ta açık dosya silinemez, POSIX'te silinmiş DB'ye
+        yazılmaya devam edilir.
+        """
+        c = self.usersdb.get_company_by_id(int(company_id))
+        if not c:
+            return
+        path = self.usersdb.get_company_db_path(c)
+        was_active = int(getattr(self, "active_company_id", None) or 0) == int(company_id)
+        self.company_pool.discard(path)
+        try:
+            self.usersdb.delete_company(int(company_id), delete_db_file=True)
+        except Exception:
+            if was_active:
+                # Silinemedi (ör. son şirket): aktif DB'yi geri aç
+                self._activate_company_db(path)
+            raise
+        if not was_active:
+            return
+        # Kullanıcı satırı tazelenir (last_company_id değişmiş olabilir)
+        urow = self.get_active_user_row()
+        if urow:
+            urow = self.usersdb.get_user_by_username(str(urow["username"])) or urow
+        crow = self.usersdb.get_active_company_for_user(urow) if urow else None
+        if crow:
+            self.switch_company(int(crow["id"]))
+
     def switch_company(self, company_id: int):
         """Aktif şirketi değiştirir (DB dosyası değişir)."""
         u = self.get_active_user_row()
@@ -428,19 +509,8 @@ class App:
             return
 
         new_path = self.usersdb.get_company_db_path(c)
-
-        try:
-            self.db.close()
-        except Exception:
-            pass
-        self.db = DB(new_path)
-        self.services = Services.build(self.db, self.usersdb)
-        try:
-            if hasattr(self, "_reminder_scheduler") and self._reminder_scheduler:
-                self._reminder_scheduler.service = self.services.notes_reminders
-                self._reminder_scheduler.reset_context()
-        except Exception:
-            pass
+        # Önceki şirket havuzda açık kalır; geri dönüş yeniden açılış gerektirmez
+        self._activate_company_db(new_path)
 
         self.active_company = c
         try:
@@ -456,6 +526,7 @@ class App:
             self.usersdb.set_last_company_id(int(u["id"]), int(self.active_company_id or 0))
         except Exception:
             pass
+        self._sync_reminder_scheduler()
 
         self.reload_settings()
 
@@ -617,13 +688,9 @@ class App:
             self.active_company_id = None
             self.active_company_name = "1. Şirket"
 
-        try:
-            self.db.close()
-        except Exception:
-            pass
-        self.db = DB(new_path)
-        self.services = Services.build(self.db, self.usersdb)
+        self._activate_company_db(new_path)
         self.data_owner_username = str(username)
+        self._sync_reminder_scheduler()
 
         self.reload_settings()
         try:
@@ -670,19 +737,8 @@ class App:
             pass
 
     def _build_ui(self):
-        from .ui.frames import (
-            CreateCenterFrame,
-            IntegrationsHubFrame,
-            KasaFrame,
-            KullanicilarFrame,
-            MessagesFrame,
-            RaporAraclarHubFrame,
-            SatisRaporlariFrame,
-            StockWmsFrame,
-            TanimlarHubFrame,
-        )
-        from .ui.navigation import ScreenRegistry
-        from .ui.plugins.loader import discover_ui_plugins
+        from .ui.frames import frame_module
+        from .ui.navigation import LazyFactory, ScreenRegistry
         # Modern tema + okunabilir fontlar
         try:
             self._ui_colors = apply_modern_style(self.root)
@@ -733,7 +789,13 @@ class App:
         body = ttk.Frame(content, style="TFrame")
         body.pack(fill=tk.BOTH, expand=True, padx=12, pady=(0, 12))
         self.screen_registry = ScreenRegistry(body, self)
+        self.screen_registry.on_created = self._on_screen_created
         self.frames = self.screen_registry.frames
+        try:
+            usage = read_manifest().get("usage") or {}
+            self.screen_registry.usage.update({str(k): int(v) for k, v in usage.items()})
+        except Exception:
+            pass
 
         # Status bar
         self.status_var = tk.StringVar(value="F1: Yardım  •  Ctrl+F: Global Arama  •  Çift tık: Düzenle")
@@ -881,11 +943,10 @@ class App:
         )
         self.btn_export_excel.pack(fill=tk.X, padx=4, pady=2)
 
-        # openpyxl yoksa Excel import/export devre dışı
+        # openpyxl yoksa Excel import devre dışı; export CSV klasörüne yazar
         if not HAS_OPENPYXL:
             try:
                 self.btn_import_excel.config(state="disabled")
-                self.btn_export_excel.config(state="disabled")
             except Exception:
                 pass
 
@@ -898,28 +959,28 @@ class App:
             command=wrap_callback("on_close", self.on_close),
         ).pack(fill=tk.X, padx=4, pady=(8, 2))
 
-        # Ekranlar
-        self.screen_registry.register("kasa", lambda parent, app: KasaFrame(parent, app), title="Kasa")
-        self.screen_registry.register("create_center", lambda parent, app: CreateCenterFrame(parent, app), title="Kayıt Oluştur (Merkez)")
-        self.screen_registry.register("mesajlar", lambda parent, app: MessagesFrame(parent, app), title="Mesajlar")
-        self.screen_registry.register("tanimlar", lambda parent, app: TanimlarHubFrame(parent, app), title="Tanımlar")
-        self.screen_registry.register("stok_wms", lambda parent, app: StockWmsFrame(parent, app), title="Stok/WMS")
-        self.screen_registry.register("entegrasyonlar", lambda parent, app: IntegrationsHubFrame(parent, app), title="Entegrasyonlar")
-        self.screen_registry.register("satis_raporlari", lambda parent, app: SatisRaporlariFrame(parent, app), title="Satış Raporları")
-        self.screen_registry.register(
-            "rapor_araclar",
-            lambda parent, app: RaporAraclarHubFrame(parent, app),
-            title="Rapor & Araçlar",
-            create=False,
-        )
-
-        # Plugin ekranları
+        # Ekranlar: modül/sınıf adıyla kaydedilir; import ve frame kurulumu ilk gösterimde.
+        # Yalnızca başlangıç ekranı (kasa) hemen oluşturulur.
+        def screen(key: str, class_name: str, title: str, create: bool = False) -> None:
+            factory = LazyFactory(frame_module(class_name), class_name)
+            self.screen_registry.register(key, factory, title=title, create=create)
+
+        screen("kasa", "KasaFrame", "Kasa", create=True)
+        screen("create_center", "CreateCenterFrame", "Kayıt Oluştur (Merkez)")
+        screen("mesajlar", "MessagesFrame", "Mesajlar")
+        screen("tanimlar", "TanimlarHubFrame", "Tanımlar")
+        screen("stok_wms", "StockWmsFrame", "Stok/WMS")
+        screen("entegrasyonlar", "IntegrationsHubFrame", "Entegrasyonlar")
+        screen("satis_raporlari", "SatisRaporlariFrame", "Satış Raporları")
+        screen("rapor_araclar", "RaporAraclarHubFrame", "Rapor & Araçlar")
+
+        # Plugin ekranları (manifestten; modül ilk build'de import edilir)
         for p in getattr(self, "ui_plugins", []) or []:
             self.screen_registry.register(p.key, p.build, title=p.page_title, create=False)
             log_ui_event("plugin_ui_registered", key=p.key, title=p.page_title)
 
         if self.is_admin:
-            self.screen_registry.register("kullanicilar", lambda parent, app: KullanicilarFrame(parent, app), title="Kullanıcılar", create=False)
+            screen("kullanicilar", "KullanicilarFrame", "Kullanıcılar")
 
         # İlk yüklemeler
         try:
@@ -1133,23 +1194,65 @@ class App:
         from .ui.windows import HelpWindow
         HelpWindow(self)
 
-    def backup_db(self):
+    def _backup_service(self) -> BackupService:
+        base = self.base_dir if hasattr(self, 'base_dir') else APP_BASE_DIR
+        try:
+            keep = int(self.db.get_setting("backup_keep") or 20)
+        except Exception:
+            keep = 20
+        return BackupService(base, keep=keep)
+
+    def _backup_prefix(self) -> str:
+        uname = self.get_active_username() if hasattr(self, 'get_active_username') else (str(self.user['username']) if self.user else 'user')
+        cname = _safe_slug(getattr(self, "active_company_name", "") or "sirket")
+        return f"{BACKUP_PREFIX}{uname}_{cname}_"
+
+    def backup_db(self, on_done=None):
+        """Canlı DB'nin tutarlı yedeğini arka planda alır (SQLite backup API)."""
         base = self.base_dir if hasattr(self, 'base_dir') else APP_BASE_DIR
         src = getattr(self.db, 'path', None) or os.path.join(base, DB_FILENAME)
         if not src or not os.path.exists(src):
             raise FileNotFoundError('DB bulunamadı.')
-        uname = self.get_active_username() if hasattr(self, 'get_active_username') else (str(self.user['username']) if self.user else 'user')
-        cname = _safe_slug(getattr(self, "active_company_name", "") or "sirket")
-        dst = os.path.join(base, f"kasa_backup_{uname}_{cname}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
-        shutil.copy2(src, dst)
-        try:
-            self.db.log('Yedek', dst)
-        except Exception:
-            pass
-        messagebox.showinfo(APP_TITLE, f"Yedek alındı:\n{dst}")
+        svc = self._backup_service()
+        prefix = self._backup_prefix()
+        name = f"{prefix}{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        compress = str(self.db.get_setting("backup_compress") or "").strip().lower()
+        if compress not in COMPRESSIONS:
+            compress = ""
+
+        def finish(dst: Optional[str], err: Optional[Exception]) -> None:
+            if err is not None:
+                messagebox.showerror(APP_TITLE, f"Yedek alınamadı:\n{err}")
+            else:
+                try:
+                    self.db.log('Yedek', str(dst))
+                except Exception:
+                    pass
+                messagebox.showinfo(APP_TITLE, f"Yedek alındı:\n{dst}")
+            if on_done is not None:
+                try:
+                    on_done()
+                except Exception:
+                    pass
+
+        def worker() -> None:
+            dst: Optional[str] = None
+            err: Optional[Exception] = None
+            try:
+                dst = svc.backup(src, name, compress=compress)
+                svc.rotate(prefix)
+            except Exception as exc:
+                logging.getLogger(__name__).exception("DB backup failed")
+                err = exc
+            self.root.after(0, lambda: finish(dst, err))
+
+        threading.Thread(target=worker, daemon=True, name="db-backup").start()
 
     def restore_db(self):
-        p = filedialog.askopenfilename(title='DB Yedek Seç', filetypes=[('DB', '*.db'), ('All', '*.*')])
+        p = filedialog.askopenfilename(
+            title='DB Yedek Seç',
+            filetypes=[('DB', ' '.join(f'*{ext}' for ext in backup_suffixes())), ('All', '*.*')],
+        )
         if not p:
             return
         uname = self.get_active_username() if hasattr(self, 'get_active_username') else (str(self.user['username']) if self.user else 'user')
@@ -1159,21 +1262,21 @@ class App:
         if not dst:
             messagebox.showerror(APP_TITLE, 'Hedef DB yolu bulunamadı.')
             return
+        backup = self._backup_service()
+        # Havuzdaki açık çift kapatılır; geri yüklemeden sonra taze açılır
+        self.company_pool.discard(dst)
         try:
-            self.db.close()
-        except Exception:
-            pass
-        try:
-            shutil.copy2(p, dst)
+            # Yedek önce doğrulanır; sonra açık DB'ye backup API ile yazılır (dosya kopyası değil)
+            backup.restore(p, dst)
         except Exception as e:
             messagebox.showerror(APP_TITLE, f'Geri yükleme başarısız: {e}')
             # DB'yi tekrar açmayı deneyelim
             try:
-                self.db = DB(dst)
+                self._activate_company_db(dst)
             except Exception:
                 pass
             return
-        self.db = DB(dst)
+        self._activate_company_db(dst)
         try:
             self.db.log('Restore', os.path.basename(p))
         except Exception:
@@ -1209,121 +1312,90 @@ class App:
                 pass
 
     def export_excel(self):
-        try:
-            from openpyxl import Workbook
-            from openpyxl.utils import get_column_letter
-        except Exception:
-            messagebox.showerror(APP_TITLE, "openpyxl kurulu değil. Kur: pip install openpyxl")
+        """Tüm verileri arka planda akış modunda dışa aktarır (openpyxl yoksa CSV klasörü)."""
+        if getattr(self, "_export_cancel", None) is not None:
             return
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Biçim bir kez seçilir; dosya adı, yazıcı ve sonuç mesajı aynı değere bakar
+        as_excel = HAS_OPENPYXL
+        if as_excel:
+            out = os.path.join(APP_BASE_DIR, f"kasa_pro_export_{stamp}.xlsx")
+        else:
+            out = os.path.join(APP_BASE_DIR, f"kasa_pro_export_{stamp}")
+        exporter = self.services.exporter
+        db = self.db
+        cancel = threading.Event()
+        self._export_cancel = cancel
+
+        dlg = tk.Toplevel(self.root)
+        dlg.title("Dışa Aktar")
+        dlg.transient(self.root)
+        dlg.resizable(False, False)
+        ttk.Label(dlg, text="Veriler dışa aktarılıyor...").pack(padx=12, pady=(12, 6))
+        pb = ttk.Progressbar(dlg, length=420, mode="determinate")
+        pb.pack(padx=12, pady=6)
+        lbl = ttk.Label(dlg, text="")
+        lbl.pack(padx=12)
+        ttk.Button(dlg, text="İptal", command=cancel.set).pack(pady=(6, 12))
+        dlg.protocol("WM_DELETE_WINDOW", cancel.set)
+
+        def on_progress(done: int, total: int) -> None:
+            def apply() -> None:
+                try:
+                    pb.config(maximum=max(1, total), value=done)
+                    lbl.config(text=f"{done}/{total}")
+                except tk.TclError:
+                    pass
 
-        wb = Workbook()
-        wb.remove(wb.active)
-
-        def add_sheet(name: str, headers: List[str], rows: List[Tuple[Any, ...]]):
-            ws = wb.create_sheet(title=name)
-            ws.append(headers)
-            for r in rows:
-                ws.append(list(r))
-            for i, h in enumerate(headers, start=1):
-                ws.column_dimensions[get_column_letter(i)].width = min(45, max(12, len(str(h))+2))
-            ws.freeze_panes = "A2"
+            self.root.after(0, apply)
 
-        caris = self.db.cari_list()
-        add_sheet("Cariler", ["id","ad","tur","telefon","notlar","acilis_bakiye","aktif"],
-                  [(r["id"], r["ad"], r["tur"], r["telefon"], r["notlar"], r["acilis_bakiye"], r.get("aktif", 1) if hasattr(r, "get") else r["aktif"]) for r in caris])
+        def finish(err: Optional[BaseException]) -> None:
+            self._export_cancel = None
+            try:
+                dlg.destroy()
+            except tk.TclError:
+                pass
+            if err is None:
+                if as_excel:
+                    db.log("Excel Export", out)
+                    messagebox.showinfo(APP_TITLE, f"Excel export:\n{out}")
+                else:
+                    db.log("CSV Export", out)
+                    messagebox.showinfo(APP_TITLE, f"CSV export (openpyxl kurulu değil, klasör):\n{out}")
+            elif isinstance(err, ExportCancelled):
+                messagebox.showinfo(APP_TITLE, "Dışa aktarma iptal edildi.")
+            else:
+                messagebox.showerror(APP_TITLE, f"Dışa aktarma başarısız:\n{err}")
 
-        ch = self.db.cari_hareket_list()
-        add_sheet("Cari_Hareket", ["id","tarih","cari","tip","tutar","para","aciklama","odeme","belge","etiket"],
-                  [(r["id"], r["tarih"], r["cari_ad"], r["tip"], r["tutar"], r["para"], r["aciklama"], r["odeme"], r["belge"], r["etiket"]) for r in ch])
+        def worker() -> None:
+            err: Optional[BaseException] = None
+            try:
+                # ConnectionProxy bu thread için ayrı bağlantı açar; UI okumaları beklemez
+                if as_excel:
+                    totals = db.kasa_toplam()
+                    summary = [("Gelir", totals["gelir"]), ("Gider", totals["gider"]), ("Net", totals["net"])]
+                    exporter.export_database_excel(db.conn, out, summary=summary, progress=on_progress, cancel_event=cancel)
+                else:
+                    exporter.export_database_csv(db.conn, out, progress=on_progress, cancel_event=cancel)
+            except BaseException as exc:
+                if not isinstance(exc, ExportCancelled):
+                    logging.getLogger(__name__).exception("Excel export failed")
+                err = exc
+            self.root.after(0, lambda: finish(err))
 
-        kh = self.db.kasa_list()
-        add_sheet("Kasa_Hareket", ["id","tarih","tip","tutar","para","odeme","kategori","cari","aciklama","belge","etiket"],
-                  [(r["id"], r["tarih"], r["tip"], r["tutar"], r["para"], r["odeme"], r["kategori"], r["cari_ad"], r["aciklama"], r["belge"], r["etiket"]) for r in kh])
+        threading.Thread(target=worker, daemon=True, name="excel-export").start()
 
-        # Banka
+    def on_close(self):
         try:
-            bh = self.db.banka_list(limit=200000)
-            add_sheet("Banka_Hareket", ["id","tarih","banka","hesap","tip","tutar","para","aciklama","referans","belge","etiket","bakiye"],
-                      [(r["id"], r["tarih"], r["banka"], r["hesap"], r["tip"], r["tutar"], r["para"], r["aciklama"], r["referans"], r["belge"], r["etiket"], r["bakiye"]) for r in bh])
-        except Exception:
-            pass
-
-        # Stok
-        try:
-            urunler = self.db.stok_urun_list()
-            add_sheet(
-                "Stok_Urun",
-                ["id","kod","ad","kategori","birim","min_stok","kritik_stok","max_stok","raf","tedarikci_id","barkod","aktif","aciklama"],
-                [
-                    (
-                        r["id"],
-                        r["kod"],
-                        r["ad"],
-                        r["kategori"],
-                        r["birim"],
-                        r["min_stok"],
-                        r["kritik_stok"],
-                        r["max_stok"],
-                        r["raf"],
-                        r["tedarikci_id"],
-                        r["barkod"],
-                        r["aktif"],
-                        r["aciklama"],
-                    )
-                    for r in urunler
-                ],
-            )
-            loks = self.db.stok_lokasyon_list(only_active=False)
-            add_sheet("Stok_Lokasyon", ["id","ad","aciklama","aktif"],
-                      [(r["id"], r["ad"], r["aciklama"], r["aktif"]) for r in loks])
-            partiler = self.db.stok_parti_list()
-            add_sheet("Stok_Parti", ["id","urun_id","parti_no","skt","uretim_tarih","aciklama"],
-                      [(r["id"], r["urun_id"], r["parti_no"], r["skt"], r["uretim_tarih"], r["aciklama"]) for r in partiler])
-            hareketler = self.db.stok_hareket_list(limit=200000)
-            add_sheet(
-                "Stok_Hareket",
-                ["id","tarih","urun_id","tip","miktar","birim","kaynak_lokasyon_id","hedef_lokasyon_id","parti_id","referans_tipi","referans_id","maliyet","aciklama"],
-                [
-                    (
-                        r["id"],
-                        r["tarih"],
-                        r["urun_id"],
-                        r["tip"],
-                        r["miktar"],
-                        r["birim"],
-                        r["kaynak_lokasyon_id"],
-                        r["hedef_lokasyon_id"],
-                        r["parti_id"],
-                        r["referans_tipi"],
-                        r["referans_id"],
-                        r["maliyet"],
-                        r["aciklama"],
-                    )
-                    for r in hareketler
-                ],
-            )
+            self.db.log("Uygulama", "Kapandı")
         except Exception:
             pass
-
-        ws = wb.create_sheet("Ozet")
-        totals = self.db.kasa_toplam()
-        ws["A1"] = "Kasa Özet"
-        ws["A3"] = "Gelir"
-        ws["B3"] = totals["gelir"]
-        ws["A4"] = "Gider"
-        ws["B4"] = totals["gider"]
-        ws["A5"] = "Net"
-        ws["B5"] = totals["net"]
-
-        base = APP_BASE_DIR
-        out = os.path.join(base, f"kasa_pro_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
-        wb.save(out)
-        self.db.log("Excel Export", out)
-        messagebox.showinfo(APP_TITLE, f"Excel export:\n{out}")
-
-    def on_close(self):
         try:
-            self.db.log("Uygulama", "Kapandı")
+            if hasattr(self, "screen_registry"):
+                self.screen_registry.cancel_prefetch()
+                # Test/benchmark oturumları gerçek kullanım sayılarını bozmasın
+                if not self._test_mode:
+                    update_manifest(usage=dict(self.screen_registry.usage))
         except Exception:
             pass
         try:
@@ -1340,6 +1412,10 @@ class App:
             self.db.close()
         except Exception:
             pass
+        try:
+            self.company_pool.close()
+        except Exception:
+            pass
         try:
             self.usersdb.close()
         except Exception:
@@ -31,6 +31,11 @@ DEFAULT_SHARED_STORAGE_DIRNAME = "shared_storage"
 DEFAULT_MESSAGE_ATTACHMENTS_DIRNAME = "attachments"
 DEFAULT_HR_ATTACHMENTS_DIRNAME = "attachments/hr"
 DEFAULT_MESSAGE_ATTACHMENT_MAX_MB = 10
+# Açık tutulan şirket DB'si sayısı (şirketler arası hızlı geçiş) ve açılışta ön yükleme
+DEFAULT_COMPANY_POOL_SIZE = 3
+DEFAULT_COMPANY_PREWARM = True
+# Açılıştan sonra boşta önceden yüklenecek (en sık açılan) ekran sayısı; 0 = kapalı
+DEFAULT_UI_PREFETCH_SCREENS = 3
 
 DEFAULT_CURRENCIES = ["TL", "USD", "EUR"]
 DEFAULT_PAYMENTS = ["Nakit", "Kredi Kartı", "Havale/EFT", "Çek", "Diğer"]
@@ -78,6 +83,9 @@ SHARED_STORAGE_DIRNAME = _cfg.get("paths", "shared_storage_dir", fallback=DEFAUL
 MESSAGE_ATTACHMENTS_DIRNAME = _cfg.get("paths", "message_attachments_dir", fallback=DEFAULT_MESSAGE_ATTACHMENTS_DIRNAME)
 HR_ATTACHMENTS_DIRNAME = _cfg.get("paths", "hr_attachments_dir", fallback=DEFAULT_HR_ATTACHMENTS_DIRNAME)
 MESSAGE_ATTACHMENT_MAX_MB = _cfg.getint("messages", "attachment_max_mb", fallback=DEFAULT_MESSAGE_ATTACHMENT_MAX_MB)
+COMPANY_POOL_SIZE = max(1, _cfg.getint("db", "company_pool_size", fallback=DEFAULT_COMPANY_POOL_SIZE))
+COMPANY_PREWARM = _cfg.getboolean("db", "company_prewarm", fallback=DEFAULT_COMPANY_PREWARM)
+UI_PREFETCH_SCREENS = max(0, _cfg.getint("ui", "prefetch_screens", fallback=DEFAULT_UI_PREFETCH_SCREENS))
 LOG_DIRNAME = _cfg.get("logging", "log_dir", fallback=DEFAULT_LOG_DIRNAME)
 LOG_LEVEL = _cfg.get("logging", "level", fallback=DEFAULT_LOG_LEVEL)
 
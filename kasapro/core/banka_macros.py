@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 """Banka 'makro' fonksiyonları.
 
-Bu modül, Excel/VBA tarafında kullanılan iki temel ihtiyacı uygulama içine taşır:
+Bu modül, Excel/VBA tarafında kullanılan temel ihtiyaçları uygulama içine taşır:
 
 1) Açıklamaya göre esnek gruplama (benzer açıklamaları yakalayıp etiket önerme)
 2) Banka hareketleri için özet/aylık/günlük/grup-günlük analiz tabloları üretme
+3) Banka çıkışlarında maaş ödemelerini (çalışan adı + tutar) bulma
 
 Uygulama içinde bu fonksiyonlar genellikle 'toblo / tablo' pencerelerinde
 (örn. BankaWorkspaceWindow) bir "eklenti" gibi çalıştırılır.
@@ -12,11 +13,24 @@ Uygulama içinde bu fonksiyonlar genellikle 'toblo / tablo' pencerelerinde
 
 from __future__ import annotations
 
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 import re
 from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
+from .fuzzy import NameMatcher, amount_score, combine_scores
+
+try:  # opsiyonel: büyük analizlerde kolon bazlı toplama
+    import numpy as _np
+except Exception:  # pragma: no cover - numpy kurulu değil
+    _np = None
+
+# Bu satır sayısının altında dizi kurulumu Python döngüsünden pahalı
+_NUMPY_MIN_ROWS = 2000
+
 
 # ==========================================================
 # 1) Açıklama bazlı gruplama
@@ -200,12 +214,14 @@ def build_tag_suggestions(
     split_plus_minus: bool = True,
     progress_cb: Optional[Callable[[str, int, int], None]] = None,
     should_cancel: Optional[Callable[[], bool]] = None,
+    workers: int = 1,
 ) -> Tuple[Dict[int, str], int]:
     """Satır id -> etiket önerisi üretir (kural + öğrenen eşleştirme + fuzzy).
 
     - rules: regex tabanlı kural listesi
     - target_only_empty: True ise sadece ETİKET boş satırlara öneri üretir; mevcut etiketler öğrenme için kullanılır.
     - split_plus_minus: (+)/(-) ayrımı ekler.
+    - workers: fuzzy gruplamada kullanılacak süreç sayısı (bkz. group_rows_by_description).
     """
     compiled = compile_tag_rules(rules or DEFAULT_TAG_RULES)
 
@@ -215,7 +231,7 @@ def build_tag_suggestions(
         t = str(r.get('etiket') or '').strip()
         if not t:
             continue
-        key = normalize_for_grouping(str(r.get('aciklama') or ''))
+        key = _normalize_cached(str(r.get('aciklama') or ''))
         base = _strip_sign_suffix(t)
         if key and base and key not in learned:
             learned[key] = base
@@ -262,7 +278,7 @@ def build_tag_suggestions(
             continue
 
         # öğrenen (exact normalize match)
-        k = normalize_for_grouping(str(r.get('aciklama') or ''))
+        k = _normalize_cached(str(r.get('aciklama') or ''))
         base2 = learned.get(k, '')
         if base2:
             out[rid] = signed(base2, tip)
@@ -277,6 +293,7 @@ def build_tag_suggestions(
             remaining,
             progress_cb=(lambda c, t: progress_cb('Fuzzy Gruplama', c, t) if progress_cb else None),
             should_cancel=should_cancel,
+            workers=workers,
         )
         group_count = len(groups)
         tag_map = suggest_tags_from_groups(groups, split_plus_minus=split_plus_minus)
@@ -321,6 +338,10 @@ def normalize_for_grouping(raw_desc: str) -> str:
     return " ".join(toks)
 
 
+# Ekstrelerde aynı açıklama çok tekrarlanır; normalize sonucu bir kez hesaplanır
+_normalize_cached = lru_cache(maxsize=65536)(normalize_for_grouping)
+
+
 def _bucket_key(norm_desc: str) -> str:
     toks = (norm_desc or "").split()
     if not toks:
@@ -388,28 +409,35 @@ def _levenshtein_distance_limited(s: str, t: str, max_dist: int) -> int:
         return m if m <= max_dist else -1
     if m == 0:
         return n if n <= max_dist else -1
+    if abs(n - m) > max_dist:
+        return -1
 
-    # DP için iki satır
+    # DP için iki satır; yalnızca köşegene max_dist uzaklıktaki hücreler
+    # hesaplanır (dışarıdakiler zaten limitin üstündedir).
+    big = max_dist + 1
     prev = list(range(m + 1))
-    cur = [0] * (m + 1)
-
     for i in range(1, n + 1):
+        lo = i - max_dist if i > max_dist else 1
+        hi = i + max_dist if i + max_dist < m else m
+        cur = [big] * (m + 1)
         cur[0] = i
         # erken çıkış için satır min
-        row_min = cur[0]
+        row_min = i if lo == 1 else big
         sc = s[i - 1]
-        for j in range(1, m + 1):
-            cost = 0 if sc == t[j - 1] else 1
-            cur[j] = min(
-                prev[j] + 1,      # sil
-                cur[j - 1] + 1,   # ekle
-                prev[j - 1] + cost,
-            )
-            if cur[j] < row_min:
-                row_min = cur[j]
+        for j in range(lo, hi + 1):
+            d = prev[j - 1] + (sc != t[j - 1])
+            x = prev[j] + 1       # sil
+            if x < d:
+                d = x
+            x = cur[j - 1] + 1    # ekle
+            if x < d:
+                d = x
+            cur[j] = d
+            if d < row_min:
+                row_min = d
         if row_min > max_dist:
             return -1
-        prev, cur = cur, prev
+        prev = cur
     return prev[m] if prev[m] <= max_dist else -1
 
 
@@ -449,6 +477,198 @@ class GroupResult:
         return len(self.members_plus) + len(self.members_minus)
 
 
+# Bu eşiğin altındaki ağırlıklı Jaccard için Levenshtein hiç hesaplanmaz
+_WJ_MIN = 0.42
+_LEV_THRESHOLD = 0.65
+
+# Süreç havuzu yalnızca bu kadar satırdan sonra açılır (başlatma maliyeti)
+_PARALLEL_MIN_ROWS = 5000
+_PARALLEL_CHUNK_ROWS = 2000
+
+# (satır sırası, id, Giriş mi, normalize açıklama, ham açıklama)
+_GroupItem = Tuple[int, int, bool, str, str]
+# (ilk satır sırası, başlık, + üyeler, - üyeler)
+_GroupOut = Tuple[int, str, List[int], List[int]]
+
+
+def _token_weights(norm_desc: str) -> Tuple[Dict[str, float], float]:
+    weights = {tok: _token_weight(tok) for tok in norm_desc.split()}
+    return weights, sum(weights.values())
+
+
+class _BucketIndex:
+    """Bir kovadaki grup temsilcileri için aday üretici (ters indeks).
+
+    Kovadaki tüm temsilciler kova anahtarı token'larını paylaşır. Ağırlıklı
+    Jaccard _WJ_MIN'i geçebilecek temsilciler ya kova dışı bir token daha
+    paylaşır (ters indeks) ya da toplam ağırlığı yeterince küçüktür (ağırlık
+    indeksi). Diğerleri skorlanmaz; sonuç tam taramayla aynıdır.
+    """
+
+    def __init__(self, bkey: str):
+        self.base = set(bkey.split())
+        self.base_weight = sum(_token_weight(t) for t in self.base)
+        self.reps: List[Tuple[str, Dict[str, float], float]] = []
+        self.chars: List[Counter] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.by_weight: Dict[float, List[int]] = {}
+
+    def add(self, norm_desc: str) -> int:
+        pos = len(self.reps)
+        weights, total = _token_weights(norm_desc)
+        self.reps.append((norm_desc, weights, total))
+        self.chars.append(Counter(norm_desc))
+        for tok in weights:
+            if tok not in self.base:
+                self.postings.setdefault(tok, []).append(pos)
+        self.by_weight.setdefault(total, []).append(pos)
+        return pos
+
+    def candidates(self, weights: Dict[str, float], total: float) -> List[int]:
+        if total <= 0:
+            return []
+        found = set()
+        for tok in weights:
+            if tok not in self.base:
+                found.update(self.postings.get(tok, ()))
+        # Yalnızca kova token'larını paylaşanlar: Wk / (Wa + Wb - Wk) >= eşik
+        wk = self.base_weight
+        limit = wk / _WJ_MIN + wk - total + 1e-9
+        for w, positions in self.by_weight.items():
+            if w <= limit:
+                found.update(positions)
+        return sorted(found)
+
+    def score(self, pos: int, norm_desc: str, weights: Dict[str, float], total: float, chars: Counter) -> float:
+        rep, rweights, rtotal = self.reps[pos]
+        if total <= 0 or rtotal <= 0:
+            return 0.0
+        small, big = (weights, rweights) if len(weights) <= len(rweights) else (rweights, weights)
+        inter = 0.0
+        for tok, w in small.items():
+            if tok in big:
+                inter += w
+        wj = inter / (total + rtotal - inter)
+        if wj < _WJ_MIN:
+            return 0.0
+        # Karakter torbası farkı Levenshtein mesafesinin alt sınırıdır: benzerlik
+        # limitin altında kalacaksa ya da wj'yi geçemeyecekse hesaplanmaz
+        max_len = max(len(norm_desc), len(rep))
+        if not max_len:
+            return wj
+        rchars = self.chars[pos]
+        bag = max(sum((chars - rchars).values()), sum((rchars - chars).values()))
+        if bag > int(((1.0 - _LEV_THRESHOLD) * max_len) + 0.999999) or wj >= 1.0 - bag / max_len:
+            return wj
+        lev = similarity_levenshtein_limited(norm_desc, rep, threshold=_LEV_THRESHOLD)
+        return wj if wj > lev else lev
+
+
+def _cluster_bucket(
+    bkey: str,
+    items: Sequence[_GroupItem],
+    strong_threshold: float,
+    weak_threshold: float,
+    tick: Optional[Callable[[], None]] = None,
+) -> List[_GroupOut]:
+    """Tek bir kovayı gruplar (kovalar birbirinden bağımsızdır)."""
+    index = _BucketIndex(bkey)
+    out: List[_GroupOut] = []
+    min_thr = min(strong_threshold, weak_threshold)
+    # normalize açıklama -> (skorlandığı andaki temsilci sayısı, [(temsilci, skor)])
+    scored: Dict[str, Tuple[int, List[Tuple[int, float]]]] = {}
+
+    for idx, rid, is_plus, nd, raw in items:
+        if tick:
+            tick()
+        cached = scored.get(nd)
+        if cached is None:
+            weights, total = _token_weights(nd)
+            sims: List[Tuple[int, float]] = []
+            new_positions: Sequence[int] = index.candidates(weights, total)
+        else:
+            sims = cached[1]
+            new_positions = range(cached[0], len(index.reps))
+            if new_positions:
+                weights, total = _token_weights(nd)
+        if new_positions:
+            sims = list(sims)
+            chars = Counter(nd)
+            for pos in new_positions:
+                sim = index.score(pos, nd, weights, total, chars)
+                if sim >= min_thr:
+                    sims.append((pos, sim))
+        scored[nd] = (len(index.reps), sims)
+
+        best: Optional[int] = None
+        best_sim = 0.0
+        for pos, sim in sims:
+            _, _, plus, minus = out[pos]
+            thr = strong_threshold if len(plus) + len(minus) > 1 else weak_threshold
+            if sim >= thr and sim > best_sim:
+                best_sim = sim
+                best = pos
+
+        if best is None:
+            best = index.add(nd)
+            out.append((idx, clean_short_title(raw, max_len=30), [], []))
+        (out[best][2] if is_plus else out[best][3]).append(rid)
+    return out
+
+
+def _cluster_chunk(
+    buckets: Sequence[Tuple[str, Sequence[_GroupItem]]], strong_threshold: float, weak_threshold: float
+) -> List[_GroupOut]:
+    out: List[_GroupOut] = []
+    for bkey, items in buckets:
+        out.extend(_cluster_bucket(bkey, items, strong_threshold, weak_threshold))
+    return out
+
+
+def _cluster_parallel(
+    buckets: Dict[str, List[_GroupItem]],
+    strong_threshold: float,
+    weak_threshold: float,
+    workers: int,
+    total: int,
+    progress_cb: Optional[Callable[[int, int], None]],
+    should_cancel: Optional[Callable[[], bool]],
+) -> List[_GroupOut]:
+    # Büyük kovalar önce; küçükler ~_PARALLEL_CHUNK_ROWS satırlık paketlerde
+    chunks: List[List[Tuple[str, List[_GroupItem]]]] = []
+    current: List[Tuple[str, List[_GroupItem]]] = []
+    size = 0
+    for bkey, items in sorted(buckets.items(), key=lambda kv: -len(kv[1])):
+        current.append((bkey, items))
+        size += len(items)
+        if size >= _PARALLEL_CHUNK_ROWS:
+            chunks.append(current)
+            current, size = [], 0
+    if current:
+        chunks.append(current)
+
+    out: List[_GroupOut] = []
+    done_rows = 0
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = {
+            pool.submit(_cluster_chunk, chunk, strong_threshold, weak_threshold): sum(len(i) for _, i in chunk)
+            for chunk in chunks
+        }
+        while pending:
+            if should_cancel and should_cancel():
+                raise RuntimeError('İşlem iptal edildi.')
+            finished, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                done_rows += pending.pop(fut)
+                out.extend(fut.result())
+                if progress_cb:
+                    progress_cb(done_rows, total)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return out
+
+
 def group_rows_by_description(
     rows: Sequence[Dict[str, object]],
     *,
@@ -456,6 +676,7 @@ def group_rows_by_description(
     weak_threshold: float = 0.60,
     progress_cb: Optional[Callable[[int, int], None]] = None,
     should_cancel: Optional[Callable[[], bool]] = None,
+    workers: int = 1,
 ) -> List[GroupResult]:
     """Benzer açıklamalara göre satırları gruplar.
 
@@ -464,74 +685,47 @@ def group_rows_by_description(
       - aciklama (str)
       - tip (str)  -> 'Giriş' / 'Çıkış' (plus/minus ayrımı için)
 
+    Satırlar kova anahtarına (ilk iki token) göre ayrılır; her satır yalnızca
+    kendi kovasındaki, ters indeksin önerdiği temsilcilerle karşılaştırılır.
+    workers > 1 ve satır sayısı yeterliyse kovalar süreç havuzunda paralel
+    gruplanır; sonuç sıralı çalışmayla aynıdır.
+
     Çıktı: grup listesi (büyükten küçüğe).
     """
 
-    # Hazırlık
-    norm: List[str] = []
-    bucket: List[str] = []
-    for r in rows:
-        nd = normalize_for_grouping(str(r.get("aciklama") or ""))
-        norm.append(nd)
-        bucket.append(_bucket_key(nd))
-
-    # Gruplar
-    rep_norm: List[str] = []
-    rep_title: List[str] = []
-    members_plus: List[List[int]] = []
-    members_minus: List[List[int]] = []
-    bucket_to_gids: Dict[str, List[int]] = {}
-
+    buckets: Dict[str, List[_GroupItem]] = {}
     for idx, r in enumerate(rows):
-        if should_cancel and should_cancel():
-            raise RuntimeError('İşlem iptal edildi.')
-        if progress_cb and (idx % 50 == 0 or idx == len(rows) - 1):
-            progress_cb(idx + 1, len(rows))
-
         rid = _as_int(r.get("id"), 0)
         if rid == 0:
             continue
-        tip = str(r.get("tip") or "")
-        is_plus = (tip == "Giriş")
-        nd = norm[idx]
-        bkey = bucket[idx]
-
-        candidates = bucket_to_gids.get(bkey, [])
-
-        best_gid: Optional[int] = None
-        best_sim: float = 0.0
-        for gid in candidates:
-            # hızlı filtre: wj düşükse boşuna lev hesaplama
-            wj = weighted_jaccard_sim(nd, rep_norm[gid])
-            if wj < 0.42:
-                continue
-            lev = similarity_levenshtein_limited(nd, rep_norm[gid], threshold=0.65)
-            sim = wj if wj > lev else lev
-
-            gsize = len(members_plus[gid]) + len(members_minus[gid])
-            thr = strong_threshold if gsize > 1 else weak_threshold
-            if sim >= thr and sim > best_sim:
-                best_sim = sim
-                best_gid = gid
-
-        if best_gid is None:
-            # yeni grup
-            gid = len(rep_norm)
-            rep_norm.append(nd)
-            rep_title.append(clean_short_title(str(r.get("aciklama") or ""), max_len=30))
-            members_plus.append([])
-            members_minus.append([])
-            bucket_to_gids.setdefault(bkey, []).append(gid)
-            best_gid = gid
-
-        if is_plus:
-            members_plus[best_gid].append(rid)
-        else:
-            members_minus[best_gid].append(rid)
-
-    groups: List[GroupResult] = []
-    for gid in range(len(rep_norm)):
-        groups.append(GroupResult(title=rep_title[gid], members_plus=members_plus[gid], members_minus=members_minus[gid]))
+        raw = str(r.get("aciklama") or "")
+        nd = _normalize_cached(raw)
+        item = (idx, rid, str(r.get("tip") or "") == "Giriş", nd, raw)
+        buckets.setdefault(_bucket_key(nd), []).append(item)
+    total = sum(len(items) for items in buckets.values())
+
+    if workers > 1 and total >= _PARALLEL_MIN_ROWS and len(buckets) > 1:
+        found = _cluster_parallel(
+            buckets, strong_threshold, weak_threshold, workers, total, progress_cb, should_cancel
+        )
+    else:
+        done = 0
+
+        def tick() -> None:
+            nonlocal done
+            if should_cancel and should_cancel():
+                raise RuntimeError('İşlem iptal edildi.')
+            done += 1
+            if progress_cb and (done % 50 == 0 or done == total):
+                progress_cb(done, total)
+
+        found = []
+        for bkey, items in buckets.items():
+            found.extend(_cluster_bucket(bkey, items, strong_threshold, weak_threshold, tick))
+
+    # Grup sırası: ilk satır sırası (eşit boyutlu grupların sırası sabit kalsın)
+    found.sort(key=lambda g: g[0])
+    groups = [GroupResult(title=title, members_plus=plus, members_minus=minus) for _, title, plus, minus in found]
     groups.sort(key=lambda g: (-g.size, g.title.lower()))
     return groups
 
@@ -611,23 +805,38 @@ def _parse_iso_date(s: str) -> Optional[datetime]:
     return None
 
 
-def compute_bank_analysis(
-    rows: Sequence[Dict[str, object]],
-    *,
-    group_field: str = "etiket",
-    type_field: str = "banka",
-) -> Dict[str, List[SummaryRow]]:
-    """Bankaya ait analiz tablolarını üretir.
+def _parse_amount(raw_amt: object) -> float:
+    # tutar DB'de +, yön tip'te. UI'de formatlı gelebilir (1.234,56).
+    if isinstance(raw_amt, str):
+        try:
+            amt = float(raw_amt)
+        except Exception:
+            try:
+                amt = float(raw_amt.replace(".", "").replace(",", "."))
+            except Exception:
+                amt = 0.0
+    else:
+        amt = _as_float(raw_amt, 0.0)
+    return abs(amt)
 
-    group_field: grup bazlı özetin hangi alandan yapılacağı (etiket/banka/hesap/belge/...)
-    type_field : 'İşlem Tipi Analizi' tablosu için hangi alanın kullanılacağı
-    """
 
-    by_group: Dict[str, SummaryRow] = {}
-    by_type: Dict[str, SummaryRow] = {}
-    by_month: Dict[str, SummaryRow] = {}
-    by_day: Dict[str, SummaryRow] = {}
-    by_group_day: Dict[str, SummaryRow] = {}
+@dataclass
+class _BankColumns:
+    """Analize girecek satırların kolon hali (satır başına tek geçiş)."""
+
+    days: List[int]        # tarih ordinal'i (date.toordinal)
+    signed: List[float]    # Giriş +, diğerleri -
+    groups: List[int]      # group_keys indeksi
+    types: List[int]       # type_keys indeksi
+    group_keys: List[str]
+    type_keys: List[str]
+
+
+def _bank_columns(rows: Sequence[Dict[str, object]], group_field: str, type_field: str) -> _BankColumns:
+    cols = _BankColumns([], [], [], [], [], [])
+    date_cache: Dict[str, Optional[int]] = {}
+    gcodes: Dict[str, int] = {}
+    tcodes: Dict[str, int] = {}
 
     for r in rows:
         try:
@@ -637,63 +846,237 @@ def compute_bank_analysis(
         except Exception:
             continue
 
-        tip = str(r.get("tip") or "")
-        # tutar DB'de +, yön tip'te. UI'de formatlı gelebilir; float parse eden taraf çağırmalı.
-        raw_amt = r.get("tutar")
-        if isinstance(raw_amt, str):
-            try:
-                amt = float(raw_amt)
-            except Exception:
-                try:
-                    amt = float(raw_amt.replace(".", "").replace(",", "."))
-                except Exception:
-                    amt = 0.0
+        # Aynı tarih metni binlerce satırda tekrarlanır; bir kez parse edilir
+        raw_date = str(r.get("tarih") or "")
+        if raw_date in date_cache:
+            od = date_cache[raw_date]
         else:
-            amt = _as_float(raw_amt, 0.0)
-        amt = abs(amt)
-        signed = amt if tip == "Giriş" else -amt
-        pos = amt if signed > 0 else 0.0
-        neg = signed if signed < 0 else 0.0
+            dt = _parse_iso_date(raw_date)
+            od = date_cache[raw_date] = dt.toordinal() if dt else None
+        if od is None:
+            continue
 
+        amt = _parse_amount(r.get("tutar"))
         gkey = str(r.get(group_field) or "").strip() or "(Grupsuz)"
         tkey = str(r.get(type_field) or "").strip() or "(Boş)"
 
-        dt = _parse_iso_date(str(r.get("tarih") or ""))
-        if not dt:
+        cols.days.append(od)
+        cols.signed.append(amt if str(r.get("tip") or "") == "Giriş" else -amt)
+        cols.groups.append(gcodes.setdefault(gkey, len(gcodes)))
+        cols.types.append(tcodes.setdefault(tkey, len(tcodes)))
+
+    cols.group_keys = list(gcodes)
+    cols.type_keys = list(tcodes)
+    return cols
+
+
+# (pos, neg, net, count, max_pos, min_neg) - kod başına listeler
+_Agg = Tuple[List[float], List[float], List[float], List[int], List[float], List[float]]
+
+
+def _aggregate_py(codes: Sequence[int], signed: Sequence[float], n: int) -> _Agg:
+    pos = [0.0] * n
+    neg = [0.0] * n
+    net = [0.0] * n
+    cnt = [0] * n
+    max_pos = [0.0] * n
+    min_neg = [0.0] * n
+    for c, v in zip(codes, signed):
+        net[c] += v
+        cnt[c] += 1
+        if v > 0:
+            pos[c] += v
+            if v > max_pos[c]:
+                max_pos[c] = v
+        elif v < 0:
+            neg[c] += v
+            if v < min_neg[c]:
+                min_neg[c] = v
+    return pos, neg, net, cnt, max_pos, min_neg
+
+
+def _aggregate_np(codes, signed, pos, neg, n: int) -> _Agg:
+    # bincount ağırlıkları satır sırasıyla toplar: sonuç Python döngüsüyle birebir aynı
+    max_pos = _np.zeros(n)
+    min_neg = _np.zeros(n)
+    _np.maximum.at(max_pos, codes, pos)
+    _np.minimum.at(min_neg, codes, neg)
+    return (
+        _np.bincount(codes, weights=pos, minlength=n).tolist(),
+        _np.bincount(codes, weights=neg, minlength=n).tolist(),
+        _np.bincount(codes, weights=signed, minlength=n).tolist(),
+        _np.bincount(codes, minlength=n).tolist(),
+        max_pos.tolist(),
+        min_neg.tolist(),
+    )
+
+
+def _summary_rows(keys: Sequence[str], agg: _Agg) -> List[SummaryRow]:
+    out: List[SummaryRow] = []
+    for key, p, ng, nt, c, mx, mn in zip(keys, *agg):
+        if not c:
             continue
-        mkey = dt.strftime("%Y-%m")
-        dkey = dt.strftime("%Y-%m-%d")
-        gdkey = f"{gkey}|{dt.strftime('%Y%m%d')}"
-
-        def upd(d: Dict[str, SummaryRow], key: str):
-            if key not in d:
-                d[key] = SummaryRow(key=key, pos=0.0, neg=0.0, net=0.0, count=0, max_pos=0.0, min_neg=0.0)
-            s = d[key]
-            s.pos += pos
-            s.neg += neg
-            s.net += signed
-            s.count += 1
-            if pos > 0 and pos > s.max_pos:
-                s.max_pos = pos
-            if neg < 0 and (s.min_neg == 0.0 or neg < s.min_neg):
-                s.min_neg = neg
-
-        upd(by_group, gkey)
-        upd(by_type, tkey)
-        upd(by_month, mkey)
-        upd(by_day, dkey)
-        upd(by_group_day, gdkey)
-
-    # Ortalama
-    for d in (by_group, by_type, by_month, by_day, by_group_day):
-        for s in d.values():
-            s.avg = (s.net / s.count) if s.count else 0.0
-
-    out = {
-        "groups": sorted(by_group.values(), key=lambda s: (-s.count, s.key.lower())),
-        "types": sorted(by_type.values(), key=lambda s: (-abs(s.net), s.key.lower())),
-        "months": sorted(by_month.values(), key=lambda s: s.key),
-        "days": sorted(by_day.values(), key=lambda s: s.key),
-        "group_days": sorted(by_group_day.values(), key=lambda s: (s.key.split("|", 1)[0].lower(), s.key.split("|", 1)[1])),
-    }
+        out.append(SummaryRow(key=key, pos=p, neg=ng, net=nt, count=int(c), avg=nt / c, max_pos=mx, min_neg=mn))
     return out
+
+
+def _day_keys(ordinals: Sequence[int]) -> Tuple[List[str], List[str], List[int]]:
+    """Benzersiz gün ordinal'leri -> (gün anahtarları, ay anahtarları, gün->ay kodu)."""
+    day_keys: List[str] = []
+    month_codes: Dict[str, int] = {}
+    day_month: List[int] = []
+    for od in ordinals:
+        d = date.fromordinal(int(od))
+        day_keys.append(d.strftime("%Y-%m-%d"))
+        day_month.append(month_codes.setdefault(d.strftime("%Y-%m"), len(month_codes)))
+    return day_keys, list(month_codes), day_month
+
+
+def _analysis_tables_py(cols: _BankColumns) -> Dict[str, List[SummaryRow]]:
+    dcodes: Dict[int, int] = {}
+    gdcodes: Dict[Tuple[int, int], int] = {}
+    day_codes = [dcodes.setdefault(od, len(dcodes)) for od in cols.days]
+    gd_codes = [gdcodes.setdefault((g, d), len(gdcodes)) for g, d in zip(cols.groups, day_codes)]
+    day_keys, month_keys, day_month = _day_keys(list(dcodes))
+    month_codes = [day_month[d] for d in day_codes]
+
+    s = cols.signed
+    return {
+        "groups": _summary_rows(cols.group_keys, _aggregate_py(cols.groups, s, len(cols.group_keys))),
+        "types": _summary_rows(cols.type_keys, _aggregate_py(cols.types, s, len(cols.type_keys))),
+        "months": _summary_rows(month_keys, _aggregate_py(month_codes, s, len(month_keys))),
+        "days": _summary_rows(day_keys, _aggregate_py(day_codes, s, len(day_keys))),
+        "group_days": _summary_rows(
+            [f"{cols.group_keys[g]}|{day_keys[d].replace('-', '')}" for g, d in gdcodes],
+            _aggregate_py(gd_codes, s, len(gdcodes)),
+        ),
+    }
+
+
+def _analysis_tables_np(cols: _BankColumns) -> Dict[str, List[SummaryRow]]:
+    signed = _np.asarray(cols.signed, dtype=_np.float64)
+    pos = _np.where(signed > 0, signed, 0.0)
+    neg = _np.where(signed < 0, signed, 0.0)
+    groups = _np.asarray(cols.groups, dtype=_np.int64)
+    types = _np.asarray(cols.types, dtype=_np.int64)
+
+    uniq_days, day_codes = _np.unique(_np.asarray(cols.days, dtype=_np.int64), return_inverse=True)
+    day_codes = day_codes.reshape(-1)
+    day_keys, month_keys, day_month = _day_keys(uniq_days.tolist())
+    month_codes = _np.asarray(day_month, dtype=_np.int64)[day_codes]
+    uniq_gd, gd_first, gd_codes = _np.unique(
+        groups * len(day_keys) + day_codes, return_index=True, return_inverse=True
+    )
+    gd_codes = gd_codes.reshape(-1)
+
+    def agg(codes, n: int) -> _Agg:
+        return _aggregate_np(codes, signed, pos, neg, n)
+
+    ndays = len(day_keys)
+    group_days = _summary_rows(
+        [f"{cols.group_keys[c // ndays]}|{day_keys[c % ndays].replace('-', '')}" for c in uniq_gd.tolist()],
+        agg(gd_codes, len(uniq_gd)),
+    )
+    # Sıralamadaki eşitlikler (büyük/küçük harf farkı) ilk görülme sırasını korusun
+    return {
+        "groups": _summary_rows(cols.group_keys, agg(groups, len(cols.group_keys))),
+        "types": _summary_rows(cols.type_keys, agg(types, len(cols.type_keys))),
+        "months": _summary_rows(month_keys, agg(month_codes, len(month_keys))),
+        "days": _summary_rows(day_keys, agg(day_codes, ndays)),
+        "group_days": [group_days[i] for i in _np.argsort(gd_first, kind="stable").tolist()],
+    }
+
+
+def compute_bank_analysis(
+    rows: Sequence[Dict[str, object]],
+    *,
+    group_field: str = "etiket",
+    type_field: str = "banka",
+    use_numpy: Optional[bool] = None,
+) -> Dict[str, List[SummaryRow]]:
+    """Bankaya ait analiz tablolarını üretir.
+
+    group_field: grup bazlı özetin hangi alandan yapılacağı (etiket/banka/hesap/belge/...)
+    type_field : 'İşlem Tipi Analizi' tablosu için hangi alanın kullanılacağı
+    use_numpy  : None -> NumPy kuruluysa ve satır sayısı yeterliyse kullanılır.
+
+    Satırlar bir kez kolonlara (gün ordinal'i, işaretli tutar, grup/tip kodu)
+    çevrilir; beş tablo bu kolonlardan kod bazlı toplanır. NumPy yolu ile saf
+    Python yolu aynı sonucu üretir.
+    """
+
+    cols = _bank_columns(rows, group_field, type_field)
+    if use_numpy is None:
+        use_numpy = len(cols.days) >= _NUMPY_MIN_ROWS
+    if use_numpy and _np is not None and cols.days:
+        data = _analysis_tables_np(cols)
+    else:
+        data = _analysis_tables_py(cols)
+
+    return {
+        "groups": sorted(data["groups"], key=lambda s: (-s.count, s.key.lower())),
+        "types": sorted(data["types"], key=lambda s: (-abs(s.net), s.key.lower())),
+        "months": sorted(data["months"], key=lambda s: s.key),
+        "days": sorted(data["days"], key=lambda s: s.key),
+        "group_days": sorted(data["group_days"], key=lambda s: (s.key.split("|", 1)[0].lower(), s.key.split("|", 1)[1])),
+    }
+
+
+# ==========================================================
+# 3) Maaş ödemesi tespiti (çalışan adı + tutar)
+# ==========================================================
+
+SALARY_HIT = 0.78
+SALARY_STRONG = 0.87
+_SALARY_NAME_MIN = 0.55
+_SALARY_W_NAME = 0.80
+_SALARY_W_AMT = 0.20
+
+
+class SalaryMatcher:
+    """Banka çıkışlarında çalışan adlarını ve maaş tutarını arar.
+
+    employees: (ad, aylık tutar) listesi. İsimler bir kez hazırlanır
+    (bkz. NameMatcher); yalnızca SALARY_HIT'e ulaşabilecek isimler skorlanır.
+    Tek bir thread içinde kullanılmalıdır.
+    """
+
+    def __init__(self, employees: Sequence[Tuple[str, float]]):
+        self.employees = [(str(name), float(expected or 0.0)) for name, expected in employees]
+        # Tutar skoru en fazla 1 olduğundan bu isim skorunun altı eşiğe ulaşamaz
+        reachable = min(SALARY_HIT, (SALARY_HIT - _SALARY_W_AMT) / _SALARY_W_NAME)
+        self._names = NameMatcher(
+            [name for name, _ in self.employees],
+            min_score=max(_SALARY_NAME_MIN, reachable - 1e-9),
+        )
+
+    def match(self, tip: str, aciklama: str, tutar: float) -> Optional[Tuple[str, float]]:
+        """Uygun olmayan satır (giriş / boş açıklama) için None.
+
+        Aksi halde (ad, skor); skor SALARY_HIT altındaysa ad boştur.
+        """
+        tip_u = str(tip or "").upper()
+        if "CIK" not in tip_u and "ÇIK" not in tip_u:
+            return None
+        if not str(aciklama or "").strip():
+            return None
+
+        tutar = abs(float(tutar or 0.0))
+        best_score = 0.0
+        best_name = ""
+        for idx, name_sc in self._names.scores(aciklama):
+            ename, expected = self.employees[idx]
+            if expected > 0:
+                a_sc = amount_score(tutar, expected, abs_tol=5.0, pct_tol=0.15)
+                if a_sc > 0:
+                    score = combine_scores(name_sc, a_sc, w_name=_SALARY_W_NAME, w_amt=_SALARY_W_AMT)
+                else:
+                    score = name_sc * 0.90
+            else:
+                score = name_sc
+            if score > best_score:
+                best_score = score
+                best_name = ename
+        if best_score < SALARY_HIT:
+            return "", best_score
+        return best_name, best_score
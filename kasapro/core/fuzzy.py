@@ -14,8 +14,9 @@ from __future__ import annotations
 
 import difflib
 import re
+from collections import Counter, OrderedDict
 from dataclasses import dataclass
-from typing import Sequence
+from typing import Dict, List, Sequence, Tuple
 
 
 _TR_MAP = str.maketrans(
@@ -45,6 +46,18 @@ def tr_normalize(s: str) -> str:
     return (s or "").translate(_TR_MAP).lower()
 
 
+def tr_normalize_sql(expr: str) -> str:
+    """tr_normalize ile aynı dönüşümü yapan SQLite ifadesi üretir.
+
+    Trigger'lar Python fonksiyonu çağıramadığı için (her bağlantıda kayıt
+    gerekir) FTS indeksi bu saf SQL karşılığıyla beslenir.
+    """
+    out = str(expr)
+    for src, dst in sorted(_TR_MAP.items()):
+        out = f"replace({out},'{chr(src)}','{dst}')"
+    return f"lower({out})"
+
+
 def normalize_text(s: str) -> str:
     """Karşılaştırma için metni normalize eder."""
     t = tr_normalize(s)
@@ -169,3 +182,170 @@ def combine3_scores(a: float, b: float, c: float, *, w_a: float = 0.5, w_b: floa
     if tot <= 0:
         return a
     return (a * w_a + b * w_b + c * w_c) / tot
+
+
+def _trigrams(tokens: Sequence[str]) -> set:
+    grams = set()
+    for tok in tokens:
+        p = f" {tok} "
+        for i in range(len(p) - 2):
+            grams.add(p[i : i + 3])
+    return grams
+
+
+class NameMatcher:
+    """Sabit bir isim listesini çok sayıda metinde arar.
+
+    `best_substring_similarity(name, text)` ile aynı skoru üretir; ancak
+    isimler bir kez normalize edilir, metin parçaları için SequenceMatcher
+    nesneleri isimler arasında paylaşılır ve aynı metin tekrar skorlanmaz.
+
+    min_score > 0 ise:
+      - metinle hiç trigram paylaşmayan isimler skorlanmaz (aday ön elemesi),
+      - uzunluk / karakter sayısı sınırıyla min_score altında kalacağı kesin
+        olan parçalar için SequenceMatcher çalıştırılmaz.
+    Bu durumda yalnızca skoru min_score ve üzeri olan isimler döner.
+
+    Thread-safe değildir; tek bir worker thread içinde kullanılmalıdır.
+    """
+
+    def __init__(self, names: Sequence[str], *, min_score: float = 0.0, cache_size: int = 4096):
+        self.names = [normalize_text(n) for n in names]
+        self.min_score = float(min_score)
+        # 1.0'a yuvarlama kısayolu (>= 0.995) taban tarafından gizlenmesin
+        self._floor = min(self.min_score, 0.995)
+        self._tokens = [n.split() for n in self.names]
+        self._token_sets = [set(t) for t in self._tokens]
+        self._counts = [list(Counter(n).items()) for n in self.names]
+        self._always: List[int] = []
+        self._index: Dict[str, List[int]] = {}
+        for i, toks in enumerate(self._tokens):
+            # 1 harfli token'lar trigram üretmez; bu isimler her zaman aday
+            if self.min_score <= 0 or any(len(t) < 2 for t in toks):
+                self._always.append(i)
+                continue
+            for g in _trigrams(toks):
+                self._index.setdefault(g, []).append(i)
+        self._cache: "OrderedDict[str, List[Tuple[int, float]]]" = OrderedDict()
+        self._cache_size = max(0, int(cache_size))
+        # parça -> {isim sırası: oran (taban altındaysa 0.0)}; ekstrelerde parçalar çok tekrarlanır
+        self._chunk_scores: Dict[str, Dict[int, float]] = {}
+
+    def scores(self, text: str) -> List[Tuple[int, float]]:
+        """(isim sırası, skor) listesi; isim sırasına göre."""
+        h = normalize_text(text)
+        cached = self._cache.get(h)
+        if cached is not None:
+            self._cache.move_to_end(h)
+            return cached
+
+        out: List[Tuple[int, float]] = []
+        if h:
+            h_tokens = h.split()
+            candidates = set(self._always)
+            for g in _trigrams(h_tokens):
+                candidates.update(self._index.get(g, ()))
+            ctx = _TextContext(h, h_tokens)
+            for i in sorted(candidates):
+                sc = self._score(i, ctx)
+                if sc >= self.min_score:
+                    out.append((i, sc))
+        elif self.min_score <= 0:
+            out = [(i, 0.0) for i in range(len(self.names))]
+
+        if self._cache_size:
+            self._cache[h] = out
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return out
+
+    def _score(self, i: int, ctx: "_TextContext") -> float:
+        # best_substring_similarity ile aynı akış
+        n = self.names[i]
+        h = ctx.text
+        if not n:
+            return 0.0
+        if n in h:
+            return 1.0
+        n_tokens = self._tokens[i]
+        h_tokens = ctx.tokens
+        n_set = self._token_sets[i]
+        overlap = len(n_set & ctx.token_set) / max(1, len(n_set))
+
+        la = len(n)
+        floor = self._floor
+        lens = sorted({max(1, len(n_tokens) - 1), len(n_tokens), len(n_tokens) + 1})
+        best = 0.0
+        for L in lens:
+            if len(h_tokens) < L:
+                best = max(best, self._ratio(i, h, ctx))
+                continue
+            for chunk in ctx.chunks(L):
+                lb = len(chunk)
+                # real_quick_ratio sınırı: uzunluk farkı büyükse oran tabana ulaşamaz
+                if 2.0 * (la if la < lb else lb) / (la + lb) < floor:
+                    continue
+                r = self._ratio(i, chunk, ctx)
+                if r > best:
+                    best = r
+                    if best >= 0.995:
+                        return 1.0
+        return float(max(best, overlap))
+
+    def _ratio(self, i: int, chunk: str, ctx: "_TextContext") -> float:
+        scores = self._chunk_scores.get(chunk)
+        if scores is None:
+            if len(self._chunk_scores) >= 50000:
+                self._chunk_scores.clear()
+            scores = self._chunk_scores[chunk] = {}
+        r = scores.get(i)
+        if r is None:
+            r = scores[i] = ctx.ratio(self.names[i], self._counts[i], chunk, self._floor)
+        return r
+
+
+class _TextContext:
+    """Tek bir metin için parça listeleri ve SequenceMatcher önbelleği."""
+
+    def __init__(self, text: str, tokens: List[str]):
+        self.text = text
+        self.tokens = tokens
+        self.token_set = set(tokens)
+        self._chunks: Dict[int, List[str]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._matchers: Dict[str, difflib.SequenceMatcher] = {}
+
+    def chunks(self, L: int) -> List[str]:
+        out = self._chunks.get(L)
+        if out is None:
+            toks = self.tokens
+            out = self._chunks[L] = [" ".join(toks[i : i + L]) for i in range(0, len(toks) - L + 1)]
+        return out
+
+    def ratio(self, a: str, a_counts: List[Tuple[str, int]], b: str, at_least: float) -> float:
+        """similarity(a, b); sonucun at_least altında kalacağı kesinse 0.0."""
+        if a == b:
+            return 1.0
+        la = len(a)
+        lb = len(b)
+        if at_least > 0:
+            # SequenceMatcher.real_quick_ratio / quick_ratio ile aynı üst sınırlar
+            if 2.0 * (la if la < lb else lb) / (la + lb) < at_least:
+                return 0.0
+            b_counts = self._counts.get(b)
+            if b_counts is None:
+                b_counts = self._counts[b] = Counter(b)
+            inter = 0
+            for ch, cnt in a_counts:
+                x = b_counts.get(ch)
+                if x:
+                    inter += cnt if cnt < x else x
+            if 2.0 * inter / (la + lb) < at_least:
+                return 0.0
+        sm = self._matchers.get(b)
+        if sm is None:
+            # b tarafı (b2j) parça başına bir kez hazırlanır
+            sm = self._matchers[b] = difflib.SequenceMatcher(None, a, b)
+        else:
+            sm.set_seq1(a)
+        return float(sm.ratio())
@@ -7,10 +7,11 @@ Bu sınıf UI tarafından kullanılıyor. İçeride repository'lere delegasyon y
 from __future__ import annotations
 
 import sqlite3
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 
 from .connection import connect
-from .schema import init_schema, migrate_schema, seed_defaults
+from .paging import DEFAULT_CHUNK_SIZE, DEFAULT_PAGE_SIZE, PageCursor
+from .schema import ensure_schema
 from ..modules.invoice.repo import AdvancedInvoiceRepo
 from ..modules.hakedis.repo import HakedisRepo
 from .repos import (
@@ -31,30 +32,32 @@ from .repos import (
     SatisSiparisRepo,
     MessagesRepo,
     HRRepo,
+    SequenceRepo,
 )
 from .repos.dms_repo import DmsRepo
+from .repos.notes_reminders_repo import NotesRemindersRepo
+from .repos.wms_repo import WMSRepo
 
 
 
 class DB:
-    def __init__(self, path: str):
+    def __init__(self, path: str, *, repair_schema: bool = False):
         self.path = path
         self.conn = connect(path)
 
-        # Önce tablolar, sonra migrasyon + seed
-        init_schema(self.conn)
-
-        # Repo'lar (log_fn -> logs tablosu hazır)
+        # Repo'lar (log_fn -> logs tablosu şema geçişinden sonra hazır olur)
         self.logs = LogsRepo(self.conn)
-        self.settings = SettingsRepo(self.conn, log_fn=self.logs.log)
+        self.sequences = SequenceRepo(self.conn)
+        self.settings = SettingsRepo(self.conn, log_fn=self.logs.log, sequences=self.sequences)
         self.users = UsersRepo(self.conn)
         self.cariler = CarilerRepo(self.conn)
         self.cari_hareket = CariHareketRepo(self.conn)
+        self.cari_balance = self.cari_hareket.balance
         self.kasa = KasaRepo(self.conn)
         self.search = SearchRepo(self.conn)
         self.maas = MaasRepo(self.conn)
         self.banka = BankaRepo(self.conn)
-        self.fatura = FaturaRepo(self.conn)
+        self.fatura = FaturaRepo(self.conn, sequences=self.sequences)
         self.stok = StokRepo(self.conn)
         self.nakliye = NakliyeRepo(self.conn)
         self.satis_rapor = SatisRaporRepo(self.conn)
@@ -65,9 +68,11 @@ class DB:
         self.hr = HRRepo(self.conn)
         self.invoice_adv = AdvancedInvoiceRepo(self.conn)
         self.dms = DmsRepo(self.conn)
+        self.notes_reminders = NotesRemindersRepo(self.conn)
+        self.wms = WMSRepo(self.conn, log_fn=self._safe_log)
 
-        migrate_schema(self.conn, log_fn=self._safe_log)
-        seed_defaults(self.conn, log_fn=self._safe_log)
+        # Şema defteri: güncel DB tek sorguyla açılır; yeni/eski DB'de tam geçiş
+        self.schema_state = ensure_schema(self.conn, log_fn=self._safe_log, repair=repair_schema)
 
     def _safe_log(self, islem: str, detay: str = ""):
         try:
@@ -75,6 +80,11 @@ class DB:
         except Exception:
             pass
 
+    def repair_schema(self) -> str:
+        """Tam init/migrate/seed geçişini zorla (onarım modu)."""
+        self.schema_state = ensure_schema(self.conn, log_fn=self._safe_log, repair=True)
+        return self.schema_state
+
     def close(self):
         try:
             self.conn.close()
@@ -165,6 +175,12 @@ class DB:
     def next_belge_no(self, prefix: str = "BLG") -> str:
         return self.settings.next_belge_no(prefix=prefix)
 
+    def reserve_belge_nos(self, prefix: str = "BLG", count: int = 1, commit: bool = True) -> List[str]:
+        return self.settings.reserve_belge_nos(prefix=prefix, count=count, commit=commit)
+
+    def sequence_reserve(self, name: str, count: int = 1) -> List[int]:
+        return self.sequences.reserve(name, count)
+
     def list_currencies(self) -> List[str]:
         return self.settings.list_currencies()
 
@@ -222,6 +238,15 @@ class DB:
     def cari_set_active(self, cid: int, aktif: int):
         return self.cariler.set_active(cid, aktif)
 
+    def cari_id_map(self) -> Dict[str, int]:
+        return self.cariler.id_map()
+
+    def cari_upsert_many(self, rows: Iterable[Sequence[Any]], commit: bool = True) -> int:
+        return self.cariler.upsert_many(rows, commit=commit)
+
+    def cari_ensure_many(self, names: Iterable[str], commit: bool = True) -> Dict[str, int]:
+        return self.cariler.ensure_many(names, commit=commit)
+
     # -----------------
     # Cari Hareket
     # -----------------
@@ -229,9 +254,18 @@ class DB:
                          aciklama: str, odeme: str, belge: str, etiket: str):
         return self.cari_hareket.add(tarih, cari_id, tip, tutar, para, aciklama, odeme, belge, etiket)
 
+    def cari_hareket_add_many(self, rows: Iterable[Sequence[Any]], commit: bool = True) -> int:
+        return self.cari_hareket.add_many(rows, commit=commit)
+
     def cari_hareket_list(self, cari_id: Optional[int] = None, q: str = "", date_from: str = "", date_to: str = "") -> List[sqlite3.Row]:
         return self.cari_hareket.list(cari_id=cari_id, q=q, date_from=date_from, date_to=date_to)
 
+    def cari_hareket_list_page(self, after: Optional[PageCursor] = None, limit: int = DEFAULT_PAGE_SIZE, **filters: Any) -> List[sqlite3.Row]:
+        return self.cari_hareket.list_page(after=after, limit=limit, **filters)
+
+    def cari_hareket_iter(self, chunk_size: int = DEFAULT_CHUNK_SIZE, **filters: Any) -> Iterator[List[sqlite3.Row]]:
+        return self.cari_hareket.iter_chunks(chunk_size=chunk_size, **filters)
+
     def cari_hareket_get(self, hid: int) -> Optional[sqlite3.Row]:
         return self.cari_hareket.get(hid)
 
@@ -249,6 +283,9 @@ class DB:
                  cari_id: Optional[int], aciklama: str, belge: str, etiket: str):
         return self.kasa.add(tarih, tip, tutar, para, odeme, kategori, cari_id, aciklama, belge, etiket)
 
+    def kasa_add_many(self, rows: Iterable[Sequence[Any]], commit: bool = True) -> int:
+        return self.kasa.add_many(rows, commit=commit)
+
     def kasa_list(
         self,
         q: str = "",
@@ -260,6 +297,15 @@ class DB:
     ) -> List[sqlite3.Row]:
         return self.kasa.list(q=q, date_from=date_from, date_to=date_to, tip=tip, kategori=kategori, has_cari=has_cari)
 
+    def kasa_list_page(self, after: Optional[PageCursor] = None, limit: int = DEFAULT_PAGE_SIZE, **filters: Any) -> List[sqlite3.Row]:
+        return self.kasa.list_page(after=after, limit=limit, **filters)
+
+    def kasa_iter(self, chunk_size: int = DEFAULT_CHUNK_SIZE, **filters: Any) -> Iterator[List[sqlite3.Row]]:
+        return self.kasa.iter_chunks(chunk_size=chunk_size, **filters)
+
+    def kasa_list_totals(self, **filters: Any) -> Dict[str, float]:
+        return self.kasa.list_totals(**filters)
+
     def kasa_get(self, kid: int) -> Optional[sqlite3.Row]:
         return self.kasa.get(kid)
 
@@ -560,6 +606,9 @@ class DB:
     def wms_post_doc(self, doc_id: int, user_id: Optional[int] = None, username: str = "", negative_stock_policy: str = "forbid") -> None:
         return self.wms.post_doc(doc_id, user_id=user_id, username=username, negative_stock_policy=negative_stock_policy)
 
+    def wms_post_docs(self, doc_ids: List[int], user_id: Optional[int] = None, username: str = "", negative_stock_policy: str = "forbid") -> List[int]:
+        return self.wms.post_docs(doc_ids, user_id=user_id, username=username, negative_stock_policy=negative_stock_policy)
+
     def wms_void_doc(self, doc_id: int, user_id: Optional[int] = None, reason: str = "") -> None:
         return self.wms.void_doc(doc_id, user_id=user_id, reason=reason)
 
@@ -630,6 +679,27 @@ class DB:
     def wms_wa_cost(self, company_id: int, branch_id: int, warehouse_id: int, item_id: int) -> float:
         return self.wms.calculate_weighted_avg_cost(company_id, branch_id, warehouse_id, item_id)
 
+    def wms_cost_layers(
+        self,
+        company_id: int,
+        branch_id: Optional[int] = None,
+        warehouse_id: Optional[int] = None,
+        item_id: Optional[int] = None,
+        lot_id: Optional[int] = None,
+        open_only: bool = True,
+    ) -> List[sqlite3.Row]:
+        return self.wms.list_cost_layers(
+            company_id, branch_id=branch_id, warehouse_id=warehouse_id, item_id=item_id, lot_id=lot_id, open_only=open_only
+        )
+
+    def wms_stock_valuation(
+        self, company_id: int, branch_id: Optional[int] = None, warehouse_id: Optional[int] = None, by_lot: bool = False
+    ) -> List[Dict[str, Any]]:
+        return self.wms.stock_valuation(company_id, branch_id=branch_id, warehouse_id=warehouse_id, by_lot=by_lot)
+
+    def wms_rebuild_cost_layers(self) -> int:
+        return self.wms.rebuild_cost_layers()
+
     def wms_allocate_landed_cost(self, total_cost: float, weights: List[float]) -> List[float]:
         return self.wms.allocate_landed_cost(total_cost, weights)
 
@@ -694,6 +764,9 @@ class DB:
                   aciklama: str, referans: str, belge: str, etiket: str, import_grup: str = "", bakiye: Optional[float] = None):
         return self.banka.add(tarih, banka, hesap, tip, tutar, para, aciklama, referans, belge, etiket, import_grup=import_grup, bakiye=bakiye)
 
+    def banka_add_many(self, rows: Iterable[Sequence[Any]], commit: bool = True) -> List[int]:
+        return self.banka.add_many(rows, commit=commit)
+
     # -----------------
     # Nakliye
     # -----------------
@@ -919,6 +992,12 @@ class DB:
                    banka: str = "", hesap: str = "", import_grup: str = "", limit: int = 2000):
         return self.banka.list(q=q, date_from=date_from, date_to=date_to, tip=tip, banka=banka, hesap=hesap, import_grup=import_grup, limit=limit)
 
+    def banka_list_page(self, after: Optional[PageCursor] = None, limit: int = DEFAULT_PAGE_SIZE, **filters: Any) -> List[sqlite3.Row]:
+        return self.banka.list_page(after=after, limit=limit, **filters)
+
+    def banka_iter(self, chunk_size: int = DEFAULT_CHUNK_SIZE, **filters: Any) -> Iterator[List[sqlite3.Row]]:
+        return self.banka.iter_chunks(chunk_size=chunk_size, **filters)
+
     def banka_get(self, hid: int) -> Optional[sqlite3.Row]:
         return self.banka.get(hid)
 
@@ -965,6 +1044,36 @@ class DB:
         acilis = float(c["acilis_bakiye"] if c else 0.0)
         return self.cari_hareket.bakiye(cid, acilis=acilis)
 
+    def cari_bakiye_all(self, only_active: bool = False) -> Dict[int, Dict[str, float]]:
+        """Tüm cariler için bakiye (tek sorgu; cari başına hareket taraması yok)."""
+        totals = self.cari_balance.totals_all()
+        out: Dict[int, Dict[str, float]] = {}
+        for c in self.cari_list(only_active=only_active):
+            cid = int(c["id"])
+            acilis = float(c["acilis_bakiye"] or 0.0)
+            borc, alacak = totals.get(cid, (0.0, 0.0))
+            out[cid] = {"borc": borc, "alacak": alacak, "bakiye": (alacak - borc) + acilis, "acilis": acilis}
+        return out
+
+    def cari_bakiye_many(self, ids: Iterable[int]) -> Dict[int, Dict[str, float]]:
+        """Verilen cariler için güncel bakiye (tek sorgu); seçim toplamları için."""
+        out: Dict[int, Dict[str, float]] = {}
+        for cid, (borc, alacak, acilis) in self.cari_balance.totals_many(ids).items():
+            out[cid] = {"borc": borc, "alacak": alacak, "bakiye": (alacak - borc) + acilis, "acilis": acilis}
+        return out
+
+    def cari_bakiye_by_currency(self, cid: int) -> List[Dict[str, Any]]:
+        return self.cari_balance.by_currency(cid)
+
+    def cari_balance_check(self) -> List[Dict[str, Any]]:
+        """cari_balance özetini hareketlerle karşılaştır; tutarsız kovaları döndür."""
+        return self.cari_balance.check()
+
+    def cari_balance_rebuild(self) -> int:
+        n = self.cari_balance.rebuild()
+        self._safe_log("Cari Balance", f"rebuilt: {n} buckets")
+        return n
+
     def cari_ekstre(self, cid: int, date_from: str = "", date_to: str = "", q: str = "") -> Dict[str, Any]:
         c = self.cari_get(cid)
         acilis = float(c["acilis_bakiye"] if c else 0.0)
@@ -976,6 +1085,10 @@ class DB:
     def global_search(self, q: str, limit: int = 300):
         return self.search.global_search(q, limit=limit)
 
+    def search_rebuild_index(self) -> int:
+        """FTS arama indeksini baştan oluştur (mevcut DB'ler / bozuk indeks için)."""
+        return self.search.rebuild_index()
+
     # -----------------
     # Maaş Takibi
     # -----------------
@@ -1148,6 +1261,12 @@ class DB:
     def fatura_list(self, *, q: str = "", date_from: str = "", date_to: str = "", tur: str = "", durum: str = "", cari_id: Optional[int] = None):
         return self.fatura.list(q=q, date_from=date_from, date_to=date_to, tur=tur, durum=durum, cari_id=cari_id)
 
+    def fatura_list_page(self, after: Optional[PageCursor] = None, limit: int = DEFAULT_PAGE_SIZE, **filters: Any) -> List[sqlite3.Row]:
+        return self.fatura.list_page(after=after, limit=limit, **filters)
+
+    def fatura_iter(self, chunk_size: int = DEFAULT_CHUNK_SIZE, **filters: Any) -> Iterator[List[sqlite3.Row]]:
+        return self.fatura.iter_chunks(chunk_size=chunk_size, **filters)
+
     def fatura_get(self, fid: int):
         return self.fatura.get(fid)
 
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Keyset (imleç) sayfalama yardımcıları.
+
+Hareket listeleri `ORDER BY tarih DESC, id DESC` ile sıralanır. OFFSET yerine
+son görülen satırın (tarih, id) çifti imleç olarak kullanılır; böylece N+1.
+sayfa da `tarih` indeksinden başlayarak sabit maliyetle okunur.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+# (tarih, id) - son görülen satır
+PageCursor = Tuple[str, int]
+
+DEFAULT_PAGE_SIZE = 200
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def keyset_clause(alias: str, after: Optional[PageCursor]) -> Tuple[str, List[Any]]:
+    """DESC sıralı listede imleçten sonraki satırlar için WHERE parçası.
+
+    `tarih <= ?` kısmı indeks aralığı olarak kullanılabilsin diye satır
+    karşılaştırması açık yazılır.
+    """
+    if not after:
+        return "", []
+    tarih, last_id = str(after[0] or ""), int(after[1])
+    p = f"{alias}." if alias else ""
+    return f"({p}tarih <= ? AND ({p}tarih < ? OR {p}id < ?))", [tarih, tarih, last_id]
+
+
+def cursor_of(row: Optional[sqlite3.Row]) -> Optional[PageCursor]:
+    """Bir satırdan sonraki sayfa imlecini üret."""
+    if row is None:
+        return None
+    return (str(row["tarih"] or ""), int(row["id"]))
+
+
+def with_clause(clauses: Sequence[str], params: Sequence[Any], extra: str, extra_params: Sequence[Any]) -> Tuple[str, List[Any]]:
+    out = list(clauses)
+    if extra:
+        out.append(extra)
+    where = ("WHERE " + " AND ".join(out)) if out else ""
+    return where, list(params) + list(extra_params)
+
+
+def iter_keyset(
+    fetch_page: Callable[[Optional[PageCursor], int], List[sqlite3.Row]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    after: Optional[PageCursor] = None,
+) -> Iterator[List[sqlite3.Row]]:
+    """fetch_page(after, limit) ile sayfa sayfa okuyup her sayfayı yield eder."""
+    size = max(1, int(chunk_size or DEFAULT_CHUNK_SIZE))
+    cur = after
+    while True:
+        page = fetch_page(cur, size)
+        if not page:
+            return
+        yield page
+        if len(page) < size:
+            return
+        cur = cursor_of(page[-1])
@@ -4,6 +4,7 @@ from .logs_repo import LogsRepo
 from .settings_repo import SettingsRepo
 from .cariler_repo import CarilerRepo
 from .cari_hareket_repo import CariHareketRepo
+from .cari_balance_repo import CariBalanceRepo
 from .kasa_repo import KasaRepo
 from .users_repo import UsersRepo
 from .search_repo import SearchRepo
@@ -17,12 +18,14 @@ from .satin_alma_repo import SatinAlmaRepo
 from .satis_siparis_repo import SatisSiparisRepo
 from .messages_repo import MessagesRepo
 from .hr_repo import HRRepo
+from .sequence_repo import SequenceRepo
 
 __all__ = [
     "LogsRepo",
     "SettingsRepo",
     "CarilerRepo",
     "CariHareketRepo",
+    "CariBalanceRepo",
     "KasaRepo",
     "UsersRepo",
     "SearchRepo",
@@ -36,4 +39,5 @@ __all__ = [
     "SatisSiparisRepo",
     "MessagesRepo",
     "HRRepo",
+    "SequenceRepo",
 ]
@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 import sqlite3
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from ...utils import parse_date_smart, safe_float
+from ..paging import DEFAULT_CHUNK_SIZE, DEFAULT_PAGE_SIZE, PageCursor, iter_keyset, keyset_clause, with_clause
 class BankaRepo:
     """Banka hareketleri repository.
     Veri modeli (banka_hareket):
@@ -46,7 +48,56 @@ class BankaRepo:
         )
         self.conn.commit()
         return int(cur.lastrowid or 0)
-    def list(
+    def add_many(self, rows: Iterable[Sequence[Any]], commit: bool = True) -> List[int]:
+        """`add` ile aynı sırada argüman demetlerini tek transaction'da ekler; yeni id'ler sırayla döner.
+
+        Yazma kilidi baştan alındığından (BEGIN IMMEDIATE) araya başka yazan
+        giremez; eklenen id'ler önceki en büyük id'den sonrakilerdir.
+        commit=False: çağıranın açtığı (BEGIN IMMEDIATE) transaction'da kalır.
+        """
+        # Ekstrelerde tarihler çok tekrarlar; parça içinde bir kez çözülür
+        day = lru_cache(maxsize=4096)(parse_date_smart)
+        params = [
+            (
+                day(tarih),
+                str(banka or ""),
+                str(hesap or ""),
+                str(tip or "Giriş"),
+                float(abs(safe_float(tutar))),
+                str(para or "TL"),
+                str(aciklama or ""),
+                str(referans or ""),
+                str(belge or ""),
+                str(etiket or ""),
+                str(import_grup or ""),
+                None if bakiye is None else float(safe_float(bakiye)),
+            )
+            for tarih, banka, hesap, tip, tutar, para, aciklama, referans, belge, etiket, import_grup, bakiye in rows
+        ]
+        if not params:
+            return []
+        cur = self.conn.cursor()
+        if not commit:
+            return self._insert_many(cur, params)
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            ids = self._insert_many(cur, params)
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+        return ids
+
+    @staticmethod
+    def _insert_many(cur: Any, params: List[tuple]) -> List[int]:
+        last_id = int(cur.execute("SELECT COALESCE(MAX(id), 0) FROM banka_hareket").fetchone()[0])
+        cur.executemany(
+            """INSERT INTO banka_hareket(tarih,banka,hesap,tip,tutar,para,aciklama,referans,belge,etiket,import_grup,bakiye)
+               VALUES(?,?,?,?,?,?,?,?,?,?,?,?)""",
+            params,
+        )
+        return [int(r[0]) for r in cur.execute("SELECT id FROM banka_hareket WHERE id > ? ORDER BY id", (last_id,))]
+    def _filters(
         self,
         q: str = "",
         date_from: str = "",
@@ -55,8 +106,7 @@ class BankaRepo:
         banka: str = "",
         hesap: str = "",
         import_grup: str = "",
-        limit: int = 2000,
-    ) -> List[sqlite3.Row]:
+    ) -> Tuple[List[str], List[Any]]:
         clauses = []
         params: List[Any] = []
         if (tip or "").strip():
@@ -81,6 +131,19 @@ class BankaRepo:
         if (date_to or "").strip():
             clauses.append("tarih<=?")
             params.append(parse_date_smart(date_to))
+        return clauses, params
+    def list(
+        self,
+        q: str = "",
+        date_from: str = "",
+        date_to: str = "",
+        tip: str = "",
+        banka: str = "",
+        hesap: str = "",
+        import_grup: str = "",
+        limit: int = 2000,
+    ) -> List[sqlite3.Row]:
+        clauses, params = self._filters(q, date_from, date_to, tip, banka, hesap, import_grup)
         where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
         sql = f"""
         SELECT * FROM banka_hareket
@@ -90,6 +153,26 @@ class BankaRepo:
         """
         params.append(int(limit))
         return list(self.conn.execute(sql, tuple(params)))
+    def list_page(
+        self,
+        after: Optional[PageCursor] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        **filters: Any,
+    ) -> List[sqlite3.Row]:
+        """list() ile aynı sıralama; `after` (tarih, id) imlecinden sonraki `limit` satır."""
+        clauses, params = self._filters(**filters)
+        extra, extra_params = keyset_clause("", after)
+        where, params = with_clause(clauses, params, extra, extra_params)
+        sql = f"""
+        SELECT * FROM banka_hareket
+        {where}
+        ORDER BY tarih DESC, id DESC
+        LIMIT ?
+        """
+        return list(self.conn.execute(sql, tuple(params + [int(limit)])))
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE, **filters: Any) -> Iterator[List[sqlite3.Row]]:
+        """Tüm sonucu belleğe almadan parça parça dolaş."""
+        return iter_keyset(lambda after, n: self.list_page(after, n, **filters), chunk_size)
     def get(self, hid: int) -> Optional[sqlite3.Row]:
         return self.conn.execute("SELECT * FROM banka_hareket WHERE id=?", (int(hid),)).fetchone()
     def get_many(self, ids: List[int]) -> List[sqlite3.Row]:
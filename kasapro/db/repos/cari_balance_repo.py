@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Cari bakiye özeti (cari_balance) okuma/kontrol.
+
+Tablo cari_hareket trigger'larıyla güncellenir (bkz. schema._ensure_cari_balance);
+bu repo yalnızca okur, tutarlılığı denetler ve gerekirse yeniden kurar.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List, Tuple
+
+from ...utils import parse_date_smart, safe_float
+from ..schema import rebuild_cari_balance
+
+# Kayan nokta birikimi için tolerans (kuruş altı)
+BALANCE_TOLERANCE = 0.005
+
+
+class CariBalanceRepo:
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def totals(self, cid: int) -> Tuple[float, float]:
+        """(borç, alacak) - tüm para birimleri toplamı."""
+        row = self.conn.execute(
+            "SELECT SUM(borc), SUM(alacak) FROM cari_balance WHERE cari_id=?",
+            (int(cid),),
+        ).fetchone()
+        return safe_float(row[0] if row else 0), safe_float(row[1] if row else 0)
+
+    def totals_all(self) -> Dict[int, Tuple[float, float]]:
+        """cari_id -> (borç, alacak); hareketi olmayan cariler listede yer almaz."""
+        rows = self.conn.execute(
+            "SELECT cari_id, SUM(borc), SUM(alacak) FROM cari_balance GROUP BY cari_id"
+        ).fetchall()
+        return {int(r[0]): (safe_float(r[1]), safe_float(r[2])) for r in rows}
+
+    def totals_many(self, ids: Iterable[int]) -> Dict[int, Tuple[float, float, float]]:
+        """cari_id -> (borç, alacak, açılış); yalnızca verilen cariler, tek sorgu."""
+        keys = sorted({int(i) for i in ids})
+        if not keys:
+            return {}
+        rows = self.conn.execute(
+            """
+            SELECT c.id, SUM(b.borc), SUM(b.alacak), c.acilis_bakiye
+            FROM cariler c
+            LEFT JOIN cari_balance b ON b.cari_id = c.id
+            WHERE c.id IN (SELECT value FROM json_each(?))
+            GROUP BY c.id
+            """,
+            (json.dumps(keys),),
+        ).fetchall()
+        return {int(r[0]): (safe_float(r[1]), safe_float(r[2]), safe_float(r[3])) for r in rows}
+
+    def totals_before(self, cid: int, tarih: Any) -> Tuple[float, float]:
+        """`tarih` öncesi (borç, alacak).
+
+        Önceki aylar kovalardan, içinde bulunulan ayın baş kısmı
+        (cari_id, tarih) indeksiyle hareketlerden okunur.
+        """
+        day = parse_date_smart(tarih)
+        month = day[:7]
+        row = self.conn.execute(
+            "SELECT SUM(borc), SUM(alacak) FROM cari_balance WHERE cari_id=? AND ay<?",
+            (int(cid), month),
+        ).fetchone()
+        borc, alacak = safe_float(row[0] if row else 0), safe_float(row[1] if row else 0)
+        row = self.conn.execute(
+            """SELECT
+                 SUM(CASE WHEN tip='Borç' THEN tutar ELSE 0 END),
+                 SUM(CASE WHEN tip='Alacak' THEN tutar ELSE 0 END)
+               FROM cari_hareket
+               WHERE cari_id=? AND tarih>=? AND tarih<?""",
+            (int(cid), month, day),
+        ).fetchone()
+        return borc + safe_float(row[0] if row else 0), alacak + safe_float(row[1] if row else 0)
+
+    def by_currency(self, cid: int) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            """SELECT para, SUM(borc) borc, SUM(alacak) alacak, SUM(adet) adet
+               FROM cari_balance WHERE cari_id=?
+               GROUP BY para ORDER BY para""",
+            (int(cid),),
+        ).fetchall()
+        return [
+            {
+                "para": r["para"],
+                "borc": safe_float(r["borc"]),
+                "alacak": safe_float(r["alacak"]),
+                "bakiye": safe_float(r["alacak"]) - safe_float(r["borc"]),
+                "adet": int(r["adet"] or 0),
+            }
+            for r in rows
+        ]
+
+    def monthly(self, cid: int, para: str = "") -> List[sqlite3.Row]:
+        clauses = ["cari_id=?"]
+        params: List[Any] = [int(cid)]
+        if (para or "").strip():
+            clauses.append("para=?")
+            params.append(para.strip())
+        return list(
+            self.conn.execute(
+                f"""SELECT ay, para, borc, alacak, (alacak - borc) net, adet
+                    FROM cari_balance WHERE {" AND ".join(clauses)}
+                    ORDER BY ay, para""",
+                tuple(params),
+            )
+        )
+
+    def check(self, tolerance: float = BALANCE_TOLERANCE) -> List[Dict[str, Any]]:
+        """Özet ile hareketlerden hesaplanan kovaları karşılaştırır; farklı olanları döndürür."""
+        rows = self.conn.execute(
+            """
+            WITH src AS (
+                SELECT cari_id, COALESCE(NULLIF(para,''),'TL') para, substr(COALESCE(tarih,''),1,7) ay,
+                       SUM(CASE WHEN tip='Borç' THEN COALESCE(tutar,0) ELSE 0 END) borc,
+                       SUM(CASE WHEN tip='Alacak' THEN COALESCE(tutar,0) ELSE 0 END) alacak,
+                       COUNT(*) adet
+                FROM cari_hareket GROUP BY 1, 2, 3
+            ),
+            keys AS (
+                SELECT cari_id, para, ay FROM src
+                UNION
+                SELECT cari_id, para, ay FROM cari_balance
+            )
+            SELECT k.cari_id, k.para, k.ay,
+                   COALESCE(s.borc,0) src_borc, COALESCE(s.alacak,0) src_alacak, COALESCE(s.adet,0) src_adet,
+                   COALESCE(b.borc,0) bal_borc, COALESCE(b.alacak,0) bal_alacak, COALESCE(b.adet,0) bal_adet
+            FROM keys k
+            LEFT JOIN src s ON s.cari_id=k.cari_id AND s.para=k.para AND s.ay=k.ay
+            LEFT JOIN cari_balance b ON b.cari_id=k.cari_id AND b.para=k.para AND b.ay=k.ay
+            """
+        ).fetchall()
+        out: List[Dict[str, Any]] = []
+        for r in rows:
+            if (
+                int(r["src_adet"]) != int(r["bal_adet"])
+                or abs(safe_float(r["src_borc"]) - safe_float(r["bal_borc"])) > tolerance
+                or abs(safe_float(r["src_alacak"]) - safe_float(r["bal_alacak"])) > tolerance
+            ):
+                out.append(dict(r))
+        return out
+
+    def rebuild(self) -> int:
+        return rebuild_cari_balance(self.conn)
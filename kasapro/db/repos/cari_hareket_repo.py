@@ -3,14 +3,19 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from ...utils import parse_date_smart, safe_float
+from ..paging import DEFAULT_CHUNK_SIZE, DEFAULT_PAGE_SIZE, PageCursor, iter_keyset, keyset_clause, with_clause
+from .cari_balance_repo import CariBalanceRepo
 
 
 class CariHareketRepo:
     def __init__(self, conn: sqlite3.Connection):
         self.conn = conn
+        # Bakiye/açılış hesapları trigger'la güncel tutulan özetten okunur
+        self.balance = CariBalanceRepo(conn)
 
     def add(
         self,
@@ -31,13 +36,35 @@ class CariHareketRepo:
         )
         self.conn.commit()
 
-    def list(
+    def add_many(self, rows: Iterable[Sequence[Any]], commit: bool = True) -> int:
+        """`add` ile aynı sırada argüman demetlerini tek executemany + tek commit ile ekler.
+
+        commit=False: çağıranın transaction'ında kalır.
+        """
+        # Ekstrelerde tarihler çok tekrarlar; parça içinde bir kez çözülür
+        day = lru_cache(maxsize=4096)(parse_date_smart)
+        params = [
+            (day(tarih), int(cari_id), tip, float(tutar), para, aciklama, odeme, belge, etiket)
+            for tarih, cari_id, tip, tutar, para, aciklama, odeme, belge, etiket in rows
+        ]
+        if not params:
+            return 0
+        self.conn.executemany(
+            """INSERT INTO cari_hareket(tarih,cari_id,tip,tutar,para,aciklama,odeme,belge,etiket)
+               VALUES(?,?,?,?,?,?,?,?,?)""",
+            params,
+        )
+        if commit:
+            self.conn.commit()
+        return len(params)
+
+    def _filters(
         self,
         cari_id: Optional[int] = None,
         q: str = "",
         date_from: str = "",
         date_to: str = "",
-    ) -> List[sqlite3.Row]:
+    ) -> Tuple[List[str], List[Any]]:
         clauses = []
         params: List[Any] = []
         if cari_id:
@@ -52,6 +79,16 @@ class CariHareketRepo:
         if (date_to or "").strip():
             clauses.append("h.tarih<=?")
             params.append(parse_date_smart(date_to))
+        return clauses, params
+
+    def list(
+        self,
+        cari_id: Optional[int] = None,
+        q: str = "",
+        date_from: str = "",
+        date_to: str = "",
+    ) -> List[sqlite3.Row]:
+        clauses, params = self._filters(cari_id, q, date_from, date_to)
         where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
         sql = f"""
         SELECT h.*, c.ad cari_ad
@@ -62,6 +99,30 @@ class CariHareketRepo:
         """
         return list(self.conn.execute(sql, tuple(params)))
 
+    def list_page(
+        self,
+        after: Optional[PageCursor] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        **filters: Any,
+    ) -> List[sqlite3.Row]:
+        """list() ile aynı sıralama; `after` (tarih, id) imlecinden sonraki `limit` satır."""
+        clauses, params = self._filters(**filters)
+        extra, extra_params = keyset_clause("h", after)
+        where, params = with_clause(clauses, params, extra, extra_params)
+        sql = f"""
+        SELECT h.*, c.ad cari_ad
+        FROM cari_hareket h
+        JOIN cariler c ON c.id=h.cari_id
+        {where}
+        ORDER BY h.tarih DESC, h.id DESC
+        LIMIT ?
+        """
+        return list(self.conn.execute(sql, tuple(params + [int(limit)])))
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE, **filters: Any) -> Iterator[List[sqlite3.Row]]:
+        """Tüm sonucu belleğe almadan parça parça dolaş."""
+        return iter_keyset(lambda after, n: self.list_page(after, n, **filters), chunk_size)
+
     def get(self, hid: int) -> Optional[sqlite3.Row]:
         return self.conn.execute("SELECT * FROM cari_hareket WHERE id=?", (int(hid),)).fetchone()
 
@@ -91,16 +152,7 @@ class CariHareketRepo:
         self.conn.commit()
 
     def bakiye(self, cid: int, acilis: float = 0.0) -> Dict[str, float]:
-        cur = self.conn.execute(
-            """SELECT
-                 SUM(CASE WHEN tip='Borç' THEN tutar ELSE 0 END) borc,
-                 SUM(CASE WHEN tip='Alacak' THEN tutar ELSE 0 END) alacak
-               FROM cari_hareket WHERE cari_id=?""",
-            (int(cid),),
-        )
-        row = cur.fetchone()
-        borc = safe_float(row[0] if row else 0)
-        alacak = safe_float(row[1] if row else 0)
+        borc, alacak = self.balance.totals(cid)
         return {"borc": borc, "alacak": alacak, "bakiye": (alacak - borc) + float(acilis), "acilis": float(acilis)}
 
     def ekstre(
@@ -116,16 +168,8 @@ class CariHareketRepo:
 
         opening = float(acilis)
         if df:
-            cur = self.conn.execute(
-                """SELECT
-                     SUM(CASE WHEN tip='Borç' THEN tutar ELSE 0 END) borc,
-                     SUM(CASE WHEN tip='Alacak' THEN tutar ELSE 0 END) alacak
-                   FROM cari_hareket
-                   WHERE cari_id=? AND tarih<?""",
-                (int(cid), df),
-            )
-            row = cur.fetchone()
-            opening = float(acilis) + (safe_float(row[1] if row else 0) - safe_float(row[0] if row else 0))
+            borc, alacak = self.balance.totals_before(cid, df)
+            opening = float(acilis) + (alacak - borc)
 
         clauses = ["cari_id=?"]
         params: List[Any] = [int(cid)]
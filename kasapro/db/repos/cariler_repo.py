@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 
 
 class CarilerRepo:
@@ -59,6 +59,45 @@ class CarilerRepo:
         self.conn.commit()
         return int(self.conn.execute("SELECT last_insert_rowid() id").fetchone()[0])
 
+    def id_map(self) -> Dict[str, int]:
+        """ad -> id; toplu içe aktarmada satır başına sorgu yerine bir kez yüklenir."""
+        return {str(r[1]): int(r[0]) for r in self.conn.execute("SELECT id, ad FROM cariler")}
+
+    def upsert_many(self, rows: Iterable[Sequence[Any]], commit: bool = True) -> int:
+        """(ad, tur, telefon, notlar, acilis_bakiye) demetlerini `upsert` kuralıyla toplu yazar."""
+        params = []
+        for ad, tur, telefon, notlar, acilis_bakiye in rows:
+            ad = (ad or "").strip()
+            if ad:
+                params.append((ad, (tur or "").strip(), (telefon or "").strip(), (notlar or "").strip(), float(acilis_bakiye or 0)))
+        if not params:
+            return 0
+        self.conn.executemany(
+            """INSERT INTO cariler(ad,tur,telefon,notlar,acilis_bakiye,aktif) VALUES(?,?,?,?,?,1)
+               ON CONFLICT(ad) DO UPDATE SET tur=excluded.tur, telefon=excluded.telefon, notlar=excluded.notlar,
+                   acilis_bakiye=excluded.acilis_bakiye, aktif=1""",
+            params,
+        )
+        if commit:
+            self.conn.commit()
+        return len(params)
+
+    def ensure_many(self, names: Iterable[str], commit: bool = True) -> Dict[str, int]:
+        """Olmayan carileri boş bilgilerle oluşturur; ad -> id döndürür."""
+        names = list(dict.fromkeys(n.strip() for n in names if n and n.strip()))
+        if not names:
+            return {}
+        self.conn.executemany("INSERT OR IGNORE INTO cariler(ad) VALUES(?)", [(n,) for n in names])
+        out: Dict[str, int] = {}
+        for i in range(0, len(names), 500):
+            chunk = names[i : i + 500]
+            marks = ",".join("?" for _ in chunk)
+            for r in self.conn.execute(f"SELECT id, ad FROM cariler WHERE ad IN ({marks})", chunk):
+                out[str(r[1])] = int(r[0])
+        if commit:
+            self.conn.commit()
+        return out
+
     def set_active(self, cid: int, aktif: int) -> None:
         """Cariyi aktif/pasif yapar. (0 = aktif değil)"""
         self.conn.execute("UPDATE cariler SET aktif=? WHERE id=?", (int(aktif), int(cid)))
@@ -4,9 +4,11 @@ from __future__ import annotations
 
 import sqlite3
 from datetime import date
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from ...utils import parse_date_smart, safe_float
+from ..paging import DEFAULT_CHUNK_SIZE, DEFAULT_PAGE_SIZE, PageCursor, iter_keyset, keyset_clause, with_clause
+from .sequence_repo import SequenceRepo, format_doc_no, reserve_block
 
 
 def _today_year() -> int:
@@ -30,11 +32,12 @@ class FaturaRepo:
     - fatura: başlık
     - fatura_kalem: kalemler (satırlar)
     - fatura_odeme: tahsilat/ödeme kayıtları
-    - fatura_seri: seri & numara üretimi
+    - fatura_seri: seri ayarları (numara sayacı: sequences, 'fatura:<seri>:<yıl>')
     """
 
-    def __init__(self, conn: sqlite3.Connection):
+    def __init__(self, conn: sqlite3.Connection, sequences: Optional[SequenceRepo] = None):
         self.conn = conn
+        self.sequences = sequences or SequenceRepo(conn)
 
     # -----------------
     # Seri
@@ -63,8 +66,14 @@ class FaturaRepo:
                  aktif=excluded.aktif""",
             (_norm(seri), int(yil), _norm(prefix), int(last_no), int(padding), _norm(fmt), int(aktif)),
         )
+        # Formdaki son numara sayacın da yeni değeri
+        self.sequences.set(self._seq_name(_norm(seri), int(yil)), int(last_no), commit=False)
         self.conn.commit()
 
+    @staticmethod
+    def _seq_name(seri: str, yil: int) -> str:
+        return f"fatura:{seri}:{int(yil)}"
+
     def next_fatura_no(self, seri: str = 'A', yil: Optional[int] = None) -> str:
         s = _norm(seri) or 'A'
         y = int(yil or _today_year() or 0)
@@ -82,30 +91,31 @@ class FaturaRepo:
                 (s, y),
             ).fetchone()
 
-        last_no = int(row['last_no'] or 0)
         padding = int(row['padding'] or 6)
         fmt = _norm(row['format'] or '{yil}{seri}{no_pad}')
+        prefix = _norm(row['prefix'] or 'FTR')
+        legacy_last = int(row['last_no'] or 0)
 
-        new_no = last_no + 1
-        no_pad = str(new_no).zfill(max(1, padding))
-
-        # güvenli format
+        cur = self.conn.cursor()
         try:
-            fatura_no = fmt.format(yil=y, seri=s, no=new_no, no_pad=no_pad, prefix=_norm(row['prefix'] or 'FTR'))
+            new_no = reserve_block(cur, self._seq_name(s, y), 1, seed=lambda: legacy_last)
+            # fatura_seri.last_no seri ekranında gösterildiği için eşlenir
+            cur.execute(
+                "UPDATE fatura_seri SET last_no=MAX(last_no, ?) WHERE seri=? AND yil=?",
+                (int(new_no), s, int(y)),
+            )
+            self.conn.commit()
         except Exception:
-            fatura_no = f"{y}{s}{no_pad}"
+            self.conn.rollback()
+            raise
 
-        self.conn.execute(
-            "UPDATE fatura_seri SET last_no=? WHERE seri=? AND yil=?",
-            (int(new_no), s, int(y)),
-        )
-        self.conn.commit()
-        return fatura_no
+        no_pad = str(new_no).zfill(max(1, padding))
+        return format_doc_no(fmt, f"{y}{s}{no_pad}", yil=y, seri=s, no=new_no, no_pad=no_pad, prefix=prefix)
 
     # -----------------
     # Fatura (başlık)
     # -----------------
-    def list(
+    def _filters(
         self,
         q: str = '',
         date_from: str = '',
@@ -113,7 +123,7 @@ class FaturaRepo:
         tur: str = '',
         durum: str = '',
         cari_id: Optional[int] = None,
-    ) -> List[sqlite3.Row]:
+    ) -> Tuple[List[str], List[Any]]:
         clauses: List[str] = []
         params: List[Any] = []
 
@@ -142,6 +152,18 @@ class FaturaRepo:
             clauses.append("f.cari_id=?")
             params.append(int(cari_id))
 
+        return clauses, params
+
+    def list(
+        self,
+        q: str = '',
+        date_from: str = '',
+        date_to: str = '',
+        tur: str = '',
+        durum: str = '',
+        cari_id: Optional[int] = None,
+    ) -> List[sqlite3.Row]:
+        clauses, params = self._filters(q, date_from, date_to, tur, durum, cari_id)
         where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
 
         sql = f"""
@@ -160,6 +182,39 @@ class FaturaRepo:
         """
         return list(self.conn.execute(sql, tuple(params)))
 
+    def list_page(
+        self,
+        after: Optional[PageCursor] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        **filters: Any,
+    ) -> List[sqlite3.Row]:
+        """list() ile aynı sıralama; `after` (tarih, id) imlecinden sonraki `limit` satır.
+
+        Ödeme toplamı tüm fatura_odeme tablosu yerine yalnızca sayfadaki
+        faturalar için (fatura_id indeksiyle) hesaplanır.
+        """
+        clauses, params = self._filters(**filters)
+        extra, extra_params = keyset_clause("f", after)
+        where, params = with_clause(clauses, params, extra, extra_params)
+        sql = f"""
+        SELECT x.*, (COALESCE(x.genel_toplam,0) - x.odendi) AS kalan
+        FROM (
+            SELECT
+                f.*,
+                COALESCE((SELECT SUM(o.tutar) FROM fatura_odeme o WHERE o.fatura_id=f.id),0) AS odendi
+            FROM fatura f
+            {where}
+            ORDER BY f.tarih DESC, f.id DESC
+            LIMIT ?
+        ) x
+        ORDER BY x.tarih DESC, x.id DESC
+        """
+        return list(self.conn.execute(sql, tuple(params + [int(limit)])))
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE, **filters: Any) -> Iterator[List[sqlite3.Row]]:
+        """Tüm sonucu belleğe almadan parça parça dolaş."""
+        return iter_keyset(lambda after, n: self.list_page(after, n, **filters), chunk_size)
+
     def get(self, fid: int) -> Optional[sqlite3.Row]:
         return self.conn.execute("SELECT * FROM fatura WHERE id=?", (int(fid),)).fetchone()
 
@@ -3,9 +3,11 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from ...utils import parse_date_smart, safe_float
+from ..paging import DEFAULT_CHUNK_SIZE, DEFAULT_PAGE_SIZE, PageCursor, iter_keyset, keyset_clause, with_clause
 
 
 class KasaRepo:
@@ -43,7 +45,40 @@ class KasaRepo:
         )
         self.conn.commit()
 
-    def list(
+    def add_many(self, rows: Iterable[Sequence[Any]], commit: bool = True) -> int:
+        """`add` ile aynı sırada argüman demetlerini tek executemany + tek commit ile ekler.
+
+        commit=False: çağıranın transaction'ında kalır.
+        """
+        # Ekstrelerde tarihler çok tekrarlar; parça içinde bir kez çözülür
+        day = lru_cache(maxsize=4096)(parse_date_smart)
+        params = [
+            (
+                day(tarih),
+                tip,
+                float(tutar),
+                para,
+                odeme,
+                kategori,
+                int(cari_id) if cari_id else None,
+                aciklama,
+                belge,
+                etiket,
+            )
+            for tarih, tip, tutar, para, odeme, kategori, cari_id, aciklama, belge, etiket in rows
+        ]
+        if not params:
+            return 0
+        self.conn.executemany(
+            """INSERT INTO kasa_hareket(tarih,tip,tutar,para,odeme,kategori,cari_id,aciklama,belge,etiket)
+               VALUES(?,?,?,?,?,?,?,?,?,?)""",
+            params,
+        )
+        if commit:
+            self.conn.commit()
+        return len(params)
+
+    def _filters(
         self,
         q: str = "",
         date_from: str = "",
@@ -51,7 +86,7 @@ class KasaRepo:
         tip: str = "",
         kategori: str = "",
         has_cari: Optional[bool] = None,
-    ) -> List[sqlite3.Row]:
+    ) -> Tuple[List[str], List[Any]]:
         clauses = []
         params: List[Any] = []
         if tip:
@@ -73,6 +108,18 @@ class KasaRepo:
         if (date_to or "").strip():
             clauses.append("k.tarih<=?")
             params.append(parse_date_smart(date_to))
+        return clauses, params
+
+    def list(
+        self,
+        q: str = "",
+        date_from: str = "",
+        date_to: str = "",
+        tip: str = "",
+        kategori: str = "",
+        has_cari: Optional[bool] = None,
+    ) -> List[sqlite3.Row]:
+        clauses, params = self._filters(q, date_from, date_to, tip, kategori, has_cari)
         where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
         sql = f"""
         SELECT k.*, c.ad cari_ad
@@ -83,6 +130,46 @@ class KasaRepo:
         """
         return list(self.conn.execute(sql, tuple(params)))
 
+    def list_page(
+        self,
+        after: Optional[PageCursor] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        **filters: Any,
+    ) -> List[sqlite3.Row]:
+        """list() ile aynı sıralama; `after` (tarih, id) imlecinden sonraki `limit` satır."""
+        clauses, params = self._filters(**filters)
+        extra, extra_params = keyset_clause("k", after)
+        where, params = with_clause(clauses, params, extra, extra_params)
+        sql = f"""
+        SELECT k.*, c.ad cari_ad
+        FROM kasa_hareket k
+        LEFT JOIN cariler c ON c.id=k.cari_id
+        {where}
+        ORDER BY k.tarih DESC, k.id DESC
+        LIMIT ?
+        """
+        return list(self.conn.execute(sql, tuple(params + [int(limit)])))
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE, **filters: Any) -> Iterator[List[sqlite3.Row]]:
+        """Tüm sonucu belleğe almadan parça parça dolaş."""
+        return iter_keyset(lambda after, n: self.list_page(after, n, **filters), chunk_size)
+
+    def list_totals(self, **filters: Any) -> Dict[str, float]:
+        """list() filtreleriyle gelir/gider/adet toplamı (satırları çekmeden)."""
+        clauses, params = self._filters(**filters)
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        row = self.conn.execute(
+            f"""SELECT
+                COUNT(*) adet,
+                SUM(CASE WHEN k.tip='Gelir' THEN k.tutar ELSE 0 END) gelir,
+                SUM(CASE WHEN k.tip='Gider' THEN k.tutar ELSE 0 END) gider
+               FROM kasa_hareket k {where}""",
+            tuple(params),
+        ).fetchone()
+        gelir = safe_float(row[1] if row else 0)
+        gider = safe_float(row[2] if row else 0)
+        return {"adet": int(row[0] or 0) if row else 0, "gelir": gelir, "gider": gider, "net": gelir - gider}
+
     def get(self, kid: int) -> Optional[sqlite3.Row]:
         return self.conn.execute("SELECT * FROM kasa_hareket WHERE id=?", (int(kid),)).fetchone()
 
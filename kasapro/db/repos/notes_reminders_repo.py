@@ -27,10 +27,19 @@ class NotesRemindersRepo:
     ) -> int:
         cur = self.conn.execute(
             """
-            INSERT INTO audit_log(company_id, user_id, action, entity, entity_id, detail, created_at)
-            VALUES(?,?,?,?,?,?,?)
+            INSERT INTO audit_log(company_id, user_id, action, entity_type, entity, entity_id, detail, created_at)
+            VALUES(?,?,?,?,?,?,?,?)
             """,
-            (int(company_id), int(user_id), str(action), str(entity), int(entity_id), str(detail), now_iso()),
+            (
+                int(company_id),
+                int(user_id),
+                str(action),
+                str(entity),
+                str(entity),
+                int(entity_id),
+                str(detail),
+                now_iso(),
+            ),
         )
         self.conn.commit()
         return int(cur.lastrowid)
@@ -367,6 +376,45 @@ class NotesRemindersRepo:
             )
         )
 
+    def list_scheduled_due(self, company_id: int, owner_user_id: int) -> List[Tuple[str, int]]:
+        """Zamanlayıcı için (due_at, id) çiftleri; status='scheduled'."""
+        rows = self.conn.execute(
+            """
+            SELECT due_at, id FROM reminders
+            WHERE company_id=? AND status='scheduled' AND (owner_user_id=? OR assignee_user_id=?)
+            """,
+            (int(company_id), int(owner_user_id), int(owner_user_id)),
+        )
+        return [(str(r[0]), int(r[1])) for r in rows]
+
+    def get_reminders(self, reminder_ids: Iterable[int]) -> List[sqlite3.Row]:
+        ids = [int(x) for x in reminder_ids]
+        out: List[sqlite3.Row] = []
+        for i in range(0, len(ids), 500):
+            chunk = ids[i : i + 500]
+            marks = ",".join("?" * len(chunk))
+            out.extend(self.conn.execute(f"SELECT * FROM reminders WHERE id IN ({marks})", chunk))
+        out.sort(key=lambda r: (str(r["due_at"]), int(r["id"])))
+        return out
+
+    def set_reminders_status(self, reminder_ids: Iterable[int], status: str) -> None:
+        ts = now_iso()
+        self.conn.executemany(
+            "UPDATE reminders SET status=?, updated_at=? WHERE id=?",
+            [(str(status), ts, int(rid)) for rid in reminder_ids],
+        )
+        self.conn.commit()
+
+    def count_overdue(self, company_id: int, owner_user_id: int) -> int:
+        row = self.conn.execute(
+            """
+            SELECT COUNT(*) FROM reminders
+            WHERE company_id=? AND status='overdue' AND (owner_user_id=? OR assignee_user_id=?)
+            """,
+            (int(company_id), int(owner_user_id), int(owner_user_id)),
+        ).fetchone()
+        return int(row[0] or 0)
+
     def list_overdue(self, company_id: int, owner_user_id: int) -> List[sqlite3.Row]:
         return list(
             self.conn.execute(
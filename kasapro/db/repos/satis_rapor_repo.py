@@ -1,11 +1,29 @@
 # -*- coding: utf-8 -*-
+"""Satış raporları.
+
+Raporlar satış küpünden (schema: satis_kup_*) okunur; küp, okumadan önce
+bekleyen (değişmiş) günler için tazelenir. Ürün/kategori/ödeme filtreleri
+fatura düzeyinde EXISTS gerektirdiğinden bu filtrelerde aynı sorgular ham
+tablolardan türetilen eş yapılı alt sorgu üzerinde çalışır.
+"""
 
 from __future__ import annotations
 
 import sqlite3
-from typing import Any, Dict, List, Tuple
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
 from ...utils import parse_date_smart, safe_float
+from ..schema import refresh_satis_kup
+
+# Küp tablolarıyla aynı boyut kolonları (ham kaynak alt sorguları için)
+_FATURA_DIMS = "f.tarih, f.tur, f.durum, f.cari_id, f.cari_ad, f.sube, f.depo, f.satis_temsilcisi"
+
+# Küpün cevaplayamadığı (fatura düzeyinde EXISTS gerektiren) filtreler
+_RAW_ONLY_FILTERS = ("urun", "kategori", "odeme")
+
+# Aylık ürün özetinde (satis_kup_urun_ay) bulunmayan boyutlar
+_DAILY_ONLY_FILTERS = ("cari_id", "sube", "depo", "temsilci")
 
 
 def _norm(s: Any) -> str:
@@ -19,6 +37,33 @@ def _like(s: str) -> str:
     return f"%{s}%"
 
 
+def _month_split(date_from: str, date_to: str) -> Tuple[Optional[Tuple[str, str]], List[Tuple[str, str]]]:
+    """[date_from, date_to] aralığını tamamen kapsanan aylara ('YYYY-MM' ilk, son) ve
+    kenarlarda kalan gün aralıklarına (dahil) böler. Boş sınır = açık uç."""
+    lo = date.fromisoformat(parse_date_smart(date_from)) if date_from else None
+    hi = date.fromisoformat(parse_date_smart(date_to)) if date_to else None
+    if lo is not None and hi is not None and lo > hi:
+        return None, []
+    one = timedelta(days=1)
+    # İlk tam ayın ilk günü / son tam ayın son günü
+    first = None if lo is None else (lo if lo.day == 1 else _add_month(lo))
+    last = None if hi is None else (hi if (hi + one).day == 1 else hi.replace(day=1) - one)
+    if first is not None and last is not None and first > last:
+        return None, [(lo.isoformat(), hi.isoformat())]  # type: ignore[union-attr]
+
+    ranges: List[Tuple[str, str]] = []
+    if lo is not None and first is not None and lo < first:
+        ranges.append((lo.isoformat(), (first - one).isoformat()))
+    if hi is not None and last is not None and last < hi:
+        ranges.append(((last + one).isoformat(), hi.isoformat()))
+    months = (first.isoformat()[:7] if first else "0000-01", last.isoformat()[:7] if last else "9999-12")
+    return months, ranges
+
+
+def _add_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
 class SatisRaporRepo:
     def __init__(self, conn: sqlite3.Connection):
         self.conn = conn
@@ -32,6 +77,7 @@ class SatisRaporRepo:
         *,
         include_product: bool = True,
         include_payment: bool = True,
+        include_dates: bool = True,
     ) -> Tuple[str, List[Any]]:
         clauses: List[str] = ["f.tur IN ('Satış','İade')"]
         params: List[Any] = []
@@ -41,12 +87,12 @@ class SatisRaporRepo:
             clauses.append("f.durum=?")
             params.append(durum)
 
-        date_from = _norm(filters.get("date_from"))
+        date_from = _norm(filters.get("date_from")) if include_dates else ""
         if date_from:
             clauses.append("f.tarih>=?")
             params.append(parse_date_smart(date_from))
 
-        date_to = _norm(filters.get("date_to"))
+        date_to = _norm(filters.get("date_to")) if include_dates else ""
         if date_to:
             clauses.append("f.tarih<=?")
             params.append(parse_date_smart(date_to))
@@ -97,24 +143,33 @@ class SatisRaporRepo:
         where_sql = ("WHERE " + " AND ".join(clauses)) if clauses else ""
         return where_sql, params
 
-    def _payment_filters(self, filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
-        where_sql, params = self._base_filters(filters, include_payment=False)
+    def _payment_filters(
+        self,
+        filters: Dict[str, Any],
+        *,
+        by_date: bool = True,
+        cube: bool = False,
+    ) -> Tuple[str, List[Any]]:
+        """by_date=True: ödeme tarihi de aralıkta olmalı (günlük tahsilat)."""
+        where_sql, params = self._base_filters(filters, include_product=not cube, include_payment=not by_date and not cube)
         extra_clauses: List[str] = []
+        odeme_col, tarih_col = ("f.odeme", "f.odeme_tarih") if cube else ("o.odeme", "o.tarih")
 
         odeme = _norm(filters.get("odeme"))
         if odeme:
-            extra_clauses.append("o.odeme=?")
+            extra_clauses.append(f"{odeme_col}=?")
             params.append(odeme)
 
-        date_from = _norm(filters.get("date_from"))
-        if date_from:
-            extra_clauses.append("o.tarih>=?")
-            params.append(parse_date_smart(date_from))
+        if by_date:
+            date_from = _norm(filters.get("date_from"))
+            if date_from:
+                extra_clauses.append(f"{tarih_col}>=?")
+                params.append(parse_date_smart(date_from))
 
-        date_to = _norm(filters.get("date_to"))
-        if date_to:
-            extra_clauses.append("o.tarih<=?")
-            params.append(parse_date_smart(date_to))
+            date_to = _norm(filters.get("date_to"))
+            if date_to:
+                extra_clauses.append(f"{tarih_col}<=?")
+                params.append(parse_date_smart(date_to))
 
         if extra_clauses:
             if where_sql:
@@ -156,46 +211,110 @@ class SatisRaporRepo:
         ).fetchall()
         return [str(r[0]) for r in rows if r and r[0]]
 
+    # -----------------
+    # Kaynaklar (küp ya da ham tablolar; aynı kolonlar, alias k)
+    # -----------------
+    def can_use_cube(self, filters: Dict[str, Any]) -> bool:
+        return not any(_norm(filters.get(k)) for k in _RAW_ONLY_FILTERS)
+
+    def refresh_cube(self) -> int:
+        """Değişmiş günleri küpe yansıtır. Dönüş: yenilenen gün sayısı."""
+        return refresh_satis_kup(self.conn)
+
+    def _prepare(self, filters: Dict[str, Any]) -> bool:
+        cube = self.can_use_cube(filters)
+        if cube:
+            self.refresh_cube()
+        return cube
+
+    def _fatura_source(self, filters: Dict[str, Any], cube: bool) -> Tuple[str, List[Any]]:
+        if cube:
+            where_sql, params = self._base_filters(filters, include_product=False, include_payment=False)
+            return f"(SELECT * FROM satis_kup_fatura f {where_sql})", params
+        where_sql, params = self._base_filters(filters)
+        return (
+            f"(SELECT {_FATURA_DIMS}, f.genel_toplam, f.iskonto_toplam, 1 AS adet FROM fatura f {where_sql})",
+            params,
+        )
+
+    def _kalem_source(self, filters: Dict[str, Any], cube: bool) -> Tuple[str, List[Any]]:
+        if cube and not any(_norm(filters.get(k)) for k in _DAILY_ONLY_FILTERS):
+            return self._urun_ay_source(filters)
+        if cube:
+            where_sql, params = self._base_filters(filters, include_product=False, include_payment=False)
+            return f"(SELECT * FROM satis_kup_kalem f {where_sql})", params
+        where_sql, params = self._base_filters(filters)
+        return (
+            f"""(SELECT {_FATURA_DIMS}, fk.urun, fk.kategori, fk.miktar, fk.toplam,
+                        fk.maliyet * fk.miktar AS maliyet_toplam
+                 FROM fatura f JOIN fatura_kalem fk ON fk.fatura_id=f.id {where_sql})""",
+            params,
+        )
+
+    def _urun_ay_source(self, filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        """Tam aylar satis_kup_urun_ay'dan, ay kenarlarındaki günler satis_kup_kalem'den."""
+        cols = "f.tur, f.durum, f.urun, f.kategori, f.miktar, f.toplam, f.maliyet_toplam"
+        where_sql, base_params = self._base_filters(
+            filters, include_product=False, include_payment=False, include_dates=False
+        )
+        months, day_ranges = _month_split(_norm(filters.get("date_from")), _norm(filters.get("date_to")))
+        parts: List[str] = []
+        params: List[Any] = []
+        if months is not None:
+            parts.append(f"SELECT {cols} FROM satis_kup_urun_ay f {where_sql} AND f.ay>=? AND f.ay<=?")
+            params += base_params + list(months)
+        for lo, hi in day_ranges:
+            parts.append(f"SELECT {cols} FROM satis_kup_kalem f {where_sql} AND f.tarih>=? AND f.tarih<=?")
+            params += base_params + [lo, hi]
+        if not parts:
+            parts.append(f"SELECT {cols} FROM satis_kup_kalem f WHERE 0")
+        return "(" + " UNION ALL ".join(parts) + ")", params
+
+    def _odeme_source(self, filters: Dict[str, Any], cube: bool, by_date: bool) -> Tuple[str, List[Any]]:
+        where_sql, params = self._payment_filters(filters, by_date=by_date, cube=cube)
+        if cube:
+            return f"(SELECT * FROM satis_kup_odeme f {where_sql})", params
+        return (
+            f"""(SELECT {_FATURA_DIMS}, o.tarih AS odeme_tarih, o.odeme, o.tutar
+                 FROM fatura_odeme o JOIN fatura f ON f.id=o.fatura_id {where_sql})""",
+            params,
+        )
+
+    def _page(self, sql: str, params: List[Any], limit: int, offset: int) -> Tuple[List[sqlite3.Row], int]:
+        """`sql` `COUNT(*) OVER () AS _total` kolonu taşır; ayrı COUNT sorgusu yalnızca boş sayfada."""
+        rows = list(self.conn.execute(f"{sql} LIMIT ? OFFSET ?", tuple(params + [int(limit), int(offset)])))
+        if rows:
+            return rows, int(rows[0]["_total"])
+        if int(offset) <= 0:
+            return rows, 0
+        return rows, int(self.conn.execute(f"SELECT COUNT(*) FROM ({sql})", tuple(params)).fetchone()[0])
+
     # -----------------
     # Raporlar
     # -----------------
     def daily_summary(self, filters: Dict[str, Any], limit: int, offset: int) -> Dict[str, Any]:
-        where_sql, params = self._base_filters(filters)
+        cube = self._prepare(filters)
+        src, params = self._fatura_source(filters, cube)
         sql = f"""
         SELECT
-            f.tarih,
-            SUM(CASE WHEN f.tur='Satış' THEN f.genel_toplam ELSE 0 END) AS ciro,
-            SUM(CASE WHEN f.tur='Satış' THEN f.iskonto_toplam ELSE 0 END) AS iskonto,
-            SUM(CASE WHEN f.tur='İade' THEN f.genel_toplam ELSE 0 END) AS iade,
-            COUNT(CASE WHEN f.tur='Satış' THEN 1 END) AS satis_adet,
-            COUNT(CASE WHEN f.tur='İade' THEN 1 END) AS iade_adet
-        FROM fatura f
-        {where_sql}
-        GROUP BY f.tarih
-        ORDER BY f.tarih DESC
-        LIMIT ? OFFSET ?
-        """
-        rows = list(self.conn.execute(sql, tuple(params + [int(limit), int(offset)])))
-
-        count_sql = f"""
-        SELECT COUNT(*) FROM (
-            SELECT f.tarih
-            FROM fatura f
-            {where_sql}
-            GROUP BY f.tarih
-        ) t
-        """
-        total = int(self.conn.execute(count_sql, tuple(params)).fetchone()[0])
-
-        pay_where, pay_params = self._payment_filters(filters)
-        pay_sql = f"""
-        SELECT o.tarih, SUM(o.tutar) AS tahsilat
-        FROM fatura_odeme o
-        JOIN fatura f ON f.id=o.fatura_id
-        {pay_where}
-        GROUP BY o.tarih
+            k.tarih,
+            SUM(CASE WHEN k.tur='Satış' THEN k.genel_toplam ELSE 0 END) AS ciro,
+            SUM(CASE WHEN k.tur='Satış' THEN k.iskonto_toplam ELSE 0 END) AS iskonto,
+            SUM(CASE WHEN k.tur='İade' THEN k.genel_toplam ELSE 0 END) AS iade,
+            SUM(CASE WHEN k.tur='Satış' THEN k.adet ELSE 0 END) AS satis_adet,
+            SUM(CASE WHEN k.tur='İade' THEN k.adet ELSE 0 END) AS iade_adet,
+            COUNT(*) OVER () AS _total
+        FROM {src} k
+        GROUP BY k.tarih
+        ORDER BY k.tarih DESC
         """
-        pay_rows = self.conn.execute(pay_sql, tuple(pay_params)).fetchall()
+        rows, total = self._page(sql, params, limit, offset)
+
+        pay_src, pay_params = self._odeme_source(filters, cube, by_date=True)
+        pay_rows = self.conn.execute(
+            f"SELECT k.odeme_tarih, SUM(k.tutar) AS tahsilat FROM {pay_src} k GROUP BY k.odeme_tarih",
+            tuple(pay_params),
+        ).fetchall()
         payments = {str(r[0]): float(safe_float(r[1])) for r in pay_rows if r}
 
         out_rows: List[Dict[str, Any]] = []
@@ -213,44 +332,40 @@ class SatisRaporRepo:
         return {"rows": out_rows, "total": total}
 
     def customer_summary(self, filters: Dict[str, Any], limit: int, offset: int) -> Dict[str, Any]:
-        where_sql, params = self._base_filters(filters)
-        odeme = _norm(filters.get("odeme"))
-        pay_clause = "WHERE odeme=?" if odeme else ""
-        pay_params = [odeme] if odeme else []
-
+        cube = self._prepare(filters)
+        src, params = self._fatura_source(filters, cube)
+        pay_src, pay_params = self._odeme_source(filters, cube, by_date=False)
+        # Ödemeler yalnızca süzülmüş faturalardan gelir; p'nin anahtarları s'nin alt kümesi
         sql = f"""
+        WITH s AS (
+            SELECT
+                k.cari_id,
+                k.cari_ad,
+                SUM(CASE WHEN k.tur='Satış' THEN k.genel_toplam ELSE 0 END) AS satis,
+                SUM(CASE WHEN k.tur='İade' THEN k.genel_toplam ELSE 0 END) AS iade,
+                SUM(CASE WHEN k.tur='Satış' THEN k.iskonto_toplam ELSE 0 END) AS iskonto
+            FROM {src} k
+            GROUP BY k.cari_id, k.cari_ad
+        ), p AS (
+            SELECT k.cari_id, k.cari_ad, SUM(k.tutar) AS tahsilat
+            FROM {pay_src} k
+            GROUP BY k.cari_id, k.cari_ad
+        )
         SELECT
-            f.cari_id,
-            COALESCE(NULLIF(f.cari_ad,''), c.ad, '(Bilinmeyen)') AS cari_ad,
-            SUM(CASE WHEN f.tur='Satış' THEN f.genel_toplam ELSE 0 END) AS satis,
-            SUM(CASE WHEN f.tur='İade' THEN f.genel_toplam ELSE 0 END) AS iade,
-            SUM(CASE WHEN f.tur='Satış' THEN f.iskonto_toplam ELSE 0 END) AS iskonto,
-            SUM(COALESCE(p.odendi,0)) AS tahsilat
-        FROM fatura f
-        LEFT JOIN cariler c ON c.id=f.cari_id
-        LEFT JOIN (
-            SELECT fatura_id, SUM(tutar) AS odendi
-            FROM fatura_odeme
-            {pay_clause}
-            GROUP BY fatura_id
-        ) p ON p.fatura_id=f.id
-        {where_sql}
-        GROUP BY f.cari_id, cari_ad
-        ORDER BY (SUM(CASE WHEN f.tur='Satış' THEN f.genel_toplam ELSE 0 END) -
-                  SUM(CASE WHEN f.tur='İade' THEN f.genel_toplam ELSE 0 END)) DESC
-        LIMIT ? OFFSET ?
-        """
-        rows = list(self.conn.execute(sql, tuple(pay_params + params + [int(limit), int(offset)])))
-
-        count_sql = f"""
-        SELECT COUNT(*) FROM (
-            SELECT f.cari_id
-            FROM fatura f
-            {where_sql}
-            GROUP BY f.cari_id
-        ) t
+            s.cari_id,
+            COALESCE(NULLIF(s.cari_ad,''), c.ad, '(Bilinmeyen)') AS cari_ad,
+            SUM(s.satis) AS satis,
+            SUM(s.iade) AS iade,
+            SUM(s.iskonto) AS iskonto,
+            SUM(COALESCE(p.tahsilat,0)) AS tahsilat,
+            COUNT(*) OVER () AS _total
+        FROM s
+        LEFT JOIN p ON p.cari_id IS s.cari_id AND p.cari_ad IS s.cari_ad
+        LEFT JOIN cariler c ON c.id=s.cari_id
+        GROUP BY s.cari_id, COALESCE(NULLIF(s.cari_ad,''), c.ad, '(Bilinmeyen)')
+        ORDER BY SUM(s.satis) - SUM(s.iade) DESC
         """
-        total = int(self.conn.execute(count_sql, tuple(params)).fetchone()[0])
+        rows, total = self._page(sql, params + pay_params, limit, offset)
 
         out_rows: List[Dict[str, Any]] = []
         for r in rows:
@@ -273,33 +388,22 @@ class SatisRaporRepo:
         return {"rows": out_rows, "total": total}
 
     def product_summary(self, filters: Dict[str, Any], limit: int, offset: int) -> Dict[str, Any]:
-        where_sql, params = self._base_filters(filters)
+        cube = self._prepare(filters)
+        src, params = self._kalem_source(filters, cube)
+        kategori = "COALESCE(NULLIF(k.kategori,''), '(Bilinmeyen)')"
         sql = f"""
         SELECT
-            fk.urun,
-            COALESCE(NULLIF(fk.kategori,''), '(Bilinmeyen)') AS kategori,
-            SUM(CASE WHEN f.tur='Satış' THEN fk.miktar ELSE -fk.miktar END) AS miktar,
-            SUM(CASE WHEN f.tur='Satış' THEN fk.toplam ELSE -fk.toplam END) AS ciro,
-            SUM(CASE WHEN f.tur='Satış' THEN fk.maliyet * fk.miktar ELSE -(fk.maliyet * fk.miktar) END) AS maliyet
-        FROM fatura f
-        JOIN fatura_kalem fk ON fk.fatura_id=f.id
-        {where_sql}
-        GROUP BY fk.urun, kategori
+            k.urun,
+            {kategori} AS kategori,
+            SUM(CASE WHEN k.tur='Satış' THEN k.miktar ELSE -k.miktar END) AS miktar,
+            SUM(CASE WHEN k.tur='Satış' THEN k.toplam ELSE -k.toplam END) AS ciro,
+            SUM(CASE WHEN k.tur='Satış' THEN k.maliyet_toplam ELSE -k.maliyet_toplam END) AS maliyet,
+            COUNT(*) OVER () AS _total
+        FROM {src} k
+        GROUP BY k.urun, {kategori}
         ORDER BY ciro DESC
-        LIMIT ? OFFSET ?
-        """
-        rows = list(self.conn.execute(sql, tuple(params + [int(limit), int(offset)])))
-
-        count_sql = f"""
-        SELECT COUNT(*) FROM (
-            SELECT fk.urun
-            FROM fatura f
-            JOIN fatura_kalem fk ON fk.fatura_id=f.id
-            {where_sql}
-            GROUP BY fk.urun, COALESCE(NULLIF(fk.kategori,''), '(Bilinmeyen)')
-        ) t
         """
-        total = int(self.conn.execute(count_sql, tuple(params)).fetchone()[0])
+        rows, total = self._page(sql, params, limit, offset)
 
         out_rows: List[Dict[str, Any]] = []
         for r in rows:
@@ -317,41 +421,30 @@ class SatisRaporRepo:
         return {"rows": out_rows, "total": total}
 
     def temsilci_summary(self, filters: Dict[str, Any], limit: int, offset: int) -> Dict[str, Any]:
-        where_sql, params = self._base_filters(filters)
-        odeme = _norm(filters.get("odeme"))
-        pay_clause = "WHERE odeme=?" if odeme else ""
-        pay_params = [odeme] if odeme else []
-
+        cube = self._prepare(filters)
+        src, params = self._fatura_source(filters, cube)
+        pay_src, pay_params = self._odeme_source(filters, cube, by_date=False)
+        temsilci = "COALESCE(NULLIF(k.satis_temsilcisi,''), '(Belirsiz)')"
         sql = f"""
-        SELECT
-            COALESCE(NULLIF(f.satis_temsilcisi,''), '(Belirsiz)') AS temsilci,
-            SUM(CASE WHEN f.tur='Satış' THEN f.genel_toplam ELSE 0 END) AS satis,
-            SUM(CASE WHEN f.tur='İade' THEN f.genel_toplam ELSE 0 END) AS iade,
-            SUM(CASE WHEN f.tur='Satış' THEN f.iskonto_toplam ELSE 0 END) AS iskonto,
-            SUM(COALESCE(p.odendi,0)) AS tahsilat
-        FROM fatura f
-        LEFT JOIN (
-            SELECT fatura_id, SUM(tutar) AS odendi
-            FROM fatura_odeme
-            {pay_clause}
-            GROUP BY fatura_id
-        ) p ON p.fatura_id=f.id
-        {where_sql}
-        GROUP BY temsilci
-        ORDER BY satis DESC
-        LIMIT ? OFFSET ?
+        WITH s AS (
+            SELECT
+                {temsilci} AS temsilci,
+                SUM(CASE WHEN k.tur='Satış' THEN k.genel_toplam ELSE 0 END) AS satis,
+                SUM(CASE WHEN k.tur='İade' THEN k.genel_toplam ELSE 0 END) AS iade,
+                SUM(CASE WHEN k.tur='Satış' THEN k.iskonto_toplam ELSE 0 END) AS iskonto
+            FROM {src} k
+            GROUP BY {temsilci}
+        ), p AS (
+            SELECT {temsilci} AS temsilci, SUM(k.tutar) AS tahsilat
+            FROM {pay_src} k
+            GROUP BY {temsilci}
+        )
+        SELECT s.temsilci, s.satis, s.iade, s.iskonto, COALESCE(p.tahsilat,0) AS tahsilat, COUNT(*) OVER () AS _total
+        FROM s
+        LEFT JOIN p ON p.temsilci=s.temsilci
+        ORDER BY s.satis DESC
         """
-        rows = list(self.conn.execute(sql, tuple(pay_params + params + [int(limit), int(offset)])))
-
-        count_sql = f"""
-        SELECT COUNT(*) FROM (
-            SELECT COALESCE(NULLIF(f.satis_temsilcisi,''), '(Belirsiz)') AS temsilci
-            FROM fatura f
-            {where_sql}
-            GROUP BY temsilci
-        ) t
-        """
-        total = int(self.conn.execute(count_sql, tuple(params)).fetchone()[0])
+        rows, total = self._page(sql, params + pay_params, limit, offset)
 
         out_rows: List[Dict[str, Any]] = []
         for r in rows:
@@ -373,15 +466,15 @@ class SatisRaporRepo:
         return {"rows": out_rows, "total": total}
 
     def kpis(self, filters: Dict[str, Any]) -> Dict[str, Any]:
-        where_sql, params = self._base_filters(filters)
+        cube = self._prepare(filters)
+        src, params = self._fatura_source(filters, cube)
         sql = f"""
         SELECT
-            SUM(CASE WHEN f.tur='Satış' THEN f.genel_toplam ELSE 0 END) AS ciro,
-            SUM(CASE WHEN f.tur='İade' THEN f.genel_toplam ELSE 0 END) AS iade,
-            SUM(CASE WHEN f.tur='Satış' THEN f.iskonto_toplam ELSE 0 END) AS iskonto,
-            COUNT(CASE WHEN f.tur='Satış' THEN 1 END) AS satis_adet
-        FROM fatura f
-        {where_sql}
+            SUM(CASE WHEN k.tur='Satış' THEN k.genel_toplam ELSE 0 END) AS ciro,
+            SUM(CASE WHEN k.tur='İade' THEN k.genel_toplam ELSE 0 END) AS iade,
+            SUM(CASE WHEN k.tur='Satış' THEN k.iskonto_toplam ELSE 0 END) AS iskonto,
+            SUM(CASE WHEN k.tur='Satış' THEN k.adet ELSE 0 END) AS satis_adet
+        FROM {src} k
         """
         row = self.conn.execute(sql, tuple(params)).fetchone()
         ciro = float(safe_float(row["ciro"] if row else 0))
@@ -392,31 +485,29 @@ class SatisRaporRepo:
         ortalama = (ciro / satis_adet) if satis_adet else 0.0
         iade_oran = (iade / ciro) if ciro else 0.0
 
+        kalem_src, kalem_params = self._kalem_source(filters, cube)
         top_products = self.conn.execute(
             f"""
-            SELECT fk.urun, SUM(CASE WHEN f.tur='Satış' THEN fk.miktar ELSE -fk.miktar END) AS miktar,
-                   SUM(CASE WHEN f.tur='Satış' THEN fk.toplam ELSE -fk.toplam END) AS ciro
-            FROM fatura f
-            JOIN fatura_kalem fk ON fk.fatura_id=f.id
-            {where_sql}
-            GROUP BY fk.urun
+            SELECT k.urun, SUM(CASE WHEN k.tur='Satış' THEN k.miktar ELSE -k.miktar END) AS miktar,
+                   SUM(CASE WHEN k.tur='Satış' THEN k.toplam ELSE -k.toplam END) AS ciro
+            FROM {kalem_src} k
+            GROUP BY k.urun
             ORDER BY ciro DESC
             LIMIT 20
             """,
-            tuple(params),
+            tuple(kalem_params),
         ).fetchall()
 
         top_customers = self.conn.execute(
             f"""
-            SELECT COALESCE(NULLIF(f.cari_ad,''), c.ad, '(Bilinmeyen)') AS cari_ad,
-                   SUM(CASE WHEN f.tur='Satış' THEN f.genel_toplam ELSE 0 END) AS satis,
-                   SUM(CASE WHEN f.tur='İade' THEN f.genel_toplam ELSE 0 END) AS iade
-            FROM fatura f
-            LEFT JOIN cariler c ON c.id=f.cari_id
-            {where_sql}
-            GROUP BY f.cari_id, cari_ad
-            ORDER BY (SUM(CASE WHEN f.tur='Satış' THEN f.genel_toplam ELSE 0 END) -
-                      SUM(CASE WHEN f.tur='İade' THEN f.genel_toplam ELSE 0 END)) DESC
+            SELECT COALESCE(NULLIF(k.cari_ad,''), c.ad, '(Bilinmeyen)') AS cari_ad,
+                   SUM(CASE WHEN k.tur='Satış' THEN k.genel_toplam ELSE 0 END) AS satis,
+                   SUM(CASE WHEN k.tur='İade' THEN k.genel_toplam ELSE 0 END) AS iade
+            FROM {src} k
+            LEFT JOIN cariler c ON c.id=k.cari_id
+            GROUP BY k.cari_id, COALESCE(NULLIF(k.cari_ad,''), c.ad, '(Bilinmeyen)')
+            ORDER BY (SUM(CASE WHEN k.tur='Satış' THEN k.genel_toplam ELSE 0 END) -
+                      SUM(CASE WHEN k.tur='İade' THEN k.genel_toplam ELSE 0 END)) DESC
             LIMIT 20
             """,
             tuple(params),
@@ -449,50 +540,27 @@ class SatisRaporRepo:
     def data_warnings(self) -> List[str]:
         warnings: List[str] = []
 
-        # Ödeme > toplam
-        overpay = self.conn.execute(
-            """
-            SELECT COUNT(*) AS adet
-            FROM (
-                SELECT f.id, f.genel_toplam, COALESCE(SUM(o.tutar),0) AS odendi
-                FROM fatura f
-                LEFT JOIN fatura_odeme o ON o.fatura_id=f.id
-                WHERE f.tur IN ('Satış','İade') AND f.durum<>'İptal'
-                GROUP BY f.id
-                HAVING odendi > f.genel_toplam + 0.01
-            ) t
-            """
+        # Fatura kontrolleri küpün günlük uyarı sayılarından (bkz. satis_kup_uyari)
+        self.refresh_cube()
+        row = self.conn.execute(
+            "SELECT SUM(fazla_odeme) AS fazla_odeme, SUM(kalem_farki) AS kalem_farki, SUM(cari_eksik) AS cari_eksik "
+            "FROM satis_kup_uyari"
         ).fetchone()
-        if overpay and int(overpay["adet"] or 0) > 0:
-            warnings.append(f"Toplamı aşan tahsilat/ödeme: {int(overpay['adet'])} fatura.")
+        overpay = int(row["fazla_odeme"] or 0) if row else 0
+        mismatch = int(row["kalem_farki"] or 0) if row else 0
+        missing_cari = int(row["cari_eksik"] or 0) if row else 0
+
+        # Ödeme > toplam
+        if overpay > 0:
+            warnings.append(f"Toplamı aşan tahsilat/ödeme: {overpay} fatura.")
 
         # Kalem toplamı eşleşmiyor
-        mismatch = self.conn.execute(
-            """
-            SELECT COUNT(*) AS adet
-            FROM (
-                SELECT f.id, f.genel_toplam, COALESCE(SUM(k.toplam),0) AS kalem_toplam
-                FROM fatura f
-                LEFT JOIN fatura_kalem k ON k.fatura_id=f.id
-                WHERE f.tur IN ('Satış','İade') AND f.durum<>'İptal'
-                GROUP BY f.id
-                HAVING ABS(COALESCE(SUM(k.toplam),0) - f.genel_toplam) > 0.01
-            ) t
-            """
-        ).fetchone()
-        if mismatch and int(mismatch["adet"] or 0) > 0:
-            warnings.append(f"Kalem toplamı ile genel toplam uyuşmayan: {int(mismatch['adet'])} fatura.")
+        if mismatch > 0:
+            warnings.append(f"Kalem toplamı ile genel toplam uyuşmayan: {mismatch} fatura.")
 
         # Cari bilgisi eksik
-        missing_cari = self.conn.execute(
-            """
-            SELECT COUNT(*) AS adet
-            FROM fatura
-            WHERE tur IN ('Satış','İade') AND durum<>'İptal' AND (cari_id IS NULL OR cari_id=0) AND COALESCE(cari_ad,'')=''
-            """
-        ).fetchone()
-        if missing_cari and int(missing_cari["adet"] or 0) > 0:
-            warnings.append(f"Cari bilgisi eksik: {int(missing_cari['adet'])} fatura.")
+        if missing_cari > 0:
+            warnings.append(f"Cari bilgisi eksik: {missing_cari} fatura.")
 
         # Sevkiyat bağlantısı
         sevk_count = self.conn.execute(
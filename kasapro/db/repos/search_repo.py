@@ -3,28 +3,136 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import Dict, List
+from typing import Dict, List, Sequence
+
+from ...core.fuzzy import normalize_text
+from ..schema import SEARCH_ENTITIES, SEARCH_FTS_TABLE, SEARCH_ROWID_STRIDE, rebuild_search_index
+
+
+# Sonuç anahtarı -> FTS ile eşleşen id'lerden satırları çeken sorgu
+_HYDRATE_SQL: Dict[str, str] = {
+    "cariler": "SELECT * FROM cariler WHERE id IN ({ids})",
+    "cari_hareket": """
+        SELECT h.*, c.ad cari_ad
+        FROM cari_hareket h JOIN cariler c ON c.id=h.cari_id
+        WHERE h.id IN ({ids})""",
+    "kasa": """
+        SELECT k.*, c.ad cari_ad
+        FROM kasa_hareket k LEFT JOIN cariler c ON c.id=k.cari_id
+        WHERE k.id IN ({ids})""",
+    "stok_urun": """
+        SELECT u.*, c.ad tedarikci_ad
+        FROM stok_urun u LEFT JOIN cariler c ON c.id=u.tedarikci_id
+        WHERE u.id IN ({ids})""",
+    "stok_hareket": """
+        SELECT h.*, u.kod urun_kod, u.ad urun_ad
+        FROM stok_hareket h JOIN stok_urun u ON u.id=h.urun_id
+        WHERE h.id IN ({ids})""",
+    "banka": "SELECT * FROM banka_hareket WHERE id IN ({ids})",
+    "fatura": "SELECT * FROM fatura WHERE id IN ({ids})",
+    "docs": "SELECT * FROM docs WHERE id IN ({ids})",
+}
+
+
+def fts_query(q: str) -> str:
+    """Kullanıcı metnini FTS5 MATCH ifadesine çevirir (her kelime önek araması, AND)."""
+    tokens = normalize_text(q).split()
+    return " ".join(f'"{t}"*' for t in tokens)
 
 
 class SearchRepo:
     def __init__(self, conn: sqlite3.Connection):
         self.conn = conn
 
+    def _empty(self) -> Dict[str, List[sqlite3.Row]]:
+        return {k: [] for k in SEARCH_ENTITIES}
+
+    def has_index(self) -> bool:
+        try:
+            row = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (SEARCH_FTS_TABLE,)
+            ).fetchone()
+            return row is not None
+        except sqlite3.Error:
+            return False
+
+    def rebuild_index(self) -> int:
+        return rebuild_search_index(self.conn)
+
     def global_search(self, q: str, limit: int = 300) -> Dict[str, List[sqlite3.Row]]:
         q = (q or "").strip()
         if not q:
-            return {"cariler": [], "cari_hareket": [], "kasa": [], "stok_urun": [], "stok_hareket": []}
+            return self._empty()
+        if not self.has_index():
+            return self._global_search_like(q, limit=limit)
+        match = fts_query(q)
+        if not match:
+            return self._empty()
+        try:
+            return self._global_search_fts(match, limit=limit)
+        except sqlite3.OperationalError:
+            # Bozuk/eksik indeks: aramayı kesme, eski yola düş
+            return self._global_search_like(q, limit=limit)
+
+    def _ranked_ids(self, key: str, match: str, limit: int) -> List[int]:
+        code = SEARCH_ENTITIES[key][0]
+        rows = self.conn.execute(
+            f"""
+            SELECT rowid FROM {SEARCH_FTS_TABLE}
+            WHERE {SEARCH_FTS_TABLE} MATCH ?
+            ORDER BY bm25({SEARCH_FTS_TABLE}, 0.0, 1.0)
+            LIMIT ?""",
+            (f"kind:e{code} AND body:({match})", int(limit)),
+        ).fetchall()
+        return [int(r[0]) // SEARCH_ROWID_STRIDE for r in rows]
 
+    def _hydrate(self, key: str, ids: Sequence[int]) -> List[sqlite3.Row]:
+        if not ids:
+            return []
+        sql = _HYDRATE_SQL[key].format(ids=",".join("?" for _ in ids))
+        by_id = {int(r["id"]): r for r in self.conn.execute(sql, tuple(ids))}
+        # BM25 sırasını koru
+        return [by_id[i] for i in ids if i in by_id]
+
+    def _related_ids(self, sql: str, parent_ids: Sequence[int], exclude: Sequence[int], limit: int) -> List[int]:
+        if not parent_ids or limit <= 0:
+            return []
+        marks = ",".join("?" for _ in parent_ids)
+        rows = self.conn.execute(sql.format(ids=marks), (*parent_ids, int(limit) + len(exclude))).fetchall()
+        seen = set(exclude)
+        return [int(r[0]) for r in rows if int(r[0]) not in seen][:limit]
+
+    def _global_search_fts(self, match: str, limit: int) -> Dict[str, List[sqlite3.Row]]:
+        ids = {key: self._ranked_ids(key, match, limit) for key in SEARCH_ENTITIES}
+
+        # Cari/ürün adına göre eşleşen hareketler (eski LIKE araması join üzerinden yapıyordu)
+        ids["cari_hareket"] += self._related_ids(
+            "SELECT id FROM cari_hareket WHERE cari_id IN ({ids}) ORDER BY tarih DESC, id DESC LIMIT ?",
+            ids["cariler"],
+            ids["cari_hareket"],
+            limit - len(ids["cari_hareket"]),
+        )
+        ids["stok_hareket"] += self._related_ids(
+            "SELECT id FROM stok_hareket WHERE urun_id IN ({ids}) ORDER BY tarih DESC, id DESC LIMIT ?",
+            ids["stok_urun"],
+            ids["stok_hareket"],
+            limit - len(ids["stok_hareket"]),
+        )
+        return {key: self._hydrate(key, key_ids) for key, key_ids in ids.items()}
+
+    def _global_search_like(self, q: str, limit: int = 300) -> Dict[str, List[sqlite3.Row]]:
+        """FTS5 olmayan SQLite derlemeleri için eski LIKE araması."""
         like = f"%{q}%"
+        out = self._empty()
 
-        cariler = list(
+        out["cariler"] = list(
             self.conn.execute(
                 "SELECT * FROM cariler WHERE ad LIKE ? OR telefon LIKE ? OR notlar LIKE ? ORDER BY ad LIMIT ?",
                 (like, like, like, int(limit)),
             )
         )
 
-        ch = list(
+        out["cari_hareket"] = list(
             self.conn.execute(
                 """
                 SELECT h.*, c.ad cari_ad
@@ -35,7 +143,7 @@ class SearchRepo:
             )
         )
 
-        kasa = list(
+        out["kasa"] = list(
             self.conn.execute(
                 """
                 SELECT k.*, c.ad cari_ad
@@ -46,7 +154,7 @@ class SearchRepo:
             )
         )
 
-        stok_urun = list(
+        out["stok_urun"] = list(
             self.conn.execute(
                 """
                 SELECT u.*, c.ad tedarikci_ad
@@ -57,7 +165,7 @@ class SearchRepo:
             )
         )
 
-        stok_hareket = list(
+        out["stok_hareket"] = list(
             self.conn.execute(
                 """
                 SELECT h.*, u.kod urun_kod, u.ad urun_ad
@@ -68,10 +176,35 @@ class SearchRepo:
             )
         )
 
-        return {
-            "cariler": cariler,
-            "cari_hareket": ch,
-            "kasa": kasa,
-            "stok_urun": stok_urun,
-            "stok_hareket": stok_hareket,
-        }
+        out["banka"] = list(
+            self.conn.execute(
+                """
+                SELECT * FROM banka_hareket
+                WHERE aciklama LIKE ? OR referans LIKE ? OR belge LIKE ? OR etiket LIKE ?
+                ORDER BY tarih DESC LIMIT ?""",
+                (like, like, like, like, int(limit)),
+            )
+        )
+
+        out["fatura"] = list(
+            self.conn.execute(
+                """
+                SELECT * FROM fatura
+                WHERE fatura_no LIKE ? OR cari_ad LIKE ? OR notlar LIKE ? OR etiket LIKE ?
+                ORDER BY tarih DESC LIMIT ?""",
+                (like, like, like, like, int(limit)),
+            )
+        )
+
+        out["docs"] = list(
+            self.conn.execute(
+                """
+                SELECT * FROM docs
+                WHERE doc_no LIKE ? OR customer_name LIKE ? OR notes LIKE ?
+                ORDER BY doc_date DESC LIMIT ?""",
+                (like, like, like, int(limit)),
+            )
+        )
+
+        return out
+
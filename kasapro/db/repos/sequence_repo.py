@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""Boşluksuz numara sayaçları (sequences tablosu).
+
+Belge/fatura/doküman numaralarının tamamı buradan ayrılır. Artırma tek
+`UPDATE ... RETURNING` ile yapılır: okuma-değiştirme-yazma yarışı yoktur ve
+yazma kilidi yalnızca o satır güncellenirken tutulur. `reserve_block`
+çağıranın transaction'ı içinde çalışır (commit etmez); böylece numara,
+belgeyle aynı transaction'da kesinleşir ya da onunla birlikte geri alınır.
+
+Sayaç satırı ilk kullanımda `seed` ile (eski tablodaki son numara) bir kez
+başlatılır.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+SeedFn = Callable[[], int]
+
+DOC_NO_FORMAT = "{series}-{year}-{no_pad}"
+
+
+def _bump(cur: Any, name: str, count: int) -> Optional[int]:
+    if _HAS_RETURNING:
+        rows = cur.execute(
+            "UPDATE sequences SET last_no = last_no + ?, updated_at = CURRENT_TIMESTAMP WHERE name = ? RETURNING last_no",
+            (int(count), name),
+        ).fetchall()
+        return int(rows[0][0]) if rows else None
+    # Eski SQLite (< 3.35): UPDATE yazma kilidini aldıktan sonra okunan değer tutarlıdır
+    cur.execute(
+        "UPDATE sequences SET last_no = last_no + ?, updated_at = CURRENT_TIMESTAMP WHERE name = ?",
+        (int(count), name),
+    )
+    if not cur.rowcount:
+        return None
+    return int(cur.execute("SELECT last_no FROM sequences WHERE name = ?", (name,)).fetchone()[0])
+
+
+def reserve_block(cur: Any, name: str, count: int = 1, seed: Optional[SeedFn] = None) -> int:
+    """`name` sayacından ardışık `count` numara ayırır; bloğun SON numarasını döndürür.
+
+    Blok: (son - count + 1) .. son. Commit etmez.
+    """
+    count = int(count)
+    if count <= 0:
+        raise ValueError("count pozitif olmalı")
+    last = _bump(cur, name, count)
+    if last is None:
+        start = int(seed() if seed is not None else 0)
+        cur.execute("INSERT OR IGNORE INTO sequences(name, last_no) VALUES(?, ?)", (name, max(0, start)))
+        last = _bump(cur, name, count)
+    return int(last or 0)
+
+
+def format_doc_no(fmt: str, fallback: str, **values: Any) -> str:
+    try:
+        return fmt.format(**values)
+    except Exception:
+        return fallback
+
+
+def reserve_doc_no(cur: Any, company_id: int, series: str, year: int) -> str:
+    """docs (fatura/WMS) için '{series}-{year}-{no_pad}' biçimli numara.
+
+    Biçim/dolgu series_counters'tan okunur; numara sequences'tan ayrılır.
+    """
+    key = (int(company_id), str(series), int(year))
+    sql = "SELECT last_no, padding, format FROM series_counters WHERE company_id=? AND series=? AND year=?"
+    row = cur.execute(sql, key).fetchone()
+    if not row:
+        cur.execute(
+            """INSERT INTO series_counters(company_id, series, year, last_no, padding, format)
+               VALUES(?,?,?,?,?,?)""",
+            (*key, 0, 6, DOC_NO_FORMAT),
+        )
+        row = cur.execute(sql, key).fetchone()
+
+    padding = int(row["padding"] or 6)
+    fmt = str(row["format"] or DOC_NO_FORMAT)
+    legacy_last = int(row["last_no"] or 0)
+    new_no = reserve_block(cur, f"doc:{key[0]}:{key[1]}:{key[2]}", 1, seed=lambda: legacy_last)
+    no_pad = str(new_no).zfill(max(1, padding))
+    return format_doc_no(fmt, f"{series}-{year}-{no_pad}", series=series, year=year, no=new_no, no_pad=no_pad)
+
+
+class SequenceRepo:
+    """Sayaç erişimi.
+
+    block_size > 1 ise her thread sayaçtan `block_size`'lık blok ayırıp
+    numaraları bellekten verir (DB'ye blok başına bir yazma). Kullanılmadan
+    kalan numaralar boşluk bırakır; yasal olarak boşluksuz olması gereken
+    seriler (fatura) varsayılan block_size=1 ile kullanılmalıdır.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, block_size: int = 1):
+        self.conn = conn
+        self.block_size = max(1, int(block_size))
+        self._local = threading.local()
+        # set()/reset sonrası thread önbelleklerini geçersiz kılmak için
+        self._generation = 0
+
+    def reserve(self, name: str, count: int = 1, seed: Optional[SeedFn] = None, commit: bool = True) -> List[int]:
+        """Ardışık `count` numarayı ayırır ve commit eder (commit=False: çağıranın transaction'ında kalır)."""
+        count = int(count)
+        if count <= 0:
+            return []
+        cur = self.conn.cursor()
+        if not commit:
+            last = reserve_block(cur, name, count, seed)
+            return list(range(last - count + 1, last + 1))
+        try:
+            last = reserve_block(cur, name, count, seed)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return list(range(last - count + 1, last + 1))
+
+    def next(self, name: str, seed: Optional[SeedFn] = None) -> int:
+        if self.block_size <= 1:
+            return self.reserve(name, 1, seed)[0]
+        blocks: Dict[str, List[int]] = getattr(self._local, "blocks", None) or {}
+        if getattr(self._local, "generation", None) != self._generation:
+            blocks = {}
+        self._local.blocks = blocks
+        self._local.generation = self._generation
+        block = blocks.get(name)
+        if not block or block[0] > block[1]:
+            nums = self.reserve(name, self.block_size, seed)
+            block = blocks[name] = [nums[0], nums[-1]]
+        no = block[0]
+        block[0] += 1
+        return no
+
+    def current(self, name: str) -> Optional[int]:
+        row = self.conn.execute("SELECT last_no FROM sequences WHERE name = ?", (name,)).fetchone()
+        return None if row is None else int(row[0])
+
+    def set(self, name: str, last_no: int, commit: bool = True) -> None:
+        """Sayacı verilen son numaraya çeker (seri ayarı / elle düzeltme)."""
+        self.conn.execute(
+            """INSERT INTO sequences(name, last_no) VALUES(?, ?)
+               ON CONFLICT(name) DO UPDATE SET last_no = excluded.last_no, updated_at = CURRENT_TIMESTAMP""",
+            (name, max(0, int(last_no))),
+        )
+        if commit:
+            self.conn.commit()
+        self._generation += 1
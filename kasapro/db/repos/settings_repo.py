@@ -7,6 +7,7 @@ import re
 import sqlite3
 from typing import List, Optional, Callable
 
+from .sequence_repo import SequenceRepo
 from ...config import (
     DEFAULT_CURRENCIES,
     DEFAULT_PAYMENTS,
@@ -17,9 +18,15 @@ from ...config import (
 
 
 class SettingsRepo:
-    def __init__(self, conn: sqlite3.Connection, log_fn: Optional[Callable[[str, str], None]] = None):
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        log_fn: Optional[Callable[[str, str], None]] = None,
+        sequences: Optional[SequenceRepo] = None,
+    ):
         self.conn = conn
         self.log_fn = log_fn
+        self.sequences = sequences or SequenceRepo(conn)
 
     def get(self, key: str) -> Optional[str]:
         cur = self.conn.execute("SELECT value FROM settings WHERE key=?", (key,))
@@ -81,16 +88,21 @@ class SettingsRepo:
         return maxn
 
     def next_belge_no(self, prefix: str = "BLG") -> str:
-        prefix = (prefix or "BLG").strip().upper()
-        prefix = re.sub(r"[^A-Z0-9]+", "", prefix)[:6] or "BLG"
+        return self.reserve_belge_nos(prefix, 1)[0]
 
-        key = "belge_seq_global"
-        cur = self.get(key)
+    def _belge_seq_seed(self) -> int:
+        # Yalnızca sayaç ilk oluşturulurken: eski ayar ya da tek seferlik tarama
+        cur = self.get("belge_seq_global")
         if cur and str(cur).strip().isdigit():
-            seq = int(str(cur).strip())
-        else:
-            seq = self._scan_max_belge_seq()
+            return int(str(cur).strip())
+        return self._scan_max_belge_seq()
+
+    def reserve_belge_nos(self, prefix: str = "BLG", count: int = 1, commit: bool = True) -> List[str]:
+        """Ardışık `count` belge numarasını tek sayaç artırımıyla ayırır.
 
-        seq += 1
-        self.set(key, str(seq))
-        return f"{prefix}-{seq:06d}"
+        commit=False: çağıranın transaction'ında kalır (belgelerle birlikte yazılır/geri alınır).
+        """
+        prefix = (prefix or "BLG").strip().upper()
+        prefix = re.sub(r"[^A-Z0-9]+", "", prefix)[:6] or "BLG"
+        nums = self.sequences.reserve("belge", int(count), seed=self._belge_seq_seed, commit=commit)
+        return [f"{prefix}-{n:06d}" for n in nums]
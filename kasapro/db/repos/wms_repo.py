@@ -9,6 +9,7 @@ from datetime import date
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from ...utils import parse_date_smart, safe_float
+from .sequence_repo import reserve_doc_no
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +42,104 @@ DOC_DIRECTIONS = {
 }
 
 
+_LEDGER_INSERT_SQL = """
+    INSERT INTO stock_ledger(
+        company_id, branch_id, warehouse_id, location_id, item_id,
+        lot_id, serial_id, doc_id, doc_line_id, txn_date,
+        qty, direction, cost
+    ) VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+_BALANCE_UPSERT_SQL = """
+    INSERT INTO stock_balance(
+        company_id, branch_id, warehouse_id, location_id, item_id,
+        qty_on_hand, qty_reserved, qty_blocked
+    ) VALUES(?,?,?,?,?,?,?,?)
+    ON CONFLICT(company_id, branch_id, warehouse_id, location_id, item_id)
+    DO UPDATE SET
+        qty_on_hand = qty_on_hand + excluded.qty_on_hand,
+        qty_reserved = qty_reserved + excluded.qty_reserved,
+        qty_blocked = qty_blocked + excluded.qty_blocked,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# IN (...) listelerini SQLite parametre sınırının altında tut
+_IN_CHUNK = 500
+
+
+def _chunks(values: List[int], size: int = _IN_CHUNK) -> Iterable[List[int]]:
+    for i in range(0, len(values), size):
+        yield values[i : i + size]
+
+
+def _marks(values: List[int]) -> str:
+    return ",".join("?" for _ in values)
+
+
+def _ledger_row(
+    company_id: int,
+    branch_id: int,
+    warehouse_id: int,
+    location_id: int,
+    item_id: int,
+    lot_id: Optional[int],
+    serial_id: Optional[int],
+    doc_id: int,
+    doc_line_id: Optional[int],
+    txn_date: str,
+    qty: float,
+    direction: str,
+    cost: float,
+) -> Tuple[Any, ...]:
+    return (
+        int(company_id),
+        int(branch_id),
+        int(warehouse_id),
+        int(location_id) if location_id else None,
+        int(item_id),
+        int(lot_id) if lot_id else None,
+        int(serial_id) if serial_id else None,
+        int(doc_id),
+        int(doc_line_id) if doc_line_id else None,
+        parse_date_smart(txn_date),
+        float(qty),
+        str(direction),
+        float(cost),
+    )
+
+
+# Katman kalanı bu değerin altındaysa kapanmış sayılır
+_QTY_EPS = 1e-9
+
+# (katman_id, lot_id, kalan, birim_maliyet) - bellekte değiştirilebilir liste
+CostLayer = List[Any]
+
+
+def _consume_fifo(layers: List[CostLayer], qty: float, lot_id: Optional[int] = None) -> List[Tuple[CostLayer, float]]:
+    """Tarih sıralı açık katmanlardan `qty` kadar tüketir; (katman, miktar) listesi döner.
+
+    Lot verilirse yalnızca o lotun katmanları kullanılır. Baştaki kapanmış
+    katmanlar listeden atılır, böylece sonraki çıkışlar onları tekrar dolaşmaz.
+    """
+    need = float(qty)
+    taken: List[Tuple[CostLayer, float]] = []
+    for layer in layers:
+        if need <= _QTY_EPS:
+            break
+        if layer[2] <= _QTY_EPS or (lot_id and layer[1] != lot_id):
+            continue
+        take = min(need, layer[2])
+        layer[2] -= take
+        need -= take
+        taken.append((layer, take))
+    k = 0
+    while k < len(layers) and layers[k][2] <= _QTY_EPS:
+        k += 1
+    if k:
+        del layers[:k]
+    return taken
+
+
 class WMSRepo:
     def __init__(self, conn: sqlite3.Connection, log_fn=None) -> None:
         self.conn = conn
@@ -360,41 +459,7 @@ class WMSRepo:
             return 0
 
     def _reserve_doc_no(self, cur: sqlite3.Cursor, company_id: int, series: str, year: int) -> str:
-        cur.execute(
-            "SELECT last_no, padding, format FROM series_counters WHERE company_id=? AND series=? AND year=?",
-            (int(company_id), str(series), int(year)),
-        )
-        row = cur.fetchone()
-        if not row:
-            cur.execute(
-                """
-                INSERT INTO series_counters(company_id, series, year, last_no, padding, format)
-                VALUES(?,?,?,?,?,?)
-                """,
-                (int(company_id), str(series), int(year), 0, 6, "{series}-{year}-{no_pad}"),
-            )
-            cur.execute(
-                "SELECT last_no, padding, format FROM series_counters WHERE company_id=? AND series=? AND year=?",
-                (int(company_id), str(series), int(year)),
-            )
-            row = cur.fetchone()
-
-        last_no = int(row["last_no"] or 0)
-        padding = int(row["padding"] or 6)
-        fmt = str(row["format"] or "{series}-{year}-{no_pad}")
-
-        new_no = last_no + 1
-        no_pad = str(new_no).zfill(max(1, padding))
-        try:
-            doc_no = fmt.format(series=series, year=year, no=new_no, no_pad=no_pad)
-        except Exception:
-            doc_no = f"{series}-{year}-{no_pad}"
-
-        cur.execute(
-            "UPDATE series_counters SET last_no=?, updated_at=CURRENT_TIMESTAMP WHERE company_id=? AND series=? AND year=?",
-            (int(new_no), int(company_id), str(series), int(year)),
-        )
-        return doc_no
+        return reserve_doc_no(cur, company_id, series, year)
 
     # -----------------
     # Dokümanlar
@@ -536,202 +601,340 @@ class WMSRepo:
         username: str = "",
         negative_stock_policy: str = "forbid",
     ) -> None:
-        payload = self.get_doc(doc_id)
-        if not payload:
-            raise ValueError("Stock document not found.")
+        self.post_docs([doc_id], user_id=user_id, username=username, negative_stock_policy=negative_stock_policy)
 
-        header = payload["header"]
-        lines = payload["lines"]
-        status = str(header["status"] or "")
-        if status == "POSTED":
-            return
-        if status == "VOID":
-            raise ValueError("Voided document cannot be posted.")
+    def post_docs(
+        self,
+        doc_ids: Iterable[int],
+        user_id: Optional[int] = None,
+        username: str = "",
+        negative_stock_policy: str = "forbid",
+    ) -> List[int]:
+        """Fişleri tek `BEGIN IMMEDIATE` içinde toplu işler (hepsi ya da hiçbiri).
+
+        Kalemler ve bakiyeler belge başına değil, parti başına tek sorguyla
+        okunur; stok kontrolü bellekteki bakiye üzerinden yapılır. Hareketler
+        `executemany` ile yazılır, bakiye farkları (depo, lokasyon, ürün)
+        bazında toplanıp bir kez uygulanır. Dönüş: işlenen fiş id'leri.
+        """
+        ids = list(dict.fromkeys(int(d) for d in doc_ids))
+        if not ids:
+            return []
+
+        headers = {
+            int(r["id"]): r
+            for chunk in _chunks(ids)
+            for r in self.conn.execute(
+                f"SELECT * FROM docs WHERE id IN ({_marks(chunk)}) AND module='stock'",
+                tuple(chunk),
+            )
+        }
+        todo: List[int] = []
+        for doc_id in ids:
+            header = headers.get(doc_id)
+            if not header:
+                raise ValueError("Stock document not found.")
+            status = str(header["status"] or "")
+            if status == "POSTED":
+                continue
+            if status == "VOID":
+                raise ValueError("Voided document cannot be posted.")
+            company_id = int(header["company_id"])
+            branch_id = int(header["branch_id"] or 1)
+            if self.is_doc_locked(company_id, branch_id, str(header["doc_type"]), str(header["doc_no"])):
+                raise ValueError("Document is locked.")
+            if self.is_period_locked(company_id, branch_id, str(header["doc_date"])):
+                raise ValueError("Period is locked.")
+            if not DOC_DIRECTIONS.get(str(header["doc_type"]), ""):
+                raise ValueError(f"Unsupported doc type: {header['doc_type']}")
+            todo.append(doc_id)
+        if not todo:
+            return []
+
+        lines_by_doc: Dict[int, List[sqlite3.Row]] = {d: [] for d in todo}
+        for chunk in _chunks(todo):
+            for line in self.conn.execute(
+                f"SELECT * FROM doc_lines WHERE doc_id IN ({_marks(chunk)}) ORDER BY doc_id, line_no ASC",
+                tuple(chunk),
+            ):
+                lines_by_doc[int(line["doc_id"])].append(line)
+
+        warnings: List[Tuple[int, int, str]] = []
+        issues: List[Tuple[Any, ...]] = []
+        current_doc = 0
+        cur = self.conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            # Okumalar yazma kilidi alındıktan sonra: bakiye kontrolü tutarlı
+            items, balances = self._prefetch_posting_state(cur, [headers[d] for d in todo], lines_by_doc)
+            ledger_rows: List[Tuple[Any, ...]] = []
+            deltas: Dict[Tuple[int, int, int, int, int], float] = {}
+            for doc_id in todo:
+                current_doc = doc_id
+                self._plan_doc(
+                    headers[doc_id],
+                    lines_by_doc[doc_id],
+                    items,
+                    balances,
+                    deltas,
+                    ledger_rows,
+                    warnings,
+                    issues,
+                    negative_stock_policy,
+                )
+            if ledger_rows:
+                # Giriş satırları trigger ile maliyet katmanı açar
+                cur.executemany(_LEDGER_INSERT_SQL, ledger_rows)
+            if issues:
+                self._consume_cost_layers(cur, issues)
+            if deltas:
+                cur.executemany(
+                    _BALANCE_UPSERT_SQL,
+                    [(*key, float(delta), 0.0, 0.0) for key, delta in deltas.items()],
+                )
+            cur.executemany("UPDATE docs SET status='POSTED' WHERE id=?", [(d,) for d in todo])
+            cur.execute("COMMIT")
+        except Exception as exc:
+            cur.execute("ROLLBACK")
+            if isinstance(exc, WmsToleranceError):
+                self.conn.execute("UPDATE docs SET status='PENDING_APPROVAL' WHERE id=?", (int(current_doc),))
+                self.conn.commit()
+                raise ValueError(str(exc)) from exc
+            raise
 
+        for company_id, item_id, detail in warnings:
+            self._audit(company_id, "stock_policy", item_id, "NEGATIVE_WARN", None, detail)
+        for doc_id in todo:
+            header = headers[doc_id]
+            doc_type, doc_no = str(header["doc_type"]), str(header["doc_no"])
+            self._audit(int(header["company_id"]), "stock_doc", doc_id, "POST", user_id, f"{doc_type} {doc_no}")
+            if self.log_fn:
+                try:
+                    self.log_fn("Stok Fişi", f"POST {doc_type} {doc_no}")
+                except Exception:
+                    pass
+        return todo
+
+    def _prefetch_posting_state(
+        self,
+        cur: sqlite3.Cursor,
+        headers: List[sqlite3.Row],
+        lines_by_doc: Dict[int, List[sqlite3.Row]],
+    ) -> Tuple[Dict[Tuple[int, int], sqlite3.Row], Dict[Tuple[int, int, int, int, int], List[float]]]:
+        """Partideki kalemleri ve ilgili bakiyeleri şirket başına tek sorguda okur."""
+        item_ids: Dict[int, set] = {}
+        for header in headers:
+            ids = item_ids.setdefault(int(header["company_id"]), set())
+            ids.update(int(line["item_id"] or 0) for line in lines_by_doc[int(header["id"])])
+
+        items: Dict[Tuple[int, int], sqlite3.Row] = {}
+        balances: Dict[Tuple[int, int, int, int, int], List[float]] = {}
+        for company_id, ids in item_ids.items():
+            for chunk in _chunks(sorted(ids)):
+                cur.execute(
+                    f"SELECT id, track_lot, track_serial FROM items WHERE company_id=? AND id IN ({_marks(chunk)})",
+                    (company_id, *chunk),
+                )
+                for row in cur.fetchall():
+                    items[(company_id, int(row["id"]))] = row
+                cur.execute(
+                    f"""
+                    SELECT company_id, branch_id, warehouse_id, location_id, item_id,
+                           qty_on_hand, qty_reserved, qty_blocked
+                    FROM stock_balance
+                    WHERE company_id=? AND item_id IN ({_marks(chunk)})
+                    """,
+                    (company_id, *chunk),
+                )
+                for row in cur.fetchall():
+                    key = (
+                        int(row["company_id"]),
+                        int(row["branch_id"]),
+                        int(row["warehouse_id"]),
+                        int(row["location_id"] or 0),
+                        int(row["item_id"]),
+                    )
+                    balances[key] = [
+                        safe_float(row["qty_on_hand"]),
+                        safe_float(row["qty_reserved"]),
+                        safe_float(row["qty_blocked"]),
+                    ]
+        return items, balances
+
+    def _plan_doc(
+        self,
+        header: sqlite3.Row,
+        lines: List[sqlite3.Row],
+        items: Dict[Tuple[int, int], sqlite3.Row],
+        balances: Dict[Tuple[int, int, int, int, int], List[float]],
+        deltas: Dict[Tuple[int, int, int, int, int], float],
+        ledger_rows: List[Tuple[Any, ...]],
+        warnings: List[Tuple[int, int, str]],
+        issues: List[Tuple[Any, ...]],
+        negative_stock_policy: str,
+    ) -> None:
+        """Bir fişin hareket satırlarını, bakiye farklarını ve maliyet çıkışlarını bellekte hazırlar."""
+        doc_id = int(header["id"])
         company_id = int(header["company_id"])
         branch_id = int(header["branch_id"] or 1)
         warehouse_id = int(header["warehouse_id"] or 0)
-        doc_no = str(header["doc_no"])
         doc_type = str(header["doc_type"])
-        doc_date = str(header["doc_date"])
-
-        if self.is_doc_locked(company_id, branch_id, doc_type, doc_no):
-            raise ValueError("Document is locked.")
-        if self.is_period_locked(company_id, branch_id, doc_date):
-            raise ValueError("Period is locked.")
-
+        doc_date = parse_date_smart(str(header["doc_date"]))
         direction = DOC_DIRECTIONS.get(doc_type, "")
-        if not direction:
-            raise ValueError(f"Unsupported doc type: {doc_type}")
 
-        cur = self.conn.cursor()
-        cur.execute("BEGIN IMMEDIATE")
-        try:
-            for line in lines:
-                item_id = int(line["item_id"] or 0)
-                qty = safe_float(line["qty"])
-                if qty == 0:
-                    continue
-                item = self.conn.execute(
-                    "SELECT * FROM items WHERE id=? AND company_id=?",
-                    (item_id, company_id),
-                ).fetchone()
-                if not item:
-                    raise ValueError("Item not found for line.")
-                if int(item["track_lot"] or 0) == 1 and not line["lot_id"]:
-                    raise ValueError("Lot is required for this item.")
-                if int(item["track_serial"] or 0) == 1 and not line["serial_id"]:
-                    raise ValueError("Serial is required for this item.")
-
-                if doc_type == "TRF":
-                    src_wh = int(line["source_warehouse_id"] or 0)
-                    tgt_wh = int(line["target_warehouse_id"] or 0)
-                    src_loc = int(line["source_location_id"] or 0)
-                    tgt_loc = int(line["target_location_id"] or 0)
-                    if not src_wh or not tgt_wh:
-                        raise ValueError("Transfer requires source and target warehouses.")
-                    self._ensure_outbound_available(
-                        company_id,
-                        branch_id,
-                        src_wh,
-                        src_loc,
-                        item_id,
-                        qty,
-                        negative_stock_policy,
-                    )
-                    self._insert_ledger(
-                        cur,
-                        company_id,
-                        branch_id,
-                        src_wh,
-                        src_loc,
-                        item_id,
+        def move(wh: int, loc: int, line: sqlite3.Row, qty: float, kind: str, carry_wh: int = 0) -> None:
+            key = (company_id, branch_id, int(wh), int(loc or 0), int(line["item_id"]))
+            balances.setdefault(key, [0.0, 0.0, 0.0])[0] += qty
+            deltas[key] = deltas.get(key, 0.0) + qty
+            if qty < 0:
+                issues.append(
+                    (
+                        (company_id, branch_id, int(wh), int(line["item_id"])),
                         int(line["lot_id"] or 0) or None,
-                        int(line["serial_id"] or 0) or None,
-                        doc_id,
-                        int(line["id"]),
-                        doc_date,
                         -qty,
-                        "OUT",
-                        float(line["unit_price"] or 0),
-                    )
-                    self._update_balance(cur, company_id, branch_id, src_wh, src_loc, item_id, -qty)
-                    self._insert_ledger(
-                        cur,
-                        company_id,
-                        branch_id,
-                        tgt_wh,
-                        tgt_loc,
-                        item_id,
-                        int(line["lot_id"] or 0) or None,
-                        int(line["serial_id"] or 0) or None,
-                        doc_id,
-                        int(line["id"]),
-                        doc_date,
-                        qty,
-                        "IN",
-                        float(line["unit_price"] or 0),
-                    )
-                    self._update_balance(cur, company_id, branch_id, tgt_wh, tgt_loc, item_id, qty)
-                    continue
-
-                if doc_type == "COUNT":
-                    location_id = int(line["source_location_id"] or line["target_location_id"] or 0)
-                    on_hand = self.get_on_hand(company_id, branch_id, warehouse_id, location_id, item_id)
-                    diff = qty - on_hand
-                    tolerance_qty = safe_float(header["tolerance_qty"] if "tolerance_qty" in header.keys() else 0)
-                    tolerance_pct = safe_float(header["tolerance_pct"] if "tolerance_pct" in header.keys() else 0)
-                    if self._exceeds_tolerance(diff, tolerance_qty, tolerance_pct, on_hand):
-                        raise WmsToleranceError("Count difference exceeds tolerance.")
-                    if diff == 0:
-                        continue
-                    direction = "IN" if diff > 0 else "OUT"
-                    if diff < 0:
-                        self._ensure_outbound_available(
-                            company_id,
-                            branch_id,
-                            warehouse_id,
-                            location_id,
-                            item_id,
-                            abs(diff),
-                            negative_stock_policy,
-                        )
-                    self._insert_ledger(
-                        cur,
-                        company_id,
-                        branch_id,
-                        warehouse_id,
-                        location_id,
-                        item_id,
-                        int(line["lot_id"] or 0) or None,
-                        int(line["serial_id"] or 0) or None,
                         doc_id,
                         int(line["id"]),
-                        doc_date,
-                        diff,
-                        direction,
-                        float(line["unit_price"] or 0),
+                        int(carry_wh or 0),
                     )
-                    self._update_balance(cur, company_id, branch_id, warehouse_id, location_id, item_id, diff)
-                    continue
-
-                location_id = int(
-                    line["target_location_id"] if direction == "IN" else line["source_location_id"] or 0
                 )
-                if direction == "OUT":
-                    self._ensure_outbound_available(
-                        company_id,
-                        branch_id,
-                        warehouse_id,
-                        location_id,
-                        item_id,
-                        qty,
-                        negative_stock_policy,
-                    )
-                    qty_signed = -abs(qty)
-                else:
-                    qty_signed = abs(qty)
-                self._insert_ledger(
-                    cur,
+            ledger_rows.append(
+                _ledger_row(
                     company_id,
                     branch_id,
-                    warehouse_id,
-                    location_id,
-                    item_id,
+                    wh,
+                    loc,
+                    int(line["item_id"]),
                     int(line["lot_id"] or 0) or None,
                     int(line["serial_id"] or 0) or None,
                     doc_id,
                     int(line["id"]),
                     doc_date,
-                    qty_signed,
-                    "IN" if qty_signed > 0 else "OUT",
+                    qty,
+                    kind,
                     float(line["unit_price"] or 0),
                 )
-                self._update_balance(cur, company_id, branch_id, warehouse_id, location_id, item_id, qty_signed)
+            )
 
-            cur.execute("UPDATE docs SET status='POSTED' WHERE id=?", (int(doc_id),))
-            cur.execute("COMMIT")
-        except Exception as exc:
-            cur.execute("ROLLBACK")
-            if isinstance(exc, WmsToleranceError):
-                self.conn.execute("UPDATE docs SET status='PENDING_APPROVAL' WHERE id=?", (int(doc_id),))
-                self.conn.commit()
-                raise ValueError(str(exc)) from exc
-            raise
+        def ensure_available(wh: int, loc: int, item_id: int, qty: float) -> None:
+            on_hand, reserved, blocked = balances.get((company_id, branch_id, int(wh), int(loc or 0), item_id), (0.0, 0.0, 0.0))
+            available = on_hand - reserved - blocked
+            if available + 1e-9 < qty:
+                if negative_stock_policy == "allow":
+                    return
+                if negative_stock_policy == "warn":
+                    warnings.append((company_id, item_id, f"Available {available} < {qty}"))
+                    return
+                raise ValueError("Insufficient stock for outbound movement.")
+
+        for line in lines:
+            item_id = int(line["item_id"] or 0)
+            qty = safe_float(line["qty"])
+            if qty == 0:
+                continue
+            item = items.get((company_id, item_id))
+            if not item:
+                raise ValueError("Item not found for line.")
+            if int(item["track_lot"] or 0) == 1 and not line["lot_id"]:
+                raise ValueError("Lot is required for this item.")
+            if int(item["track_serial"] or 0) == 1 and not line["serial_id"]:
+                raise ValueError("Serial is required for this item.")
+
+            if doc_type == "TRF":
+                src_wh = int(line["source_warehouse_id"] or 0)
+                tgt_wh = int(line["target_warehouse_id"] or 0)
+                src_loc = int(line["source_location_id"] or 0)
+                tgt_loc = int(line["target_location_id"] or 0)
+                if not src_wh or not tgt_wh:
+                    raise ValueError("Transfer requires source and target warehouses.")
+                ensure_available(src_wh, src_loc, item_id, qty)
+                move(src_wh, src_loc, line, -qty, "OUT", carry_wh=tgt_wh)
+                move(tgt_wh, tgt_loc, line, qty, "IN")
+                continue
+
+            if doc_type == "COUNT":
+                location_id = int(line["source_location_id"] or line["target_location_id"] or 0)
+                on_hand = balances.get((company_id, branch_id, warehouse_id, location_id, item_id), [0.0])[0]
+                diff = qty - on_hand
+                tolerance_qty = safe_float(header["tolerance_qty"] if "tolerance_qty" in header.keys() else 0)
+                tolerance_pct = safe_float(header["tolerance_pct"] if "tolerance_pct" in header.keys() else 0)
+                if self._exceeds_tolerance(diff, tolerance_qty, tolerance_pct, on_hand):
+                    raise WmsToleranceError("Count difference exceeds tolerance.")
+                if diff == 0:
+                    continue
+                if diff < 0:
+                    ensure_available(warehouse_id, location_id, item_id, abs(diff))
+                move(warehouse_id, location_id, line, diff, "IN" if diff > 0 else "OUT")
+                continue
+
+            location_id = int((line["target_location_id"] if direction == "IN" else line["source_location_id"]) or 0)
+            if direction == "OUT":
+                ensure_available(warehouse_id, location_id, item_id, qty)
+                qty_signed = -abs(qty)
+            else:
+                qty_signed = abs(qty)
+            move(warehouse_id, location_id, line, qty_signed, "IN" if qty_signed > 0 else "OUT")
+
+    def _consume_cost_layers(self, cur: sqlite3.Cursor, issues: List[Tuple[Any, ...]]) -> None:
+        """Çıkışları açık katmanlardan FIFO sırasıyla düşer (tek okuma + toplu yazım).
+
+        Transferde hedef depodaki yeni katman, kaynakta tüketilen ortalama
+        maliyeti devralır.
+        """
+        item_ids: Dict[int, set] = {}
+        for key, *_ in issues:
+            item_ids.setdefault(key[0], set()).add(key[3])
 
-        self._audit(
-            company_id,
-            "stock_doc",
-            doc_id,
-            "POST",
-            user_id,
-            f"{doc_type} {doc_no}",
-        )
-        if self.log_fn:
-            try:
-                self.log_fn("Stok Fişi", f"POST {doc_type} {doc_no}")
-            except Exception:
-                pass
+        layers: Dict[Tuple[int, int, int, int], List[CostLayer]] = {}
+        for company_id, ids in item_ids.items():
+            for chunk in _chunks(sorted(ids)):
+                cur.execute(
+                    f"""
+                    SELECT id, branch_id, warehouse_id, item_id, lot_id, qty_remaining, unit_cost
+                    FROM cost_layers
+                    WHERE company_id=? AND item_id IN ({_marks(chunk)}) AND qty_remaining > 0 AND is_void=0
+                    ORDER BY txn_date ASC, id ASC
+                    """,
+                    (company_id, *chunk),
+                )
+                for r in cur.fetchall():
+                    key = (company_id, int(r["branch_id"]), int(r["warehouse_id"]), int(r["item_id"]))
+                    layers.setdefault(key, []).append(
+                        [int(r["id"]), r["lot_id"], safe_float(r["qty_remaining"]), safe_float(r["unit_cost"])]
+                    )
+
+        touched: Dict[int, CostLayer] = {}
+        consumption: List[Tuple[Any, ...]] = []
+        carries: List[Tuple[Any, ...]] = []
+        for key, lot_id, qty, doc_id, line_id, carry_wh in issues:
+            taken = _consume_fifo(layers.get(key, []), qty, lot_id)
+            cost = 0.0
+            used = 0.0
+            for layer, take in taken:
+                touched[layer[0]] = layer
+                consumption.append((layer[0], key[0], doc_id, line_id, take, layer[3]))
+                cost += take * layer[3]
+                used += take
+            if carry_wh and used > _QTY_EPS:
+                carries.append((cost / used, doc_id, line_id, carry_wh))
+
+        if touched:
+            cur.executemany(
+                "UPDATE cost_layers SET qty_remaining=? WHERE id=?",
+                [(max(0.0, layer[2]), layer_id) for layer_id, layer in touched.items()],
+            )
+        if consumption:
+            cur.executemany(
+                """
+                INSERT INTO cost_layer_consumption(layer_id, company_id, doc_id, doc_line_id, qty, unit_cost)
+                VALUES(?,?,?,?,?,?)
+                """,
+                consumption,
+            )
+        if carries:
+            cur.executemany(
+                "UPDATE cost_layers SET unit_cost=? WHERE doc_id=? AND doc_line_id=? AND warehouse_id=?",
+                carries,
+            )
 
     def void_doc(self, doc_id: int, user_id: Optional[int] = None, reason: str = "") -> None:
         payload = self.get_doc(doc_id)
@@ -760,33 +963,39 @@ class WMSRepo:
                     (int(doc_id), int(company_id), int(branch_id)),
                 )
             )
+            ledger_rows: List[Tuple[Any, ...]] = []
+            deltas: Dict[Tuple[int, int, int, int, int], float] = {}
             for row in rows:
                 qty = safe_float(row["qty"]) * -1
-                self._insert_ledger(
-                    cur,
-                    company_id,
-                    branch_id,
-                    int(row["warehouse_id"]),
-                    int(row["location_id"]) if row["location_id"] is not None else 0,
-                    int(row["item_id"]),
-                    int(row["lot_id"]) if row["lot_id"] is not None else None,
-                    int(row["serial_id"]) if row["serial_id"] is not None else None,
-                    doc_id,
-                    int(row["doc_line_id"]) if row["doc_line_id"] is not None else None,
-                    doc_date,
-                    qty,
-                    "REV",
-                    float(row["cost"] or 0),
+                warehouse_id = int(row["warehouse_id"])
+                location_id = int(row["location_id"]) if row["location_id"] is not None else 0
+                ledger_rows.append(
+                    _ledger_row(
+                        company_id,
+                        branch_id,
+                        warehouse_id,
+                        location_id,
+                        int(row["item_id"]),
+                        int(row["lot_id"]) if row["lot_id"] is not None else None,
+                        int(row["serial_id"]) if row["serial_id"] is not None else None,
+                        doc_id,
+                        int(row["doc_line_id"]) if row["doc_line_id"] is not None else None,
+                        doc_date,
+                        qty,
+                        "REV",
+                        float(row["cost"] or 0),
+                    )
                 )
-                self._update_balance(
-                    cur,
-                    company_id,
-                    branch_id,
-                    int(row["warehouse_id"]),
-                    int(row["location_id"]) if row["location_id"] is not None else 0,
-                    int(row["item_id"]),
-                    qty,
+                key = (company_id, branch_id, warehouse_id, location_id, int(row["item_id"]))
+                deltas[key] = deltas.get(key, 0.0) + qty
+            if ledger_rows:
+                cur.executemany(_LEDGER_INSERT_SQL, ledger_rows)
+            if deltas:
+                cur.executemany(
+                    _BALANCE_UPSERT_SQL,
+                    [(*key, float(delta), 0.0, 0.0) for key, delta in deltas.items()],
                 )
+            self._reverse_cost_layers(cur, int(doc_id))
             cur.execute(
                 "UPDATE docs SET status='VOID', notes=notes || ? WHERE id=?",
                 (f" VOID:{reason or ''}", int(doc_id)),
@@ -805,6 +1014,25 @@ class WMSRepo:
             f"{doc_type} {doc_no} {reason}",
         )
 
+    def _reverse_cost_layers(self, cur: sqlite3.Cursor, doc_id: int) -> None:
+        """Fişin tükettiği miktarları katmanlara iade eder, açtığı katmanları kapatır.
+
+        Başka bir iptalle kapatılmış (is_void=1) katmana iade yapılmaz; o stok geri gelmez.
+        """
+        cur.execute(
+            """
+            UPDATE cost_layers
+            SET qty_remaining = qty_remaining + (
+                SELECT SUM(c.qty) FROM cost_layer_consumption c
+                WHERE c.layer_id = cost_layers.id AND c.doc_id = ?
+            )
+            WHERE id IN (SELECT layer_id FROM cost_layer_consumption WHERE doc_id = ?) AND is_void=0
+            """,
+            (int(doc_id), int(doc_id)),
+        )
+        cur.execute("DELETE FROM cost_layer_consumption WHERE doc_id=?", (int(doc_id),))
+        cur.execute("UPDATE cost_layers SET qty_remaining=0, is_void=1 WHERE doc_id=?", (int(doc_id),))
+
     def list_ledger(
         self,
         company_id: int,
@@ -1051,18 +1279,7 @@ class WMSRepo:
         blocked_delta: float = 0,
     ) -> None:
         cur.execute(
-            """
-            INSERT INTO stock_balance(
-                company_id, branch_id, warehouse_id, location_id, item_id,
-                qty_on_hand, qty_reserved, qty_blocked
-            ) VALUES(?,?,?,?,?,?,?,?)
-            ON CONFLICT(company_id, branch_id, warehouse_id, location_id, item_id)
-            DO UPDATE SET
-                qty_on_hand = qty_on_hand + excluded.qty_on_hand,
-                qty_reserved = qty_reserved + excluded.qty_reserved,
-                qty_blocked = qty_blocked + excluded.qty_blocked,
-                updated_at = CURRENT_TIMESTAMP
-            """,
+            _BALANCE_UPSERT_SQL,
             (
                 int(company_id),
                 int(branch_id),
@@ -1093,27 +1310,21 @@ class WMSRepo:
         cost: float,
     ) -> None:
         cur.execute(
-            """
-            INSERT INTO stock_ledger(
-                company_id, branch_id, warehouse_id, location_id, item_id,
-                lot_id, serial_id, doc_id, doc_line_id, txn_date,
-                qty, direction, cost
-            ) VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?)
-            """,
-            (
-                int(company_id),
-                int(branch_id),
-                int(warehouse_id),
-                int(location_id) if location_id else None,
-                int(item_id),
-                int(lot_id) if lot_id else None,
-                int(serial_id) if serial_id else None,
-                int(doc_id),
-                int(doc_line_id) if doc_line_id else None,
-                parse_date_smart(txn_date),
-                float(qty),
-                str(direction),
-                float(cost),
+            _LEDGER_INSERT_SQL,
+            _ledger_row(
+                company_id,
+                branch_id,
+                warehouse_id,
+                location_id,
+                item_id,
+                lot_id,
+                serial_id,
+                doc_id,
+                doc_line_id,
+                txn_date,
+                qty,
+                direction,
+                cost,
             ),
         )
 
@@ -1170,21 +1381,22 @@ class WMSRepo:
         item_id: int,
         qty: float,
     ) -> float:
+        """Sıradaki `qty` çıkışın FIFO maliyeti (yalnızca açık katmanlar okunur)."""
         remaining = abs(qty)
         total = 0.0
         rows = self.conn.execute(
             """
-            SELECT qty, cost FROM stock_ledger
-            WHERE company_id=? AND branch_id=? AND warehouse_id=? AND item_id=? AND qty>0
+            SELECT qty_remaining, unit_cost FROM cost_layers
+            WHERE company_id=? AND item_id=? AND warehouse_id=? AND branch_id=? AND qty_remaining > 0 AND is_void=0
             ORDER BY txn_date ASC, id ASC
             """,
-            (int(company_id), int(branch_id), int(warehouse_id), int(item_id)),
-        ).fetchall()
+            (int(company_id), int(item_id), int(warehouse_id), int(branch_id)),
+        )
         for row in rows:
             if remaining <= 0:
                 break
-            take = min(remaining, safe_float(row["qty"]))
-            total += take * safe_float(row["cost"])
+            take = min(remaining, safe_float(row["qty_remaining"]))
+            total += take * safe_float(row["unit_cost"])
             remaining -= take
         return total
 
@@ -1195,19 +1407,171 @@ class WMSRepo:
         warehouse_id: int,
         item_id: int,
     ) -> float:
+        """Eldeki (tüketilmemiş) katmanların ağırlıklı ortalama maliyeti."""
         row = self.conn.execute(
             """
-            SELECT SUM(qty) AS qty_sum, SUM(qty * cost) AS cost_sum
-            FROM stock_ledger
-            WHERE company_id=? AND branch_id=? AND warehouse_id=? AND item_id=? AND qty>0
+            SELECT SUM(qty_remaining) AS qty_sum, SUM(qty_remaining * unit_cost) AS cost_sum
+            FROM cost_layers
+            WHERE company_id=? AND item_id=? AND warehouse_id=? AND branch_id=? AND qty_remaining > 0 AND is_void=0
             """,
-            (int(company_id), int(branch_id), int(warehouse_id), int(item_id)),
+            (int(company_id), int(item_id), int(warehouse_id), int(branch_id)),
         ).fetchone()
         qty_sum = safe_float(row["qty_sum"] if row else 0)
         if qty_sum <= 0:
             return 0.0
         return safe_float(row["cost_sum"] if row else 0) / qty_sum
 
+    def list_cost_layers(
+        self,
+        company_id: int,
+        branch_id: Optional[int] = None,
+        warehouse_id: Optional[int] = None,
+        item_id: Optional[int] = None,
+        lot_id: Optional[int] = None,
+        open_only: bool = True,
+    ) -> List[sqlite3.Row]:
+        clauses = ["company_id=?"]
+        params: List[Any] = [int(company_id)]
+        for col, val in (("branch_id", branch_id), ("warehouse_id", warehouse_id), ("item_id", item_id), ("lot_id", lot_id)):
+            if val:
+                clauses.append(f"{col}=?")
+                params.append(int(val))
+        if open_only:
+            clauses.append("qty_remaining > 0")
+        return list(
+            self.conn.execute(
+                f"""
+                SELECT * FROM cost_layers
+                WHERE {" AND ".join(clauses)}
+                ORDER BY item_id, warehouse_id, txn_date ASC, id ASC
+                """,
+                tuple(params),
+            )
+        )
+
+    def stock_valuation(
+        self,
+        company_id: int,
+        branch_id: Optional[int] = None,
+        warehouse_id: Optional[int] = None,
+        by_lot: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Eldeki stok değeri (açık katmanlardan).
+
+        `value` FIFO değerlemesidir (her katman kendi maliyetiyle); `avg_cost`
+        aynı katmanların ağırlıklı ortalamasıdır.
+        """
+        clauses = ["company_id=?", "qty_remaining > 0"]
+        params: List[Any] = [int(company_id)]
+        if branch_id:
+            clauses.append("branch_id=?")
+            params.append(int(branch_id))
+        if warehouse_id:
+            clauses.append("warehouse_id=?")
+            params.append(int(warehouse_id))
+        group = "warehouse_id, item_id" + (", lot_id" if by_lot else "")
+        rows = self.conn.execute(
+            f"""
+            SELECT {group}, SUM(qty_remaining) AS qty, SUM(qty_remaining * unit_cost) AS value,
+                   MIN(txn_date) AS oldest_layer
+            FROM cost_layers
+            WHERE {" AND ".join(clauses)}
+            GROUP BY {group}
+            ORDER BY {group}
+            """,
+            tuple(params),
+        ).fetchall()
+        out: List[Dict[str, Any]] = []
+        for r in rows:
+            data = dict(r)
+            qty = safe_float(data["qty"])
+            data["avg_cost"] = safe_float(data["value"]) / qty if qty > 0 else 0.0
+            out.append(data)
+        return out
+
+    def rebuild_cost_layers(self) -> int:
+        """Katmanları stock_ledger'dan yeniden kurar (giriş/çıkış kronolojik tekrar oynatılır).
+
+        Void edilmiş fişlerin hareketleri atlanır. Dönüş: oluşturulan katman sayısı.
+        """
+        rows = self.conn.execute(
+            """
+            SELECT l.*, d.doc_type FROM stock_ledger l
+            LEFT JOIN docs d ON d.id = l.doc_id
+            WHERE COALESCE(d.status, '') <> 'VOID'
+              AND ((l.qty > 0 AND l.direction = 'IN') OR (l.qty < 0 AND l.direction = 'OUT'))
+            ORDER BY l.txn_date ASC, l.id ASC
+            """
+        ).fetchall()
+        new_layers: List[Tuple[Any, ...]] = []
+        open_layers: Dict[Tuple[int, int, int, int], List[CostLayer]] = {}
+        consumption: List[Tuple[Any, ...]] = []
+        remaining: Dict[int, CostLayer] = {}
+        carried: Dict[Tuple[Any, Any], Tuple[float, float]] = {}
+        for r in rows:
+            key = (int(r["company_id"]), int(r["branch_id"]), int(r["warehouse_id"]), int(r["item_id"]))
+            qty = safe_float(r["qty"])
+            if qty > 0:
+                layer_id = len(new_layers) + 1
+                unit_cost = safe_float(r["cost"])
+                if r["doc_type"] == "TRF" and (r["doc_id"], r["doc_line_id"]) in carried:
+                    cost, used = carried[(r["doc_id"], r["doc_line_id"])]
+                    unit_cost = cost / used
+                layer = [layer_id, r["lot_id"], qty, unit_cost]
+                open_layers.setdefault(key, []).append(layer)
+                remaining[layer_id] = layer
+                new_layers.append(
+                    (
+                        layer_id,
+                        *key[:3],
+                        r["location_id"],
+                        key[3],
+                        r["lot_id"],
+                        int(r["id"]),
+                        r["doc_id"],
+                        r["doc_line_id"],
+                        r["txn_date"],
+                        qty,
+                        qty,
+                        unit_cost,
+                    )
+                )
+                continue
+            cost = used = 0.0
+            for layer, take in _consume_fifo(open_layers.get(key, []), -qty, r["lot_id"]):
+                consumption.append((layer[0], key[0], r["doc_id"], r["doc_line_id"], take, layer[3]))
+                cost += take * layer[3]
+                used += take
+            if used > _QTY_EPS:
+                carried[(r["doc_id"], r["doc_line_id"])] = (cost, used)
+
+        cur = self.conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            cur.execute("DELETE FROM cost_layer_consumption")
+            cur.execute("DELETE FROM cost_layers")
+            cur.executemany(
+                """
+                INSERT INTO cost_layers(
+                    id, company_id, branch_id, warehouse_id, location_id, item_id, lot_id,
+                    ledger_id, doc_id, doc_line_id, txn_date, qty_in, qty_remaining, unit_cost
+                ) VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+                """,
+                [row[:12] + (max(0.0, remaining[row[0]][2]),) + row[13:] for row in new_layers],
+            )
+            cur.executemany(
+                """
+                INSERT INTO cost_layer_consumption(layer_id, company_id, doc_id, doc_line_id, qty, unit_cost)
+                VALUES(?,?,?,?,?,?)
+                """,
+                consumption,
+            )
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+        return len(new_layers)
+
     @staticmethod
     def allocate_landed_cost(total_cost: float, weights: Iterable[float]) -> List[float]:
         weights = [safe_float(w) for w in weights]
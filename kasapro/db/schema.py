@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import hashlib
+import inspect
 import sqlite3
-from typing import Callable, Optional
+import types
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 
 def init_schema(conn: sqlite3.Connection) -> None:
@@ -4578,3 +4581,718 @@ def seed_defaults(conn: sqlite3.Connection, log_fn: Optional[Callable[[str, str]
         conn.commit()
     except Exception:
         pass
+
+
+# -----------------
+# Şema sürüm defteri (PRAGMA user_version + modül parmak izi)
+# -----------------
+# Tam init/migrate/seed geçişi binlerce DDL ve PRAGMA sorgusu demek; şirket
+# DB'si her açıldığında (ve her şirket değişiminde) tekrar çalışmasın diye
+# DB'nin hangi şema sürümüne ve hangi schema.py içeriğine göre kurulduğu
+# saklanır. Güncel bir DB tek sorguyla açılır.
+
+MigrationFn = Callable[[sqlite3.Connection, Optional[Callable[[str, str], None]]], None]
+
+# (version, name, fn) - sıralı; fn'ler idempotent olmalı (tam geçişte hepsi tekrar çalışır).
+MIGRATIONS: List[Tuple[int, str, MigrationFn]] = []
+
+
+def migration(version: int, name: str) -> Callable[[MigrationFn], MigrationFn]:
+    """Sürümlü migrasyon kaydı için dekoratör."""
+
+    def deco(fn: MigrationFn) -> MigrationFn:
+        if any(v == int(version) for v, _, _ in MIGRATIONS):
+            raise ValueError(f"Migration version {version} zaten kayıtlı")
+        MIGRATIONS.append((int(version), str(name), fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+
+    return deco
+
+
+def _code_digest(h: Any, value: Any) -> None:
+    """Kod nesnesini (bytecode + sabitler, iç içe fonksiyonlar dahil) özete katar.
+
+    Kaynağı olmayan (.pyc-only / frozen) kurulumlar için; set sabitleri
+    hash rastgeleleştirmesinden etkilenmesin diye sıralanır.
+    """
+    if isinstance(value, types.CodeType):
+        h.update(value.co_code)
+        h.update(repr(value.co_names).encode("utf-8"))
+        for const in value.co_consts:
+            _code_digest(h, const)
+    elif isinstance(value, (frozenset, set)):
+        h.update(repr(sorted(repr(v) for v in value)).encode("utf-8"))
+    elif isinstance(value, tuple):
+        for item in value:
+            _code_digest(h, item)
+    else:
+        h.update(repr(value).encode("utf-8"))
+
+
+def _schema_fingerprint() -> str:
+    """Baseline (init/migrate/seed) kaynağının özeti.
+
+    Sürümlü migrasyonlar parmak izine dahil değildir; onlar user_version ile
+    takip edilir. Baseline fonksiyonları değişirse bir sonraki açılışta tam
+    geçiş tetiklenir. Kaynak okunamazsa bytecode özetlenir ("code:" önekiyle,
+    kaynak özetiyle karışmasın); o da olmazsa "" döner ve her açılış tam geçiş yapar.
+    """
+    fns = (init_schema, _table_columns, _ensure_column, _ensure_index, migrate_schema, seed_defaults)
+    h = hashlib.sha1()
+    try:
+        for fn in fns:
+            h.update(inspect.getsource(fn).encode("utf-8"))
+        return h.hexdigest()[:16]
+    except (OSError, TypeError):
+        pass
+    h = hashlib.sha1()
+    try:
+        for fn in fns:
+            _code_digest(h, fn.__code__)
+    except AttributeError:
+        return ""
+    return "code:" + h.hexdigest()[:16]
+
+
+SCHEMA_FINGERPRINT = _schema_fingerprint()
+
+
+def schema_version() -> int:
+    """Kodun beklediği şema sürümü (baseline = 1)."""
+    return max([1] + [v for v, _, _ in MIGRATIONS])
+
+
+def _ensure_ledger(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            version INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            mode TEXT NOT NULL DEFAULT 'migrate',
+            fingerprint TEXT NOT NULL DEFAULT '',
+            applied_at TEXT NOT NULL
+        );"""
+    )
+
+
+def read_schema_state(conn: sqlite3.Connection) -> Tuple[int, str]:
+    """(user_version, son parmak izi) - tek sorgu. Defter yoksa (0, '')."""
+    try:
+        row = conn.execute(
+            "SELECT (SELECT user_version FROM pragma_user_version),"
+            " (SELECT fingerprint FROM schema_migrations ORDER BY id DESC LIMIT 1)"
+        ).fetchone()
+    except sqlite3.Error:
+        try:
+            row = conn.execute("PRAGMA user_version").fetchone()
+            return (int(row[0] or 0) if row else 0), ""
+        except sqlite3.Error:
+            return 0, ""
+    if not row:
+        return 0, ""
+    return int(row[0] or 0), str(row[1] or "")
+
+
+def ensure_schema(
+    conn: sqlite3.Connection,
+    log_fn: Optional[Callable[[str, str], None]] = None,
+    *,
+    repair: bool = False,
+) -> str:
+    """Şemayı güncel hale getirir.
+
+    Dönüş:
+      - "current":  DB zaten güncel, hiçbir DDL çalışmadı
+      - "migrated": yalnızca bekleyen sürümlü migrasyonlar çalıştı
+      - "repaired": tam init_schema + migrate_schema + seed_defaults geçişi yapıldı
+
+    `repair=True` eski idempotent yolu zorlar (bozuk/elle düzenlenmiş DB'ler için).
+    Yeni DB, parmak izi değişmiş schema.py veya defteri olmayan eski DB'ler
+    otomatik olarak tam geçişe girer; parmak izi hesaplanamıyorsa her açılış
+    tam geçiştir. Daha yeni bir sürümün yazdığı DB (user_version > hedef)
+    güncel sayılır, dokunulmaz.
+    """
+    target = schema_version()
+    version, fingerprint = read_schema_state(conn)
+    if not repair and version > target:
+        return "current"
+    if not repair and SCHEMA_FINGERPRINT and version == target and fingerprint == SCHEMA_FINGERPRINT:
+        return "current"
+
+    full = bool(repair or version <= 0 or not SCHEMA_FINGERPRINT or fingerprint != SCHEMA_FINGERPRINT)
+    if full:
+        init_schema(conn)
+        migrate_schema(conn, log_fn=log_fn)
+        seed_defaults(conn, log_fn=log_fn)
+        pending = list(MIGRATIONS)
+    else:
+        pending = [m for m in MIGRATIONS if m[0] > version]
+
+    for v, name, fn in pending:
+        fn(conn, log_fn)
+
+    from ..utils import now_iso
+
+    mode = "repair" if full else "migrate"
+    _ensure_ledger(conn)
+    applied = pending or [(target, "baseline", None)]
+    conn.executemany(
+        "INSERT INTO schema_migrations(version,name,mode,fingerprint,applied_at) VALUES(?,?,?,?,?)",
+        [(int(v), str(name), mode, SCHEMA_FINGERPRINT, now_iso()) for v, name, _ in applied],
+    )
+    # Yeni sürümlü bir uygulamanın yazdığı DB'yi geri sarma
+    conn.execute(f"PRAGMA user_version = {int(max(version, target))}")
+    conn.commit()
+    if log_fn:
+        try:
+            log_fn("Schema", f"{mode}: v{version} -> v{max(version, target)} ({SCHEMA_FINGERPRINT})")
+        except Exception:
+            pass
+    return "repaired" if full else "migrated"
+
+
+# -----------------
+# Global arama (FTS5) indeksi
+# -----------------
+# Tek bir FTS5 tablosu tüm varlıkları tutar. rowid = kayıt_id * 16 + varlık_kodu
+# olduğundan trigger'lar indeks satırını doğrudan rowid ile günceller/siler.
+# Metin tr_normalize ile aynı kurala göre (SQL karşılığı) normalize edilir,
+# unicode61 tokenizer geri kalan aksan/harf katlamasını yapar.
+
+SEARCH_FTS_TABLE = "search_fts"
+SEARCH_ROWID_STRIDE = 16
+
+# anahtar -> (kod, tablo, indekslenen kolonlar)
+SEARCH_ENTITIES: Dict[str, Tuple[int, str, Tuple[str, ...]]] = {
+    "cariler": (1, "cariler", ("ad", "tur", "telefon", "notlar")),
+    "cari_hareket": (2, "cari_hareket", ("tip", "aciklama", "odeme", "belge", "etiket")),
+    "kasa": (3, "kasa_hareket", ("tip", "kategori", "aciklama", "belge", "etiket")),
+    "stok_urun": (4, "stok_urun", ("kod", "ad", "kategori", "barkod")),
+    "stok_hareket": (5, "stok_hareket", ("tip", "aciklama")),
+    "banka": (6, "banka_hareket", ("banka", "hesap", "aciklama", "referans", "belge", "etiket")),
+    "fatura": (7, "fatura", ("fatura_no", "cari_ad", "cari_vkn", "notlar", "etiket")),
+    "docs": (8, "docs", ("doc_no", "doc_type", "customer_name", "notes")),
+}
+
+
+def _search_body_sql(prefix: str, cols: Sequence[str]) -> str:
+    from ..core.fuzzy import tr_normalize_sql
+
+    parts = " || ' ' || ".join(f"coalesce({prefix}{c},'')" for c in cols)
+    return tr_normalize_sql(parts)
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    try:
+        row = conn.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()
+        if row and int(row[0] or 0):
+            return True
+    except sqlite3.Error:
+        pass
+    # Bazı derlemelerde compile option listelenmiyor; geçici tabloyla dene
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def _ensure_search_index(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_FTS_TABLE} USING fts5("
+        "kind, body, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    for code, table, cols in SEARCH_ENTITIES.values():
+        cols = tuple(c for c in cols if c in _table_columns(conn, table))
+        if not cols:
+            continue
+        new_body = _search_body_sql("NEW.", cols)
+        rowid_new = f"NEW.id * {SEARCH_ROWID_STRIDE} + {code}"
+        rowid_old = f"OLD.id * {SEARCH_ROWID_STRIDE} + {code}"
+        conn.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS trg_{SEARCH_FTS_TABLE}_{table}_ai AFTER INSERT ON {table} BEGIN
+                INSERT OR REPLACE INTO {SEARCH_FTS_TABLE}(rowid, kind, body) VALUES ({rowid_new}, 'e{code}', {new_body});
+            END;"""
+        )
+        conn.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS trg_{SEARCH_FTS_TABLE}_{table}_au AFTER UPDATE OF {", ".join(cols)} ON {table} BEGIN
+                DELETE FROM {SEARCH_FTS_TABLE} WHERE rowid = {rowid_old};
+                INSERT INTO {SEARCH_FTS_TABLE}(rowid, kind, body) VALUES ({rowid_new}, 'e{code}', {new_body});
+            END;"""
+        )
+        conn.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS trg_{SEARCH_FTS_TABLE}_{table}_ad AFTER DELETE ON {table} BEGIN
+                DELETE FROM {SEARCH_FTS_TABLE} WHERE rowid = {rowid_old};
+            END;"""
+        )
+
+
+def rebuild_search_index(conn: sqlite3.Connection, log_fn: Optional[Callable[[str, str], None]] = None) -> int:
+    """FTS indeksini kaynak tablolardan sıfırdan doldurur. Dönüş: indekslenen satır sayısı."""
+    if not fts5_available(conn):
+        if log_fn:
+            log_fn("Search Index", "FTS5 desteklenmiyor; LIKE araması kullanılacak")
+        return 0
+    _ensure_search_index(conn)
+    total = 0
+    conn.execute(f"DELETE FROM {SEARCH_FTS_TABLE}")
+    for code, table, cols in SEARCH_ENTITIES.values():
+        cols = tuple(c for c in cols if c in _table_columns(conn, table))
+        if not cols:
+            continue
+        cur = conn.execute(
+            f"INSERT INTO {SEARCH_FTS_TABLE}(rowid, kind, body) "
+            f"SELECT id * {SEARCH_ROWID_STRIDE} + {code}, 'e{code}', {_search_body_sql('', cols)} FROM {table}"
+        )
+        total += max(0, int(cur.rowcount or 0))
+    conn.execute(f"INSERT INTO {SEARCH_FTS_TABLE}({SEARCH_FTS_TABLE}) VALUES('optimize')")
+    conn.commit()
+    if log_fn:
+        log_fn("Search Index", f"rebuilt: {total} rows")
+    return total
+
+
+@migration(2, "search_fts")
+def _migration_search_fts(conn: sqlite3.Connection, log_fn: Optional[Callable[[str, str], None]] = None) -> None:
+    if not fts5_available(conn):
+        return
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (SEARCH_FTS_TABLE,)
+    ).fetchone()
+    _ensure_search_index(conn)
+    conn.commit()
+    if not exists:
+        rebuild_search_index(conn, log_fn=log_fn)
+
+
+# -----------------
+# Cari bakiye özeti (cari_balance)
+# -----------------
+# cari_hareket üzerindeki trigger'lar her yazımda (UI, fatura, ticaret modülü)
+# ilgili (cari, para, ay) kovasını aynı transaction içinde günceller.
+_CARI_BALANCE_BUCKET = {
+    "para": "COALESCE(NULLIF({p}para,''),'TL')",
+    "ay": "substr(COALESCE({p}tarih,''),1,7)",
+    "borc": "CASE WHEN {p}tip='Borç' THEN COALESCE({p}tutar,0) ELSE 0 END",
+    "alacak": "CASE WHEN {p}tip='Alacak' THEN COALESCE({p}tutar,0) ELSE 0 END",
+}
+
+
+def _cari_balance_upsert_sql(p: str, sign: int) -> str:
+    b = {k: v.format(p=p) for k, v in _CARI_BALANCE_BUCKET.items()}
+    s = "" if sign > 0 else "-"
+    return f"""INSERT INTO cari_balance(cari_id, para, ay, borc, alacak, adet)
+                VALUES ({p}cari_id, {b['para']}, {b['ay']}, {s}({b['borc']}), {s}({b['alacak']}), {sign})
+                ON CONFLICT(cari_id, para, ay) DO UPDATE SET
+                    borc = borc + excluded.borc,
+                    alacak = alacak + excluded.alacak,
+                    adet = adet + excluded.adet;"""
+
+
+def _ensure_cari_balance(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS cari_balance(
+            cari_id INTEGER NOT NULL,
+            para TEXT NOT NULL,
+            ay TEXT NOT NULL,
+            borc REAL NOT NULL DEFAULT 0,
+            alacak REAL NOT NULL DEFAULT 0,
+            adet INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY(cari_id, para, ay)
+        ) WITHOUT ROWID"""
+    )
+    cleanup = "DELETE FROM cari_balance WHERE cari_id=OLD.cari_id AND adet<=0;"
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_cari_balance_ai AFTER INSERT ON cari_hareket BEGIN
+            {_cari_balance_upsert_sql("NEW.", 1)}
+        END;"""
+    )
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_cari_balance_au
+            AFTER UPDATE OF tarih, cari_id, tip, tutar, para ON cari_hareket BEGIN
+            {_cari_balance_upsert_sql("OLD.", -1)}
+            {_cari_balance_upsert_sql("NEW.", 1)}
+            {cleanup}
+        END;"""
+    )
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_cari_balance_ad AFTER DELETE ON cari_hareket BEGIN
+            {_cari_balance_upsert_sql("OLD.", -1)}
+            {cleanup}
+        END;"""
+    )
+
+
+def rebuild_cari_balance(conn: sqlite3.Connection, log_fn: Optional[Callable[[str, str], None]] = None) -> int:
+    """cari_balance tablosunu cari_hareket'ten sıfırdan hesaplar. Dönüş: kova sayısı."""
+    _ensure_cari_balance(conn)
+    b = {k: v.format(p="") for k, v in _CARI_BALANCE_BUCKET.items()}
+    try:
+        conn.execute("DELETE FROM cari_balance")
+        cur = conn.execute(
+            f"""INSERT INTO cari_balance(cari_id, para, ay, borc, alacak, adet)
+                SELECT cari_id, {b['para']}, {b['ay']}, SUM({b['borc']}), SUM({b['alacak']}), COUNT(*)
+                FROM cari_hareket
+                GROUP BY 1, 2, 3"""
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    total = max(0, int(cur.rowcount or 0))
+    if log_fn:
+        log_fn("Cari Balance", f"rebuilt: {total} buckets")
+    return total
+
+
+@migration(3, "cari_balance")
+def _migration_cari_balance(conn: sqlite3.Connection, log_fn: Optional[Callable[[str, str], None]] = None) -> None:
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='cari_balance'"
+    ).fetchone()
+    _ensure_cari_balance(conn)
+    conn.commit()
+    if not exists:
+        rebuild_cari_balance(conn, log_fn=log_fn)
+
+
+# -----------------
+# FIFO maliyet katmanları (cost_layers)
+# -----------------
+# Her giriş hareketi (stock_ledger, direction='IN') bir katman açar; trigger
+# sayesinde doğrudan yazılan giriş satırları da katmanlanır. Çıkışlar katmanları
+# WMSRepo.post_docs içinde FIFO sırasıyla tüketir (cost_layer_consumption),
+# void_doc tüketimi geri alır.
+def _ensure_cost_layers(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS cost_layers(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_id INTEGER NOT NULL,
+            branch_id INTEGER NOT NULL,
+            warehouse_id INTEGER NOT NULL,
+            location_id INTEGER,
+            item_id INTEGER NOT NULL,
+            lot_id INTEGER,
+            ledger_id INTEGER,
+            doc_id INTEGER,
+            doc_line_id INTEGER,
+            txn_date TEXT NOT NULL,
+            qty_in REAL NOT NULL,
+            qty_remaining REAL NOT NULL,
+            unit_cost REAL NOT NULL DEFAULT 0,
+            is_void INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS cost_layer_consumption(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            layer_id INTEGER NOT NULL,
+            company_id INTEGER NOT NULL,
+            doc_id INTEGER,
+            doc_line_id INTEGER,
+            qty REAL NOT NULL,
+            unit_cost REAL NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(layer_id) REFERENCES cost_layers(id)
+        )"""
+    )
+    # Yalnızca açık katmanlar indekslenir: FIFO okuması kapanmış geçmişi taramaz
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS idx_cost_layers_open
+           ON cost_layers(company_id, item_id, warehouse_id, branch_id, txn_date, id)
+           WHERE qty_remaining > 0"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cost_layers_doc ON cost_layers(doc_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cost_layers_lot ON cost_layers(company_id, lot_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cost_layer_consumption_doc ON cost_layer_consumption(doc_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cost_layer_consumption_layer ON cost_layer_consumption(layer_id)")
+    conn.execute(
+        """CREATE TRIGGER IF NOT EXISTS trg_cost_layers_ledger_ai
+           AFTER INSERT ON stock_ledger
+           WHEN NEW.qty > 0 AND NEW.direction = 'IN'
+           BEGIN
+               INSERT INTO cost_layers(
+                   company_id, branch_id, warehouse_id, location_id, item_id, lot_id,
+                   ledger_id, doc_id, doc_line_id, txn_date, qty_in, qty_remaining, unit_cost
+               ) VALUES (
+                   NEW.company_id, NEW.branch_id, NEW.warehouse_id, NEW.location_id, NEW.item_id, NEW.lot_id,
+                   NEW.id, NEW.doc_id, NEW.doc_line_id, NEW.txn_date, NEW.qty, NEW.qty, COALESCE(NEW.cost, 0)
+               );
+           END;"""
+    )
+
+
+@migration(4, "cost_layers")
+def _migration_cost_layers(conn: sqlite3.Connection, log_fn: Optional[Callable[[str, str], None]] = None) -> None:
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='cost_layers'"
+    ).fetchone()
+    _ensure_cost_layers(conn)
+    conn.commit()
+    if not exists:
+        from .repos.wms_repo import WMSRepo
+
+        n = WMSRepo(conn).rebuild_cost_layers()
+        if log_fn:
+            log_fn("Cost Layers", f"rebuilt: {n} layers")
+
+
+# -----------------
+# Entegrasyon iş kiraları (jobs.locked_by / lease_until)
+# -----------------
+@migration(5, "job_leases")
+def _migration_job_leases(conn: sqlite3.Connection, log_fn: Optional[Callable[[str, str], None]] = None) -> None:
+    _ensure_column(conn, "jobs", "locked_by", "TEXT", log_fn)
+    _ensure_column(conn, "jobs", "lease_until", "TEXT", log_fn)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs(company_id, lease_until) WHERE status = 'running'"
+    )
+    conn.commit()
+
+
+# -----------------
+# Numara sayaçları (bkz. repos.sequence_repo)
+# -----------------
+def _ensure_sequences(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS sequences(
+            name TEXT PRIMARY KEY,
+            last_no INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );"""
+    )
+
+
+@migration(6, "sequences")
+def _migration_sequences(conn: sqlite3.Connection, log_fn: Optional[Callable[[str, str], None]] = None) -> None:
+    # Sayaçlar ilk kullanımda eski tablolardan (settings/fatura_seri/series_counters) başlatılır
+    _ensure_sequences(conn)
+    conn.commit()
+
+
+# -----------------
+# Satış raporu küpü (günlük ön-toplamlar)
+# -----------------
+# satis_kup_fatura / satis_kup_kalem / satis_kup_odeme satış-iade faturalarının
+# gün x (tür, durum, cari, şube, depo, temsilci[, ürün, kategori | ödeme]) kırılımında
+# toplamlarıdır; satis_kup_urun_ay ürün kırılımının aylık özetidir (tarih filtresi
+# tam ayları kapsayan ürün raporları için), satis_kup_uyari ise veri uyarısı
+# sayılarının (fazla ödeme, kalem farkı, eksik cari) günlük dökümüdür. fatura/fatura_kalem/fatura_odeme trigger'ları yalnızca etkilenen
+# günü satis_kup_bekleyen'e yazar; SatisRaporRepo okumadan önce bu günleri
+# kaynaktan yeniden toplar (refresh_satis_kup). Böylece toplu yazmalar ucuz kalır
+# ve küp kayan nokta birikimi olmadan kaynakla birebir tutarlıdır.
+SATIS_KUP_TURLER = "('Satış','İade')"
+
+_SATIS_KUP_DIMS = "tarih, tur, durum, cari_id, cari_ad, sube, depo, satis_temsilcisi"
+_SATIS_KUP_DIMS_F = ", ".join(f"f.{c.strip()}" for c in _SATIS_KUP_DIMS.split(","))
+_SATIS_KUP_DIMS_DDL = """
+            tarih TEXT NOT NULL,
+            tur TEXT NOT NULL,
+            durum TEXT,
+            cari_id INTEGER,
+            cari_ad TEXT,
+            sube TEXT,
+            depo TEXT,
+            satis_temsilcisi TEXT,"""
+
+_SATIS_KUP_TABLES = {
+    "satis_kup_fatura": (
+        "genel_toplam REAL NOT NULL DEFAULT 0, iskonto_toplam REAL NOT NULL DEFAULT 0, adet INTEGER NOT NULL DEFAULT 0",
+        "genel_toplam, iskonto_toplam, adet",
+        "SUM(f.genel_toplam), SUM(f.iskonto_toplam), COUNT(*) FROM fatura f",
+        "",
+    ),
+    "satis_kup_kalem": (
+        "urun TEXT, kategori TEXT, miktar REAL NOT NULL DEFAULT 0, toplam REAL NOT NULL DEFAULT 0, "
+        "maliyet_toplam REAL NOT NULL DEFAULT 0",
+        "urun, kategori, miktar, toplam, maliyet_toplam",
+        "fk.urun, fk.kategori, SUM(fk.miktar), SUM(fk.toplam), SUM(fk.maliyet * fk.miktar) "
+        "FROM fatura f JOIN fatura_kalem fk ON fk.fatura_id = f.id",
+        ", fk.urun, fk.kategori",
+    ),
+    "satis_kup_odeme": (
+        "odeme_tarih TEXT, odeme TEXT, tutar REAL NOT NULL DEFAULT 0",
+        "odeme_tarih, odeme, tutar",
+        "o.tarih, o.odeme, SUM(o.tutar) FROM fatura f JOIN fatura_odeme o ON o.fatura_id = f.id",
+        ", o.tarih, o.odeme",
+    ),
+}
+
+
+def _satis_kup_mark_parent_sql(ref: str) -> str:
+    return (
+        "INSERT OR IGNORE INTO satis_kup_bekleyen(tarih) "
+        f"SELECT tarih FROM fatura WHERE id = {ref}.fatura_id AND tur IN {SATIS_KUP_TURLER};"
+    )
+
+
+def _ensure_satis_kup(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE TABLE IF NOT EXISTS satis_kup_bekleyen(tarih TEXT PRIMARY KEY) WITHOUT ROWID")
+    for table, (measures_ddl, _cols, _select, _group) in _SATIS_KUP_TABLES.items():
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table}({_SATIS_KUP_DIMS_DDL} {measures_ddl})")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_tarih ON {table}(tarih)")
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS satis_kup_urun_ay(
+            ay TEXT NOT NULL,
+            tur TEXT NOT NULL,
+            durum TEXT,
+            urun TEXT,
+            kategori TEXT,
+            miktar REAL NOT NULL DEFAULT 0,
+            toplam REAL NOT NULL DEFAULT 0,
+            maliyet_toplam REAL NOT NULL DEFAULT 0
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_satis_kup_urun_ay_ay ON satis_kup_urun_ay(ay)")
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS satis_kup_uyari(
+            tarih TEXT PRIMARY KEY,
+            fazla_odeme INTEGER NOT NULL DEFAULT 0,
+            kalem_farki INTEGER NOT NULL DEFAULT 0,
+            cari_eksik INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID"""
+    )
+
+    mark = "INSERT OR IGNORE INTO satis_kup_bekleyen(tarih) VALUES ({}.tarih);"
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_satis_kup_fatura_ai AFTER INSERT ON fatura
+            WHEN NEW.tur IN {SATIS_KUP_TURLER} BEGIN {mark.format("NEW")} END;"""
+    )
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_satis_kup_fatura_au
+            AFTER UPDATE OF {_SATIS_KUP_DIMS}, genel_toplam, iskonto_toplam ON fatura
+            WHEN OLD.tur IN {SATIS_KUP_TURLER} OR NEW.tur IN {SATIS_KUP_TURLER} BEGIN
+            {mark.format("OLD")}
+            {mark.format("NEW")}
+        END;"""
+    )
+    conn.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_satis_kup_fatura_ad AFTER DELETE ON fatura
+            WHEN OLD.tur IN {SATIS_KUP_TURLER} BEGIN {mark.format("OLD")} END;"""
+    )
+    for child, cols in (("fatura_kalem", "fatura_id, urun, kategori, miktar, toplam, maliyet"),
+                        ("fatura_odeme", "fatura_id, tarih, tutar, odeme")):
+        conn.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS trg_satis_kup_{child}_ai AFTER INSERT ON {child} BEGIN
+                {_satis_kup_mark_parent_sql("NEW")}
+            END;"""
+        )
+        conn.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS trg_satis_kup_{child}_au AFTER UPDATE OF {cols} ON {child} BEGIN
+                {_satis_kup_mark_parent_sql("OLD")}
+                {_satis_kup_mark_parent_sql("NEW")}
+            END;"""
+        )
+        # Fatura silinirken (CASCADE) üst kayıt yoksa günü zaten fatura trigger'ı işaretler
+        conn.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS trg_satis_kup_{child}_ad AFTER DELETE ON {child} BEGIN
+                {_satis_kup_mark_parent_sql("OLD")}
+            END;"""
+        )
+
+
+def refresh_satis_kup(conn: sqlite3.Connection, chunk: int = 400) -> int:
+    """Bekleyen günleri kaynaktan yeniden toplar. Dönüş: yenilenen gün sayısı."""
+    days = [r[0] for r in conn.execute("SELECT tarih FROM satis_kup_bekleyen").fetchall()]
+    if not days:
+        return 0
+    cur = conn.cursor()
+    try:
+        for i in range(0, len(days), chunk):
+            part = days[i : i + chunk]
+            marks = ",".join("?" for _ in part)
+            for table, (_ddl, cols, select_sql, group_sql) in _SATIS_KUP_TABLES.items():
+                cur.execute(f"DELETE FROM {table} WHERE tarih IN ({marks})", part)
+                cur.execute(
+                    f"""INSERT INTO {table}({_SATIS_KUP_DIMS}, {cols})
+                        SELECT {_SATIS_KUP_DIMS_F}, {select_sql}
+                        WHERE f.tarih IN ({marks}) AND f.tur IN {SATIS_KUP_TURLER}
+                        GROUP BY {_SATIS_KUP_DIMS_F}{group_sql}""",
+                    part,
+                )
+            cur.execute(f"DELETE FROM satis_kup_uyari WHERE tarih IN ({marks})", part)
+            cur.execute(
+                f"""INSERT INTO satis_kup_uyari(tarih, fazla_odeme, kalem_farki, cari_eksik)
+                    SELECT f.tarih,
+                        SUM((SELECT COALESCE(SUM(o.tutar),0) FROM fatura_odeme o WHERE o.fatura_id=f.id)
+                            > f.genel_toplam + 0.01),
+                        SUM(ABS((SELECT COALESCE(SUM(k.toplam),0) FROM fatura_kalem k WHERE k.fatura_id=f.id)
+                            - f.genel_toplam) > 0.01),
+                        SUM((f.cari_id IS NULL OR f.cari_id=0) AND COALESCE(f.cari_ad,'')='')
+                    FROM fatura f
+                    WHERE f.tarih IN ({marks}) AND f.tur IN {SATIS_KUP_TURLER} AND f.durum<>'İptal'
+                    GROUP BY f.tarih""",
+                part,
+            )
+            cur.execute(f"DELETE FROM satis_kup_bekleyen WHERE tarih IN ({marks})", part)
+        for ay in sorted({str(d)[:7] for d in days}):
+            cur.execute("DELETE FROM satis_kup_urun_ay WHERE ay=?", (ay,))
+            cur.execute(
+                """INSERT INTO satis_kup_urun_ay(ay, tur, durum, urun, kategori, miktar, toplam, maliyet_toplam)
+                   SELECT ?, tur, durum, urun, kategori, SUM(miktar), SUM(toplam), SUM(maliyet_toplam)
+                   FROM satis_kup_kalem
+                   WHERE tarih >= ? AND tarih <= ?
+                   GROUP BY tur, durum, urun, kategori""",
+                (ay, f"{ay}-01", f"{ay}-31"),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(days)
+
+
+def rebuild_satis_kup(conn: sqlite3.Connection, log_fn: Optional[Callable[[str, str], None]] = None) -> int:
+    """Tüm günleri yeniden toplar. Dönüş: gün sayısı."""
+    _ensure_satis_kup(conn)
+    conn.execute(
+        f"INSERT OR IGNORE INTO satis_kup_bekleyen(tarih) SELECT DISTINCT tarih FROM fatura WHERE tur IN {SATIS_KUP_TURLER}"
+    )
+    conn.commit()
+    total = refresh_satis_kup(conn)
+    if log_fn:
+        log_fn("Satış Küpü", f"rebuilt: {total} days")
+    return total
+
+
+@migration(7, "satis_kup")
+def _migration_satis_kup(conn: sqlite3.Connection, log_fn: Optional[Callable[[str, str], None]] = None) -> None:
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='satis_kup_fatura'"
+    ).fetchone()
+    _ensure_satis_kup(conn)
+    conn.commit()
+    if not exists:
+        rebuild_satis_kup(conn, log_fn=log_fn)
+
+
+# -----------------
+# Hakediş metraj indeksi (bkz. HakedisRepo.pay_estimate_calculate)
+# -----------------
+@migration(8, "measurements_boq_index")
+def _migration_measurements_boq_index(
+    conn: sqlite3.Connection, log_fn: Optional[Callable[[str, str], None]] = None
+) -> None:
+    # Poz başına önceki/dönem içi metraj toplamları tek sorguda bu indeksten okunur
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_measurements_boq ON measurements(company_id, boq_item_id, tarih)"
+    )
+    conn.commit()
+
+
+# -----------------
+# Hatırlatma zamanlayıcı indeksi (bkz. notes_reminders.scheduler.ReminderScheduler)
+# -----------------
+@migration(9, "reminders_schedule_index")
+def _migration_reminders_schedule_index(
+    conn: sqlite3.Connection, log_fn: Optional[Callable[[str, str], None]] = None
+) -> None:
+    # Hatırlatma zamanlayıcısı açılışta şirketin 'scheduled' kayıtlarını bu indeksten okur
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_reminders_status_due ON reminders(company_id, status, due_at)"
+    )
+    conn.commit()
@@ -317,6 +317,13 @@ class UsersDB:
         except Exception:
             pass
 
+        # companies tablosuna last_used_at ekle (yoksa) - son kullanılan şirketler sırası
+        try:
+            if "last_used_at" not in self._table_columns("companies"):
+                self.conn.execute("ALTER TABLE companies ADD COLUMN last_used_at TEXT;")
+        except Exception:
+            pass
+
         try:
             self.conn.commit()
         except Exception:
@@ -423,10 +430,21 @@ class UsersDB:
             if "last_company_id" not in cols:
                 return
             self.conn.execute("UPDATE users SET last_company_id=? WHERE id=?", (int(company_id), int(user_id)))
+            self.conn.execute("UPDATE companies SET last_used_at=? WHERE id=?", (now_iso(), int(company_id)))
             self.conn.commit()
         except Exception:
             pass
 
+    def recent_companies(self, user_id: int, limit: int = 3) -> List[sqlite3.Row]:
+        """Kullanıcının şirketleri, en son kullanılan başta."""
+        try:
+            return list(self.conn.execute(
+                "SELECT * FROM companies WHERE user_id=? ORDER BY COALESCE(last_used_at,'') DESC, id LIMIT ?",
+                (int(user_id), max(0, int(limit)))
+            ))
+        except Exception:
+            return []
+
     def add_company(self, user_id: int, company_name: str) -> int:
         company_name = (company_name or "").strip()
         if not company_name:
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 import sqlite3
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Dict, Iterable, List, Optional, Tuple
@@ -449,7 +450,16 @@ class HakedisRepo:
             (company_id, contract_id),
         ).fetchall()
 
-    def pay_estimate_calculate(self, company_id: int, period_id: int) -> Dict[str, float]:
+    def pay_estimate_calculate(
+        self, company_id: int, period_id: int, timings: Optional[Dict[str, float]] = None
+    ) -> Dict[str, float]:
+        """Dönemin hakediş satırlarını yeniden hesaplar.
+
+        Tüm pozların önceki/dönem içi metrajları tek GROUP BY sorgusuyla okunur,
+        satırlar bellekte hesaplanıp toplu yazılır. `timings` verilirse aşama
+        süreleri (saniye) içine yazılır: load_s, compute_s, write_s, total_s.
+        """
+        t0 = time.perf_counter()
         period = self.period_get(company_id, period_id)
         if not period:
             raise ValueError("Hakediş dönemi bulunamadı.")
@@ -457,59 +467,100 @@ class HakedisRepo:
         start_date = str(period["start_date"])
         end_date = str(period["end_date"])
 
+        prev_sql, prev_params = self._measurement_filter("m.", None, start_date)
+        cur_sql, cur_params = self._measurement_filter("m.", start_date, end_date)
+        rows = self.conn.execute(
+            f"""
+            SELECT b.id, b.unit_price,
+                   COALESCE(SUM(CASE WHEN {prev_sql} THEN m.qty END), 0),
+                   COALESCE(SUM(CASE WHEN {cur_sql} THEN m.qty END), 0)
+            FROM boq_items b
+            LEFT JOIN measurements m
+              ON m.company_id=b.company_id AND m.boq_item_id=b.id AND m.status='active'
+            WHERE b.company_id=? AND b.contract_id=? AND b.status='active'
+            GROUP BY b.id
+            ORDER BY b.poz_code, b.id
+            """,
+            (*prev_params, *cur_params, company_id, contract_id),
+        ).fetchall()
+        t_load = time.perf_counter()
+
+        now = self._now()
         lines = []
-        boq_rows = self.boq_list(company_id, contract_id)
-        for row in boq_rows:
-            boq_id = int(row["id"])
-            unit_price = float(row["unit_price"] or 0)
-            prev_qty = self._sum_measurement_qty(company_id, boq_id, None, start_date)
-            current_qty = self._sum_measurement_qty(company_id, boq_id, start_date, end_date)
+        for boq_id, unit_price, prev_qty, current_qty in rows:
+            unit_price = float(unit_price or 0)
+            prev_qty = float(prev_qty or 0)
+            current_qty = float(current_qty or 0)
             cum_qty = prev_qty + current_qty
-            prev_amount = prev_qty * unit_price
-            current_amount = current_qty * unit_price
-            cum_amount = cum_qty * unit_price
             lines.append(
                 (
+                    company_id,
                     period_id,
-                    boq_id,
+                    int(boq_id),
                     prev_qty,
                     current_qty,
                     cum_qty,
                     unit_price,
-                    prev_amount,
-                    current_amount,
-                    cum_amount,
+                    prev_qty * unit_price,
+                    current_qty * unit_price,
+                    cum_qty * unit_price,
                     "active",
-                    self._now(),
+                    now,
                 )
             )
+        t_compute = time.perf_counter()
 
-        self.conn.execute(
-            "UPDATE pay_estimate_lines SET status='passive' WHERE company_id=? AND pay_estimate_id=?",
-            (company_id, period_id),
-        )
-        self.conn.executemany(
-            """
-            INSERT INTO pay_estimate_lines(
-                company_id, pay_estimate_id, boq_item_id,
-                prev_qty, current_qty, cum_qty, unit_price,
-                prev_amount, current_amount, cum_amount, status, created_at
-            ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
-            """,
-            [(company_id, *line) for line in lines],
-        )
-        self.conn.commit()
-        totals = self._sum_pay_estimate_totals(company_id, period_id)
-        deductions = self._calculate_deductions(company_id, period_id, contract_id, totals["current_total"])
+        try:
+            self.conn.execute(
+                "UPDATE pay_estimate_lines SET status='passive' WHERE company_id=? AND pay_estimate_id=?",
+                (company_id, period_id),
+            )
+            self.conn.executemany(
+                """
+                INSERT INTO pay_estimate_lines(
+                    company_id, pay_estimate_id, boq_item_id,
+                    prev_qty, current_qty, cum_qty, unit_price,
+                    prev_amount, current_amount, cum_amount, status, created_at
+                ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
+                """,
+                lines,
+            )
+            totals = self._sum_pay_estimate_totals(company_id, period_id)
+            deductions = self._calculate_deductions(company_id, period_id, contract_id, totals["current_total"])
+            self.conn.execute(
+                "UPDATE pay_estimates SET updated_at=? WHERE id=?",
+                (self._now(), period_id),
+            )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
         net = totals["current_total"] - deductions
-        self.conn.execute(
-            "UPDATE pay_estimates SET updated_at=? WHERE id=?",
-            (self._now(), period_id),
-        )
-        self.conn.commit()
+        t_write = time.perf_counter()
         self._audit(company_id, "pay_estimates", period_id, "calculate", detail=f"net={net:.2f}")
+        if timings is not None:
+            timings.update(
+                {
+                    "lines": float(len(lines)),
+                    "load_s": round(t_load - t0, 4),
+                    "compute_s": round(t_compute - t_load, 4),
+                    "write_s": round(t_write - t_compute, 4),
+                    "total_s": round(time.perf_counter() - t0, 4),
+                }
+            )
         return {"net": net, **totals}
 
+    @staticmethod
+    def _measurement_filter(
+        prefix: str, start_date: Optional[str], end_date: Optional[str]
+    ) -> Tuple[str, List[Any]]:
+        """Metraj tarih koşulu: başlangıç+bitiş -> aralık, yalnız bitiş -> öncesi."""
+        if start_date and end_date:
+            return f"{prefix}tarih>=? AND {prefix}tarih<=?", [start_date, end_date]
+        if end_date and not start_date:
+            return f"{prefix}tarih<?", [end_date]
+        return "1", []
+
     def _sum_measurement_qty(
         self,
         company_id: int,
@@ -517,18 +568,14 @@ class HakedisRepo:
         start_date: Optional[str],
         end_date: Optional[str],
     ) -> float:
-        base_sql = """
+        cond, extra = self._measurement_filter("", start_date, end_date)
+        row = self.conn.execute(
+            f"""
             SELECT COALESCE(SUM(qty),0) FROM measurements
-            WHERE company_id=? AND boq_item_id=? AND status='active'
-        """
-        params: List[Any] = [company_id, boq_item_id]
-        if start_date and end_date:
-            base_sql += " AND tarih>=? AND tarih<=?"
-            params.extend([start_date, end_date])
-        elif end_date and not start_date:
-            base_sql += " AND tarih<?"
-            params.append(end_date)
-        row = self.conn.execute(base_sql, params).fetchone()
+            WHERE company_id=? AND boq_item_id=? AND status='active' AND {cond}
+            """,
+            [company_id, boq_item_id, *extra],
+        ).fetchone()
         return float(row[0] or 0)
 
     def _sum_pay_estimate_totals(self, company_id: int, period_id: int) -> Dict[str, float]:
@@ -581,7 +628,7 @@ class HakedisRepo:
         add_deduction("retention", retention_rate)
         add_deduction("advance", advance_rate)
         add_deduction("penalty", penalty_rate)
-        self.conn.commit()
+        # commit çağırana ait: pay_estimate_calculate tek işlemde yazar
         return total
 
     def pay_estimate_lines(self, company_id: int, period_id: int) -> List[sqlite3.Row]:
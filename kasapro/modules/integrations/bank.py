@@ -3,15 +3,23 @@ from __future__ import annotations
 
 import csv
 import hashlib
+import json
+import re
+import xml.etree.ElementTree as ET
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional, Tuple
-
-from kasapro.utils import parse_date_smart
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from .reconcile import CENTS_SQL, ReconcileCandidate, ReconcileEngine, parse_day, to_cents
 from .repo import IntegrationRepo
 
+PAYMENT_REF_PREFIX = "payment:"
+
+# Ekstre içe aktarımında tek executemany'e giden satır sayısı
+IMPORT_CHUNK_ROWS = 1000
+
 
 @dataclass
 class BankTransactionRow:
@@ -20,20 +28,196 @@ class BankTransactionRow:
     description: str
 
 
+# -----------------
+# Ekstre ayrıştırıcıları
+# -----------------
+# Her ayrıştırıcı dosyayı satır satır/öğe öğe okuyup BankTransactionRow üretir;
+# dosyanın tamamı belleğe alınmaz.
+StatementParser = Callable[[Path], Iterator[BankTransactionRow]]
+
+_PARSERS: Dict[str, StatementParser] = {}
+_SUFFIXES: Dict[str, str] = {}
+
+
+def register_statement_parser(fmt: str, parser: StatementParser, suffixes: Iterable[str] = ()) -> None:
+    """Yeni ekstre biçimi ekler (veya mevcut olanı değiştirir)."""
+    fmt = fmt.lower()
+    _PARSERS[fmt] = parser
+    for suffix in suffixes:
+        _SUFFIXES[suffix.lower()] = fmt
+
+
+def statement_formats() -> List[str]:
+    return sorted(_PARSERS)
+
+
+def detect_statement_format(path: Path) -> str:
+    """Uzantıdan; uzantı bilinmiyor ya da birden çok biçimde kullanılıyorsa (.txt) dosya başından."""
+    fmt = _SUFFIXES.get(path.suffix.lower())
+    if fmt:
+        return fmt
+    with path.open("r", encoding="utf-8", errors="replace") as f:
+        head = f.read(2048)
+    if "camt.053" in head:
+        return "camt053"
+    if re.search(r"^:(20|25|60[FM]):", head, re.M):
+        return "mt940"
+    return "csv"
+
+
+def iter_statement(path: Path, fmt: Optional[str] = None) -> Iterator[BankTransactionRow]:
+    fmt = (fmt or detect_statement_format(path)).lower()
+    parser = _PARSERS.get(fmt)
+    if parser is None:
+        raise ValueError(f"Desteklenmeyen ekstre biçimi: {fmt}")
+    return parser(path)
+
+
+def _statement_date(value: object) -> Optional[str]:
+    """yyyy-mm-dd veya gg.aa.yyyy; geçersizse None (parse_date_smart gibi bugüne düşmez)."""
+    s = str(value or "").strip()
+    m = re.fullmatch(r"(\d{4})-(\d{2})-(\d{2})", s)
+    if m:
+        yyyy, mm, dd = m.groups()
+    else:
+        m = re.fullmatch(r"(\d{1,2})[./-](\d{1,2})[./-](\d{4})", s)
+        if not m:
+            return None
+        dd, mm, yyyy = m.groups()
+    try:
+        return date(int(yyyy), int(mm), int(dd)).isoformat()
+    except ValueError:
+        return None
+
+
+def _csv_amount(value: object) -> Optional[float]:
+    s = str(value or "").strip().replace(",", ".")
+    if not s:
+        return None
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def iter_csv_statement(path: Path) -> Iterator[BankTransactionRow]:
+    """tarih/date, tutar/amount, aciklama/description sütunlu CSV.
+
+    Başlıkta bu sütunlar yoksa ya da bir satırın tarihi/tutarı okunamıyorsa
+    ValueError; içe aktarım tümüyle geri alınır (bugünün tarihi / 0 uydurulmaz).
+    """
+    with path.open("r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fields = {str(k or "").strip().lower() for k in (reader.fieldnames or [])}
+        if not (fields & {"tarih", "date"}) or not (fields & {"tutar", "amount"}):
+            raise ValueError(f"CSV ekstrede tarih/tutar sütunu yok: {path.name}")
+        for row in reader:
+            date_val = _statement_date(row.get("tarih") or row.get("date"))
+            amount = _csv_amount(row.get("tutar") or row.get("amount"))
+            if date_val is None or amount is None:
+                raise ValueError(f"{path.name} satır {reader.line_num}: tarih/tutar okunamadı")
+            desc = str(row.get("aciklama") or row.get("description") or "")
+            yield BankTransactionRow(date_val, amount, desc)
+
+
+# :61:YYMMDD[MMDD](C|D|RC|RD)[fon kodu]tutar...
+_MT940_61 = re.compile(r"^(\d{2})(\d{2})(\d{2})(?:\d{4})?(R?[CD])[A-Z]?(\d+(?:,\d*)?)(.*)$")
+
+
+def _mt940_row(line61: str, info86: List[str]) -> Optional[BankTransactionRow]:
+    m = _MT940_61.match(line61)
+    if not m:
+        return None
+    yy, mm, dd, mark, amount_s, rest = m.groups()
+    year = 2000 + int(yy) if int(yy) < 80 else 1900 + int(yy)
+    amount = float(amount_s.replace(",", "."))
+    # D: borç (çıkış), RC: alacak iptali -> eksi
+    if mark in ("D", "RC"):
+        amount = -amount
+    desc = " ".join(s.strip() for s in info86 if s.strip()) or rest.strip()
+    return BankTransactionRow(f"{year:04d}-{mm}-{dd}", amount, desc)
+
+
+def iter_mt940_statement(path: Path) -> Iterator[BankTransactionRow]:
+    """SWIFT MT940: her :61: bir hareket, ardından gelen :86: açıklamasıdır."""
+    line61: Optional[str] = None
+    info86: List[str] = []
+    tag = ""
+    with path.open("r", encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            line = raw.rstrip("\r\n")
+            if line.startswith(("-", "{")):
+                # Blok başlığı / mesaj sonu
+                tag = ""
+                continue
+            m = re.match(r"^:(\w+):(.*)$", line)
+            if m is None:
+                # Önceki etiketin devam satırı
+                if tag == "86" and line61 is not None:
+                    info86.append(line)
+                continue
+            tag, value = m.group(1), m.group(2)
+            if tag == "61":
+                if line61 is not None:
+                    row = _mt940_row(line61, info86)
+                    if row is not None:
+                        yield row
+                line61, info86 = value, []
+            elif tag == "86" and line61 is not None:
+                info86.append(value)
+    if line61 is not None:
+        row = _mt940_row(line61, info86)
+        if row is not None:
+            yield row
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _camt_text(elem: ET.Element, *path: str) -> str:
+    """Namespace'ten bağımsız alt öğe metni ('' yoksa)."""
+    cur: Optional[ET.Element] = elem
+    for name in path:
+        if cur is None:
+            return ""
+        cur = next((c for c in cur if _local(c.tag) == name), None)
+    return (cur.text or "").strip() if cur is not None else ""
+
+
+def iter_camt053_statement(path: Path) -> Iterator[BankTransactionRow]:
+    """ISO 20022 camt.053: her <Ntry> bir hareket; iterparse ile akış halinde okunur."""
+    for _event, elem in ET.iterparse(str(path), events=("end",)):
+        if _local(elem.tag) != "Ntry":
+            continue
+        amount = float(_camt_text(elem, "Amt") or 0)
+        if _camt_text(elem, "CdtDbtInd") == "DBIT":
+            amount = -amount
+        day = (
+            _camt_text(elem, "BookgDt", "Dt") or _camt_text(elem, "BookgDt", "DtTm")
+            or _camt_text(elem, "ValDt", "Dt") or _camt_text(elem, "ValDt", "DtTm")
+        )
+        texts = [(e.text or "").strip() for e in elem.iter() if _local(e.tag) == "Ustrd"]
+        desc = " ".join(t for t in texts if t) or _camt_text(elem, "AddtlNtryInf")
+        date_val = _statement_date(day[:10])
+        if date_val is None:
+            raise ValueError(f"{path.name}: tarihi okunamayan <Ntry>")
+        yield BankTransactionRow(date_val, amount, desc)
+        elem.clear()
+
+
+# .txt bilinçli olarak yok: hem CSV hem MT940 için kullanılır, içerikten ayırt edilir
+register_statement_parser("csv", iter_csv_statement, (".csv",))
+register_statement_parser("mt940", iter_mt940_statement, (".sta", ".mt940", ".940"))
+register_statement_parser("camt053", iter_camt053_statement, (".xml", ".camt", ".053"))
+
+
 class BankStatementService:
     def __init__(self, repo: IntegrationRepo):
         self.repo = repo
 
     def parse_csv(self, csv_path: Path) -> List[BankTransactionRow]:
-        rows: List[BankTransactionRow] = []
-        with csv_path.open("r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                date_val = parse_date_smart(row.get("tarih") or row.get("date") or "")
-                amount = float(str(row.get("tutar") or row.get("amount") or 0).replace(",", "."))
-                desc = str(row.get("aciklama") or row.get("description") or "")
-                rows.append(BankTransactionRow(date_val, amount, desc))
-        return rows
+        return list(iter_csv_statement(csv_path))
 
     def import_statement(
         self,
@@ -41,60 +225,95 @@ class BankStatementService:
         source_name: str,
         period_start: str,
         period_end: str,
-        transactions: List[BankTransactionRow],
+        transactions: Iterable[BankTransactionRow],
+        chunk_size: int = IMPORT_CHUNK_ROWS,
     ) -> Tuple[int, int, int]:
-        statement_id = self.repo.bank_statement_add(company_id, source_name, period_start, period_end)
-        inserted = 0
-        skipped = 0
-        for tx in transactions:
-            unique_hash = self._unique_hash(company_id, tx.transaction_date, tx.amount, tx.description)
-            ok = self.repo.bank_transaction_add(
-                company_id,
-                statement_id,
-                tx.transaction_date,
-                tx.amount,
-                tx.description,
-                unique_hash,
-            )
-            if ok:
-                inserted += 1
-            else:
-                skipped += 1
-        return statement_id, inserted, skipped
+        """Hareketleri parça parça yazar; (statement_id, eklenen, atlanan) döndürür.
+
+        `transactions` bir üreteç olabilir; bellekte en fazla bir parça tutulur.
+        Ekstre ve hareketleri tek transaction'dır: hata olursa hiçbiri kalmaz.
+        """
+        statement_id, inserted, total = self.repo.bank_statement_import(
+            company_id,
+            source_name,
+            period_start,
+            period_end,
+            self._hashed_chunks(company_id, transactions, max(1, int(chunk_size))),
+        )
+        return statement_id, inserted, total - inserted
+
+    def import_file(
+        self,
+        company_id: int,
+        source_name: str,
+        period_start: str,
+        period_end: str,
+        path: Path,
+        fmt: Optional[str] = None,
+    ) -> Tuple[int, int, int]:
+        return self.import_statement(company_id, source_name, period_start, period_end, iter_statement(path, fmt))
 
     def auto_reconcile(self, company_id: int, conn, window_days: int = 3) -> int:
-        unmatched = self.repo.bank_transactions_list(company_id, matched=0)
-        if not unmatched:
+        txs = self.repo.bank_transactions_unmatched(company_id)
+        days = [d for d in (parse_day(tx[1]) for tx in txs) if d is not None]
+        if not days:
             return 0
-        matched_count = 0
-        for tx in unmatched:
-            amount = float(tx["amount"])
-            tx_date = tx["transaction_date"]
-            candidates = conn.execute(
-                """
-                SELECT id, tarih, tutar FROM fatura_odeme
-                WHERE ABS(tutar - ?) < 0.01
-                """,
-                (amount,),
-            ).fetchall()
-            for c in candidates:
-                if self._date_close(tx_date, c["tarih"], window_days):
-                    self.repo.bank_transaction_mark_matched(int(tx["id"]), f"payment:{c['id']}")
-                    matched_count += 1
-                    break
-        return matched_count
+        # Adaylar tek sorguda: hareketlerin tarih aralığı ± pencere ve aynı kuruş tutarı
+        lo = date.fromordinal(max(1, min(days) - window_days)).isoformat()
+        hi = date.fromordinal(max(days) + window_days).isoformat()
+        cents = json.dumps(sorted({to_cents(tx[2]) for tx in txs}))
+        rows = conn.execute(
+            f"""
+            SELECT o.id, o.tarih, o.tutar, f.fatura_no, f.cari_ad, o.ref, o.aciklama
+            FROM fatura_odeme o
+            LEFT JOIN fatura f ON f.id = o.fatura_id
+            WHERE o.tarih BETWEEN ? AND ?
+              AND {CENTS_SQL.format(col="o.tutar")} IN (SELECT value FROM json_each(?))
+            """,
+            (lo, hi, cents),
+        ).fetchall()
+        payments = [
+            ReconcileCandidate(int(r[0]), str(r[1] or ""), float(r[2] or 0), tuple(str(v or "") for v in r[3:]))
+            for r in rows
+        ]
+        used = set()
+        for ref in self.repo.bank_matched_refs(company_id, PAYMENT_REF_PREFIX):
+            try:
+                used.add(int(ref[len(PAYMENT_REF_PREFIX):]))
+            except ValueError:
+                continue
+
+        matches = ReconcileEngine(window_days).match(txs, payments, used)
+        return self.repo.bank_transactions_mark_matched_many(
+            (m.transaction_id, f"{PAYMENT_REF_PREFIX}{m.payment_id}") for m in matches
+        )
 
     def manual_reconcile(self, tx_id: int, reference: str) -> None:
         self.repo.bank_transaction_mark_matched(tx_id, reference)
 
+    def _hashed_chunks(
+        self, company_id: int, transactions: Iterable[BankTransactionRow], size: int
+    ) -> Iterator[List[Tuple[str, float, str, str]]]:
+        sha = hashlib.sha256
+        prefix = f"{company_id}|"
+        it = iter(transactions)
+        while True:
+            chunk = list(islice(it, size))
+            if not chunk:
+                return
+            # _unique_hash ile aynı anahtar; parça başına tek döngüde
+            yield [
+                (
+                    tx.transaction_date,
+                    tx.amount,
+                    tx.description,
+                    sha(
+                        f"{prefix}{tx.transaction_date}|{tx.amount:.2f}|{tx.description.strip().lower()}".encode("utf-8")
+                    ).hexdigest(),
+                )
+                for tx in chunk
+            ]
+
     def _unique_hash(self, company_id: int, date_val: str, amount: float, description: str) -> str:
         raw = f"{company_id}|{date_val}|{amount:.2f}|{description.strip().lower()}"
         return hashlib.sha256(raw.encode("utf-8")).hexdigest()
-
-    def _date_close(self, d1: str, d2: str, window_days: int) -> bool:
-        try:
-            dt1 = datetime.strptime(d1, "%Y-%m-%d")
-            dt2 = datetime.strptime(d2, "%Y-%m-%d")
-            return abs((dt1 - dt2).days) <= window_days
-        except Exception:
-            return False
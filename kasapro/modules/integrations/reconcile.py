@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Banka hareketi <-> tahsilat/ödeme eşleştirme motoru.
+
+Adaylar bir kez yüklenir; tutar kuruş (int) cinsinden anahtarlanır ve her
+tutar için ödemeler tarihe göre sıralı tutulur. Her banka hareketi için
+aynı tutardaki pencere içi ödemeler bisect ile bulunur. Bir ödeme yalnızca
+bir harekete bağlanır; birden fazla aday varsa açıklama benzerliği
+(kasapro.core.fuzzy), sonra tarih yakınlığı belirler.
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from kasapro.core.fuzzy import best_substring_similarity
+
+
+def to_cents(amount: object) -> int:
+    """Tutar -> kuruş; SQLite ROUND gibi yarımı sıfırdan uzağa yuvarlar."""
+    v = float(amount or 0) * 100
+    return int(math.floor(v + 0.5)) if v >= 0 else -int(math.floor(-v + 0.5))
+
+
+# to_cents'in SQL karşılığı (aday ön süzgeci için)
+CENTS_SQL = "CAST(ROUND({col} * 100) AS INTEGER)"
+
+
+def parse_day(value: object) -> Optional[int]:
+    """'YYYY-MM-DD' -> gün ordinal'i (geçersizse None)."""
+    try:
+        return datetime.strptime(str(value or ""), "%Y-%m-%d").toordinal()
+    except Exception:
+        return None
+
+
+class _DayParser:
+    """parse_day; aynı tarih metni bir kez çözülür."""
+
+    def __init__(self) -> None:
+        self._cache: Dict[str, Optional[int]] = {}
+
+    def __call__(self, value: object) -> Optional[int]:
+        s = str(value or "")
+        if s not in self._cache:
+            self._cache[s] = parse_day(s)
+        return self._cache[s]
+
+
+@dataclass
+class ReconcileCandidate:
+    id: int
+    tarih: str
+    tutar: float
+    texts: Tuple[str, ...] = ()
+
+
+@dataclass
+class ReconcileMatch:
+    transaction_id: int
+    payment_id: int
+    score: float
+    day_diff: int
+
+
+@dataclass
+class _Bucket:
+    days: List[int] = field(default_factory=list)
+    items: List[ReconcileCandidate] = field(default_factory=list)
+
+
+class ReconcileEngine:
+    def __init__(self, window_days: int = 3):
+        self.window_days = max(0, int(window_days))
+
+    def match(
+        self,
+        transactions: Sequence[Tuple[int, str, float, str]],
+        payments: Iterable[ReconcileCandidate],
+        used_payment_ids: Optional[Set[int]] = None,
+    ) -> List[ReconcileMatch]:
+        """transactions: (id, tarih, tutar, açıklama); sırası eşleştirme önceliğidir."""
+        day_of = _DayParser()
+        buckets: Dict[int, _Bucket] = {}
+        for p in payments:
+            day = day_of(p.tarih)
+            if day is None:
+                continue
+            buckets.setdefault(to_cents(p.tutar), _Bucket()).items.append(p)
+        for b in buckets.values():
+            b.items.sort(key=lambda p: (day_of(p.tarih), p.id))
+            b.days = [day_of(p.tarih) for p in b.items]  # type: ignore[misc]
+
+        used: Set[int] = set(used_payment_ids or ())
+        out: List[ReconcileMatch] = []
+        for tx_id, tx_date, tx_amount, tx_desc in transactions:
+            bucket = buckets.get(to_cents(tx_amount))
+            day = day_of(tx_date)
+            if bucket is None or day is None:
+                continue
+            lo = bisect_left(bucket.days, day - self.window_days)
+            hi = bisect_right(bucket.days, day + self.window_days)
+            window = [(bucket.days[i], bucket.items[i]) for i in range(lo, hi) if bucket.items[i].id not in used]
+            if not window:
+                continue
+            best = self._pick(day, tx_desc, window)
+            used.add(best[1].id)
+            out.append(ReconcileMatch(int(tx_id), int(best[1].id), best[2], abs(best[0] - day)))
+        return out
+
+    def _pick(
+        self, day: int, desc: str, window: List[Tuple[int, ReconcileCandidate]]
+    ) -> Tuple[int, ReconcileCandidate, float]:
+        if len(window) == 1:
+            pday, p = window[0]
+            return pday, p, 0.0
+        ranked = []
+        for pday, p in window:
+            sim = max((best_substring_similarity(t, desc) for t in p.texts if t), default=0.0)
+            ranked.append((-sim, abs(pday - day), p.id, pday, p))
+        ranked.sort(key=lambda r: r[:3])
+        neg_sim, _, _, pday, p = ranked[0]
+        return pday, p, -neg_sim
@@ -2,7 +2,17 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import Any, Iterable, Optional
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+# Ayrılan bir işin kira süresi (sn); worker çalışırken yeniler, çökerse
+# job_reap_expired süresi dolan işi tekrar kuyruğa alır.
+JOB_LEASE_SECONDS = 60
+
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+def _lease_modifier(seconds: int) -> str:
+    return f"{int(seconds):+d} seconds"
 
 
 class IntegrationRepo:
@@ -45,6 +55,47 @@ class IntegrationRepo:
         )
         self.conn.commit()
 
+    def outbox_fan_out(
+        self,
+        company_id: int,
+        jobs: Sequence[Tuple[str, str, Optional[str]]],
+        event_ids: Sequence[int],
+        quarantined: Sequence[Tuple[str, str, str, Optional[str]]] = (),
+    ) -> int:
+        """(job_type, payload_json, idempotency_key) işlerini ekler ve olayları işlenmiş sayar.
+
+        Tek transaction: idempotency anahtarı çakışan işler INSERT OR IGNORE ile
+        atlanır. `quarantined` (job_type, payload_json, last_error, idempotency_key)
+        kayıtları iş yerine dead_letter_jobs'a yazılır. Dönüş: yeni eklenen iş sayısı.
+        """
+        cur = self.conn.cursor()
+        try:
+            cur.executemany(
+                """
+                INSERT OR IGNORE INTO jobs(company_id, job_type, payload_json, status, attempts, next_retry_at, idempotency_key, created_at)
+                VALUES (?, ?, ?, 'pending', 0, NULL, ?, CURRENT_TIMESTAMP)
+                """,
+                [(company_id, job_type, payload_json, key) for job_type, payload_json, key in jobs],
+            )
+            inserted = max(0, int(cur.rowcount or 0))
+            if quarantined:
+                cur.executemany(
+                    """
+                    INSERT INTO dead_letter_jobs(company_id, job_type, payload_json, attempts, last_error, idempotency_key, failed_at)
+                    VALUES (?, ?, ?, 0, ?, ?, CURRENT_TIMESTAMP)
+                    """,
+                    [(company_id, job_type, payload_json, error, key) for job_type, payload_json, error, key in quarantined],
+                )
+            cur.executemany(
+                "UPDATE event_outbox SET processed_at = CURRENT_TIMESTAMP WHERE event_id = ? AND processed_at IS NULL",
+                [(int(event_id),) for event_id in event_ids],
+            )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return inserted
+
     def job_enqueue(
         self,
         company_id: int,
@@ -100,6 +151,136 @@ class IntegrationRepo:
         )
         return cur.fetchone()
 
+    def job_claim_due(
+        self,
+        company_id: int,
+        limit: int = 10,
+        job_types: Optional[Iterable[str]] = None,
+        exclude_types: Optional[Iterable[str]] = None,
+        worker_id: str = "",
+        lease_seconds: int = JOB_LEASE_SECONDS,
+    ) -> List[sqlite3.Row]:
+        """Vadesi gelmiş en fazla `limit` işi `worker_id` adına kiralayıp döndürür.
+
+        Seçim ve 'running' işaretleme tek UPDATE ... RETURNING ile yapılır; aynı
+        DB'ye bağlı birden fazla worker/süreç aynı işi alamaz.
+        """
+        clauses = [
+            "company_id = ?",
+            "status = 'pending'",
+            "(next_retry_at IS NULL OR next_retry_at <= CURRENT_TIMESTAMP)",
+        ]
+        params: List[Any] = [company_id]
+        types = list(job_types or [])
+        if types:
+            clauses.append(f"job_type IN ({','.join('?' for _ in types)})")
+            params += types
+        excluded = list(exclude_types or [])
+        if excluded:
+            clauses.append(f"job_type NOT IN ({','.join('?' for _ in excluded)})")
+            params += excluded
+        return self._update_jobs_returning(
+            " AND ".join(clauses),
+            params,
+            "status = 'running', locked_by = ?, lease_until = datetime('now', ?), updated_at = CURRENT_TIMESTAMP",
+            [worker_id or None, _lease_modifier(lease_seconds)],
+            limit=int(limit),
+        )
+
+    def job_renew_leases(self, job_ids: Iterable[int], worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS) -> int:
+        """`worker_id`'nin hâlâ tuttuğu işlerin kira süresini uzatır; uzatılan iş sayısı."""
+        ids = [int(i) for i in job_ids]
+        if not ids:
+            return 0
+        cur = self.conn.cursor()
+        cur.executemany(
+            """
+            UPDATE jobs SET lease_until = datetime('now', ?)
+            WHERE job_id = ? AND status = 'running' AND locked_by IS ?
+            """,
+            [(_lease_modifier(lease_seconds), job_id, worker_id or None) for job_id in ids],
+        )
+        self.conn.commit()
+        return max(0, int(cur.rowcount or 0))
+
+    def job_release_leases(self, job_ids: Iterable[int], worker_id: str) -> int:
+        """Çalıştırılmadan bırakılan işleri kira dolmasını beklemeden kuyruğa geri verir.
+
+        Deneme sayılmaz; yalnızca `worker_id`'nin hâlâ tuttuğu işler etkilenir.
+        """
+        ids = [int(i) for i in job_ids]
+        if not ids:
+            return 0
+        cur = self.conn.cursor()
+        cur.executemany(
+            """
+            UPDATE jobs SET status = 'pending', locked_by = NULL, lease_until = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE job_id = ? AND status = 'running' AND locked_by IS ?
+            """,
+            [(job_id, worker_id or None) for job_id in ids],
+        )
+        self.conn.commit()
+        return max(0, int(cur.rowcount or 0))
+
+    def job_reap_expired(self, company_id: int, stale_seconds: int = JOB_LEASE_SECONDS) -> List[sqlite3.Row]:
+        """Kirası dolmuş 'running' işleri (çöken worker) tekrar kuyruğa alır.
+
+        Kira bilgisi olmayan eski 'running' kayıtları `stale_seconds` sonra
+        sahipsiz sayılır. Her geri alma bir deneme olarak sayılır.
+        """
+        return self._update_jobs_returning(
+            """company_id = ? AND status = 'running' AND (
+                   lease_until < CURRENT_TIMESTAMP
+                   OR (lease_until IS NULL AND COALESCE(updated_at, created_at) < datetime('now', ?))
+               )""",
+            [company_id, _lease_modifier(-int(stale_seconds))],
+            """status = 'pending', attempts = attempts + 1, next_retry_at = NULL,
+               last_error = 'lease expired (' || COALESCE(locked_by, '?') || ')',
+               locked_by = NULL, lease_until = NULL, updated_at = CURRENT_TIMESTAMP""",
+            [],
+        )
+
+    def _update_jobs_returning(
+        self,
+        where_sql: str,
+        where_params: List[Any],
+        set_sql: str,
+        set_params: List[Any],
+        limit: Optional[int] = None,
+    ) -> List[sqlite3.Row]:
+        select_sql = f"SELECT job_id FROM jobs WHERE {where_sql} ORDER BY job_id ASC"
+        select_params: List[Any] = list(where_params)
+        if limit is not None:
+            select_sql += " LIMIT ?"
+            select_params.append(int(limit))
+        cur = self.conn.cursor()
+        if _HAS_RETURNING:
+            try:
+                rows = cur.execute(
+                    f"UPDATE jobs SET {set_sql} WHERE job_id IN ({select_sql}) RETURNING *",
+                    (*set_params, *select_params),
+                ).fetchall()
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            return sorted(rows, key=lambda r: int(r["job_id"]))
+        # Eski SQLite (< 3.35): aynı atomikliği yazma kilidiyle sağla
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            ids = [int(r[0]) for r in cur.execute(select_sql, tuple(select_params)).fetchall()]
+            rows = []
+            for i in range(0, len(ids), 500):
+                chunk = ids[i : i + 500]
+                marks = ",".join("?" for _ in chunk)
+                cur.execute(f"UPDATE jobs SET {set_sql} WHERE job_id IN ({marks})", (*set_params, *chunk))
+                rows += cur.execute(f"SELECT * FROM jobs WHERE job_id IN ({marks}) ORDER BY job_id", chunk).fetchall()
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+        return rows
+
     def job_mark_running(self, job_id: int) -> None:
         self.conn.execute(
             "UPDATE jobs SET status = 'running', updated_at = CURRENT_TIMESTAMP WHERE job_id = ?",
@@ -109,7 +290,7 @@ class IntegrationRepo:
 
     def job_mark_done(self, job_id: int) -> None:
         self.conn.execute(
-            "UPDATE jobs SET status = 'done', updated_at = CURRENT_TIMESTAMP WHERE job_id = ?",
+            "UPDATE jobs SET status = 'done', locked_by = NULL, lease_until = NULL, updated_at = CURRENT_TIMESTAMP WHERE job_id = ?",
             (job_id,),
         )
         self.conn.commit()
@@ -118,7 +299,8 @@ class IntegrationRepo:
         self.conn.execute(
             """
             UPDATE jobs
-            SET status = 'pending', attempts = ?, next_retry_at = ?, last_error = ?, updated_at = CURRENT_TIMESTAMP
+            SET status = 'pending', attempts = ?, next_retry_at = ?, last_error = ?,
+                locked_by = NULL, lease_until = NULL, updated_at = CURRENT_TIMESTAMP
             WHERE job_id = ?
             """,
             (attempts, next_retry_at, last_error, job_id),
@@ -141,7 +323,7 @@ class IntegrationRepo:
             ),
         )
         self.conn.execute(
-            "UPDATE jobs SET status = 'dead', updated_at = CURRENT_TIMESTAMP WHERE job_id = ?",
+            "UPDATE jobs SET status = 'dead', locked_by = NULL, lease_until = NULL, updated_at = CURRENT_TIMESTAMP WHERE job_id = ?",
             (job_row["job_id"],),
         )
         self.conn.commit()
@@ -373,6 +555,52 @@ class IntegrationRepo:
         except sqlite3.IntegrityError:
             return False
 
+    def bank_statement_import(
+        self,
+        company_id: int,
+        source_name: str,
+        period_start: str,
+        period_end: str,
+        chunks: Iterable[Sequence[Tuple[str, float, str, str]]],
+    ) -> Tuple[int, int, int]:
+        """Ekstre + hareketleri tek transaction'da yazar.
+
+        chunks: (tarih, tutar, açıklama, unique_hash) parçaları. Mükerrerler
+        (company_id, unique_hash) tekil indeksinde INSERT OR IGNORE ile atlanır.
+        Dönüş: (statement_id, eklenen, toplam satır).
+        """
+        cur = self.conn.cursor()
+        inserted = 0
+        total = 0
+        try:
+            cur.execute(
+                """
+                INSERT INTO bank_statements(company_id, source_name, period_start, period_end, imported_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                """,
+                (company_id, source_name, period_start, period_end),
+            )
+            statement_id = int(cur.lastrowid)
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                cur.executemany(
+                    """
+                    INSERT OR IGNORE INTO bank_transactions(
+                        company_id, statement_id, transaction_date, amount, description, unique_hash, matched)
+                    VALUES (?, ?, ?, ?, ?, ?, 0)
+                    """,
+                    [(company_id, statement_id, d, a, desc, h) for d, a, desc, h in chunk],
+                )
+                # executemany'de rowcount, her çalıştırmanın changes() toplamıdır
+                inserted += max(0, int(cur.rowcount))
+                total += len(chunk)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return statement_id, inserted, total
+
     def bank_transactions_list(self, company_id: int, matched: Optional[int] = None):
         cur = self.conn.cursor()
         if matched is None:
@@ -387,6 +615,17 @@ class IntegrationRepo:
             )
         return cur.fetchall()
 
+    def bank_transactions_unmatched(self, company_id: int) -> List[Tuple[int, str, float, str]]:
+        """Eşleşmemiş hareketler: (id, tarih, tutar, açıklama), tarih sırasıyla."""
+        cur = self.conn.execute(
+            """
+            SELECT id, transaction_date, amount, description FROM bank_transactions
+            WHERE company_id = ? AND matched = 0 ORDER BY transaction_date
+            """,
+            (company_id,),
+        )
+        return [(int(r[0]), str(r[1] or ""), float(r[2] or 0), str(r[3] or "")) for r in cur.fetchall()]
+
     def bank_transaction_mark_matched(self, tx_id: int, matched_ref: str) -> None:
         self.conn.execute(
             """
@@ -398,6 +637,35 @@ class IntegrationRepo:
         )
         self.conn.commit()
 
+    def bank_transactions_mark_matched_many(self, matches: Iterable[Tuple[int, str]]) -> int:
+        """(tx_id, matched_ref) çiftlerini tek transaction'da işaretler; gerçekten güncellenen satır sayısını döndürür."""
+        rows = [(ref, int(tx_id)) for tx_id, ref in matches]
+        if not rows:
+            return 0
+        try:
+            cur = self.conn.executemany(
+                """
+                UPDATE bank_transactions
+                SET matched = 1, matched_ref = ?, matched_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND matched = 0
+                """,
+                rows,
+            )
+            # Zaten eşleşmiş (matched = 1) ya da silinmiş hareketler sayılmaz
+            updated = int(cur.rowcount)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return updated
+
+    def bank_matched_refs(self, company_id: int, prefix: str) -> List[str]:
+        cur = self.conn.execute(
+            "SELECT matched_ref FROM bank_transactions WHERE company_id = ? AND matched = 1 AND matched_ref LIKE ?",
+            (company_id, f"{prefix}%"),
+        )
+        return [str(r[0]) for r in cur.fetchall()]
+
     # -----------------
     # API & Webhook
     # -----------------
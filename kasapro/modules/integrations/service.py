@@ -3,9 +3,9 @@ from __future__ import annotations
 
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from kasapro.utils import now_iso
 from kasapro.db.main_db import DB
@@ -14,7 +14,7 @@ from .api import ApiAuthService, WebhookService
 from .bank import BankStatementService, BankTransactionRow
 from .connectors import GenericCSVConnector
 from .notifications import NotificationService
-from .repo import IntegrationRepo
+from .repo import JOB_LEASE_SECONDS, IntegrationRepo
 from .security import SettingsEncryptor
 
 
@@ -30,6 +30,8 @@ class IntegrationService:
         self.webhooks = WebhookService(self.repo)
         self.csv = GenericCSVConnector(self.repo)
         self.max_attempts = 3
+        # Yeni olay/iş geldiğinde çağrılır (IntegrationWorker.wake)
+        self._wake_listeners: List[Callable[[], None]] = []
 
     def _ctx(self):
         return self._context_provider()
@@ -77,43 +79,109 @@ class IntegrationService:
     # -----------------
     # Outbox / Jobs
     # -----------------
+    def add_wake_listener(self, callback: Callable[[], None]) -> None:
+        if callback not in self._wake_listeners:
+            self._wake_listeners.append(callback)
+
+    def remove_wake_listener(self, callback: Callable[[], None]) -> None:
+        try:
+            self._wake_listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def _notify_work(self) -> None:
+        for callback in list(self._wake_listeners):
+            try:
+                callback()
+            except Exception:
+                self.logger.exception("wake listener failed")
+
     def emit_event(self, event_type: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None) -> int:
         company_id = self._company_id()
         event_id = self.repo.outbox_add(company_id, event_type, json.dumps(payload, ensure_ascii=False), idempotency_key)
         self.repo.audit_log(company_id, self._actor(), "emit_event", "event", event_id, event_type)
+        self._notify_work()
         return event_id
 
-    def process_outbox(self) -> int:
+    def process_outbox(self, limit: int = 200) -> int:
+        """Bekleyen en fazla `limit` olayı bildirim/webhook işlerine çevirir (tek commit)."""
         company_id = self._company_id()
-        pending = self.repo.outbox_list_pending(company_id)
-        created_jobs = 0
+        pending = self.repo.outbox_list_pending(company_id, limit)
+        if not pending:
+            return 0
+        jobs: List[Tuple[str, str, Optional[str]]] = []
+        quarantined: List[Tuple[str, str, str, Optional[str]]] = []
         for event in pending:
-            payload = json.loads(event["payload_json"] or "{}")
-            event_type = event["event_type"]
             idempotency_key = event["idempotency_key"] or f"event:{event['event_id']}"
-            job_payload = {
-                "event_type": event_type,
-                "payload": payload,
-            }
-            job_id = self.enqueue_job("notification_dispatch", job_payload, idempotency_key)
-            if job_id:
-                created_jobs += 1
-            webhook_job_id = self.enqueue_job("webhook_delivery", job_payload, f"webhook:{idempotency_key}")
-            if webhook_job_id:
-                created_jobs += 1
-            self.repo.outbox_mark_processed(int(event["event_id"]))
-        return created_jobs
+            try:
+                payload = json.loads(event["payload_json"] or "{}")
+            except ValueError as exc:
+                # Bozuk payload tüm tüketicilerde patlar; iş üretilmez, dead-letter'a alınır
+                self.logger.warning("outbox event %s has invalid payload: %s", event["event_id"], exc)
+                quarantined.append(
+                    (f"event:{event['event_type']}", str(event["payload_json"]), f"invalid payload_json: {exc}", idempotency_key)
+                )
+                continue
+            job_payload = json.dumps({"event_type": event["event_type"], "payload": payload}, ensure_ascii=False)
+            jobs.append(("notification_dispatch", job_payload, idempotency_key))
+            jobs.append(("webhook_delivery", job_payload, f"webhook:{idempotency_key}"))
+        if self.repo.outbox_fan_out(company_id, jobs, [int(e["event_id"]) for e in pending], quarantined):
+            self._notify_work()
+        return len(jobs)
 
     def enqueue_job(self, job_type: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None) -> int:
         company_id = self._company_id()
-        return self.repo.job_enqueue(company_id, job_type, json.dumps(payload, ensure_ascii=False), idempotency_key)
+        job_id = self.repo.job_enqueue(company_id, job_type, json.dumps(payload, ensure_ascii=False), idempotency_key)
+        self._notify_work()
+        return job_id
+
+    def claim_jobs(
+        self,
+        limit: int = 10,
+        job_types: Optional[Iterable[str]] = None,
+        exclude_types: Optional[Iterable[str]] = None,
+        worker_id: str = "",
+        lease_seconds: int = JOB_LEASE_SECONDS,
+    ) -> List[Any]:
+        """Vadesi gelmiş işleri `worker_id` adına kiralar; run_job ile çalıştırılır."""
+        return self.repo.job_claim_due(
+            self._company_id(),
+            limit=limit,
+            job_types=job_types,
+            exclude_types=exclude_types,
+            worker_id=worker_id,
+            lease_seconds=lease_seconds,
+        )
+
+    def renew_leases(self, job_ids: Iterable[int], worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS) -> int:
+        return self.repo.job_renew_leases(job_ids, worker_id, lease_seconds)
+
+    def release_jobs(self, job_ids: Iterable[int], worker_id: str) -> int:
+        released = self.repo.job_release_leases(job_ids, worker_id)
+        if released:
+            self._notify_work()
+        return released
+
+    def reap_expired_jobs(self, stale_seconds: int = JOB_LEASE_SECONDS) -> int:
+        """Kirası dolan işleri kuyruğa geri alır; deneme hakkı biteni dead-letter'a taşır."""
+        reaped = self.repo.job_reap_expired(self._company_id(), stale_seconds)
+        for job in reaped:
+            self.logger.warning("job %s lease expired: %s", job["job_id"], job["last_error"])
+            if int(job["attempts"]) >= self.max_attempts:
+                self.repo.job_move_dead_letter(job)
+        if reaped:
+            self._notify_work()
+        return len(reaped)
 
     def run_next_job(self) -> bool:
-        company_id = self._company_id()
-        job = self.repo.job_next_due(company_id)
-        if not job:
+        jobs = self.claim_jobs(limit=1)
+        if not jobs:
             return False
-        self.repo.job_mark_running(int(job["job_id"]))
+        self.run_job(jobs[0])
+        return True
+
+    def run_job(self, job) -> bool:
+        """Ayrılmış bir işi çalıştırır; başarı/yeniden deneme/dead-letter durumunu yazar."""
         try:
             ok = self._handle_job(job)
         except Exception as exc:  # pragma: no cover
@@ -125,12 +193,13 @@ class IntegrationService:
             self.repo.job_mark_done(int(job["job_id"]))
             return True
         attempts = int(job["attempts"]) + 1
-        next_retry = (datetime.now() + timedelta(seconds=2 * attempts)).strftime("%Y-%m-%d %H:%M:%S")
+        # CURRENT_TIMESTAMP ile karşılaştırılır: UTC
+        next_retry = (datetime.now(timezone.utc) + timedelta(seconds=2 * attempts)).strftime("%Y-%m-%d %H:%M:%S")
         self.repo.job_mark_failed(int(job["job_id"]), attempts, next_retry, err or "Job failed")
         job = self.repo.job_get(int(job["job_id"]))
         if job and int(job["attempts"]) >= self.max_attempts:
             self.repo.job_move_dead_letter(job)
-        return True
+        return False
 
     def _handle_job(self, job) -> bool:
         job_type = job["job_type"]
@@ -232,8 +301,13 @@ class IntegrationService:
     # Bank
     # -----------------
     def import_bank_csv(self, source_name: str, period_start: str, period_end: str, csv_path: Path):
-        transactions = self.bank.parse_csv(csv_path)
-        return self.bank.import_statement(self._company_id(), source_name, period_start, period_end, transactions)
+        return self.bank.import_file(self._company_id(), source_name, period_start, period_end, csv_path, fmt="csv")
+
+    def import_bank_file(
+        self, source_name: str, period_start: str, period_end: str, path: Path, fmt: Optional[str] = None
+    ):
+        """CSV / MT940 / camt.053 ekstre; biçim verilmezse dosyadan tahmin edilir."""
+        return self.bank.import_file(self._company_id(), source_name, period_start, period_end, path, fmt)
 
     def auto_reconcile(self) -> int:
         return self.bank.auto_reconcile(self._company_id(), self.db.conn)
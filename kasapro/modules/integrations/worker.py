@@ -1,44 +1,185 @@
 # -*- coding: utf-8 -*-
+"""Entegrasyon iş kuyruğu çalıştırıcısı.
+
+Tek bir dağıtıcı (dispatcher) thread outbox'ı işlere çevirir, vadesi gelen
+işleri boş slot kadar ayırır ve sınırlı bir thread havuzunda çalıştırır.
+`emit_event` / `enqueue_job` ve biten işler dağıtıcıyı Condition ile hemen
+uyandırır; `poll_interval` yalnızca ileri tarihli yeniden denemeler için
+yedek zamanlayıcıdır. İşler `worker_id` adına süreli kirayla ayrılır; çalışan
+işlerin kirası düzenli yenilenir, kirası dolan (çökmüş worker'a ait) işler
+tekrar kuyruğa alınır. Böylece aynı DB'de birden fazla süreç güvenle çalışır.
+"""
 from __future__ import annotations
 
+import logging
+import os
 import queue
+import socket
 import threading
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
+
+from .repo import JOB_LEASE_SECONDS
+
+logger = logging.getLogger("kasapro.integrations")
 
 
 class IntegrationWorker:
-    def __init__(self, service, poll_interval: float = 2.0):
+    def __init__(
+        self,
+        service,
+        poll_interval: float = 2.0,
+        max_workers: int = 4,
+        type_limits: Optional[Dict[str, int]] = None,
+        worker_id: str = "",
+        lease_seconds: int = JOB_LEASE_SECONDS,
+    ):
         self.service = service
         self.poll_interval = poll_interval
+        self.max_workers = max(1, int(max_workers))
+        # İş tipi -> aynı anda en fazla kaç iş (verilmeyen tipler yalnızca havuzla sınırlı)
+        self.type_limits: Dict[str, int] = {k: max(1, int(v)) for k, v in (type_limits or {}).items()}
         self._thread: Optional[threading.Thread] = None
         self._stop = threading.Event()
         self._ui_queue: "queue.Queue[str]" = queue.Queue()
+        self._cond = threading.Condition()
+        self._wake_pending = False
+        self._in_flight = 0
+        self._running_by_type: Dict[str, int] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self.lease_seconds = max(3, int(lease_seconds))
+        self._running_ids: Set[int] = set()
+        self._last_lease_check = 0.0
 
     def start(self, root=None):
         if self._thread and self._thread.is_alive():
             return
         self._stop.clear()
-        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="integration-job")
+        try:
+            self.service.add_wake_listener(self.wake)
+        except AttributeError:
+            pass
+        self._thread = threading.Thread(target=self._run, daemon=True, name="integration-dispatcher")
         self._thread.start()
+        self.wake()
         if root is not None:
             try:
                 root.after(500, lambda: self._drain_ui_queue(root))
             except Exception:
                 pass
 
-    def stop(self):
+    def stop(self, wait: bool = False):
         self._stop.set()
+        try:
+            self.service.remove_wake_listener(self.wake)
+        except AttributeError:
+            pass
+        self.wake()
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+        if wait and self._thread is not None:
+            self._thread.join(timeout=max(1.0, self.poll_interval * 2))
+
+    def wake(self) -> None:
+        """Dağıtıcıyı bekletmeden uyandır (yeni olay/iş veya boşalan slot)."""
+        with self._cond:
+            self._wake_pending = True
+            self._cond.notify()
 
     def _run(self):
+        # Kira süresinin üçte birinde bir yenile/topla
+        lease_tick = self.lease_seconds / 3.0
         while not self._stop.is_set():
             try:
-                handled = self.service.run_next_job()
-                if handled:
-                    self._ui_queue.put("job_processed")
+                self._maintain_leases(lease_tick)
+                self._dispatch()
             except Exception:
-                pass
-            time.sleep(self.poll_interval)
+                logger.exception("integration dispatch failed")
+            with self._cond:
+                if not self._wake_pending and not self._stop.is_set():
+                    self._cond.wait(timeout=min(self.poll_interval, lease_tick))
+                self._wake_pending = False
+
+    def _maintain_leases(self, interval: float) -> None:
+        now = time.monotonic()
+        if now - self._last_lease_check < interval:
+            return
+        self._last_lease_check = now
+        with self._cond:
+            running = list(self._running_ids)
+        if running:
+            self.service.renew_leases(running, self.worker_id, self.lease_seconds)
+        self.service.reap_expired_jobs(self.lease_seconds)
+
+    def _dispatch(self) -> int:
+        """Outbox'ı işlere çevir, boş slot kadar iş ayırıp havuza gönder."""
+        if self.service.process_outbox():
+            # Outbox'ta kalan olaylar için bir tur daha
+            self.wake()
+        jobs = self._claim()
+        submitted = 0
+        for job in jobs:
+            pool = self._pool
+            if self._stop.is_set() or pool is None:
+                break
+            self._track(job)
+            try:
+                pool.submit(self._execute, job)
+            except RuntimeError:
+                # stop() havuzu bu arada kapattı
+                self._untrack(job)
+                break
+            submitted += 1
+        if submitted < len(jobs):
+            # Gönderilemeyen işlerin kirası dolmayı beklemesin
+            self.service.release_jobs([int(j["job_id"]) for j in jobs[submitted:]], self.worker_id)
+        return submitted
+
+    def _track(self, job) -> None:
+        job_type = str(job["job_type"])
+        with self._cond:
+            self._in_flight += 1
+            self._running_ids.add(int(job["job_id"]))
+            self._running_by_type[job_type] = self._running_by_type.get(job_type, 0) + 1
+
+    def _untrack(self, job) -> None:
+        job_type = str(job["job_type"])
+        with self._cond:
+            self._in_flight -= 1
+            self._running_ids.discard(int(job["job_id"]))
+            self._running_by_type[job_type] = max(0, self._running_by_type.get(job_type, 0) - 1)
+            self._wake_pending = True
+            self._cond.notify()
+
+    def _claim(self) -> List:
+        with self._cond:
+            free = self.max_workers - self._in_flight
+            type_free = {t: lim - self._running_by_type.get(t, 0) for t, lim in self.type_limits.items()}
+        if free <= 0:
+            return []
+        lease = {"worker_id": self.worker_id, "lease_seconds": self.lease_seconds}
+        # Önce sınırlı tipler (kendi kotalarıyla), kalan slotlar diğer işlere
+        jobs: List = []
+        for job_type, cap in type_free.items():
+            room = min(cap, free - len(jobs))
+            if room > 0:
+                jobs += list(self.service.claim_jobs(limit=room, job_types=[job_type], **lease))
+        if free - len(jobs) > 0:
+            jobs += list(self.service.claim_jobs(limit=free - len(jobs), exclude_types=list(self.type_limits), **lease))
+        return jobs
+
+    def _execute(self, job) -> None:
+        try:
+            self.service.run_job(job)
+            self._ui_queue.put("job_processed")
+        except Exception:
+            logger.exception("integration job %s failed", job["job_id"])
+        finally:
+            self._untrack(job)
 
     def _drain_ui_queue(self, root):
         try:
@@ -7,6 +7,7 @@ import logging
 from datetime import date
 from typing import Any, Dict, List, Optional, Tuple
 
+from ...db.repos.sequence_repo import reserve_doc_no
 from ...utils import parse_date_smart, safe_float
 from .calculator import calculate_totals
 
@@ -33,39 +34,7 @@ class AdvancedInvoiceRepo:
             return 0
 
     def _reserve_doc_no(self, cur, company_id: int, series: str, year: int) -> str:
-        cur.execute(
-            "SELECT last_no, padding, format FROM series_counters WHERE company_id=? AND series=? AND year=?",
-            (int(company_id), str(series), int(year)),
-        )
-        row = cur.fetchone()
-        if not row:
-            cur.execute(
-                """INSERT INTO series_counters(company_id, series, year, last_no, padding, format)
-                   VALUES(?,?,?,?,?,?)""",
-                (int(company_id), str(series), int(year), 0, 6, "{series}-{year}-{no_pad}"),
-            )
-            cur.execute(
-                "SELECT last_no, padding, format FROM series_counters WHERE company_id=? AND series=? AND year=?",
-                (int(company_id), str(series), int(year)),
-            )
-            row = cur.fetchone()
-
-        last_no = int(row["last_no"] or 0)
-        padding = int(row["padding"] or 6)
-        fmt = str(row["format"] or "{series}-{year}-{no_pad}")
-
-        new_no = last_no + 1
-        no_pad = str(new_no).zfill(max(1, padding))
-        try:
-            doc_no = fmt.format(series=series, year=year, no=new_no, no_pad=no_pad)
-        except Exception:
-            doc_no = f"{series}-{year}-{no_pad}"
-
-        cur.execute(
-            "UPDATE series_counters SET last_no=?, updated_at=CURRENT_TIMESTAMP WHERE company_id=? AND series=? AND year=?",
-            (int(new_no), int(company_id), str(series), int(year)),
-        )
-        return doc_no
+        return reserve_doc_no(cur, company_id, series, year)
 
     def _doc_type_sign(self, doc_type: str) -> int:
         return DOC_TYPES.get(doc_type, {}).get("sign", 1)
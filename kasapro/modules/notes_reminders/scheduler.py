@@ -1,31 +1,132 @@
 # -*- coding: utf-8 -*-
-"""Hatırlatma scheduler (thread-safe)."""
+"""Hatırlatma scheduler (thread-safe).
+
+Bekleyen hatırlatmaların due_at değerleri bellekte bir min-heap'te tutulur:
+açılışta bir kez yüklenir, servis dinleyicisiyle (ekle/düzenle/ertele/kapat)
+güncellenir. Thread yalnızca sıradaki hatırlatmanın zamanına kadar uyur; vadesi
+gelenler toplu olarak 'overdue' yapılır.
+
+Saat atlamaları: `Event.wait` monotonik saatle bekler, due_at ise duvar saatidir.
+Geri atlamada erken uyanılır, zaman yeniden hesaplanır (erken tetikleme olmaz);
+ileri atlama ana thread'deki kuyruk yoklamasında (1 sn) fark edilip thread
+uyandırılır. Her durumda en fazla `max_sleep_seconds` uyunur.
+"""
 
 from __future__ import annotations
 
+import heapq
+import logging
 import queue
 import threading
 import time
-from typing import Any, Dict, Optional
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
+from ...utils import now_iso
 from .service import NotesRemindersService
 
+_log = logging.getLogger(__name__)
+
+MAX_SLEEP_SECONDS = 300.0
+# Ana thread yoklamasında bu kadar saniyelik duvar/monotonik kayma saat atlaması sayılır
+CLOCK_JUMP_SECONDS = 1.0
+
+
+def _due_timestamp(due_at: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(due_at.strip()).timestamp()
+    except ValueError:
+        return None
+
+
+class DueHeap:
+    """(due_at, id) min-heap'i; güncellenen/silinen kayıtlar tembel olarak atılır."""
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[str, int]] = []
+        self._due: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def load(self, items: Iterable[Tuple[str, int]]) -> None:
+        self._due = {int(rid): str(due) for due, rid in items}
+        self._heap = [(due, rid) for rid, due in self._due.items()]
+        heapq.heapify(self._heap)
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._due.clear()
+
+    def set(self, reminder_id: int, due_at: Optional[str]) -> None:
+        """due_at=None kaydı çıkarır."""
+        rid = int(reminder_id)
+        if due_at is None:
+            self._due.pop(rid, None)
+        elif self._due.get(rid) != due_at:
+            self._due[rid] = str(due_at)
+            heapq.heappush(self._heap, (str(due_at), rid))
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self.load((due, rid) for rid, due in self._due.items())
+
+    def peek(self) -> Optional[str]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: str) -> List[int]:
+        """due_at <= now olan tüm kayıtları sırayla çıkarır."""
+        out: List[int] = []
+        while self._heap and self._heap[0][0] <= now:
+            due, rid = heapq.heappop(self._heap)
+            if self._due.get(rid) == due:
+                del self._due[rid]
+                out.append(rid)
+        return out
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
 
 class ReminderScheduler:
-    def __init__(self, app, service: NotesRemindersService, interval_seconds: int = 45):
+    def __init__(self, app, service: NotesRemindersService, max_sleep_seconds: float = MAX_SLEEP_SECONDS):
         self.app = app
-        self.service = service
-        self.interval_seconds = max(30, min(int(interval_seconds), 60))
+        self.max_sleep_seconds = max(1.0, float(max_sleep_seconds))
         self._stop = threading.Event()
+        self._wake = threading.Event()
         self._thread: Optional[threading.Thread] = None
         self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
-        self._notified_ids: set[int] = set()
+        self._lock = threading.Lock()
+        self._heap = DueHeap()
+        self._changed: Set[int] = set()
+        self._reload = True
+        self._loaded_for: Optional[Tuple[Any, Any]] = None
+        self._clock_offset = time.time() - time.monotonic()
+        self._service: Optional[NotesRemindersService] = None
+        self.service = service
+
+    @property
+    def service(self) -> Optional[NotesRemindersService]:
+        return self._service
+
+    @service.setter
+    def service(self, service: Optional[NotesRemindersService]) -> None:
+        # Şirket değişince App yeni servisi atar; dinleyici yeni servise taşınır
+        old = self._service
+        if old is service:
+            return
+        if old is not None:
+            old.remove_reminder_listener(self._on_reminder_changed)
+        self._service = service
+        if service is not None:
+            service.add_reminder_listener(self._on_reminder_changed)
+        self._request_reload()
 
     def start(self) -> None:
         if self._thread and self._thread.is_alive():
             return
         self._stop.clear()
-        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="reminder-scheduler")
         self._thread.start()
         try:
             self.app.root.after(800, self._poll_queue)
@@ -34,29 +135,94 @@ class ReminderScheduler:
 
     def stop(self) -> None:
         self._stop.set()
+        self._wake.set()
 
     def reset_context(self) -> None:
-        self._notified_ids.clear()
+        self._request_reload()
+
+    def _request_reload(self) -> None:
+        with self._lock:
+            self._reload = True
+            self._changed.clear()
+        self._wake.set()
+
+    def _on_reminder_changed(self, reminder_id: int) -> None:
+        with self._lock:
+            self._changed.add(int(reminder_id))
+        self._wake.set()
+
+    def _context(self) -> Tuple[Any, Any]:
+        uid = self.app.get_active_user_id() if hasattr(self.app, "get_active_user_id") else None
+        return uid, getattr(self.app, "active_company_id", None)
 
     def _run(self) -> None:
         while not self._stop.is_set():
             try:
-                uid = self.app.get_active_user_id() if hasattr(self.app, "get_active_user_id") else None
-                cid = getattr(self.app, "active_company_id", None)
-                if uid:
-                    due, overdue_count = self.service.check_due_reminders(cid, uid)
-                    if due:
-                        for item in due:
-                            rid = int(item.get("id") or 0)
-                            if rid and rid not in self._notified_ids:
-                                self._queue.put({"type": "notify", "payload": item})
-                                self._notified_ids.add(rid)
-                    self._queue.put({"type": "badge", "payload": overdue_count})
+                timeout = self._tick()
             except Exception:
+                _log.exception("Hatırlatma zamanlayıcısı hatası")
                 self._queue.put({"type": "error", "payload": "scheduler"})
-            time.sleep(self.interval_seconds)
+                with self._lock:
+                    self._reload = True
+                timeout = 30.0
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def _tick(self) -> float:
+        """Değişiklikleri uygular, vadesi gelenleri tetikler; sonraki uyku süresini döndürür."""
+        service = self._service
+        uid, cid = self._context()
+        with self._lock:
+            reload = self._reload or self._loaded_for != (uid, cid)
+            changed = self._changed
+            self._changed = set()
+            self._reload = False
+        if service is None or not uid:
+            self._heap.clear()
+            self._loaded_for = None
+            return self.max_sleep_seconds
+
+        badge = False
+        if reload:
+            self._heap.load(service.scheduled_reminders(cid, uid))
+            self._loaded_for = (uid, cid)
+            badge = True
+        elif changed:
+            for rid in changed:
+                self._heap.set(rid, service.reminder_schedule_entry(rid, cid, uid))
+            badge = True
+
+        now = now_iso()
+        fired = self._heap.pop_due(now)
+        if fired:
+            due, overdue_count = service.fire_reminders(cid, uid, fired, now)
+            for item in due:
+                self._queue.put({"type": "notify", "payload": item})
+            self._queue.put({"type": "badge", "payload": overdue_count})
+        elif badge:
+            self._queue.put({"type": "badge", "payload": service.overdue_count(cid, uid)})
+        return self._next_timeout()
+
+    def _next_timeout(self) -> float:
+        nxt = self._heap.peek()
+        if nxt is None:
+            return self.max_sleep_seconds
+        ts = _due_timestamp(nxt)
+        if ts is None:
+            # Biçimi tanınmayan due_at: eski davranıştaki gibi metin karşılaştırmasıyla yoklanır
+            return 1.0
+        # due_at saniye çözünürlüklü; tam sınırda uyanıp erken kalmamak için küçük pay
+        delay = ts - time.time() + 0.01
+        return min(max(delay, 0.0), self.max_sleep_seconds)
+
+    def _check_clock(self) -> None:
+        offset = time.time() - time.monotonic()
+        if abs(offset - self._clock_offset) > CLOCK_JUMP_SECONDS:
+            self._clock_offset = offset
+            self._wake.set()
 
     def _poll_queue(self) -> None:
+        self._check_clock()
         try:
             while True:
                 msg = self._queue.get_nowait()
@@ -10,7 +10,7 @@ import shutil
 import uuid
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from ...config import MESSAGE_ATTACHMENTS_DIRNAME, MESSAGE_ATTACHMENT_MAX_BYTES
 from ...db.main_db import DB
@@ -33,6 +33,8 @@ class NotesRemindersService:
     def __init__(self, db: DB, usersdb: UsersDB):
         self.db = db
         self.usersdb = usersdb
+        # Hatırlatma değişince (eklendi/güncellendi/ertelendi/kapandı) çağrılır: fn(reminder_id)
+        self._reminder_listeners: List[Callable[[int], None]] = []
 
     # -----------------
     # Helpers
@@ -65,6 +67,30 @@ class NotesRemindersService:
             self.db.notes_reminders.add_audit_log(company_id, user_id, action, entity, entity_id, detail)
         except Exception:
             logger.exception("Audit log yazılamadı")
+            # Yarım kalan yazma işlemi bağlantıyı kilitli bırakmasın (scheduler thread'i yazamaz)
+            try:
+                self.db.conn.rollback()
+            except Exception:
+                pass
+
+    def add_reminder_listener(self, fn: Callable[[int], None]) -> None:
+        if fn not in self._reminder_listeners:
+            self._reminder_listeners.append(fn)
+
+    def remove_reminder_listener(self, fn: Callable[[int], None]) -> None:
+        try:
+            self._reminder_listeners.remove(fn)
+        except ValueError:
+            pass
+
+    def _reminder_changed(self, reminder_id: Optional[int]) -> None:
+        if not reminder_id:
+            return
+        for fn in list(self._reminder_listeners):
+            try:
+                fn(int(reminder_id))
+            except Exception:
+                logger.exception("Hatırlatma dinleyicisi hata verdi")
 
     def list_company_users(self) -> List[Tuple[int, str]]:
         out: List[Tuple[int, str]] = []
@@ -240,6 +266,7 @@ class NotesRemindersService:
                 1,
             )
         self._audit(cid, owner_user_id, "create", "reminder", rid, title)
+        self._reminder_changed(rid)
         return rid
 
     def update_reminder(
@@ -276,6 +303,7 @@ class NotesRemindersService:
                 1,
             )
         self._audit(cid, owner_user_id, "update", "reminder", reminder_id, title)
+        self._reminder_changed(reminder_id)
 
     def snooze_reminder(self, reminder_id: int, minutes: int, company_id: int, owner_user_id: int) -> None:
         row = self.db.notes_reminders.get_reminder(reminder_id)
@@ -285,6 +313,7 @@ class NotesRemindersService:
         self.db.notes_reminders.update_reminder_due(reminder_id, due.strftime("%Y-%m-%d %H:%M:%S"))
         self.db.notes_reminders.set_reminder_status(reminder_id, "scheduled")
         self._audit(self._company_id(company_id), owner_user_id, "snooze", "reminder", reminder_id, f"{minutes} dk")
+        self._reminder_changed(reminder_id)
 
     def mark_reminder_done(self, reminder_id: int, company_id: int, owner_user_id: int, close_series: bool = False) -> None:
         row = self.db.notes_reminders.get_reminder(reminder_id)
@@ -292,20 +321,25 @@ class NotesRemindersService:
             raise ValueError("Hatırlatma bulunamadı.")
         self.db.notes_reminders.set_reminder_status(reminder_id, "done")
         series_id = int(row["series_id"] or row["id"])
+        next_id = None
         if close_series:
             self.db.notes_reminders.set_recurrence_active(series_id, 0)
         else:
-            self._create_next_occurrence(row)
+            next_id = self._create_next_occurrence(row)
         self._audit(self._company_id(company_id), owner_user_id, "done", "reminder", reminder_id, "")
+        self._reminder_changed(reminder_id)
+        self._reminder_changed(next_id)
 
     def cancel_reminder(self, reminder_id: int, company_id: int, owner_user_id: int) -> None:
         self.db.notes_reminders.set_reminder_status(reminder_id, "canceled")
         self._audit(self._company_id(company_id), owner_user_id, "cancel", "reminder", reminder_id, "")
+        self._reminder_changed(reminder_id)
 
     def archive_reminder(self, reminder_id: int, company_id: int, owner_user_id: int, archived: bool) -> None:
         status = "archived" if archived else "scheduled"
         self.db.notes_reminders.set_reminder_status(reminder_id, status)
         self._audit(self._company_id(company_id), owner_user_id, "archive" if archived else "restore", "reminder", reminder_id, status)
+        self._reminder_changed(reminder_id)
 
     def list_reminders(
         self,
@@ -331,14 +365,49 @@ class NotesRemindersService:
 
     def check_due_reminders(self, company_id: int, owner_user_id: int) -> Tuple[List[Dict[str, str]], int]:
         cid = self._company_id(company_id)
-        now = now_iso()
-        due = self.db.notes_reminders.list_due_reminders(cid, owner_user_id, "scheduled", now)
-        notified = []
-        for r in due:
-            self.db.notes_reminders.set_reminder_status(int(r["id"]), "overdue")
-            notified.append({"id": str(r["id"]), "title": str(r["title"]), "due_at": str(r["due_at"])})
-        overdue = self.db.notes_reminders.list_overdue(cid, owner_user_id)
-        return notified, len(overdue)
+        due = self.db.notes_reminders.list_due_reminders(cid, owner_user_id, "scheduled", now_iso())
+        return self._mark_fired(cid, owner_user_id, due)
+
+    def scheduled_reminders(self, company_id: int, owner_user_id: int) -> List[Tuple[str, int]]:
+        """Zamanlayıcı yığını için (due_at, id) listesi."""
+        return self.db.notes_reminders.list_scheduled_due(self._company_id(company_id), owner_user_id)
+
+    def reminder_schedule_entry(self, reminder_id: int, company_id: int, owner_user_id: int) -> Optional[str]:
+        """Hatırlatma bu kullanıcı için hâlâ bekliyorsa due_at, değilse None."""
+        row = self.db.notes_reminders.get_reminder(reminder_id)
+        if not row or not self._is_pending_for(row, self._company_id(company_id), owner_user_id):
+            return None
+        return str(row["due_at"])
+
+    def fire_reminders(
+        self, company_id: int, owner_user_id: int, reminder_ids: Iterable[int], now: Optional[str] = None
+    ) -> Tuple[List[Dict[str, str]], int]:
+        """Yığından düşen kayıtları tek toplu güncellemeyle 'overdue' yapar."""
+        cid = self._company_id(company_id)
+        now = now or now_iso()
+        rows = [
+            r
+            for r in self.db.notes_reminders.get_reminders(reminder_ids)
+            if self._is_pending_for(r, cid, owner_user_id) and str(r["due_at"]) <= now
+        ]
+        return self._mark_fired(cid, owner_user_id, rows)
+
+    def overdue_count(self, company_id: int, owner_user_id: int) -> int:
+        return self.db.notes_reminders.count_overdue(self._company_id(company_id), owner_user_id)
+
+    def _is_pending_for(self, row, company_id: int, owner_user_id: int) -> bool:
+        if str(row["status"]) != "scheduled" or int(row["company_id"] or 1) != company_id:
+            return False
+        uid = int(owner_user_id)
+        return int(row["owner_user_id"]) == uid or (
+            row["assignee_user_id"] is not None and int(row["assignee_user_id"]) == uid
+        )
+
+    def _mark_fired(self, company_id: int, owner_user_id: int, rows) -> Tuple[List[Dict[str, str]], int]:
+        if rows:
+            self.db.notes_reminders.set_reminders_status([int(r["id"]) for r in rows], "overdue")
+        notified = [{"id": str(r["id"]), "title": str(r["title"]), "due_at": str(r["due_at"])} for r in rows]
+        return notified, self.db.notes_reminders.count_overdue(company_id, owner_user_id)
 
     def list_overdue(self, company_id: int, owner_user_id: int):
         return self.db.notes_reminders.list_overdue(self._company_id(company_id), owner_user_id)
@@ -410,16 +479,16 @@ class NotesRemindersService:
             bymonthday=str(row["bymonthday"] or ""),
         )
 
-    def _create_next_occurrence(self, reminder_row) -> None:
+    def _create_next_occurrence(self, reminder_row) -> Optional[int]:
         series_id = int(reminder_row["series_id"] or reminder_row["id"])
         rule = self._get_recurrence(series_id)
         if not rule:
-            return
+            return None
         due = self._parse_dt(str(reminder_row["due_at"]))
         next_due = self._next_due(due, rule)
         if not next_due:
-            return
-        self.db.notes_reminders.create_reminder(
+            return None
+        return self.db.notes_reminders.create_reminder(
             int(reminder_row["company_id"]),
             int(reminder_row["owner_user_id"]),
             str(reminder_row["title"]),
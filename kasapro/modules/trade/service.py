@@ -554,8 +554,9 @@ class TradeService:
     def cari_risk(self) -> List[Dict[str, Any]]:
         self.require("reports")
         rows = []
+        balances = self.db.cari_bakiye_all()
         for cari in self.db.cari_list():
-            bakiye = self.db.cari_bakiye(int(cari["id"]))
+            bakiye = balances.get(int(cari["id"])) or {"bakiye": 0.0}
             rows.append({"cari": cari["ad"], "bakiye": bakiye["bakiye"]})
         rows.sort(key=lambda x: x["bakiye"], reverse=True)
         return rows
@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+"""Startup / ekran açılış benchmark paketi.
+
+Ölçülenler (her biri ayrı metrik):
+- import.<paket>: temiz bir Python sürecinde paket import süresi
+- db.open.small / db.open.large: sentetik küçük ve büyük şirket DB'si için `DB()`
+- services.build: `Services.build`
+- ui.first_frame: `App(test_mode=True)` + ilk çizim (Tk gerekir)
+- ui.screen.<key>: kayıtlı her ekranın ilk açılışı (`show` + update_idletasks)
+
+Sonuçlar yüzdelik istatistiklerle JSON geçmişine eklenir; eşik dosyasına göre
+son çalıştırmaların medyanından belirgin yavaşlama varsa çıkış kodu 1 olur.
+
+Kullanım:
+    python -m kasapro.qa.bench [--repeat 5] [--only import,db] [--no-save]
+    xvfb-run python -m kasapro.qa.bench   # ekransız makinede UI ölçümleri
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as _dt
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ..config import APP_BASE_DIR, DATA_DIRNAME
+
+DEFAULT_HISTORY_PATH = os.path.join(APP_BASE_DIR, DATA_DIRNAME, "bench_history.json")
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_THRESHOLDS_PATH = os.path.join(_REPO_ROOT, "tools", "bench_thresholds.json")
+HISTORY_LIMIT = 200
+
+IMPORT_PACKAGES = (
+    "kasapro.config",
+    "kasapro.db",
+    "kasapro.services",
+    "kasapro.ui",
+    "kasapro.app",
+)
+GROUPS = ("import", "db", "services", "ui")
+
+SMALL_COMPANY_ROWS = 200
+LARGE_COMPANY_ROWS = 50000
+
+# Eşik dosyası yoksa / metrik tanımlı değilse kullanılan kurallar
+DEFAULT_RULE: Dict[str, Any] = {
+    "stat": "p50_ms",
+    "max_regression_pct": 25.0,
+    "min_delta_ms": 2.0,
+    "baseline_runs": 5,
+}
+
+
+# -----------------------------------------------------------------
+# İstatistik
+# -----------------------------------------------------------------
+def _percentile(ordered: List[float], q: float) -> float:
+    if len(ordered) == 1:
+        return ordered[0]
+    pos = (len(ordered) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def summarize(samples: Iterable[float]) -> Dict[str, float]:
+    """Saniye cinsinden örneklerden milisaniye istatistikleri."""
+    ms = sorted(float(s) * 1000.0 for s in samples)
+    if not ms:
+        raise ValueError("Ölçüm örneği yok")
+    return {
+        "n": len(ms),
+        "min_ms": round(ms[0], 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(_percentile(ms, 0.50), 3),
+        "p90_ms": round(_percentile(ms, 0.90), 3),
+        "p95_ms": round(_percentile(ms, 0.95), 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int = 0) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+# -----------------------------------------------------------------
+# Ölçümler
+# -----------------------------------------------------------------
+_IMPORT_SNIPPET = "import time,importlib;t=time.perf_counter();importlib.import_module({name!r});print(time.perf_counter()-t)"
+
+
+def bench_imports(packages: Iterable[str] = IMPORT_PACKAGES, repeat: int = 5) -> Dict[str, List[float]]:
+    """Her paket için temiz süreçte import süresi (önceki paketlerin önbelleği yok)."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (_REPO_ROOT, env.get("PYTHONPATH", "")) if p)
+    out: Dict[str, List[float]] = {}
+    for name in packages:
+        samples: List[float] = []
+        for _ in range(max(1, repeat)):
+            res = subprocess.run(
+                [sys.executable, "-c", _IMPORT_SNIPPET.format(name=name)],
+                capture_output=True, text=True, env=env, cwd=_REPO_ROOT, check=True,
+            )
+            samples.append(float(res.stdout.strip().splitlines()[-1]))
+        out[f"import.{name}"] = samples
+    return out
+
+
+def make_company_db(path: str, rows: int) -> None:
+    """Cari, cari hareket ve kasa hareketleriyle sentetik şirket DB'si oluşturur."""
+    from ..db.main_db import DB
+
+    db = DB(path)
+    try:
+        conn = db.conn
+        cari_count = max(1, rows // 50)
+        conn.executemany(
+            "INSERT OR IGNORE INTO cariler(ad, tur) VALUES (?, ?)",
+            [(f"Bench Cari {i:05d}", "Müşteri") for i in range(cari_count)],
+        )
+        cari_ids = [r[0] for r in conn.execute("SELECT id FROM cariler ORDER BY id")]
+        conn.executemany(
+            "INSERT INTO cari_hareket(tarih, cari_id, tip, tutar, aciklama) VALUES (?,?,?,?,?)",
+            [
+                (f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", cari_ids[i % len(cari_ids)],
+                 "Borç" if i % 3 else "Alacak", float(i % 997) + 0.5, f"Hareket {i}")
+                for i in range(rows)
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO kasa_hareket(tarih, tip, tutar, kategori, cari_id, aciklama) VALUES (?,?,?,?,?,?)",
+            [
+                (f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", "Gider" if i % 2 else "Gelir",
+                 float(i % 499) + 0.25, "Genel", cari_ids[i % len(cari_ids)], f"Kasa {i}")
+                for i in range(rows)
+            ],
+        )
+        conn.commit()
+    finally:
+        db.close()
+
+
+def bench_db(tmp: str, repeat: int = 5, small_rows: int = SMALL_COMPANY_ROWS,
+             large_rows: int = LARGE_COMPANY_ROWS) -> Dict[str, List[float]]:
+    """Var olan şirket DB'sini açma (`DB()` + ilk sorgu) süresi."""
+    from ..db.main_db import DB
+
+    out: Dict[str, List[float]] = {}
+    for label, rows in (("small", small_rows), ("large", large_rows)):
+        path = os.path.join(tmp, f"bench_{label}.db")
+        make_company_db(path, rows)
+
+        def open_close(path: str = path) -> None:
+            db = DB(path)
+            db.get_setting("backup_keep")
+            db.close()
+
+        out[f"db.open.{label}"] = measure(open_close, repeat, warmup=1)
+    return out
+
+
+def bench_services(tmp: str, repeat: int = 5) -> Dict[str, List[float]]:
+    from ..db.main_db import DB
+    from ..db.users_db import UsersDB
+    from ..services import Services
+
+    usersdb = UsersDB(os.path.join(tmp, "services"))
+    db = DB(os.path.join(tmp, "services", "bench_services.db"))
+    try:
+        samples = measure(lambda: Services.build(db, usersdb, context_provider=lambda: None), repeat, warmup=1)
+    finally:
+        db.close()
+        usersdb.close()
+    return {"services.build": samples}
+
+
+def can_start_tk() -> bool:
+    try:
+        import tkinter as tk
+
+        root = tk.Tk()
+        root.withdraw()
+        root.update_idletasks()
+        root.destroy()
+        return True
+    except Exception:
+        return False
+
+
+def bench_ui(tmp: str, repeat: int = 3, screens: Optional[Iterable[str]] = None) -> Dict[str, List[float]]:
+    """Her tekrarda yeni bir App: ilk frame süresi ve ekranların ilk açılışı."""
+    from ..app import App
+
+    out: Dict[str, List[float]] = {}
+    for n in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        app = App(base_dir=os.path.join(tmp, f"ui_{n}"), test_mode=True)
+        app.root.update_idletasks()
+        out.setdefault("ui.first_frame", []).append(time.perf_counter() - t0)
+        try:
+            keys = list(screens) if screens is not None else app.screen_registry.keys()
+            for key in keys:
+                t0 = time.perf_counter()
+                app.show(key)
+                app.root.update_idletasks()
+                out.setdefault(f"ui.screen.{key}", []).append(time.perf_counter() - t0)
+        finally:
+            try:
+                app.on_close()
+            except Exception:
+                pass
+    return out
+
+
+def run_suite(groups: Iterable[str] = GROUPS, repeat: int = 5, ui_repeat: int = 3,
+              large_rows: int = LARGE_COMPANY_ROWS) -> Dict[str, Any]:
+    groups = set(groups)
+    samples: Dict[str, List[float]] = {}
+    skipped: Dict[str, str] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if "import" in groups:
+            samples.update(bench_imports(repeat=repeat))
+        if "db" in groups:
+            samples.update(bench_db(tmp, repeat=repeat, large_rows=large_rows))
+        if "services" in groups:
+            samples.update(bench_services(tmp, repeat=repeat))
+        if "ui" in groups:
+            if can_start_tk():
+                samples.update(bench_ui(tmp, repeat=ui_repeat))
+            else:
+                skipped["ui"] = "Tk başlatılamadı (ekran yok; xvfb-run ile çalıştırın)"
+    return {
+        "timestamp": _dt.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "metrics": {k: summarize(v) for k, v in sorted(samples.items())},
+        "skipped": skipped,
+    }
+
+
+# -----------------------------------------------------------------
+# Geçmiş ve eşikler
+# -----------------------------------------------------------------
+def load_history(path: str = DEFAULT_HISTORY_PATH) -> List[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return data if isinstance(data, list) else []
+
+
+def append_history(run: Dict[str, Any], path: str = DEFAULT_HISTORY_PATH, limit: int = HISTORY_LIMIT) -> None:
+    history = load_history(path)
+    history.append(run)
+    history = history[-max(1, int(limit)):]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(history, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def load_thresholds(path: str = DEFAULT_THRESHOLDS_PATH) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def rule_for(metric: str, thresholds: Dict[str, Any]) -> Dict[str, Any]:
+    """Varsayılan <- thresholds['default'] <- en uzun eşleşen metrik öneki."""
+    rule = dict(DEFAULT_RULE)
+    rule.update(thresholds.get("default") or {})
+    metrics = thresholds.get("metrics") or {}
+    for prefix in sorted((p for p in metrics if metric == p or metric.startswith(p + ".")), key=len):
+        rule.update(metrics[prefix] or {})
+    return rule
+
+
+@dataclass
+class Regression:
+    metric: str
+    stat: str
+    value_ms: float
+    limit_ms: float
+    reason: str
+
+    def __str__(self) -> str:
+        return f"{self.metric} {self.stat}={self.value_ms:.3f} ms > {self.limit_ms:.3f} ms ({self.reason})"
+
+
+def check_regressions(run: Dict[str, Any], history: List[Dict[str, Any]],
+                      thresholds: Dict[str, Any]) -> List[Regression]:
+    """`run` metriklerini mutlak sınırlara ve geçmiş medyanına göre denetler.
+
+    `history` bu çalıştırmayı içermemelidir.
+    """
+    out: List[Regression] = []
+    for metric, stats in (run.get("metrics") or {}).items():
+        rule = rule_for(metric, thresholds)
+        stat = str(rule["stat"])
+        value = stats.get(stat)
+        if value is None:
+            continue
+        max_ms = rule.get("max_ms")
+        if max_ms is not None and value > float(max_ms):
+            out.append(Regression(metric, stat, value, float(max_ms), "mutlak sınır"))
+            continue
+        past = [
+            float(r["metrics"][metric][stat])
+            for r in history[-max(1, int(rule["baseline_runs"])):]
+            if stat in ((r.get("metrics") or {}).get(metric) or {})
+        ]
+        if not past:
+            continue
+        baseline = statistics.median(past)
+        limit = max(baseline * (1.0 + float(rule["max_regression_pct"]) / 100.0),
+                    baseline + float(rule["min_delta_ms"]))
+        if value > limit:
+            out.append(Regression(metric, stat, value, limit, f"geçmiş medyanı {baseline:.3f} ms"))
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m kasapro.qa.bench", description="KasaPro startup benchmark")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--ui-repeat", type=int, default=3)
+    ap.add_argument("--large-rows", type=int, default=LARGE_COMPANY_ROWS)
+    ap.add_argument("--only", default=",".join(GROUPS), help="Virgüllü grup listesi: " + ",".join(GROUPS))
+    ap.add_argument("--history", default=DEFAULT_HISTORY_PATH)
+    ap.add_argument("--thresholds", default=DEFAULT_THRESHOLDS_PATH)
+    ap.add_argument("--no-save", action="store_true", help="Sonucu geçmişe yazma")
+    args = ap.parse_args(argv)
+
+    groups = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = sorted(set(groups) - set(GROUPS))
+    if unknown:
+        ap.error(f"Bilinmeyen grup: {', '.join(unknown)}")
+
+    run = run_suite(groups, repeat=args.repeat, ui_repeat=args.ui_repeat, large_rows=args.large_rows)
+    history = load_history(args.history)
+    regressions = check_regressions(run, history, load_thresholds(args.thresholds))
+    run["regressions"] = [str(r) for r in regressions]
+    if not args.no_save:
+        append_history(run, args.history)
+    print(json.dumps(run, ensure_ascii=False, indent=2))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 
 from .context import Services
+from .company_pool import CompanyHandle, CompanyPool
 from .settings_service import SettingsService
 from .company_users_service import CompanyUsersService
 from .cari_service import CariService
+from .backup_service import BackupService
 from .export_service import ExportService
+from .import_service import ImportService
 from .messages_service import MessagesService
 from modules.hakedis.service import HakedisService
 from ..modules.hakedis.service import HakedisService
@@ -15,10 +18,14 @@ from ..modules.notes_reminders.service import NotesRemindersService
 
 __all__ = [
     "Services",
+    "CompanyHandle",
+    "CompanyPool",
     "SettingsService",
     "CompanyUsersService",
     "CariService",
+    "BackupService",
     "ExportService",
+    "ImportService",
     "MessagesService",
     "HakedisService",
     "HakedisService",
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""Çevrimiçi DB yedekleme / geri yükleme.
+
+Canlı (WAL) veritabanı dosya kopyasıyla değil SQLite backup API ile
+kopyalanır: sayfalar adım adım aktarılır, her adım arasında kaynak kilidi
+bırakılır ve -wal içeriği de yedeğe girer. İsteğe bağlı VACUUM INTO ile
+sıkıştırılmış (boşlukları atılmış) kopya, gzip/xz dosya sıkıştırma, eski
+yedeklerin döndürülmesi ve `PRAGMA integrity_check` doğrulaması yapılır.
+"""
+
+from __future__ import annotations
+
+import gzip
+import lzma
+import os
+import shutil
+import sqlite3
+import tempfile
+from glob import escape, glob
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+BACKUP_PREFIX = "kasa_backup_"
+
+# sıkıştırma adı -> (dosya uzantısı, açıcı)
+COMPRESSIONS: Dict[str, Tuple[str, Optional[Callable[..., object]]]] = {
+    "": (".db", None),
+    "gz": (".db.gz", gzip.open),
+    "xz": (".db.xz", lzma.open),
+}
+
+# (kopyalanan sayfa, toplam sayfa)
+BackupProgressFn = Callable[[int, int], None]
+
+
+class BackupError(Exception):
+    """Yedek/geri yükleme doğrulaması başarısız."""
+
+
+def backup_suffixes() -> List[str]:
+    return [ext for ext, _ in COMPRESSIONS.values()]
+
+
+def _compression_of(path: str) -> str:
+    for name, (ext, _) in COMPRESSIONS.items():
+        if name and path.endswith(ext):
+            return name
+    return ""
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def integrity_check(path: str) -> str:
+    """Sıkıştırılmamış DB dosyası için 'ok' ya da ilk hata satırlarını döndürür."""
+    conn = sqlite3.connect(Path(os.path.abspath(path)).as_uri() + "?mode=ro", uri=True)
+    try:
+        rows = [str(r[0]) for r in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+    return "ok" if rows == ["ok"] else "; ".join(rows[:5])
+
+
+class BackupService:
+    def __init__(self, backup_dir: str, keep: int = 20, pages_per_step: int = 256, busy_sleep: float = 0.05):
+        self.backup_dir = backup_dir
+        self.keep = int(keep)
+        self.pages_per_step = max(1, int(pages_per_step))
+        self.busy_sleep = float(busy_sleep)
+
+    # -----------------
+    # Yedek
+    # -----------------
+    def backup(
+        self,
+        src_path: str,
+        name: str,
+        *,
+        compact: bool = False,
+        compress: str = "",
+        verify: bool = True,
+        progress: Optional[BackupProgressFn] = None,
+    ) -> str:
+        """`src_path`'in tutarlı anlık görüntüsünü `backup_dir/name + uzantı` olarak yazar.
+
+        compact=True: VACUUM INTO ile boşlukları atılmış kopya (tek okuma
+        transaction'ı; WAL'da yazanları bekletmez).
+        """
+        if compress not in COMPRESSIONS:
+            raise ValueError(f"Bilinmeyen sıkıştırma: {compress}")
+        if not os.path.exists(src_path):
+            raise FileNotFoundError("DB bulunamadı.")
+        os.makedirs(self.backup_dir, exist_ok=True)
+        ext, opener = COMPRESSIONS[compress]
+        dest = os.path.join(self.backup_dir, name + ext)
+        raw = os.path.join(self.backup_dir, name + ".db.part")
+        _remove_quietly(raw)
+        try:
+            self._snapshot(src_path, raw, compact=compact, progress=progress)
+            if verify:
+                result = integrity_check(raw)
+                if result != "ok":
+                    raise BackupError(f"Yedek doğrulanamadı: {result}")
+            if opener is None:
+                os.replace(raw, dest)
+            else:
+                packed = dest + ".part"
+                try:
+                    with open(raw, "rb") as fin, opener(packed, "wb") as fout:  # type: ignore[misc]
+                        shutil.copyfileobj(fin, fout, 1024 * 1024)
+                    os.replace(packed, dest)
+                finally:
+                    _remove_quietly(packed)
+        finally:
+            _remove_quietly(raw)
+        return dest
+
+    def _snapshot(self, src_path: str, dest_path: str, *, compact: bool, progress: Optional[BackupProgressFn]) -> None:
+        src = sqlite3.connect(src_path, timeout=30)
+        try:
+            src.execute("PRAGMA busy_timeout = 30000")
+            if compact:
+                src.execute("VACUUM INTO ?", (dest_path,))
+                return
+            dst = sqlite3.connect(dest_path)
+            try:
+
+                def on_step(_status: int, remaining: int, total: int) -> None:
+                    if progress is not None:
+                        progress(total - remaining, total)
+
+                # Her adımda `pages_per_step` sayfa; adımlar arasında kaynak kilidi bırakılır
+                src.backup(dst, pages=self.pages_per_step, progress=on_step, sleep=self.busy_sleep)
+                # Yedek tek dosya olsun (WAL kalıntısı bırakmasın)
+                dst.execute("PRAGMA journal_mode = DELETE")
+            finally:
+                dst.close()
+        finally:
+            src.close()
+
+    def backup_many(self, items: Iterable[Tuple[str, str]], **options: object) -> List[Tuple[str, Optional[str], str]]:
+        """(kaynak yol, yedek adı) listesini sırayla yedekler; biri hata verse de diğerleri sürer.
+
+        Dönüş: (kaynak, yedek yolu ya da None, hata mesajı) listesi.
+        """
+        out: List[Tuple[str, Optional[str], str]] = []
+        for src_path, name in items:
+            try:
+                out.append((src_path, self.backup(src_path, name, **options), ""))  # type: ignore[arg-type]
+            except Exception as exc:
+                out.append((src_path, None, str(exc)))
+        return out
+
+    # -----------------
+    # Liste / döndürme
+    # -----------------
+    def list_backups(self, prefix: str = BACKUP_PREFIX) -> List[str]:
+        """En yeni önce."""
+        files: List[str] = []
+        for ext in backup_suffixes():
+            files += glob(os.path.join(self.backup_dir, f"{escape(prefix)}*{ext}"))
+        files = [f for f in dict.fromkeys(files) if not f.endswith(".part")]
+        files.sort(key=lambda p: (os.path.getmtime(p), p), reverse=True)
+        return files
+
+    def rotate(self, prefix: str, keep: Optional[int] = None) -> List[str]:
+        """`prefix` ile başlayan yedeklerden en yeni `keep` tanesi dışındakileri siler."""
+        keep = self.keep if keep is None else int(keep)
+        if keep <= 0:
+            return []
+        removed = []
+        for path in self.list_backups(prefix)[keep:]:
+            try:
+                os.remove(path)
+                removed.append(path)
+            except OSError:
+                pass
+        return removed
+
+    # -----------------
+    # Doğrulama / geri yükleme
+    # -----------------
+    def verify(self, backup_path: str) -> str:
+        """Yedeği (gerekirse açarak) geçici kopyada kontrol eder; 'ok' ya da hata metni."""
+        with tempfile.TemporaryDirectory() as tmp:
+            return integrity_check(self._unpack(backup_path, tmp))
+
+    def restore(self, backup_path: str, target_path: str, progress: Optional[BackupProgressFn] = None) -> None:
+        """Yedeği doğrular ve backup API ile hedef DB'nin üzerine yazar.
+
+        Dosya kopyalamanın aksine açık bağlantılar ve -wal dosyası SQLite
+        tarafından tutarlı biçimde güncellenir.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            plain = self._unpack(backup_path, tmp)
+            result = integrity_check(plain)
+            if result != "ok":
+                raise BackupError(f"Yedek bozuk, geri yüklenmedi: {result}")
+            src = sqlite3.connect(plain)
+            dst = sqlite3.connect(target_path, timeout=30)
+            try:
+
+                def on_step(_status: int, remaining: int, total: int) -> None:
+                    if progress is not None:
+                        progress(total - remaining, total)
+
+                src.backup(dst, pages=self.pages_per_step, progress=on_step, sleep=self.busy_sleep)
+            finally:
+                dst.close()
+                src.close()
+
+    def _unpack(self, backup_path: str, tmp_dir: str) -> str:
+        _ext, opener = COMPRESSIONS[_compression_of(backup_path)]
+        if opener is None:
+            return backup_path
+        plain = os.path.join(tmp_dir, "restore.db")
+        with opener(backup_path, "rb") as fin, open(plain, "wb") as fout:  # type: ignore[misc]
+            shutil.copyfileobj(fin, fout, 1024 * 1024)
+        return plain
+
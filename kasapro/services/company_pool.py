@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Şirket DB + servis havuzu.
+
+Şirket değiştirmek her seferinde DB açılışı (şema defteri, ~20 repo) ve
+Services.build maliyeti demekti. Havuz, açık (DB, Services) çiftlerini DB
+yoluna göre LRU sırasıyla tutar; kapasite aşılınca en eski çift kapatılır.
+`prewarm` son kullanılan şirketleri arka planda açar; aynı yol için eşzamanlı
+istekler tek açılışı bekler.
+
+Not: DB bağlantıları thread başınadır (ConnectionProxy); arka planda açılan
+bir DB ana thread'de ilk kullanımda kendi bağlantısını açar (ucuz). Ağır kısım
+(şema kontrolü, repo/servis kurulumu) arka planda kalır.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+_log = logging.getLogger(__name__)
+
+# yol -> (db, services)
+CompanyFactory = Callable[[str], Tuple[Any, Any]]
+
+
+def _key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _file_id(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (int(st.st_dev), int(st.st_ino))
+
+
+@dataclass
+class CompanyHandle:
+    path: str
+    db: Any
+    services: Any
+    file_id: Optional[Tuple[int, int]] = None
+
+    def close(self) -> None:
+        try:
+            self.db.close()
+        except Exception:
+            pass
+
+
+class CompanyPool:
+    def __init__(self, factory: CompanyFactory, capacity: int = 3):
+        self.factory = factory
+        self.capacity = max(1, int(capacity))
+        self._entries: "OrderedDict[str, CompanyHandle]" = OrderedDict()
+        self._pending: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, path: str) -> bool:
+        with self._lock:
+            return _key(path) in self._entries
+
+    def paths(self) -> List[str]:
+        """LRU sırasıyla (en eski başta)."""
+        with self._lock:
+            return [h.path for h in self._entries.values()]
+
+    def acquire(self, path: str) -> CompanyHandle:
+        """Yolun DB/servislerini döndürür; yoksa açar. Çift en yeni kullanılan olur."""
+        key = _key(path)
+        while True:
+            with self._lock:
+                handle = self._entries.get(key)
+                if handle is not None and handle.file_id == _file_id(path):
+                    self._entries.move_to_end(key)
+                    return handle
+                if handle is not None:
+                    # Dosya silinmiş / yeniden oluşturulmuş: eski bağlantı artık geçersiz
+                    del self._entries[key]
+                    handle.close()
+                waiter = self._pending.get(key)
+                if waiter is None:
+                    self._pending[key] = threading.Event()
+                    break
+            waiter.wait()
+
+        try:
+            handle = self._build(path)
+        finally:
+            with self._lock:
+                self._pending.pop(key).set()
+        with self._lock:
+            self._entries[key] = handle
+            evicted = self._trim()
+        for h in evicted:
+            h.close()
+        return handle
+
+    def prewarm(self, paths: Iterable[str], background: bool = True) -> Optional[threading.Thread]:
+        """Boş yuvalar kadar şirketi önceden açar; havuzdakileri geri itmez."""
+        todo = list(dict.fromkeys(paths))
+        if not todo:
+            return None
+        if not background:
+            self._prewarm(todo)
+            return None
+        t = threading.Thread(target=self._prewarm, args=(todo,), daemon=True, name="company-prewarm")
+        t.start()
+        return t
+
+    def discard(self, path: str) -> None:
+        """Yolu havuzdan çıkarır ve kapatır (geri yükleme / silme öncesi).
+
+        Yol o an (ör. ön yüklemede) açılıyorsa açılışın bitmesi beklenir.
+        """
+        key = _key(path)
+        while True:
+            with self._lock:
+                waiter = self._pending.get(key)
+                if waiter is None:
+                    handle = self._entries.pop(key, None)
+                    break
+            waiter.wait()
+        if handle is not None:
+            handle.close()
+
+    def close(self) -> None:
+        with self._lock:
+            handles = list(self._entries.values())
+            self._entries.clear()
+        for h in handles:
+            h.close()
+
+    def _build(self, path: str) -> CompanyHandle:
+        file_id = _file_id(path)
+        db, services = self.factory(path)
+        # DB yeni oluşturulduysa kimlik açılıştan sonra belli olur
+        return CompanyHandle(path, db, services, file_id or _file_id(path))
+
+    def _prewarm(self, paths: List[str]) -> None:
+        for path in paths:
+            key = _key(path)
+            with self._lock:
+                if key in self._entries or key in self._pending:
+                    continue
+                if len(self._entries) >= self.capacity:
+                    return
+                self._pending[key] = threading.Event()
+            handle = None
+            try:
+                handle = self._build(path)
+            except Exception:
+                _log.exception("Şirket ön yüklemesi başarısız: %s", path)
+            finally:
+                with self._lock:
+                    self._pending.pop(key).set()
+                    if handle is not None and len(self._entries) < self.capacity:
+                        # Ön yüklenen çift, kullanılanların gerisinde (LRU tarafında) durur
+                        self._entries[key] = handle
+                        self._entries.move_to_end(key, last=False)
+                        handle = None
+            if handle is not None:
+                # Bu arada havuz doldu: kullanılan çiftleri itmek yerine bırak
+                handle.close()
+
+    def _trim(self) -> List[CompanyHandle]:
+        evicted = []
+        while len(self._entries) > self.capacity:
+            _, handle = self._entries.popitem(last=False)
+            evicted.append(handle)
+        return evicted
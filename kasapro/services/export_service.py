@@ -6,10 +6,123 @@ UI tarafındaki openpyxl/reportlab bağımlılıklarını tek noktada toplamak i
 
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, List, List
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from ..utils import fmt_amount, ensure_pdf_fonts
 
+# (sayfa adı, başlıklar, sorgu) - sorgu kolonları başlık sırasıyla aynıdır.
+# Tam dışa aktarma bu listeyi sunucu tarafı imleçle (fetchmany) akıtır.
+FULL_EXPORT_SHEETS: List[Tuple[str, List[str], str]] = [
+    (
+        "Cariler",
+        ["id", "ad", "tur", "telefon", "notlar", "acilis_bakiye", "aktif"],
+        "SELECT id, ad, tur, telefon, notlar, acilis_bakiye, aktif FROM cariler ORDER BY ad",
+    ),
+    (
+        "Cari_Hareket",
+        ["id", "tarih", "cari", "tip", "tutar", "para", "aciklama", "odeme", "belge", "etiket"],
+        """SELECT h.id, h.tarih, c.ad, h.tip, h.tutar, h.para, h.aciklama, h.odeme, h.belge, h.etiket
+           FROM cari_hareket h JOIN cariler c ON c.id=h.cari_id
+           ORDER BY h.tarih DESC, h.id DESC""",
+    ),
+    (
+        "Kasa_Hareket",
+        ["id", "tarih", "tip", "tutar", "para", "odeme", "kategori", "cari", "aciklama", "belge", "etiket"],
+        """SELECT k.id, k.tarih, k.tip, k.tutar, k.para, k.odeme, k.kategori, c.ad, k.aciklama, k.belge, k.etiket
+           FROM kasa_hareket k LEFT JOIN cariler c ON c.id=k.cari_id
+           ORDER BY k.tarih DESC, k.id DESC""",
+    ),
+    (
+        "Banka_Hareket",
+        ["id", "tarih", "banka", "hesap", "tip", "tutar", "para", "aciklama", "referans", "belge", "etiket", "bakiye"],
+        """SELECT id, tarih, banka, hesap, tip, tutar, para, aciklama, referans, belge, etiket, bakiye
+           FROM banka_hareket ORDER BY tarih DESC, id DESC""",
+    ),
+    (
+        "Stok_Urun",
+        ["id", "kod", "ad", "kategori", "birim", "min_stok", "kritik_stok", "max_stok", "raf", "tedarikci_id", "barkod", "aktif", "aciklama"],
+        """SELECT id, kod, ad, kategori, birim, min_stok, kritik_stok, max_stok, raf, tedarikci_id, barkod, aktif, aciklama
+           FROM stok_urun ORDER BY ad""",
+    ),
+    (
+        "Stok_Lokasyon",
+        ["id", "ad", "aciklama", "aktif"],
+        "SELECT id, ad, aciklama, aktif FROM stok_lokasyon ORDER BY ad",
+    ),
+    (
+        "Stok_Parti",
+        ["id", "urun_id", "parti_no", "skt", "uretim_tarih", "aciklama"],
+        "SELECT id, urun_id, parti_no, skt, uretim_tarih, aciklama FROM stok_parti ORDER BY parti_no",
+    ),
+    (
+        "Stok_Hareket",
+        ["id", "tarih", "urun_id", "tip", "miktar", "birim", "kaynak_lokasyon_id", "hedef_lokasyon_id", "parti_id", "referans_tipi", "referans_id", "maliyet", "aciklama"],
+        """SELECT id, tarih, urun_id, tip, miktar, birim, kaynak_lokasyon_id, hedef_lokasyon_id, parti_id,
+                  referans_tipi, referans_id, maliyet, aciklama
+           FROM stok_hareket ORDER BY tarih DESC, id DESC""",
+    ),
+]
+
+# (yazılan satır, toplam satır)
+ExportProgressFn = Callable[[int, int], None]
+
+_FETCH_SIZE = 1000
+
+
+class ExportCancelled(Exception):
+    """Dışa aktarma iptal edildi; yarım dosya silinir."""
+
+
+class _StreamExport:
+    """Tam dışa aktarma için ortak akış/ilerleme/iptal yardımcıları."""
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        sheets: Sequence[Tuple[str, List[str], str]],
+        progress: Optional[ExportProgressFn],
+        cancel_event: Optional[threading.Event],
+    ):
+        self.conn = conn
+        self.progress = progress
+        self.cancel_event = cancel_event
+        self.done = 0
+        # Olmayan tablolar (eski şema / kapalı modül) atlanır
+        self.sheets: List[Tuple[str, List[str], str, int]] = []
+        for name, headers, sql in sheets:
+            try:
+                n = int(conn.execute(f"SELECT COUNT(*) FROM ({sql})").fetchone()[0])
+            except sqlite3.Error:
+                continue
+            self.sheets.append((name, headers, sql, n))
+        self.total = sum(s[3] for s in self.sheets)
+
+    def rows(self, sql: str) -> Iterator[Sequence[Any]]:
+        cur = self.conn.execute(sql)
+        while True:
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                raise ExportCancelled()
+            batch = cur.fetchmany(_FETCH_SIZE)
+            if not batch:
+                break
+            yield from batch
+            self.done += len(batch)
+            if self.progress is not None:
+                try:
+                    self.progress(self.done, self.total)
+                except Exception:
+                    pass
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
 
 class ExportService:
     def export_table_csv(self, headers: List[str], rows: Iterable[Iterable[Any]], filepath: str) -> None:
@@ -35,6 +148,78 @@ class ExportService:
         ws.freeze_panes = "A2"
         wb.save(filepath)
 
+    def export_database_excel(
+        self,
+        conn: sqlite3.Connection,
+        filepath: str,
+        summary: Optional[Sequence[Tuple[str, Any]]] = None,
+        progress: Optional[ExportProgressFn] = None,
+        cancel_event: Optional[threading.Event] = None,
+        sheets: Sequence[Tuple[str, List[str], str]] = FULL_EXPORT_SHEETS,
+    ) -> Dict[str, int]:
+        """Tüm tabloları write_only çalışma kitabına akıtır; sayfa -> satır sayısı.
+
+        Satırlar bellekte biriktirilmez (openpyxl write_only + fetchmany); iptalde
+        yarım dosya bırakılmaz. Ayrı thread'den çağrılabilir.
+        """
+        from openpyxl import Workbook
+        from openpyxl.utils import get_column_letter
+
+        stream = _StreamExport(conn, sheets, progress, cancel_event)
+        wb = Workbook(write_only=True)
+        counts: Dict[str, int] = {}
+        for name, headers, sql, n in stream.sheets:
+            ws = wb.create_sheet(title=name)
+            for i, h in enumerate(headers, start=1):
+                ws.column_dimensions[get_column_letter(i)].width = min(45, max(12, len(str(h)) + 2))
+            ws.freeze_panes = "A2"
+            ws.append(headers)
+            for row in stream.rows(sql):
+                ws.append(list(row))
+            counts[name] = n
+        if summary:
+            ws = wb.create_sheet("Ozet")
+            ws.append(["Kasa Özet"])
+            ws.append([])
+            for label, value in summary:
+                ws.append([label, value])
+        tmp = f"{filepath}.part"
+        try:
+            wb.save(tmp)
+            os.replace(tmp, filepath)
+        except BaseException:
+            _remove_quietly(tmp)
+            raise
+        return counts
+
+    def export_database_csv(
+        self,
+        conn: sqlite3.Connection,
+        out_dir: str,
+        progress: Optional[ExportProgressFn] = None,
+        cancel_event: Optional[threading.Event] = None,
+        sheets: Sequence[Tuple[str, List[str], str]] = FULL_EXPORT_SHEETS,
+    ) -> List[str]:
+        """Her tabloyu `out_dir` altına ayrı CSV olarak akıtır (openpyxl gerekmez)."""
+        import csv
+
+        stream = _StreamExport(conn, sheets, progress, cancel_event)
+        os.makedirs(out_dir, exist_ok=True)
+        paths: List[str] = []
+        try:
+            for name, headers, sql, _n in stream.sheets:
+                path = os.path.join(out_dir, f"{name}.csv")
+                paths.append(path)
+                with open(path, "w", newline="", encoding="utf-8") as handle:
+                    writer = csv.writer(handle)
+                    writer.writerow(headers)
+                    writer.writerows(stream.rows(sql))
+        except ExportCancelled:
+            for path in paths:
+                _remove_quietly(path)
+            raise
+        return paths
+
     def export_cari_ekstre_excel(self, data: Dict[str, Any], filepath: str):
         """Cari ekstreyi Excel'e yazar.
 
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""Toplu Excel içe aktarma.
+
+Satırlar (openpyxl read_only `iter_rows(values_only=True)` demetleri) parça
+parça okunur; cari adları bir kez yüklenen sözlükten çözülür, boş belge
+numaraları parça başına tek seferde ayrılır ve her parça tek transaction'da
+(BEGIN IMMEDIATE ... COMMIT) yazılır: yeni cariler, belge numaraları ve
+hareketler birlikte kesinleşir ya da birlikte geri alınır.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from ..db.main_db import DB
+from ..utils import norm_header, safe_float
+
+DEFAULT_IMPORT_CHUNK = 2000
+
+# (bölüm, o bölümde işlenen satır sayısı)
+ProgressFn = Callable[[str, int], None]
+
+# Kolon eşlemesi: alan -> 1 tabanlı kolon numarası (None = seçilmedi)
+ColumnMap = Dict[str, Optional[int]]
+
+
+class ImportCancelled(Exception):
+    """İçe aktarma kullanıcı tarafından durduruldu (tamamlanan parçalar kalır)."""
+
+
+def open_workbook_stream(path: str):
+    """Excel'i yalnızca okunur (akış) modda açar."""
+    import openpyxl  # type: ignore
+
+    return openpyxl.load_workbook(path, read_only=True, data_only=True)
+
+
+def sheet_rows(ws, header_row: int) -> Iterator[Sequence[Any]]:
+    """Başlık satırından sonraki satırları değer demetleri olarak akıtır."""
+    return ws.iter_rows(min_row=int(header_row) + 1, values_only=True)
+
+
+def _cell(row: Sequence[Any], col: Optional[int]) -> Any:
+    if not col or col > len(row):
+        return None
+    return row[col - 1]
+
+
+def _text(row: Sequence[Any], col: Optional[int], default: str = "") -> str:
+    return str(_cell(row, col) or default)
+
+
+class ImportService:
+    def __init__(
+        self,
+        db: DB,
+        chunk_size: int = DEFAULT_IMPORT_CHUNK,
+        progress: Optional[ProgressFn] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ):
+        self.db = db
+        self.chunk_size = max(1, int(chunk_size))
+        self.progress = progress
+        self.cancel_event = cancel_event
+        self._cari_ids: Optional[Dict[str, int]] = None
+
+    # -----------------
+    # Yardımcılar
+    # -----------------
+    def _chunks(self, section: str, rows: Iterable[Sequence[Any]]) -> Iterator[List[Sequence[Any]]]:
+        done = 0
+        chunk: List[Sequence[Any]] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self._check_cancel()
+                yield chunk
+                done += len(chunk)
+                self._report(section, done)
+                chunk = []
+        if chunk:
+            self._check_cancel()
+            yield chunk
+            done += len(chunk)
+            self._report(section, done)
+
+    @contextmanager
+    def _chunk_transaction(self) -> Iterator[None]:
+        conn = self.db.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            # Geri alınan parçada oluşturulan cari id'leri önbellekte kalmasın
+            self._cari_ids = None
+            raise
+
+    def _check_cancel(self) -> None:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ImportCancelled()
+
+    def _report(self, section: str, done: int) -> None:
+        if self.progress is not None:
+            try:
+                self.progress(section, done)
+            except Exception:
+                pass
+
+    def _cari_map(self) -> Dict[str, int]:
+        if self._cari_ids is None:
+            self._cari_ids = self.db.cari_id_map()
+        return self._cari_ids
+
+    def _resolve_cari_ids(self, names: Iterable[str], create_missing: bool) -> Dict[str, int]:
+        ids = self._cari_map()
+        missing = [n for n in names if n and n not in ids]
+        if missing and create_missing:
+            ids.update(self.db.cari_ensure_many(missing, commit=False))
+        return ids
+
+    def _fill_belge(self, records: List[List[Any]], idx: int, prefix: str) -> None:
+        empty = [rec for rec in records if not str(rec[idx] or "").strip()]
+        if empty:
+            for rec, belge in zip(empty, self.db.reserve_belge_nos(prefix, len(empty), commit=False)):
+                rec[idx] = belge
+
+    # -----------------
+    # Bölümler
+    # -----------------
+    def import_cariler(self, rows: Iterable[Sequence[Any]], cols: ColumnMap) -> int:
+        if not cols.get("ad"):
+            return 0
+        count = 0
+        for chunk in self._chunks("cariler", rows):
+            batch = []
+            for row in chunk:
+                ad = _cell(row, cols.get("ad"))
+                if not ad or not str(ad).strip():
+                    continue
+                batch.append((
+                    str(ad),
+                    _text(row, cols.get("tur")),
+                    _text(row, cols.get("telefon")),
+                    _text(row, cols.get("notlar")),
+                    safe_float(_cell(row, cols.get("acilis"))),
+                ))
+            with self._chunk_transaction():
+                count += self.db.cari_upsert_many(batch, commit=False)
+        # Yeni/yeniden adlandırılmış cariler için önbelleği tazele
+        self._cari_ids = None
+        return count
+
+    def import_cari_hareket(self, rows: Iterable[Sequence[Any]], cols: ColumnMap, create_missing_cari: bool = True) -> int:
+        count = 0
+        for chunk in self._chunks("cari_hareket", rows):
+            records: List[List[Any]] = []
+            for row in chunk:
+                cari = _cell(row, cols.get("cari"))
+                tutar = _cell(row, cols.get("tutar"))
+                if not cari or not str(cari).strip():
+                    continue
+                if safe_float(tutar) == 0:
+                    continue
+                tip_raw = _text(row, cols.get("tip"), "Borç")
+                records.append([
+                    _cell(row, cols.get("tarih")),
+                    str(cari).strip(),
+                    "Alacak" if "alacak" in norm_header(tip_raw) else "Borç",
+                    safe_float(tutar),
+                    _text(row, cols.get("para"), "TL"),
+                    _text(row, cols.get("aciklama")),
+                    _text(row, cols.get("odeme")),
+                    _text(row, cols.get("belge")),
+                    _text(row, cols.get("etiket")),
+                ])
+            with self._chunk_transaction():
+                ids = self._resolve_cari_ids([rec[1] for rec in records], create_missing_cari)
+                records = [rec for rec in records if rec[1] in ids]
+                for rec in records:
+                    rec[1] = ids[rec[1]]
+                self._fill_belge(records, 7, "C")
+                count += self.db.cari_hareket_add_many(records, commit=False)
+        return count
+
+    def import_kasa(self, rows: Iterable[Sequence[Any]], cols: ColumnMap, create_missing_cari: bool = True) -> int:
+        count = 0
+        for chunk in self._chunks("kasa", rows):
+            records: List[List[Any]] = []
+            for row in chunk:
+                tutar = _cell(row, cols.get("tutar"))
+                if safe_float(tutar) == 0:
+                    continue
+                tip_raw = _text(row, cols.get("tip"), "Gider")
+                cari = _cell(row, cols.get("cari"))
+                records.append([
+                    _cell(row, cols.get("tarih")),
+                    "Gelir" if "gelir" in norm_header(tip_raw) else "Gider",
+                    safe_float(tutar),
+                    _text(row, cols.get("para"), "TL"),
+                    _text(row, cols.get("odeme")),
+                    _text(row, cols.get("kategori")),
+                    str(cari).strip() if cari and str(cari).strip() else None,
+                    _text(row, cols.get("aciklama")),
+                    _text(row, cols.get("belge")),
+                    _text(row, cols.get("etiket")),
+                ])
+            with self._chunk_transaction():
+                ids = self._resolve_cari_ids([rec[6] for rec in records if rec[6]], create_missing_cari)
+                for rec in records:
+                    rec[6] = ids.get(rec[6]) if rec[6] else None
+                self._fill_belge(records, 8, "K")
+                count += self.db.kasa_add_many(records, commit=False)
+        return count
+
+    def import_banka(self, rows: Iterable[Sequence[Any]], cols: ColumnMap, import_grup: str = "") -> List[int]:
+        ids: List[int] = []
+        for chunk in self._chunks("banka", rows):
+            records: List[List[Any]] = []
+            for row in chunk:
+                # tutar/borç/alacak toleranslı
+                alacak = safe_float(_cell(row, cols.get("alacak")))
+                borc = safe_float(_cell(row, cols.get("borc")))
+                tutar_val = safe_float(_cell(row, cols.get("tutar")))
+                if alacak != 0:
+                    tipn, amount = "Giriş", abs(alacak)
+                elif borc != 0:
+                    tipn, amount = "Çıkış", abs(borc)
+                elif tutar_val != 0:
+                    tipn, amount = ("Çıkış" if tutar_val < 0 else "Giriş"), abs(tutar_val)
+                else:
+                    continue
+                bakiye = _cell(row, cols.get("bakiye"))
+                records.append([
+                    _cell(row, cols.get("tarih")),
+                    _text(row, cols.get("banka")),
+                    _text(row, cols.get("hesap")),
+                    tipn,
+                    amount,
+                    _text(row, cols.get("para"), "TL"),
+                    _text(row, cols.get("aciklama")),
+                    _text(row, cols.get("referans")),
+                    _text(row, cols.get("belge")),
+                    _text(row, cols.get("etiket")),
+                    import_grup,
+                    None if bakiye is None else safe_float(bakiye),
+                ])
+            with self._chunk_transaction():
+                self._fill_belge(records, 8, "B")
+                ids += self.db.banka_add_many(records, commit=False)
+        return ids
@@ -1,34 +1,46 @@
 # -*- coding: utf-8 -*-
-"""KasaPro UI - Frame'ler (sekme içerikleri)."""
-
-from .kasa import KasaFrame as KasaFrame
-from .cariler import CarilerFrame as CarilerFrame
-from .raporlar import RaporlarFrame as RaporlarFrame
-from .satis_raporlari import SatisRaporlariFrame as SatisRaporlariFrame
-from .global_search import GlobalSearchFrame as GlobalSearchFrame
-from .logs import LogsFrame as LogsFrame
-from .sirketler import SirketlerFrame as SirketlerFrame
-from .kullanicilar import KullanicilarFrame as KullanicilarFrame
-from .tanimlar_hub import TanimlarHubFrame as TanimlarHubFrame
-from .rapor_araclar_hub import RaporAraclarHubFrame as RaporAraclarHubFrame
-from .messages import MessagesFrame as MessagesFrame
-from .integrations_hub import IntegrationsHubFrame as IntegrationsHubFrame
-from .create_center import CreateCenterFrame as CreateCenterFrame
-from .stock_wms import StockWmsFrame as StockWmsFrame
-
-__all__ = [
-    "KasaFrame",
-    "CarilerFrame",
-    "RaporlarFrame",
-    "SatisRaporlariFrame",
-    "GlobalSearchFrame",
-    "LogsFrame",
-    "SirketlerFrame",
-    "KullanicilarFrame",
-    "TanimlarHubFrame",
-    "RaporAraclarHubFrame",
-    "MessagesFrame",
-    "IntegrationsHubFrame",
-    "CreateCenterFrame",
-    "StockWmsFrame",
-]
+"""KasaPro UI - Frame'ler (sekme içerikleri).
+
+Frame sınıfları ilk erişimde import edilir (PEP 562); paketi import etmek
+ekran modüllerini ve bağımlılıklarını yüklemez.
+"""
+
+from importlib import import_module
+from typing import Any
+
+# sınıf adı -> modül
+FRAME_MODULES = {
+    "KasaFrame": "kasa",
+    "CarilerFrame": "cariler",
+    "RaporlarFrame": "raporlar",
+    "SatisRaporlariFrame": "satis_raporlari",
+    "GlobalSearchFrame": "global_search",
+    "LogsFrame": "logs",
+    "SirketlerFrame": "sirketler",
+    "KullanicilarFrame": "kullanicilar",
+    "TanimlarHubFrame": "tanimlar_hub",
+    "RaporAraclarHubFrame": "rapor_araclar_hub",
+    "MessagesFrame": "messages",
+    "IntegrationsHubFrame": "integrations_hub",
+    "CreateCenterFrame": "create_center",
+    "StockWmsFrame": "stock_wms",
+}
+
+__all__ = list(FRAME_MODULES)
+
+
+def frame_module(name: str) -> str:
+    """Sınıf adının tam modül yolu (LazyFactory için)."""
+    return f"{__name__}.{FRAME_MODULES[name]}"
+
+
+def __getattr__(name: str) -> Any:
+    if name not in FRAME_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(frame_module(name)), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
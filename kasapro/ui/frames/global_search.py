@@ -27,7 +27,7 @@ class GlobalSearchFrame(BaseView):
         self._build()
 
     def _build(self):
-        top = ttk.LabelFrame(self, text="Global Arama (Cari + Kasa + Stok)")
+        top = ttk.LabelFrame(self, text="Global Arama (Cari + Kasa + Banka + Stok + Fatura)")
         top.pack(fill=tk.X, padx=10, pady=10)
 
         r = ttk.Frame(top)
@@ -61,6 +61,14 @@ class GlobalSearchFrame(BaseView):
         for r in res["stok_hareket"]:
             self.txt.insert(tk.END, f"{r['id']} | {fmt_tr_date(r['tarih'])} | {r['urun_kod']} | {r['urun_ad']} | {r['tip']} | {r['miktar']}\n")
 
-        self.txt.insert(tk.END, f"\nSTOK HAREKET ({len(res['stok_hareket'])})\n" + "-"*80 + "\n")
-        for r in res["stok_hareket"]:
-            self.txt.insert(tk.END, f"{r['id']} | {fmt_tr_date(r['tarih'])} | {r['urun_kod']} | {r['urun_ad']} | {r['tip']} | {r['miktar']}\n")
+        self.txt.insert(tk.END, f"\nBANKA ({len(res['banka'])})\n" + "-"*80 + "\n")
+        for r in res["banka"]:
+            self.txt.insert(tk.END, f"{r['id']} | {fmt_tr_date(r['tarih'])} | {r['banka']} | {r['tip']} | {r['tutar']} | {r['aciklama']}\n")
+
+        self.txt.insert(tk.END, f"\nFATURA ({len(res['fatura'])})\n" + "-"*80 + "\n")
+        for r in res["fatura"]:
+            self.txt.insert(tk.END, f"{r['id']} | {fmt_tr_date(r['tarih'])} | {r['fatura_no']} | {r['cari_ad']} | {r['genel_toplam']}\n")
+
+        self.txt.insert(tk.END, f"\nBELGELER ({len(res['docs'])})\n" + "-"*80 + "\n")
+        for r in res["docs"]:
+            self.txt.insert(tk.END, f"{r['id']} | {fmt_tr_date(r['doc_date'])} | {r['doc_no']} | {r['customer_name']} | {r['grand_total']}\n")
@@ -20,12 +20,14 @@ from tkinter import ttk, messagebox
 from ...config import APP_TITLE
 from ...utils import today_iso, fmt_tr_date, fmt_amount
 from ..base import BaseView
-from ..widgets import SimpleField, LabeledEntry, LabeledCombo, MoneyEntry
+from ..widgets import SimpleField, LabeledEntry, LabeledCombo, MoneyEntry, PagedGridSource, VirtualGrid
 
 if TYPE_CHECKING:
     from ...app import App
 
 class KasaFrame(BaseView):
+    HISTORY_PAGE_SIZE = 500
+
     def __init__(self, master, app: "App"):
         self.app = app
         super().__init__(master, app)
@@ -165,9 +167,15 @@ class KasaFrame(BaseView):
         ttk.Button(frow, text="Yenile", command=self.refresh).pack(side=tk.LEFT, padx=6)
 
         cols = ("id", "tarih", "tip", "tutar", "para", "odeme", "kategori", "cari", "aciklama", "belge", "etiket")
-        self.tree = ttk.Treeview(mid, columns=cols, show="headings", height=14, selectmode="browse")
-        for c in cols:
-            self.tree.heading(c, text=c.upper())
+        # Sanal tablo: 100k+ kayıtta da Treeview'de yalnızca görünen satırlar tutulur
+        self.grid_history = VirtualGrid(
+            mid,
+            cols,
+            values_fn=self._history_values,
+            height=14,
+            sort_keys={"cari": "cari_ad"},
+        )
+        self.tree = self.grid_history.tree
 
         self.tree.column("id", width=55, anchor="center")
         self.tree.column("tarih", width=95)
@@ -181,7 +189,7 @@ class KasaFrame(BaseView):
         self.tree.column("belge", width=90)
         self.tree.column("etiket", width=90)
 
-        self.tree.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        self.grid_history.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
         self.tree.bind("<Double-1>", lambda _e: self.edit_selected())
 
         btm = ttk.Frame(mid)
@@ -574,54 +582,46 @@ class KasaFrame(BaseView):
             pass
 
     def _refresh_history(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-
         kat = self.f_kat.get()
         kat = "" if kat == "(Tümü)" else kat
         tip = self.f_tip.get()
         tip = "" if tip == "(Tümü)" else tip
 
-        rows = self.app.db.kasa_list(
+        # Tüm geçmiş yerine sayfa sayfa (tarih, id imleciyle) okunur; toplamlar SQL'den
+        filters = dict(
             q=self.f_q.get(),
             date_from=self.f_from.get(),
             date_to=self.f_to.get(),
             tip=tip,
             kategori=kat,
         )
-
-        gelir = gider = 0.0
-        for r in rows:
-            t = (r["tip"] or "").strip()
-            try:
-                v = float(r["tutar"] or 0)
-            except Exception:
-                v = 0.0
-            if t == "Gelir":
-                gelir += v
-            elif t == "Gider":
-                gider += v
-
-            self.tree.insert(
-                "",
-                tk.END,
-                values=(
-                    r["id"],
-                    fmt_tr_date(r["tarih"]),
-                    r["tip"],
-                    fmt_amount(r["tutar"]),
-                    r["para"],
-                    r["odeme"],
-                    r["kategori"],
-                    r["cari_ad"] or "",
-                    r["aciklama"] or "",
-                    r["belge"] or "",
-                    r["etiket"] or "",
-                ),
+        tot = self.app.db.kasa_list_totals(**filters)
+        self.grid_history.set_source(
+            PagedGridSource(
+                lambda after, limit: self.app.db.kasa_list_page(after=after, limit=limit, **filters),
+                total=int(tot["adet"] or 0),
+                page_size=self.HISTORY_PAGE_SIZE,
             )
+        )
+        self.lbl_sum.config(
+            text=f"Kayıt: {tot['adet']} | Gelir: {fmt_amount(tot['gelir'])} | Gider: {fmt_amount(tot['gider'])} | Net: {fmt_amount(tot['net'])}"
+        )
 
-        net = gelir - gider
-        self.lbl_sum.config(text=f"Gelir: {fmt_amount(gelir)} | Gider: {fmt_amount(gider)} | Net: {fmt_amount(net)}")
+    @staticmethod
+    def _history_values(r) -> tuple:
+        return (
+            r["id"],
+            fmt_tr_date(r["tarih"]),
+            r["tip"],
+            fmt_amount(r["tutar"]),
+            r["para"],
+            r["odeme"],
+            r["kategori"],
+            r["cari_ad"] or "",
+            r["aciklama"] or "",
+            r["belge"] or "",
+            r["etiket"] or "",
+        )
 
     def _refresh_summary_bar(self):
         d = date.today()
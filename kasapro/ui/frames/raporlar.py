@@ -105,13 +105,14 @@ class RaporlarFrame(BaseView):
         for w in self.inner.winfo_children():
             w.destroy()
         self.cari_rows.clear()
+        balances = self.app.db.cari_bakiye_all(only_active=True)
         for r in self.app.db.cari_list(only_active=True):
             var = tk.BooleanVar(value=False)
             cid = int(r["id"])
             frm = ttk.Frame(self.inner)
             frm.pack(fill=tk.X, pady=2, padx=6)
             ttk.Checkbutton(frm, variable=var, text=r["ad"]).pack(side=tk.LEFT)
-            b = self.app.db.cari_bakiye(cid)
+            b = balances.get(cid) or self.app.db.cari_bakiye(cid)
             ttk.Label(frm, text=f"Bakiye: {fmt_amount(b['bakiye'])}").pack(side=tk.RIGHT)
             self.cari_rows.append((cid, var))
 
@@ -125,12 +126,12 @@ class RaporlarFrame(BaseView):
 
     def calc_selected(self):
         total_borc = total_alacak = total_bakiye = 0.0
-        for cid, var in self.cari_rows:
-            if var.get():
-                b = self.app.db.cari_bakiye(cid)
-                total_borc += b["borc"]
-                total_alacak += b["alacak"]
-                total_bakiye += b["bakiye"]
+        # Liste yenilendikten sonra hareket girilmiş olabilir: seçilenler güncel okunur
+        selected = [cid for cid, var in self.cari_rows if var.get()]
+        for b in self.app.db.cari_bakiye_many(selected).values():
+            total_borc += b["borc"]
+            total_alacak += b["alacak"]
+            total_bakiye += b["bakiye"]
         self.lbl_sel.config(text=f"Borç: {fmt_amount(total_borc)} | Alacak: {fmt_amount(total_alacak)} | Bakiye: {fmt_amount(total_bakiye)}")
 
     def _refresh_kasa_analysis(self):
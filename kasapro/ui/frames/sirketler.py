@@ -203,20 +203,8 @@ class SirketlerFrame(BaseView):
         if not uid:
             return
         try:
-            was_active = (getattr(self.app, "active_company_id", None) is not None and int(self.app.active_company_id or 0) == int(cid))
-            self.app.usersdb.delete_company(int(cid), delete_db_file=True)
-
-            # aktif şirket silindiyse otomatik başka şirkete geç
-            if was_active:
-                urow = self.app.get_active_user_row()
-                try:
-                    # kullanıcı satırını tazele (last_company_id değişmiş olabilir)
-                    urow2 = self.app.usersdb.get_user_by_username(str(urow["username"])) if urow else None
-                except Exception:
-                    urow2 = urow
-                crow = self.app.usersdb.get_active_company_for_user(urow2) if urow2 else None
-                if crow:
-                    self.app.switch_company(int(crow["id"]))
+            # Havuzdaki bağlantıyı kapatır, aktif şirketse başka şirkete geçer
+            self.app.delete_company(int(cid))
             self.refresh()
         except Exception as e:
             messagebox.showerror(APP_TITLE, f"Silinemedi:\n{e}")
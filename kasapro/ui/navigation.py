@@ -3,9 +3,11 @@
 
 from __future__ import annotations
 
+from collections import Counter
 from dataclasses import dataclass
+from importlib import import_module
 import time
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
 import tkinter as tk
 from tkinter import ttk
@@ -16,6 +18,23 @@ from .ui_logging import get_ui_logger, log_ui_event
 Factory = Callable[[ttk.Frame, Any], ttk.Frame]
 
 
+class LazyFactory:
+    """`module.attr(master, app)`; modül ilk çağrıda (veya load ile) import edilir."""
+
+    def __init__(self, module: str, attr: str = "build") -> None:
+        self.module = module
+        self.attr = attr
+
+    def load(self) -> Factory:
+        return getattr(import_module(self.module), self.attr)
+
+    def __call__(self, master: ttk.Frame, app: Any) -> ttk.Frame:
+        return self.load()(master, app)
+
+    def __repr__(self) -> str:
+        return f"LazyFactory({self.module}.{self.attr})"
+
+
 @dataclass
 class ScreenSpec:
     key: str
@@ -24,12 +43,19 @@ class ScreenSpec:
 
 
 class ScreenRegistry:
+    """Ekran kayıtları. create=False ile kaydedilen frame ilk `show`'da oluşturulur."""
+
     def __init__(self, container: ttk.Frame, controller: Any) -> None:
         self.container = container
         self.controller = controller
         self.frames: Dict[str, ttk.Frame] = {}
         self._specs: Dict[str, ScreenSpec] = {}
         self._logger = get_ui_logger()
+        # Ekran açılma sayıları (ön yükleme sırası için)
+        self.usage: Counter = Counter()
+        # Frame oluşturulduktan sonra çağrılır: (key, frame)
+        self.on_created: Optional[Callable[[str, ttk.Frame], None]] = None
+        self._prefetch_job: Optional[str] = None
 
     def register(self, key: str, factory: Factory, title: str = "", create: bool = True) -> None:
         if key in self._specs:
@@ -44,6 +70,10 @@ class ScreenRegistry:
     def has_spec(self, key: str) -> bool:
         return key in self._specs
 
+    def keys(self) -> List[str]:
+        """Kayıt sırasıyla ekran anahtarları."""
+        return list(self._specs)
+
     def _create_frame(self, spec: ScreenSpec) -> Optional[ttk.Frame]:
         if spec.key in self.frames:
             return self.frames[spec.key]
@@ -58,10 +88,75 @@ class ScreenRegistry:
                 view=frame.__class__.__name__,
                 elapsed_s=round(elapsed, 4),
             )
-            return frame
         except Exception:
             self._logger.exception("Failed to build screen: %s", spec.key)
             return None
+        if self.on_created is not None:
+            try:
+                self.on_created(spec.key, frame)
+            except Exception:
+                self._logger.exception("Screen created hook failed: %s", spec.key)
+        return frame
+
+    def most_used(self, limit: int, default: Iterable[str] = ()) -> List[str]:
+        """Henüz oluşturulmamış ekranlar; en çok açılan başta, sonra `default` sırası."""
+        keys = [k for k, _ in self.usage.most_common()] + list(default)
+        out: List[str] = []
+        for k in keys:
+            if k in self._specs and k not in self.frames and k not in out:
+                out.append(k)
+        return out[: max(0, int(limit))]
+
+    def prefetch(self, keys: Iterable[str], build: bool = False, delay_ms: int = 150) -> None:
+        """Boşta kalındıkça ekranları sırayla hazırlar (her adımda bir ekran).
+
+        build=False yalnızca modülü import eder; True ise frame'i de (gizli) oluşturur.
+        """
+        queue = [k for k in keys if k in self._specs]
+        self.cancel_prefetch()
+
+        def step() -> None:
+            self._prefetch_job = None
+            while queue:
+                key = queue.pop(0)
+                if key in self.frames:
+                    continue
+                spec = self._specs[key]
+                started = time.perf_counter()
+                try:
+                    if build:
+                        self._create_frame(spec)
+                    else:
+                        load = getattr(spec.factory, "load", None)
+                        if not callable(load):
+                            continue
+                        load()
+                    log_ui_event("screen_prefetched", key=key, built=build,
+                                 elapsed_s=round(time.perf_counter() - started, 4))
+                except Exception:
+                    self._logger.exception("Screen prefetch failed: %s", key)
+                break
+            if queue:
+                self._schedule_prefetch(step, delay_ms)
+
+        self._schedule_prefetch(step, delay_ms)
+
+    def cancel_prefetch(self) -> None:
+        if self._prefetch_job is not None:
+            try:
+                self.container.after_cancel(self._prefetch_job)
+            except Exception:
+                pass
+            self._prefetch_job = None
+
+    def _schedule_prefetch(self, step: Callable[[], None], delay_ms: int) -> None:
+        # after -> after_idle: kullanıcı olayları bekletilmeden, boşta çalışır
+        try:
+            self._prefetch_job = self.container.after(
+                delay_ms, lambda: self.container.after_idle(step)
+            )
+        except Exception:
+            self._prefetch_job = None
 
     def show(self, key: str) -> None:
         if key not in self.frames:
@@ -72,6 +167,7 @@ class ScreenRegistry:
             frame = self._create_frame(spec)
             if frame is None:
                 return
+        self.usage[key] += 1
         for k, f in self.frames.items():
             if k == key:
                 f.pack(fill=tk.BOTH, expand=True)
@@ -12,20 +12,33 @@ Her eklenti modülü şu iki parçayı sağlamalıdır:
     - order (int)      : (opsiyonel) menü sıralaması
 
 - build(master, app) -> ttk.Frame : frame oluşturucu
+
+Keşif, modülleri import etmez: PLUGIN_META kaynaktan okunup mtime ile birlikte
+manifeste (DEFAULT_MANIFEST_PATH) yazılır; modül ilk `build` çağrısında yüklenir.
 """
 
 from __future__ import annotations
 
+import ast
 from dataclasses import dataclass
 from importlib import import_module
+import json
 import logging
 import os
-import pkgutil
-from typing import Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from tkinter import ttk
 
-from ...config import APP_BASE_DIR, LOG_DIRNAME
+from ...config import APP_BASE_DIR, DATA_DIRNAME, LOG_DIRNAME
+from ..navigation import LazyFactory
+
+# Eklenti manifesti: modül başına PLUGIN_META + dosya mtime'ı. Açılışta yalnızca
+# bu dosya okunur; değişen eklenti dosyası import edilmeden (ast) yeniden okunur.
+MANIFEST_VERSION = 1
+DEFAULT_MANIFEST_PATH = os.path.join(APP_BASE_DIR, DATA_DIRNAME, "ui_manifest.json")
+_PACKAGE = "kasapro.ui.plugins"
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_SKIP_MODULES = {"__init__", "loader"}
 
 
 def _ensure_plugin_logger() -> logging.Logger:
@@ -61,61 +74,157 @@ class UIPlugin:
     page_title: str
     build: Callable[[ttk.Frame, object], ttk.Frame]
     order: int = 100
+    module: str = ""
 
 
-def discover_ui_plugins() -> List[UIPlugin]:
-    """kasapro.ui.plugins altındaki eklentileri keşfeder.
-
-    Hatalı/eksik eklentiler uygulamayı düşürmez; sessizce atlanır.
-    """
-    logger = _ensure_plugin_logger()
-    plugins: List[UIPlugin] = []
+def read_manifest(path: Optional[str] = None) -> Dict[str, Any]:
+    """Manifest dosyası (yoksa/bozuksa ya da sürüm farklıysa boş)."""
     try:
-        pkg = import_module("kasapro.ui.plugins")
-    except Exception:
-        logger.exception("UI plugin package import failed")
-        return []
+        with open(path or DEFAULT_MANIFEST_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data
+
+
+def update_manifest(path: Optional[str] = None, **sections: Any) -> None:
+    """Verilen bölümleri (plugins, usage, ...) yazar; diğerlerini korur."""
+    path = path or DEFAULT_MANIFEST_PATH
+    data = read_manifest(path)
+    data.update(sections)
+    data["version"] = MANIFEST_VERSION
+    tmp = f"{path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+    except OSError:
+        _ensure_plugin_logger().warning("UI manifest could not be written: %s", path)
 
-    for modinfo in pkgutil.iter_modules(getattr(pkg, "__path__", []), pkg.__name__ + "."):
-        name = modinfo.name
-        # loader.py ve __init__.py gibi yardımcıları atla
-        if name.endswith(".loader"):
-            continue
-        try:
-            mod = import_module(name)
-        except Exception:
-            logger.exception("UI plugin import failed: %s", name)
-            continue
 
-        meta: Optional[Dict[str, object]] = getattr(mod, "PLUGIN_META", None)
-        build = getattr(mod, "build", None)
-        if not isinstance(meta, dict):
-            continue
-        if not callable(build):
+def _scan_plugin_files(package_dir: str) -> List[Tuple[str, str, int]]:
+    """(modül adı, dosya yolu, mtime_ns) - import etmeden."""
+    out: List[Tuple[str, str, int]] = []
+    try:
+        entries = sorted(os.scandir(package_dir), key=lambda e: e.name)
+    except OSError:
+        return out
+    for entry in entries:
+        stem, ext = os.path.splitext(entry.name)
+        if ext != ".py" or stem in _SKIP_MODULES or stem.startswith("_") or not entry.is_file():
             continue
+        out.append((stem, entry.path, entry.stat().st_mtime_ns))
+    return out
+
+
+def _read_plugin_meta(path: str, module: str) -> Optional[Dict[str, Any]]:
+    """PLUGIN_META'yı kaynaktan okur; sabit değilse modül import edilir.
+
+    build tanımı yoksa None.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        _ensure_plugin_logger().exception("UI plugin parse failed: %s", module)
+        return None
+    meta_node = None
+    has_build = False
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and node.name == "build":
+            has_build = True
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            has_build = has_build or any((a.asname or a.name) == "build" for a in node.names)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names = {t.id for t in targets if isinstance(t, ast.Name)}
+            if "PLUGIN_META" in names:
+                meta_node = node.value
+            has_build = has_build or "build" in names
+    if meta_node is None or not has_build:
+        return None
+    try:
+        meta = ast.literal_eval(meta_node)
+    except ValueError:
+        # Hesaplanan meta: tek seferlik import (sonuç manifeste yazılır)
         try:
-            key = str(meta.get("key") or "").strip()
-            nav_text = str(meta.get("nav_text") or "").strip()
-            page_title = str(meta.get("page_title") or key).strip()
-            enabled = bool(meta.get("enabled", True))
-            name = str(meta.get("name") or key).strip()
-            version = str(meta.get("version") or "0.1.0").strip()
-            order_value = meta.get("order")
-            if isinstance(order_value, (int, float, str)):
-                order = int(order_value)
-            else:
-                order = 100
+            meta = getattr(import_module(module), "PLUGIN_META", None)
         except Exception:
-            logger.exception("UI plugin metadata invalid: %s", name)
-            continue
-        if not enabled:
-            logger.info("UI plugin disabled: %s", key)
-            continue
-        if not key or not nav_text:
+            _ensure_plugin_logger().exception("UI plugin import failed: %s", module)
+            return None
+    if not isinstance(meta, dict):
+        return None
+    try:
+        return json.loads(json.dumps(meta, default=str))
+    except (TypeError, ValueError):
+        return None
+
+
+def load_plugin_manifest(
+    path: Optional[str] = None, package_dir: str = _PACKAGE_DIR, package: str = _PACKAGE
+) -> List[Dict[str, Any]]:
+    """Eklenti kayıtları: {module, path, mtime, meta}. Değişen dosyalar yeniden okunur."""
+    cached = read_manifest(path).get("plugins")
+    cached = cached if isinstance(cached, dict) else {}
+    entries: Dict[str, Dict[str, Any]] = {}
+    changed = False
+    for stem, fpath, mtime in _scan_plugin_files(package_dir):
+        module = f"{package}.{stem}"
+        entry = cached.get(module)
+        if not isinstance(entry, dict) or entry.get("mtime") != mtime:
+            entry = {"module": module, "path": fpath, "mtime": mtime, "meta": _read_plugin_meta(fpath, module)}
+            changed = True
+        entries[module] = entry
+    if changed or set(entries) != set(cached):
+        update_manifest(path, plugins=entries)
+    return list(entries.values())
+
+
+def _plugin_from_meta(meta: Dict[str, Any], module: str, build: Callable) -> Optional[UIPlugin]:
+    logger = _ensure_plugin_logger()
+    try:
+        key = str(meta.get("key") or "").strip()
+        nav_text = str(meta.get("nav_text") or "").strip()
+        page_title = str(meta.get("page_title") or key).strip()
+        enabled = bool(meta.get("enabled", True))
+        name = str(meta.get("name") or key).strip()
+        version = str(meta.get("version") or "0.1.0").strip()
+        order_value = meta.get("order")
+        if isinstance(order_value, (int, float, str)):
+            order = int(order_value)
+        else:
+            order = 100
+    except Exception:
+        logger.exception("UI plugin metadata invalid: %s", module)
+        return None
+    if not enabled:
+        logger.info("UI plugin disabled: %s", key)
+        return None
+    if not key or not nav_text:
+        return None
+    logger.info("UI plugin registered: %s (%s v%s)", key, name, version)
+    return UIPlugin(key=key, nav_text=nav_text, page_title=page_title, build=build, order=order, module=module)
+
+
+def discover_ui_plugins(
+    manifest_path: Optional[str] = None, package_dir: str = _PACKAGE_DIR, package: str = _PACKAGE
+) -> List[UIPlugin]:
+    """kasapro.ui.plugins altındaki eklentileri manifestten keşfeder.
+
+    Eklenti modülleri burada import edilmez; `build` ilk çağrıda modülü yükler.
+    Hatalı/eksik eklentiler uygulamayı düşürmez; sessizce atlanır.
+    """
+    plugins: List[UIPlugin] = []
+    for entry in load_plugin_manifest(manifest_path, package_dir, package):
+        meta = entry.get("meta")
+        module = str(entry.get("module") or "")
+        if not isinstance(meta, dict) or not module:
             continue
-
-        plugins.append(UIPlugin(key=key, nav_text=nav_text, page_title=page_title, build=build, order=order))
-        logger.info("UI plugin loaded: %s (%s v%s)", key, name, version)
-
+        plugin = _plugin_from_meta(meta, module, LazyFactory(module, "build"))
+        if plugin is not None:
+            plugins.append(plugin)
     plugins.sort(key=lambda p: (p.order, p.key))
     return plugins
@@ -9,6 +9,7 @@ import re
 import tkinter as tk
 from tkinter import ttk
 
+from ..db.paging import cursor_of
 from ..utils import safe_float, fmt_amount, parse_number_smart
 
 
@@ -1620,3 +1621,382 @@ class MoneyEntry(ttk.Frame):
             self.var.set("" if (v is None or v == "") else fmt_amount(parse_number_smart(v)))
         finally:
             self._formatting = False
+
+
+# -----------------
+# Sanal (virtual) tablo
+# -----------------
+def _grid_sort_key(v: Any):
+    """Karışık tipli kolonlarda güvenli sıralama anahtarı (None en sona)."""
+    if v is None or v == "":
+        return (2, 0, "")
+    if isinstance(v, (int, float)):
+        return (0, float(v), "")
+    return (1, 0, str(v).casefold())
+
+
+class ListGridSource:
+    """VirtualGrid için bellek içi veri modeli.
+
+    Sıralama/filtre satır listesi üzerinde yapılır; Treeview'e yalnızca görünen
+    pencere yazılır. Satırlar dict veya sqlite3.Row olabilir.
+    """
+
+    def __init__(self, rows: Optional[List[Any]] = None, id_key: str = "id"):
+        self.id_key = id_key
+        self._all: List[Any] = list(rows or [])
+        self._view: List[Any] = self._all
+        self._sort: Optional[tuple] = None
+        self._filter = ""
+        self._index: Optional[dict] = None
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def row_id(self, row: Any) -> Any:
+        return row[self.id_key]
+
+    def rows(self, start: int, stop: int) -> List[Any]:
+        return self._view[max(0, start):max(0, stop)]
+
+    def _rebuild_view(self) -> None:
+        view = self._all
+        if self._filter:
+            from ..core.fuzzy import tr_normalize
+
+            needle = self._filter
+
+            def _hit(r: Any) -> bool:
+                try:
+                    vals = [r[k] for k in r.keys()]
+                except Exception:
+                    vals = list(r.values()) if isinstance(r, dict) else [r]
+                return needle in tr_normalize(" ".join("" if v is None else str(v) for v in vals))
+
+            view = [r for r in view if _hit(r)]
+        if self._sort:
+            col, desc = self._sort
+            view = sorted(view, key=lambda r: _grid_sort_key(r[col]), reverse=desc)
+        self._view = view
+        self._index = None
+
+    def sort(self, column: str, descending: bool = False) -> None:
+        self._sort = (column, bool(descending))
+        self._rebuild_view()
+
+    def set_filter(self, text: str) -> None:
+        from ..core.fuzzy import tr_normalize
+
+        self._filter = tr_normalize((text or "").strip())
+        self._rebuild_view()
+
+    def index_of(self, row_id: Any) -> int:
+        if self._index is None:
+            self._index = {str(self.row_id(r)): i for i, r in enumerate(self._view)}
+        return int(self._index.get(str(row_id), -1))
+
+
+class PagedGridSource(ListGridSource):
+    """Sayfa sayfa (keyset) okunan veri modeli.
+
+    `fetch_page(after, limit)` repo'lardaki `list_page` imzasıdır. Satırlar
+    kaydırdıkça çekilir; `total` biliniyorsa kaydırma çubuğu baştan doğru
+    boyutta olur. Sıralama/filtre istenirse kalan sayfalar modele okunur
+    (Treeview'e değil).
+    """
+
+    def __init__(
+        self,
+        fetch_page: Callable[[Any, int], List[Any]],
+        total: Optional[int] = None,
+        page_size: int = 500,
+        id_key: str = "id",
+    ):
+        super().__init__([], id_key=id_key)
+        self._fetch_page = fetch_page
+        self._total = None if total is None else int(total)
+        self._page_size = max(1, int(page_size))
+        self._after: Any = None
+        self._exhausted = False
+
+    def _load_more(self) -> bool:
+        if self._exhausted:
+            return False
+        page = list(self._fetch_page(self._after, self._page_size) or [])
+        if page:
+            self._all.extend(page)
+            self._after = cursor_of(page[-1])
+        if len(page) < self._page_size:
+            self._exhausted = True
+            self._total = len(self._all)
+        if self._sort or self._filter:
+            self._rebuild_view()
+        else:
+            self._view = self._all
+            self._index = None
+        return bool(page)
+
+    def _load_all(self) -> None:
+        while self._load_more():
+            pass
+
+    def __len__(self) -> int:
+        if self._sort or self._filter:
+            return len(self._view)
+        if self._total is not None:
+            return self._total
+        return len(self._all) + (0 if self._exhausted else self._page_size)
+
+    def rows(self, start: int, stop: int) -> List[Any]:
+        while len(self._view) < stop and self._load_more():
+            pass
+        return super().rows(start, stop)
+
+    def sort(self, column: str, descending: bool = False) -> None:
+        self._load_all()
+        super().sort(column, descending)
+
+    def set_filter(self, text: str) -> None:
+        if (text or "").strip():
+            self._load_all()
+        super().set_filter(text)
+
+
+class VirtualGrid(ttk.Frame):
+    """Çok satırlı (100k+) listeler için sanal Treeview.
+
+    Treeview'de yalnızca görünen pencere (+ küçük bir tampon) tutulur; kaydırma
+    çubuğu ve tekerlek veri modelindeki konumu değiştirir. Satır iid'leri kayıt
+    id'sidir, böylece `grid.tree.selection()` kullanan mevcut kod çalışmaya
+    devam eder; seçim modeldeki id'ler üzerinden korunur.
+
+    Kullanım:
+        grid = VirtualGrid(parent, cols, values_fn=lambda r: (r["id"], r["ad"]))
+        grid.set_source(ListGridSource(rows))
+    """
+
+    BUFFER_ROWS = 4
+    WHEEL_ROWS = 3
+
+    def __init__(
+        self,
+        master,
+        columns,
+        *,
+        values_fn: Callable[[Any], tuple],
+        tags_fn: Optional[Callable[[Any], tuple]] = None,
+        height: int = 20,
+        selectmode: str = "browse",
+        sortable: bool = True,
+        sort_keys: Optional[dict] = None,
+        **kw,
+    ):
+        super().__init__(master, **kw)
+        # Kolon adı -> satırdaki alan adı (ör. "cari" -> "cari_ad")
+        self.sort_keys = dict(sort_keys or {})
+        self.columns = tuple(columns)
+        self.values_fn = values_fn
+        self.tags_fn = tags_fn
+        self.source: ListGridSource = ListGridSource([])
+        self._offset = 0
+        self._visible = max(1, int(height))
+        self._selected: set = set()
+        self._sort_state: Optional[tuple] = None
+        self._sort_column = ""
+        self._rendering = False
+
+        self.tree = ttk.Treeview(self, columns=self.columns, show="headings", height=height, selectmode=selectmode)
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.hsb = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.hsb.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        self.hsb.grid(row=1, column=0, sticky="ew")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        for c in self.columns:
+            if sortable:
+                self.tree.heading(c, text=str(c).upper(), command=lambda cc=c: self.sort_by(cc))
+            else:
+                self.tree.heading(c, text=str(c).upper())
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda _e: self.scroll_rows(-self.WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda _e: self.scroll_rows(self.WHEEL_ROWS))
+        self.tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        self.tree.bind("<Up>", lambda _e: self._move_focus(-1))
+        self.tree.bind("<Down>", lambda _e: self._move_focus(1))
+        self.tree.bind("<Prior>", lambda _e: self._move_focus(-self._visible))
+        self.tree.bind("<Next>", lambda _e: self._move_focus(self._visible))
+        self.tree.bind("<Home>", lambda _e: self._move_focus(-len(self.source)))
+        self.tree.bind("<End>", lambda _e: self._move_focus(len(self.source)))
+
+    # ---- veri ----
+    def set_source(self, source: ListGridSource, keep_selection: bool = True) -> None:
+        self.source = source
+        if not keep_selection:
+            self._selected.clear()
+        if self._sort_state:
+            self.source.sort(*self._sort_state)
+        self._offset = 0
+        self.render()
+
+    def sort_by(self, column: str) -> None:
+        desc = bool(self._sort_state and self._sort_column == column and not self._sort_state[1])
+        self._sort_state = (self.sort_keys.get(column, column), desc)
+        self._sort_column = column
+        self.source.sort(*self._sort_state)
+        self._offset = 0
+        self.render()
+
+    def set_filter(self, text: str) -> None:
+        self.source.set_filter(text)
+        self._offset = 0
+        self.render()
+
+    def __len__(self) -> int:
+        return len(self.source)
+
+    # ---- seçim ----
+    def selected_ids(self) -> List[str]:
+        return sorted(self._selected, key=lambda x: self.source.index_of(x))
+
+    def select_id(self, row_id: Any, see: bool = True) -> None:
+        self._selected = {str(row_id)}
+        if see:
+            idx = self.source.index_of(row_id)
+            if idx >= 0:
+                self.see_index(idx)
+                return
+        self.render()
+
+    def see_index(self, index: int) -> None:
+        if index < self._offset:
+            self._offset = index
+        elif index >= self._offset + self._visible:
+            self._offset = index - self._visible + 1
+        self.render()
+
+    def row_for_iid(self, iid: str) -> Optional[Any]:
+        idx = self.source.index_of(iid)
+        if idx < 0:
+            return None
+        rows = self.source.rows(idx, idx + 1)
+        return rows[0] if rows else None
+
+    # ---- çizim ----
+    def _max_offset(self) -> int:
+        return max(0, len(self.source) - self._visible)
+
+    def render(self) -> None:
+        self._offset = max(0, min(self._offset, self._max_offset()))
+        rows = self.source.rows(self._offset, self._offset + self._visible + self.BUFFER_ROWS)
+        self._rendering = True
+        try:
+            children = self.tree.get_children("")
+            if children:
+                self.tree.delete(*children)
+            sel = []
+            for r in rows:
+                iid = str(self.source.row_id(r))
+                if self.tree.exists(iid):
+                    continue
+                self.tree.insert(
+                    "",
+                    tk.END,
+                    iid=iid,
+                    values=self.values_fn(r),
+                    tags=(self.tags_fn(r) if self.tags_fn else ()),
+                )
+                if iid in self._selected:
+                    sel.append(iid)
+            self.tree.selection_set(sel)
+        finally:
+            self._rendering = False
+        self._update_scrollbar()
+
+    def _update_scrollbar(self) -> None:
+        total = len(self.source)
+        if total <= 0:
+            self.vsb.set(0.0, 1.0)
+            return
+        first = self._offset / total
+        last = min(1.0, (self._offset + self._visible) / total)
+        self.vsb.set(first, last)
+
+    def scroll_rows(self, delta: int) -> str:
+        new = max(0, min(self._offset + int(delta), self._max_offset()))
+        if new != self._offset:
+            self._offset = new
+            self.render()
+        return "break"
+
+    # ---- olaylar ----
+    def _on_scrollbar(self, *args) -> None:
+        if not args:
+            return
+        if args[0] == "moveto":
+            try:
+                frac = float(args[1])
+            except Exception:
+                return
+            self._offset = int(round(frac * len(self.source)))
+            self.render()
+        elif args[0] == "scroll":
+            try:
+                n = int(args[1])
+            except Exception:
+                return
+            step = self._visible if (len(args) > 2 and args[2] == "pages") else 1
+            self.scroll_rows(n * step)
+
+    def _on_wheel(self, event) -> str:
+        delta = getattr(event, "delta", 0) or 0
+        if delta == 0:
+            return "break"
+        return self.scroll_rows(-self.WHEEL_ROWS if delta > 0 else self.WHEEL_ROWS)
+
+    def _on_resize(self, _event=None) -> None:
+        try:
+            style = ttk.Style()
+            row_h = int(style.lookup("Treeview", "rowheight") or 20)
+        except Exception:
+            row_h = 20
+        try:
+            height = int(self.tree.winfo_height())
+        except Exception:
+            return
+        visible = max(1, (height - row_h) // max(1, row_h))
+        if visible != self._visible:
+            self._visible = visible
+            self.render()
+
+    def _on_select(self, _event=None) -> None:
+        if self._rendering:
+            return
+        window = set(self.tree.get_children(""))
+        self._selected = (self._selected - window) | set(self.tree.selection())
+
+    def _move_focus(self, delta: int) -> str:
+        total = len(self.source)
+        if total <= 0:
+            return "break"
+        cur = self.tree.focus()
+        idx = self.source.index_of(cur) if cur else -1
+        if idx < 0:
+            idx = self._offset
+        new = max(0, min(total - 1, idx + int(delta)))
+        rows = self.source.rows(new, new + 1)
+        if not rows:
+            return "break"
+        iid = str(self.source.row_id(rows[0]))
+        self._selected = {iid}
+        self.see_index(new)
+        try:
+            self.tree.focus(iid)
+        except Exception:
+            pass
+        self.tree.event_generate("<<TreeviewSelect>>")
+        return "break"
@@ -34,6 +34,9 @@ class BankaAnalizWindow(tk.Toplevel):
 
         self.var_group_field = tk.StringVar(value="etiket")
         self.var_type_field = tk.StringVar(value="banka")
+        self._data: Dict[str, List[SummaryRow]] = {}
+        self._data_fields = ("", "")
+        self._filled: set = set()
 
         self._build()
         self.refresh()
@@ -86,6 +89,7 @@ class BankaAnalizWindow(tk.Toplevel):
         self.nb.add(self.tab_months, text="Aylık Analiz")
         self.nb.add(self.tab_days, text="Günlük Analiz")
         self.nb.add(self.tab_group_days, text="Grup Günlük Analiz")
+        self.nb.bind("<<NotebookTabChanged>>", lambda _e: self._fill_current())
 
         self.tree_groups = self._make_tree(
             self.tab_groups,
@@ -147,15 +151,36 @@ class BankaAnalizWindow(tk.Toplevel):
         group_field = (self.var_group_field.get() or "etiket").strip()
         type_field = (self.var_type_field.get() or "banka").strip()
         data = compute_bank_analysis(self.rows, group_field=group_field, type_field=type_field)
+        self._data = data
+        self._data_fields = (group_field, type_field)
 
-        self._fill_groups(self.tree_groups, data.get("groups", []))
-        self._fill_types(self.tree_types, data.get("types", []))
-        self._fill_months(self.tree_months, data.get("months", []))
-        self._fill_days(self.tree_days, data.get("days", []))
-        self._fill_group_days(self.tree_group_days, data.get("group_days", []))
+        # Sekmeler görüntülendikçe doldurulur (büyük listelerde Treeview eklemesi pahalı)
+        self._filled = set()
+        self._fill_current()
 
         self.lbl_info.config(text=f"Satır: {len(self.rows)}  •  Grup: {len(data.get('groups', []))}")
 
+    def _tabs(self):
+        return {
+            str(self.tab_groups): ("groups", self._fill_groups, self.tree_groups),
+            str(self.tab_types): ("types", self._fill_types, self.tree_types),
+            str(self.tab_months): ("months", self._fill_months, self.tree_months),
+            str(self.tab_days): ("days", self._fill_days, self.tree_days),
+            str(self.tab_group_days): ("group_days", self._fill_group_days, self.tree_group_days),
+        }
+
+    def _fill_current(self):
+        try:
+            tab = str(self.nb.select())
+        except Exception:
+            return
+        spec = self._tabs().get(tab)
+        if not spec or tab in self._filled:
+            return
+        key, fill, tree = spec
+        fill(tree, self._data.get(key, []))
+        self._filled.add(tab)
+
     def _clear(self, tree: ttk.Treeview):
         try:
             for iid in list(tree.get_children()):
@@ -235,7 +260,10 @@ class BankaAnalizWindow(tk.Toplevel):
 
         group_field = (self.var_group_field.get() or "etiket").strip()
         type_field = (self.var_type_field.get() or "banka").strip()
-        data = compute_bank_analysis(self.rows, group_field=group_field, type_field=type_field)
+        if self._data and self._data_fields == (group_field, type_field):
+            data = self._data
+        else:
+            data = compute_bank_analysis(self.rows, group_field=group_field, type_field=type_field)
 
         try:
             wb = openpyxl.Workbook()
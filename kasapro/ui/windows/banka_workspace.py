@@ -29,8 +29,7 @@ from tkinter import ttk, messagebox, filedialog, simpledialog
 
 from ...config import APP_TITLE, HAS_OPENPYXL
 from ...utils import safe_float, fmt_amount, parse_date_smart, center_window
-from ...core.banka_macros import build_tag_suggestions, DEFAULT_TAG_RULES
-from ...core.fuzzy import best_substring_similarity, amount_score, combine_scores
+from ...core.banka_macros import build_tag_suggestions, DEFAULT_TAG_RULES, SALARY_HIT, SALARY_STRONG, SalaryMatcher
 from .banka_analysis import BankaAnalizWindow
 
 if TYPE_CHECKING:
@@ -1077,122 +1076,154 @@ class BankaWorkspaceWindow(tk.Toplevel):
             messagebox.showinfo(APP_TITLE, "Tabloda satır yok.", parent=self)
             return
 
+        # Satırlar UI thread'inde okunur; eşleştirme worker thread'de yapılır
+        items: List[Tuple[str, str, str, float]] = []
+        for iid in ids:
+            iid = str(iid)
+            try:
+                if not self.tree.exists(iid):
+                    continue
+                vals = list(self.tree.item(iid, "values") or [])
+                if not vals or len(vals) < len(_COLS):
+                    continue
+                row = dict(zip(_COLS, vals))
+                tutar = abs(float(safe_float(row.get("tutar") or 0)))
+                items.append((iid, str(row.get("tip") or ""), str(row.get("aciklama") or ""), tutar))
+            except Exception:
+                continue
+
+        # Çalışanları hazırlayalım
+        emp_list: List[Tuple[str, float]] = []
+        for e in emps:
+            try:
+                emp_list.append((str(e["ad"]), float(e["aylik_tutar"] or 0.0)))
+            except Exception:
+                continue
+
         # Küçük bir ilerleme penceresi
         dlg = tk.Toplevel(self)
         dlg.title("Maaşları Bul")
         dlg.transient(self)
         dlg.grab_set()
         ttk.Label(dlg, text="Maaş eşleşmeleri aranıyor...").pack(padx=12, pady=(12, 6))
-        pb = ttk.Progressbar(dlg, length=420, mode="determinate", maximum=total)
+        pb = ttk.Progressbar(dlg, length=420, mode="determinate", maximum=max(len(items), 1))
         pb.pack(padx=12, pady=6)
         lbl = ttk.Label(dlg, text="0/0")
-        lbl.pack(padx=12, pady=(0, 12))
+        lbl.pack(padx=12, pady=(0, 6))
 
-        updated = 0
-        colored = 0
+        cancel_event = threading.Event()
 
-        # Çalışanları hazırlayalım
-        emp_list: list[tuple[str, float]] = []
-        for e in emps:
+        def on_cancel():
+            cancel_event.set()
+            lbl.config(text="İptal ediliyor...")
+
+        ttk.Button(dlg, text="İptal", command=on_cancel).pack(pady=(0, 12))
+
+        q: "queue.Queue[tuple]" = queue.Queue()
+
+        def worker():
             try:
-                emp_list.append((str(e["ad"]), float(e["aylik_tutar"] or 0.0)))
-            except Exception:
-                continue
+                matcher = SalaryMatcher(emp_list)
+                batch: List[Tuple[str, str, float]] = []
+                for k, (iid, tip, desc, tutar) in enumerate(items, 1):
+                    if cancel_event.is_set():
+                        q.put(("cancel",))
+                        return
+                    res = matcher.match(tip, desc, tutar)
+                    if res is not None:
+                        batch.append((iid, res[0], res[1]))
+                    if k % 200 == 0 or k == len(items):
+                        q.put(("batch", batch, k))
+                        batch = []
+                q.put(("done",))
+            except Exception as e:
+                q.put(("error", str(e)))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+        updated = 0
+        colored = 0
 
-        def step(i: int = 0):
+        def apply_batch(batch: List[Tuple[str, str, float]]):
             nonlocal updated, colored
-            end = min(i + 250, total)
-            for k in range(i, end):
-                iid = str(ids[k])
+            for iid, best_name, best_score in batch:
                 try:
                     if not self.tree.exists(iid):
                         continue
-                    vals = list(self.tree.item(iid, "values") or [])
-                    if not vals or len(vals) < len(_COLS):
-                        continue
-                    row = dict(zip(_COLS, vals))
-
-                    tip = str(row.get("tip") or "")
-                    if "CIK" not in tip.upper() and "ÇIK" not in tip.upper():
-                        continue
-                    desc = str(row.get("aciklama") or "")
-                    if not desc.strip():
-                        continue
-
-                    tutar = abs(float(safe_float(row.get("tutar") or 0)))
-
-                    best_score = 0.0
-                    best_name = ""
-                    for ename, expected in emp_list:
-                        name_sc = best_substring_similarity(ename, desc)
-                        if name_sc < 0.55:
-                            continue
-                        if expected > 0:
-                            a_sc = amount_score(tutar, expected, abs_tol=5.0, pct_tol=0.15)
-                            if a_sc > 0:
-                                score = combine_scores(name_sc, a_sc, w_name=0.80, w_amt=0.20)
-                            else:
-                                score = name_sc * 0.90
-                        else:
-                            score = name_sc
-                        if score > best_score:
-                            best_score = score
-                            best_name = ename
-
-                    if best_score >= 0.78:
-                        # tag ekle
-                        old_tags = set(self.tree.item(iid, "tags") or ())
-                        old_tags.discard("salary_hit")
-                        old_tags.discard("salary_hit_weak")
-                        if best_score >= 0.87:
-                            old_tags.add("salary_hit")
-                        else:
-                            old_tags.add("salary_hit_weak")
-                        self.tree.item(iid, tags=tuple(old_tags))
-                        colored += 1
-
-                        if write_tag:
-                            cur = str(row.get("etiket") or "").strip()
-                            if (not overwrite) and cur:
-                                pass
-                            else:
-                                new_tag = f"Maaş: {best_name}"[:60]
-                                # etiket kolon indexi 10
-                                vals[10] = new_tag
-                                self.tree.item(iid, values=tuple(vals))
-                                try:
-                                    rid = int(row.get("id") or int(iid))
-                                    self.dirty.add(int(rid))
-                                except Exception:
-                                    pass
-                                updated += 1
-                    else:
+                    old_tags = set(self.tree.item(iid, "tags") or ())
+                    if best_score < SALARY_HIT:
                         # eşleşme yoksa maaş taglerini kaldır
-                        old_tags = set(self.tree.item(iid, "tags") or ())
                         if "salary_hit" in old_tags or "salary_hit_weak" in old_tags:
                             old_tags.discard("salary_hit")
                             old_tags.discard("salary_hit_weak")
                             self.tree.item(iid, tags=tuple(old_tags))
+                        continue
+
+                    # tag ekle
+                    old_tags.discard("salary_hit")
+                    old_tags.discard("salary_hit_weak")
+                    old_tags.add("salary_hit" if best_score >= SALARY_STRONG else "salary_hit_weak")
+                    self.tree.item(iid, tags=tuple(old_tags))
+                    colored += 1
+
+                    if write_tag:
+                        vals = list(self.tree.item(iid, "values") or [])
+                        row = dict(zip(_COLS, vals))
+                        cur = str(row.get("etiket") or "").strip()
+                        if overwrite or not cur:
+                            # etiket kolon indexi 10
+                            vals[10] = f"Maaş: {best_name}"[:60]
+                            self.tree.item(iid, values=tuple(vals))
+                            try:
+                                rid = int(row.get("id") or int(iid))
+                                self.dirty.add(int(rid))
+                            except Exception:
+                                pass
+                            updated += 1
                 except Exception:
                     continue
 
-            pb["value"] = end
-            lbl.config(text=f"{end}/{total}")
-            if end >= total:
-                try:
-                    dlg.destroy()
-                except Exception:
-                    pass
-                self._update_info()
-                messagebox.showinfo(
-                    APP_TITLE,
-                    f"Tamamlandı.\n\nRenklendirilen satır: {colored}\nEtiketi güncellenen satır: {updated}\n\nNot: Etiket değişikliklerini kalıcı yapmak için 'Değişiklikleri Kaydet' kullanın.",
-                    parent=self,
-                )
-                return
-            self.after(1, lambda: step(end))
+        def finish(text: str):
+            try:
+                dlg.destroy()
+            except Exception:
+                pass
+            self._update_info()
+            messagebox.showinfo(APP_TITLE, text, parent=self)
 
-        self.after(10, step)
+        def poll():
+            try:
+                while True:
+                    msg = q.get_nowait()
+                    kind = msg[0]
+                    if kind == "batch":
+                        _, batch, done = msg
+                        apply_batch(batch)
+                        pb["value"] = done
+                        if not cancel_event.is_set():
+                            lbl.config(text=f"{done}/{len(items)}")
+                    elif kind == "error":
+                        try:
+                            dlg.destroy()
+                        except Exception:
+                            pass
+                        messagebox.showerror(APP_TITLE, f"Maaş eşleştirme başarısız: {msg[1]}", parent=self)
+                        return
+                    elif kind == "cancel":
+                        finish(f"İptal edildi.\n\nRenklendirilen satır: {colored}\nEtiketi güncellenen satır: {updated}")
+                        return
+                    elif kind == "done":
+                        finish(
+                            f"Tamamlandı.\n\nRenklendirilen satır: {colored}\nEtiketi güncellenen satır: {updated}\n\nNot: Etiket değişikliklerini kalıcı yapmak için 'Değişiklikleri Kaydet' kullanın."
+                        )
+                        return
+            except queue.Empty:
+                pass
+
+            if dlg.winfo_exists():
+                dlg.after(60, poll)
+
+        poll()
 
     def macro_auto_tag(self):
         """Açıklamaya göre otomatik etiketleme (kural + öğrenen + fuzzy)."""
@@ -1272,6 +1303,8 @@ class BankaWorkspaceWindow(tk.Toplevel):
                     split_plus_minus=split_pm,
                     progress_cb=lambda phase, cur, tot: q.put(("progress", phase, cur, tot)),
                     should_cancel=cancel_event.is_set,
+                    # Büyük ekstrelerde kovalar ayrı süreçlerde gruplanır
+                    workers=min(4, os.cpu_count() or 1),
                 )
                 q.put(("done", tag_map, group_count))
             except Exception as e:
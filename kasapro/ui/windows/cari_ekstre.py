@@ -11,7 +11,7 @@ from tkinter import ttk, messagebox, filedialog
 
 from ...config import APP_TITLE, HAS_OPENPYXL, HAS_REPORTLAB
 from ...utils import center_window, fmt_tr_date, fmt_amount, ensure_pdf_fonts
-from ..widgets import LabeledEntry
+from ..widgets import LabeledEntry, ListGridSource, VirtualGrid
 
 if TYPE_CHECKING:
     from ...app import App
@@ -74,9 +74,9 @@ class CariEkstreWindow(tk.Toplevel):
         mid.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0,10))
 
         cols = ("tarih","tip","borc","alacak","para","odeme","belge","etiket","aciklama","bakiye")
-        self.tree = ttk.Treeview(mid, columns=cols, show="headings", height=18)
-        for c in cols:
-            self.tree.heading(c, text=c.upper())
+        # Uzun ekstrelerde Treeview'e yalnızca görünen satırlar yazılır
+        self.vgrid = VirtualGrid(mid, cols, values_fn=self._row_values, height=18)
+        self.tree = self.vgrid.tree
 
         self.tree.column("tarih", width=90)
         self.tree.column("tip", width=70)
@@ -89,11 +89,7 @@ class CariEkstreWindow(tk.Toplevel):
         self.tree.column("aciklama", width=360)
         self.tree.column("bakiye", width=110, anchor="e")
 
-        self.tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT, padx=(6,0), pady=6)
-
-        scr = ttk.Scrollbar(mid, orient="vertical", command=self.tree.yview)
-        scr.pack(fill=tk.Y, side=tk.RIGHT, padx=(0,6), pady=6)
-        self.tree.configure(yscrollcommand=scr.set)
+        self.vgrid.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
 
     def last30(self):
         d_to = date.today()
@@ -103,8 +99,6 @@ class CariEkstreWindow(tk.Toplevel):
         self.refresh()
 
     def refresh(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
         data = (
             self.cari_service.ekstre(
                 self.cari_id,
@@ -131,19 +125,23 @@ class CariEkstreWindow(tk.Toplevel):
             )
         )
 
-        for r in data["rows"]:
-            self.tree.insert("", tk.END, values=(
-                fmt_tr_date(r["tarih"]),
-                r["tip"],
-                f"{fmt_amount(r['borc'])}" if r["borc"] else "",
-                f"{fmt_amount(r['alacak'])}" if r["alacak"] else "",
-                r["para"],
-                r["odeme"],
-                r["belge"],
-                r["etiket"],
-                r["aciklama"],
-                f"{fmt_amount(r['bakiye'])}",
-            ))
+        self.vgrid.set_source(ListGridSource(data["rows"]))
+
+    @staticmethod
+    def _row_values(r) -> tuple:
+        return (
+            fmt_tr_date(r["tarih"]),
+            r["tip"],
+            f"{fmt_amount(r['borc'])}" if r["borc"] else "",
+            f"{fmt_amount(r['alacak'])}" if r["alacak"] else "",
+            r["para"],
+            r["odeme"],
+            r["belge"],
+            r["etiket"],
+            r["aciklama"],
+            f"{fmt_amount(r['bakiye'])}",
+        )
+
     def export_excel(self):
         p = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
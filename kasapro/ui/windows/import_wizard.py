@@ -22,6 +22,7 @@ from ...utils import (
     norm_header,
 )
 from ...db.main_db import DB
+from ...services.import_service import ImportCancelled, ImportService, ProgressFn, open_workbook_stream, sheet_rows
 
 # Maaş/isim eşleştirme için fuzzy yardımcılar
 from ...core.fuzzy import best_substring_similarity, normalize_text, similarity
@@ -101,6 +102,7 @@ class ImportWizard(tk.Toplevel):
         self.result_counts: Optional[Dict[str, int]] = None
         self.mappings: Dict[str, Dict[str, Any]] = {}
         self._import_in_progress = False
+        self._cancel_event = threading.Event()
 
         self._build()
         center_window(self, app.root)
@@ -260,6 +262,9 @@ class ImportWizard(tk.Toplevel):
         if self.mode in ("full", "cariler", "cari", "carihareket", "kasa", "kasahareket"):
             ttk.Checkbutton(bottom, text="İçe aktarma sırasında cari yoksa otomatik oluştur", variable=self.var_create_missing_cari).pack(side=tk.LEFT)
 
+        self.var_status = tk.StringVar(value="")
+        ttk.Label(bottom, textvariable=self.var_status, foreground="#666").pack(side=tk.LEFT, padx=(12, 0))
+
         self.btn_cancel = ttk.Button(bottom, text="İptal", command=self._cancel)
         self.btn_cancel.pack(side=tk.RIGHT, padx=6)
         self.btn_import = ttk.Button(bottom, text="İçe Aktar", command=self._do_import)
@@ -827,6 +832,9 @@ class ImportWizard(tk.Toplevel):
 
     def _cancel(self):
         if self._import_in_progress:
+            # Sürmekte olan parça biter, sonrakiler yazılmaz
+            self._cancel_event.set()
+            self.var_status.set("İptal ediliyor...")
             return
         self.result_counts = None
         self.destroy()
@@ -928,12 +936,21 @@ class ImportWizard(tk.Toplevel):
         db_path = getattr(self.app.db, "path", "")
         logger = logging.getLogger(__name__)
 
+        self._cancel_event.clear()
+
+        def progress(section: str, done: int) -> None:
+            self.after(0, lambda: self.var_status.set(f"{section}: {done} satır işlendi..."))
+
         def worker() -> None:
             try:
                 db = DB(db_path)
-                counts = self._run_import(plan, create_missing_cari=create_missing, db=db)
-                db.close()
+                try:
+                    counts = self._run_import(plan, create_missing_cari=create_missing, db=db, progress=progress)
+                finally:
+                    db.close()
                 self.after(0, lambda: self._finish_import_success(counts))
+            except ImportCancelled as exc:
+                self.after(0, lambda: self._finish_import_error(exc))
             except Exception as exc:
                 logger.exception("Excel import failed")
                 self.after(0, lambda: self._finish_import_error(exc))
@@ -944,8 +961,6 @@ class ImportWizard(tk.Toplevel):
         try:
             if hasattr(self, "btn_import"):
                 self.btn_import.config(state=tk.DISABLED if is_busy else tk.NORMAL)
-            if hasattr(self, "btn_cancel"):
-                self.btn_cancel.config(state=tk.DISABLED if is_busy else tk.NORMAL)
             self.config(cursor="watch" if is_busy else "")
         except Exception:
             pass
@@ -971,9 +986,19 @@ class ImportWizard(tk.Toplevel):
     def _finish_import_error(self, exc: Exception) -> None:
         self._import_in_progress = False
         self._set_busy(False)
+        self.var_status.set("")
+        if isinstance(exc, ImportCancelled):
+            messagebox.showwarning(APP_TITLE, "İçe aktarma durduruldu. Tamamlanan kısımlar kaydedildi.")
+            return
         messagebox.showerror(APP_TITLE, f"İçe aktarma sırasında hata oluştu:\n{exc}")
 
-    def _run_import(self, plan: Dict[str, Dict[str, Any]], create_missing_cari: bool, db: Optional[DB] = None) -> Dict[str, int]:
+    def _run_import(
+        self,
+        plan: Dict[str, Dict[str, Any]],
+        create_missing_cari: bool,
+        db: Optional[DB] = None,
+        progress: Optional[ProgressFn] = None,
+    ) -> Dict[str, int]:
         db = db or self.db
         counts = {"cariler": 0, "cari_hareket": 0, "kasa": 0, "banka": 0, "maas": 0}
         bank_ids: List[int] = []
@@ -983,154 +1008,44 @@ class ImportWizard(tk.Toplevel):
                 return None
             return ws.cell(r, col).value
 
-        car = plan.get("Cariler")
-        if car and car.get("sheet") and car.get("sheet") != "(Atla)":
-            ws = self.wb[car["sheet"]]
-            hr = int(car["header_row"])
-            c = car["cols"]
-            if c.get("ad"):
-                for r in range(hr + 1, (ws.max_row or hr) + 1):
-                    ad = cell(ws, r, c.get("ad"))
-                    if not ad or not str(ad).strip():
-                        continue
-                    tur = str(cell(ws, r, c.get("tur")) or "")
-                    tel = str(cell(ws, r, c.get("telefon")) or "")
-                    notlar = str(cell(ws, r, c.get("notlar")) or "")
-                    acilis = safe_float(cell(ws, r, c.get("acilis")))
-                    db.cari_upsert(str(ad), tur, tel, notlar, acilis)
-                    counts["cariler"] += 1
-
-        ch = plan.get("CariHareket")
-        if ch and ch.get("sheet") and ch.get("sheet") != "(Atla)":
-            ws = self.wb[ch["sheet"]]
-            hr = int(ch["header_row"])
-            c = ch["cols"]
-            for r in range(hr + 1, (ws.max_row or hr) + 1):
-                cari = cell(ws, r, c.get("cari"))
-                tutar = cell(ws, r, c.get("tutar"))
-                if not cari or not str(cari).strip():
-                    continue
-                if safe_float(tutar) == 0:
-                    continue
-
-                cari_name = str(cari).strip()
-                c_row = db.cari_get_by_name(cari_name)
-                if not c_row:
-                    if not create_missing_cari:
-                        continue
-                    cari_id = db.cari_upsert(cari_name)
-                else:
-                    cari_id = int(c_row["id"])
-
-                tarih = cell(ws, r, c.get("tarih"))
-                tip_raw = str(cell(ws, r, c.get("tip")) or "Borç")
-                tipn = "Alacak" if "alacak" in norm_header(tip_raw) else "Borç"
-                para = str(cell(ws, r, c.get("para")) or "TL")
-                odeme = str(cell(ws, r, c.get("odeme")) or "")
-                belge = str(cell(ws, r, c.get("belge")) or "")
-                if not belge.strip():
-                    belge = db.next_belge_no("C")
-                etiket = str(cell(ws, r, c.get("etiket")) or "")
-                aciklama = str(cell(ws, r, c.get("aciklama")) or "")
-
-                db.cari_hareket_add(tarih, cari_id, tipn, safe_float(tutar), para, aciklama, odeme, belge, etiket)
-                counts["cari_hareket"] += 1
-
-        kh = plan.get("KasaHareket")
-        if kh and kh.get("sheet") and kh.get("sheet") != "(Atla)":
-            ws = self.wb[kh["sheet"]]
-            hr = int(kh["header_row"])
-            c = kh["cols"]
-            for r in range(hr + 1, (ws.max_row or hr) + 1):
-                tutar = cell(ws, r, c.get("tutar"))
-                if safe_float(tutar) == 0:
-                    continue
-
-                tarih = cell(ws, r, c.get("tarih"))
-                tip_raw = str(cell(ws, r, c.get("tip")) or "Gider")
-                tipn = "Gelir" if "gelir" in norm_header(tip_raw) else "Gider"
-                para = str(cell(ws, r, c.get("para")) or "TL")
-                odeme = str(cell(ws, r, c.get("odeme")) or "")
-                kategori = str(cell(ws, r, c.get("kategori")) or "")
-                belge = str(cell(ws, r, c.get("belge")) or "")
-                if not belge.strip():
-                    belge = db.next_belge_no("K")
-                etiket = str(cell(ws, r, c.get("etiket")) or "")
-                aciklama = str(cell(ws, r, c.get("aciklama")) or "")
-
-                cari_id = None
-                cari = cell(ws, r, c.get("cari"))
-                if cari and str(cari).strip():
-                    cari_name = str(cari).strip()
-                c_row = db.cari_get_by_name(cari_name)
-                if not c_row:
-                    if create_missing_cari:
-                        cari_id = db.cari_upsert(cari_name)
-                else:
-                    cari_id = int(c_row["id"])
-
-                db.kasa_add(tarih, tipn, safe_float(tutar), para, odeme, kategori, cari_id, aciklama, belge, etiket)
-                counts["kasa"] += 1
-
-        # Banka hareketleri
-        bh = plan.get("BankaHareket")
-        if bh and bh.get("sheet") and bh.get("sheet") != "(Atla)":
-            ws = self.wb[bh["sheet"]]
-            hr = int(bh["header_row"])
-            c = bh["cols"]
-            import_grup = f"{now_iso()} | {os.path.basename(self.xlsx_path)}"
-            for r in range(hr + 1, (ws.max_row or hr) + 1):
-                tarih = cell(ws, r, c.get("tarih"))
-                banka = str(cell(ws, r, c.get("banka")) or "")
-                hesap = str(cell(ws, r, c.get("hesap")) or "")
-                aciklama = str(cell(ws, r, c.get("aciklama")) or "")
-                para = str(cell(ws, r, c.get("para")) or "TL")
-                referans = str(cell(ws, r, c.get("referans")) or "")
-                belge = str(cell(ws, r, c.get("belge")) or "")
-                if not belge.strip():
-                    belge = db.next_belge_no("B")
-                etiket = str(cell(ws, r, c.get("etiket")) or "")
-                bakiye = cell(ws, r, c.get("bakiye"))
-
-                # tutar/borç/alacak toleranslı
-                alacak = safe_float(cell(ws, r, c.get("alacak")))
-                borc = safe_float(cell(ws, r, c.get("borc")))
-                tutar_val = safe_float(cell(ws, r, c.get("tutar")))
-
-                tipn = ""
-                amount = 0.0
-                if alacak != 0:
-                    tipn = "Giriş"
-                    amount = abs(alacak)
-                elif borc != 0:
-                    tipn = "Çıkış"
-                    amount = abs(borc)
-                elif tutar_val != 0:
-                    tipn = "Çıkış" if tutar_val < 0 else "Giriş"
-                    amount = abs(tutar_val)
-                else:
-                    continue
-
-                hid = db.banka_add(
-
-                    tarih,
-                    banka=banka,
-                    hesap=hesap,
-                    tip=tipn,
-                    tutar=amount,
-                    para=para,
-                    aciklama=aciklama,
-                    referans=referans,
-                    belge=belge,
-                    etiket=etiket,
-                    import_grup=import_grup,
-                    bakiye=(None if bakiye is None else safe_float(bakiye)),
-                )
-                bank_ids.append(int(hid))
-                counts["banka"] += 1
+        def active(tab: str) -> Optional[Dict[str, Any]]:
+            p = plan.get(tab)
+            return p if p and p.get("sheet") and p.get("sheet") != "(Atla)" else None
 
-            # UI'nin sonradan tek tıkla çağırabilmesi için sakla
-            self.last_import_bank_group = import_grup
+        bulk_tabs = [t for t in ("Cariler", "CariHareket", "KasaHareket", "BankaHareket") if active(t)]
+        if bulk_tabs:
+            # Hareket sayfaları akış modunda okunur ve parça parça toplu yazılır
+            importer = ImportService(db, progress=progress, cancel_event=self._cancel_event)
+            stream_wb = open_workbook_stream(self.xlsx_path)
+            try:
+                car = active("Cariler")
+                if car:
+                    rows = sheet_rows(stream_wb[car["sheet"]], int(car["header_row"]))
+                    counts["cariler"] = importer.import_cariler(rows, car["cols"])
+
+                ch = active("CariHareket")
+                if ch:
+                    rows = sheet_rows(stream_wb[ch["sheet"]], int(ch["header_row"]))
+                    counts["cari_hareket"] = importer.import_cari_hareket(rows, ch["cols"], create_missing_cari)
+
+                kh = active("KasaHareket")
+                if kh:
+                    rows = sheet_rows(stream_wb[kh["sheet"]], int(kh["header_row"]))
+                    counts["kasa"] = importer.import_kasa(rows, kh["cols"], create_missing_cari)
+
+                bh = active("BankaHareket")
+                if bh:
+                    import_grup = f"{now_iso()} | {os.path.basename(self.xlsx_path)}"
+                    rows = sheet_rows(stream_wb[bh["sheet"]], int(bh["header_row"]))
+                    bank_ids = importer.import_banka(rows, bh["cols"], import_grup)
+                    counts["banka"] = len(bank_ids)
+                    # UI'nin sonradan tek tıkla çağırabilmesi için sakla
+                    self.last_import_bank_group = import_grup
+            finally:
+                try:
+                    stream_wb.close()
+                except Exception:
+                    pass
 
         # Maaş ödemeleri
         mp = plan.get("MaasOdeme")
@@ -14,7 +14,6 @@ from typing import Optional, List, TYPE_CHECKING
 import os
 import sys
 import subprocess
-from glob import glob
 
 import json
 import tkinter as tk
@@ -22,6 +21,7 @@ from tkinter import ttk, messagebox, simpledialog
 
 from ...config import APP_TITLE, APP_BASE_DIR, SHARED_STORAGE_DIRNAME
 from ...utils import center_window, fmt_amount, _safe_slug
+from ...services.backup_service import BackupService
 from ..dialogs import simple_input, simple_choice
 
 if TYPE_CHECKING:
@@ -299,30 +299,8 @@ class SettingsWindow(tk.Toplevel):
             return
 
         try:
-            was_active = (
-                getattr(self.app, "active_company_id", None) is not None
-                and int(self.app.active_company_id or 0) == int(cid)
-            )
-
-            self.app.usersdb.delete_company(int(cid), delete_db_file=True)
-
-            # aktif şirket silindiyse otomatik başka şirkete geç
-            if was_active:
-                try:
-                    urow = self.app.get_active_user_row() if hasattr(self.app, "get_active_user_row") else None
-                except Exception:
-                    urow = None
-                crow = None
-                try:
-                    crow = self.app.usersdb.get_active_company_for_user(urow) if urow else None
-                except Exception:
-                    crow = None
-                if crow:
-                    try:
-                        self.app.switch_company(int(crow["id"]))
-                    except Exception:
-                        pass
-
+            # Havuzdaki bağlantıyı kapatır, aktif şirketse başka şirkete geçer
+            self.app.delete_company(int(cid))
             self._companies_refresh()
         except Exception as e:
             messagebox.showerror(APP_TITLE, f"Silinemedi:\n{e}", parent=self)
@@ -878,13 +856,10 @@ class SettingsWindow(tk.Toplevel):
         ttk.Button(btns, text="🔄 Yenile", command=self._refresh_shared_storage_info).pack(side=tk.RIGHT)
 
     def _list_backup_files(self) -> List[str]:
-        base = self._get_base_dir()
-        files = glob(os.path.join(base, "kasa_backup_*.db"))
         try:
-            files.sort(key=lambda p: os.path.getmtime(p), reverse=True)
+            return BackupService(self._get_base_dir()).list_backups()
         except Exception:
-            files = sorted(files, reverse=True)
-        return files
+            return []
 
     def _open_in_file_manager(self, path: str):
         try:
@@ -909,7 +884,7 @@ class SettingsWindow(tk.Toplevel):
             master,
             text=(
                 "Bu sekmeden mevcut şirket veritabanının yedeğini alabilirsin.\n"
-                "Yedek dosyaları uygulama klasörüne kaydedilir (kasa_backup_*.db).\n"
+                "Yedek dosyaları uygulama klasörüne kaydedilir (kasa_backup_*.db / .db.gz / .db.xz).\n"
                 f"Klasör: {base}"
             ),
             justify="left",
@@ -920,11 +895,13 @@ class SettingsWindow(tk.Toplevel):
         top.pack(fill=tk.X, padx=10)
 
         def do_backup():
+            refresh = lambda: self._refresh_backup_list(getattr(self, "tree_db_backup", None))
             try:
-                self.app.backup_db()
+                # Yedek arka planda alınır; bitince liste tazelenir
+                self.app.backup_db(on_done=refresh)
             except Exception as e:
                 messagebox.showerror(APP_TITLE, f"Yedek alınamadı:\n{e}", parent=self)
-            self._refresh_backup_list(getattr(self, "tree_db_backup", None))
+                refresh()
 
         ttk.Button(top, text="💾 Yedek Al", command=do_backup).pack(side=tk.LEFT)
         ttk.Button(top, text="🔄 Listeyi Yenile", command=lambda: self._refresh_backup_list(getattr(self, "tree_db_backup", None))).pack(
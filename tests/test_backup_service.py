@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from kasapro.db.main_db import DB
+from kasapro.services.backup_service import BackupError, BackupService
+
+
+class BackupServiceTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "live.db")
+        self.db = DB(self.path)
+        self.backups = os.path.join(self.tmpdir.name, "yedek")
+        self.svc = BackupService(self.backups, keep=2, pages_per_step=4)
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def _kasa_count(self) -> int:
+        return int(self.db.conn.execute("SELECT COUNT(*) FROM kasa_hareket").fetchone()[0])
+
+    def test_backup_includes_uncheckpointed_wal_and_restores(self) -> None:
+        for i in range(30):
+            self.db.kasa_add("2024-01-01", "Gelir", i, "TL", "Nakit", "Genel", None, "x" * 200, "", "")
+        # Son yazımlar yalnızca -wal dosyasında; düz dosya kopyası bunları kaçırırdı
+        self.assertTrue(os.path.exists(self.path + "-wal"))
+
+        steps = []
+        for compress in ("", "gz", "xz"):
+            dest = self.svc.backup(self.path, f"kasa_backup_u_s_{compress or 'raw'}", compress=compress, progress=lambda d, t: steps.append((d, t)))
+            self.assertEqual(self.svc.verify(dest), "ok")
+        self.assertGreater(len(steps), 3)
+        self.assertEqual(steps[-1][0], steps[-1][1])
+
+        self.db.kasa_add("2024-01-02", "Gider", 1, "TL", "Nakit", "Genel", None, "sonra", "", "")
+        self.assertEqual(self._kasa_count(), 31)
+        self.svc.restore(dest, self.path)
+        self.assertEqual(self._kasa_count(), 30)
+
+    def test_compact_rotate_and_corrupt_restore(self) -> None:
+        names = []
+        for i in range(3):
+            names.append(self.svc.backup(self.path, f"kasa_backup_u_s_{i}", compact=True))
+            os.utime(names[-1], (time.time() + i, time.time() + i))
+        self.assertEqual(self.svc.rotate("kasa_backup_u_s_"), [names[0]])
+        self.assertEqual(self.svc.list_backups(), [names[2], names[1]])
+
+        bad = os.path.join(self.backups, "kasa_backup_bad.db")
+        with open(bad, "wb") as handle:
+            handle.write(b"SQLite format 3\x00" + b"\x00" * 4000)
+        with self.assertRaises((BackupError, sqlite3.DatabaseError)):
+            self.svc.restore(bad, self.path)
+        # Canlı DB'ye dokunulmadı
+        self.assertEqual(self.db.conn.execute("PRAGMA integrity_check").fetchone()[0], "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
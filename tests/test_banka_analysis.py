@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import random
+import unittest
+from unittest import mock
+
+from kasapro.core import banka_macros
+from kasapro.core.banka_macros import SALARY_STRONG, SalaryMatcher, compute_bank_analysis, group_rows_by_description
+from kasapro.core.fuzzy import NameMatcher, best_substring_similarity
+
+
+def _rows(n: int):
+    rnd = random.Random(7)
+    dates = ["2024-%02d-%02d" % (m, d) for m in range(1, 4) for d in range(1, 29)] + ["05.03.2024", "45687", "", "x"]
+    groups = ["Kira", "kira", "Maaş", "", None, "a|b"]
+    amounts = [12.5, "1.234,56", "abc", None, 0, "99", -40.0]
+    return [
+        {
+            "id": rnd.choice([i + 1, i + 1, 0]),
+            "tarih": rnd.choice(dates),
+            "tip": rnd.choice(["Giriş", "Çıkış"]),
+            "tutar": rnd.choice(amounts),
+            "etiket": rnd.choice(groups),
+            "banka": rnd.choice(["Ziraat", ""]),
+        }
+        for i in range(n)
+    ]
+
+
+def _dump(data):
+    return {k: [vars(s) for s in v] for k, v in data.items()}
+
+
+class BankAnalysisTests(unittest.TestCase):
+    def test_tables(self) -> None:
+        rows = [
+            {"id": 1, "tarih": "2024-01-05", "tip": "Giriş", "tutar": "1.000,50", "etiket": "Kira"},
+            {"id": 2, "tarih": "05.01.2024", "tip": "Çıkış", "tutar": 200, "etiket": "kira"},
+            {"id": 3, "tarih": "2024-02-01", "tip": "Çıkış", "tutar": -50, "etiket": ""},
+            {"id": 0, "tarih": "2024-02-01", "tip": "Giriş", "tutar": 999, "etiket": "Kira"},
+            {"id": 4, "tarih": "geçersiz", "tip": "Giriş", "tutar": 999, "etiket": "Kira"},
+        ]
+        data = compute_bank_analysis(rows, use_numpy=False)
+        self.assertEqual([(s.key, s.count) for s in data["groups"]], [("(Grupsuz)", 1), ("Kira", 1), ("kira", 1)])
+        self.assertEqual([(s.key, s.pos, s.neg, s.count) for s in data["months"]],
+                         [("2024-01", 1000.5, -200.0, 2), ("2024-02", 0.0, -50.0, 1)])
+        self.assertEqual([s.key for s in data["group_days"]], ["(Grupsuz)|20240201", "Kira|20240105", "kira|20240105"])
+        self.assertEqual((data["types"][0].key, data["types"][0].net, data["types"][0].min_neg), ("(Boş)", 750.5, -200.0))
+
+    @unittest.skipIf(banka_macros._np is None, "numpy kurulu değil")
+    def test_numpy_matches_python(self) -> None:
+        rows = _rows(5000)
+        self.assertEqual(
+            _dump(compute_bank_analysis(rows, use_numpy=True)),
+            _dump(compute_bank_analysis(rows, use_numpy=False)),
+        )
+
+
+class GroupingTests(unittest.TestCase):
+    def _statement(self, n: int):
+        rnd = random.Random(3)
+        names = ["ahmet yilmaz", "mehmet kaya", "ayse demir", "tedarikci anonim", "market zinciri"]
+        templates = ["HAVALE GELEN {n} REF:{r}", "kira bedeli {n} {m}", "POS SATIS {m} ISYERI", "{n} {m} transfer", "komisyon"]
+        return [
+            {
+                "id": i + 1,
+                "aciklama": rnd.choice(templates).format(
+                    n=rnd.choice(names) + rnd.choice(["", "x", " ltd"]),
+                    r=rnd.randint(100, 999999),
+                    m=rnd.choice(["ocak", "subat", "istanbul"]),
+                ),
+                "tip": rnd.choice(["Giriş", "Çıkış"]),
+            }
+            for i in range(n)
+        ]
+
+    def test_similar_descriptions_share_group(self) -> None:
+        rows = [
+            {"id": 1, "aciklama": "KIRA BEDELI AHMET YILMAZ OCAK", "tip": "Çıkış"},
+            {"id": 2, "aciklama": "Kira bedeli Ahmet Yılmaz Şubat", "tip": "Çıkış"},
+            {"id": 3, "aciklama": "MARKET ALISVERISI", "tip": "Çıkış"},
+            {"id": 4, "aciklama": "kira bedeli ahmet yilmaz", "tip": "Giriş"},
+            {"id": 0, "aciklama": "KIRA BEDELI AHMET YILMAZ", "tip": "Çıkış"},
+        ]
+        groups = group_rows_by_description(rows)
+        self.assertEqual([(g.members_plus, g.members_minus) for g in groups], [([4], [1, 2]), ([], [3])])
+
+    def test_parallel_matches_sequential(self) -> None:
+        rows = self._statement(600)
+        seq = group_rows_by_description(rows)
+        with mock.patch.object(banka_macros, "_PARALLEL_MIN_ROWS", 1), \
+                mock.patch.object(banka_macros, "_PARALLEL_CHUNK_ROWS", 50):
+            par = group_rows_by_description(rows, workers=2)
+        self.assertEqual(seq, par)
+        self.assertEqual(sum(g.size for g in seq), 600)
+
+    def test_cancel(self) -> None:
+        with self.assertRaises(RuntimeError):
+            group_rows_by_description(self._statement(100), should_cancel=lambda: True)
+
+
+class SalaryMatcherTests(unittest.TestCase):
+    NAMES = ["Ahmet Yılmaz", "Mehmet Kaya", "Ayşe Demir", "Ali Can", ""]
+    TEXTS = [
+        "MAAŞ ÖDEMESİ AHMET YILMAZ",
+        "EFT GİDEN MEHMED KAYA REF 1234",
+        "havale ayse demır ocak",
+        "POS HARCAMA MIGROS",
+        "ali",
+        "",
+    ]
+
+    def test_name_matcher_matches_reference_scores(self) -> None:
+        full = NameMatcher(self.NAMES)
+        pruned = NameMatcher(self.NAMES, min_score=0.7)
+        for text in self.TEXTS:
+            expected = [(i, best_substring_similarity(n, text)) for i, n in enumerate(self.NAMES)]
+            self.assertEqual(full.scores(text), expected)
+            self.assertEqual(pruned.scores(text), [(i, sc) for i, sc in expected if sc >= 0.7])
+
+    def test_match_uses_name_and_amount(self) -> None:
+        matcher = SalaryMatcher([("Ahmet Yılmaz", 20000.0), ("Mehmet Kaya", 0.0)])
+        self.assertIsNone(matcher.match("Giriş", "AHMET YILMAZ", 20000))
+        self.assertIsNone(matcher.match("Çıkış", "  ", 20000))
+        name, score = matcher.match("Çıkış", "MAAS AHMET YILMAZ", 20000)
+        self.assertEqual(name, "Ahmet Yılmaz")
+        self.assertGreaterEqual(score, SALARY_STRONG)
+        self.assertEqual(matcher.match("ÇIKIŞ", "EFT MEHMED KAYA", 100)[0], "Mehmet Kaya")
+        self.assertEqual(matcher.match("Çıkış", "POS HARCAMA MIGROS", 20000)[0], "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+
+from kasapro.qa import bench
+
+
+def _run(**p50) -> dict:
+    return {"metrics": {k.replace("__", "."): {"p50_ms": v, "p90_ms": v * 2} for k, v in p50.items()}}
+
+
+class BenchStatsTests(unittest.TestCase):
+    def test_summarize_reports_percentiles_in_ms(self) -> None:
+        stats = bench.summarize([0.001 * i for i in range(1, 11)])
+        self.assertEqual(stats["n"], 10)
+        self.assertEqual(stats["min_ms"], 1.0)
+        self.assertEqual(stats["p50_ms"], 5.5)
+        self.assertEqual(stats["p90_ms"], 9.1)
+        self.assertEqual(stats["max_ms"], 10.0)
+        self.assertEqual(bench.summarize([0.002])["p95_ms"], 2.0)
+        with self.assertRaises(ValueError):
+            bench.summarize([])
+
+    def test_rule_uses_longest_matching_prefix(self) -> None:
+        thresholds = {
+            "default": {"max_regression_pct": 10},
+            "metrics": {"ui": {"min_delta_ms": 20}, "ui.screen": {"stat": "p90_ms"}, "ui.scr": {"max_ms": 1}},
+        }
+        rule = bench.rule_for("ui.screen.kasa", thresholds)
+        self.assertEqual((rule["stat"], rule["min_delta_ms"], rule["max_regression_pct"]), ("p90_ms", 20, 10))
+        self.assertNotIn("max_ms", rule)
+        self.assertEqual(bench.rule_for("db.open.small", {})["stat"], "p50_ms")
+
+
+class BenchRegressionTests(unittest.TestCase):
+    def test_relative_and_absolute_thresholds(self) -> None:
+        history = [_run(db__open=10.0), _run(db__open=12.0), _run(db__open=11.0)]
+        thresholds = {"metrics": {"services": {"max_ms": 5}}}
+
+        self.assertEqual(bench.check_regressions(_run(db__open=13.0), history, thresholds), [])
+        slow = bench.check_regressions(_run(db__open=14.5, services__build=6.0), history, thresholds)
+        self.assertEqual(sorted(r.metric for r in slow), ["db.open", "services.build"])
+        rel = next(r for r in slow if r.metric == "db.open")
+        self.assertAlmostEqual(rel.limit_ms, 13.75)
+
+        # Küçük metriklerde yüzde yerine en az min_delta_ms fark aranır
+        self.assertEqual(bench.check_regressions(_run(tiny=1.9), [_run(tiny=0.5)], {}), [])
+        # Geçmişi olmayan metrik yalnızca mutlak sınıra bakar
+        self.assertEqual(bench.check_regressions(_run(new=100.0), history, {}), [])
+
+    def test_history_is_appended_and_trimmed(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sub", "history.json")
+            self.assertEqual(bench.load_history(path), [])
+            for i in range(4):
+                bench.append_history({"metrics": {}, "i": i}, path, limit=3)
+            self.assertEqual([r["i"] for r in bench.load_history(path)], [1, 2, 3])
+
+
+class BenchMeasurementTests(unittest.TestCase):
+    def test_db_and_services_groups_produce_samples(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            samples = bench.bench_db(tmp, repeat=2, small_rows=10, large_rows=100)
+            samples.update(bench.bench_services(tmp, repeat=2))
+        self.assertEqual(sorted(samples), ["db.open.large", "db.open.small", "services.build"])
+        self.assertTrue(all(len(v) == 2 for v in samples.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
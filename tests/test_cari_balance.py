@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+
+from kasapro.db.main_db import DB
+
+
+class CariBalanceTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DB(os.path.join(self.tmpdir.name, "balance.db"))
+        self.cid = self.db.cari_upsert("Bakiye Cari", acilis_bakiye=100.0)
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def test_summary_follows_add_update_delete(self) -> None:
+        self.db.cari_hareket_add("2024-01-10", self.cid, "Borç", 40.0, "TL", "", "", "", "")
+        self.db.cari_hareket_add("2024-02-05", self.cid, "Alacak", 15.0, "TL", "", "", "", "")
+        self.db.cari_hareket_add("2024-02-20", self.cid, "Alacak", 7.0, "USD", "", "", "", "")
+        hid = int(self.db.cari_hareket_list(cari_id=self.cid)[0]["id"])
+
+        b = self.db.cari_bakiye(self.cid)
+        self.assertAlmostEqual(b["borc"], 40.0)
+        self.assertAlmostEqual(b["alacak"], 22.0)
+        self.assertAlmostEqual(b["bakiye"], 82.0)
+
+        # Tarih/para değişimi kovayı taşır
+        self.db.cari_hareket_update(hid, "2024-03-01", self.cid, "Alacak", 9.0, "USD", "", "", "", "")
+        usd = [r for r in self.db.cari_bakiye_by_currency(self.cid) if r["para"] == "USD"][0]
+        self.assertAlmostEqual(usd["alacak"], 9.0)
+        self.assertEqual([r["ay"] for r in self.db.cari_balance.monthly(self.cid, "USD")], ["2024-03"])
+
+        self.db.cari_hareket_delete(hid)
+        self.assertEqual(self.db.cari_bakiye_by_currency(self.cid)[0]["para"], "TL")
+        self.assertEqual(self.db.cari_balance_check(), [])
+        self.assertAlmostEqual(self.db.cari_bakiye_all()[self.cid]["bakiye"], 75.0)
+
+    def test_bakiye_many_reads_current_totals(self) -> None:
+        other = self.db.cari_upsert("Hareketsiz Cari")
+        self.db.cari_hareket_add("2024-01-10", self.cid, "Borç", 40.0, "TL", "", "", "", "")
+        self.assertAlmostEqual(self.db.cari_bakiye_many([self.cid])[self.cid]["bakiye"], 60.0)
+        # Sonradan girilen hareket bir sonraki okumada görünür
+        self.db.cari_hareket_add("2024-01-11", self.cid, "Alacak", 5.0, "TL", "", "", "", "")
+        got = self.db.cari_bakiye_many([self.cid, other, 999999])
+        self.assertEqual(sorted(got), sorted([self.cid, other]))
+        self.assertEqual(got[self.cid], self.db.cari_bakiye(self.cid))
+        self.assertEqual(got[other]["bakiye"], 0.0)
+        self.assertEqual(self.db.cari_bakiye_many([]), {})
+
+    def test_ekstre_opening_uses_buckets(self) -> None:
+        for day, tip, tutar in [("2024-01-03", "Borç", 10.0), ("2024-02-01", "Alacak", 4.0), ("2024-02-09", "Borç", 1.0), ("2024-02-15", "Alacak", 50.0)]:
+            self.db.cari_hareket_add(day, self.cid, tip, tutar, "TL", "", "", "", "")
+
+        data = self.db.cari_ekstre(self.cid, date_from="10.02.2024")
+        self.assertAlmostEqual(data["opening"], 100.0 - 10.0 + 4.0 - 1.0)
+        self.assertEqual(len(data["rows"]), 1)
+        self.assertAlmostEqual(data["closing"], 143.0)
+
+    def test_check_detects_drift_and_rebuild_fixes(self) -> None:
+        self.db.cari_hareket_add("2024-01-03", self.cid, "Borç", 10.0, "TL", "", "", "", "")
+        self.db.conn.execute("UPDATE cari_balance SET borc=borc+5")
+        self.db.conn.commit()
+        self.assertEqual(len(self.db.cari_balance_check()), 1)
+
+        self.db.cari_balance_rebuild()
+        self.assertEqual(self.db.cari_balance_check(), [])
+        self.assertAlmostEqual(self.db.cari_bakiye(self.cid)["borc"], 10.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
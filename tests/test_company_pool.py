@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from kasapro.db.users_db import UsersDB
+from kasapro.services.company_pool import CompanyPool
+
+
+class _FakeDB:
+    def __init__(self, path: str):
+        self.path = path
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class CompanyPoolTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.built: list = []
+        self.paths = {}
+        for name in ("a", "b", "c"):
+            self.paths[name] = self._touch(name)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def _touch(self, name: str) -> str:
+        path = os.path.join(self.tmpdir.name, f"{name}.db")
+        with open(path, "wb"):
+            pass
+        return path
+
+    def _factory(self, path: str):
+        self.built.append(os.path.basename(path))
+        db = _FakeDB(path)
+        return db, {"db": db}
+
+    def test_lru_reuses_and_evicts_oldest(self) -> None:
+        pool = CompanyPool(self._factory, capacity=2)
+        a = pool.acquire(self.paths["a"])
+        b = pool.acquire(self.paths["b"])
+        self.assertIs(pool.acquire(self.paths["a"]), a)
+        pool.acquire(self.paths["c"])
+        self.assertEqual(self.built, ["a.db", "b.db", "c.db"])
+        self.assertTrue(b.db.closed)
+        self.assertFalse(a.db.closed)
+        self.assertEqual([os.path.basename(p) for p in pool.paths()], ["a.db", "c.db"])
+        pool.close()
+        self.assertTrue(a.db.closed)
+        self.assertEqual(len(pool), 0)
+
+    def test_prewarm_fills_free_slots_behind_active(self) -> None:
+        pool = CompanyPool(self._factory, capacity=2)
+        active = pool.acquire(self.paths["a"])
+        pool.prewarm([self.paths["a"], self.paths["b"], self.paths["c"]]).join()
+        self.assertEqual(self.built, ["a.db", "b.db"])
+        self.assertEqual([os.path.basename(p) for p in pool.paths()], ["b.db", "a.db"])
+        self.assertIs(pool.acquire(self.paths["a"]), active)
+        pool.acquire(self.paths["b"])
+        self.assertEqual(self.built, ["a.db", "b.db"])
+
+    def test_recreated_file_is_reopened(self) -> None:
+        pool = CompanyPool(self._factory, capacity=2)
+        first = pool.acquire(self.paths["a"])
+        # Şirket silinip aynı adla yeniden oluşturulmuş gibi: yol artık başka bir dosya
+        os.replace(self.paths["b"], self.paths["a"])
+        second = pool.acquire(self.paths["a"])
+        self.assertIsNot(first, second)
+        self.assertTrue(first.db.closed)
+        pool.discard(self.paths["a"])
+        self.assertTrue(second.db.closed)
+        self.assertNotIn(self.paths["a"], pool)
+
+    def test_concurrent_acquire_builds_once(self) -> None:
+        def slow_factory(path: str):
+            time.sleep(0.05)
+            return self._factory(path)
+
+        pool = CompanyPool(slow_factory, capacity=2)
+        got: list = []
+        threads = [threading.Thread(target=lambda: got.append(pool.acquire(self.paths["a"]))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.built, ["a.db"])
+        self.assertEqual(len({id(h) for h in got}), 1)
+
+    def test_discard_waits_for_prewarm_in_progress(self) -> None:
+        started, release = threading.Event(), threading.Event()
+        handles: list = []
+
+        def gated_factory(path: str):
+            started.set()
+            release.wait(5)
+            db, services = self._factory(path)
+            handles.append(db)
+            return db, services
+
+        pool = CompanyPool(gated_factory, capacity=2)
+        warm = pool.prewarm([self.paths["a"]])
+        self.assertTrue(started.wait(5))
+        # Silme, ön yükleme açılışı sürerken gelir; açılış bitince çift kapatılmalı
+        discard = threading.Thread(target=pool.discard, args=(self.paths["a"],))
+        discard.start()
+        release.set()
+        warm.join()
+        discard.join()
+        self.assertNotIn(self.paths["a"], pool)
+        self.assertTrue(handles[0].closed)
+
+
+class RecentCompaniesTests(unittest.TestCase):
+    def test_most_recently_used_first(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            users = UsersDB(tmp)
+            try:
+                uid = int(users.list_users()[0]["id"])
+                first = int(users.list_companies(uid)[0]["id"])
+                second = users.add_company(uid, "İkinci")
+                third = users.add_company(uid, "Üçüncü")
+                users.conn.execute("UPDATE companies SET last_used_at='2024-01-01 00:00:00' WHERE id=?", (third,))
+                users.conn.execute("UPDATE companies SET last_used_at='2024-01-02 00:00:00' WHERE id=?", (second,))
+                users.conn.commit()
+                self.assertEqual([int(c["id"]) for c in users.recent_companies(uid, 2)], [second, third])
+                users.set_last_company_id(uid, first)
+                self.assertEqual([int(c["id"]) for c in users.recent_companies(uid, 3)], [first, second, third])
+            finally:
+                users.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import csv
+import os
+import tempfile
+import threading
+import unittest
+
+from kasapro.config import HAS_OPENPYXL
+from kasapro.db.main_db import DB
+from kasapro.services.export_service import ExportCancelled, ExportService
+
+
+class StreamingExportTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DB(os.path.join(self.tmpdir.name, "export.db"))
+        cid = self.db.cari_upsert("Çağ Ltd")
+        for i in range(25):
+            self.db.cari_hareket_add(f"2024-01-{i % 28 + 1:02d}", cid, "Borç", i + 1, "TL", f"satır {i}", "", "", "")
+            self.db.banka_add("2024-01-02", "B", "H", "Giriş", 1.5, "TL", "", "", "", "")
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def test_csv_export_streams_all_rows_with_progress(self) -> None:
+        out = os.path.join(self.tmpdir.name, "out")
+        seen = []
+        paths = ExportService().export_database_csv(self.db.conn, out, progress=lambda d, t: seen.append((d, t)))
+        by_name = {os.path.basename(p): p for p in paths}
+        with open(by_name["Cari_Hareket.csv"], encoding="utf-8") as handle:
+            rows = list(csv.reader(handle))
+        self.assertEqual(rows[0][:3], ["id", "tarih", "cari"])
+        self.assertEqual(len(rows), 26)
+        self.assertEqual(rows[1][2], "Çağ Ltd")
+        self.assertEqual(seen[-1][0], seen[-1][1])
+
+    def test_cancel_removes_partial_files(self) -> None:
+        out = os.path.join(self.tmpdir.name, "cancelled")
+        cancel = threading.Event()
+        cancel.set()
+        with self.assertRaises(ExportCancelled):
+            ExportService().export_database_csv(self.db.conn, out, cancel_event=cancel)
+        self.assertEqual(os.listdir(out), [])
+
+    @unittest.skipUnless(HAS_OPENPYXL, "openpyxl kurulu değil")
+    def test_excel_export_write_only(self) -> None:
+        from openpyxl import load_workbook
+
+        path = os.path.join(self.tmpdir.name, "out.xlsx")
+        counts = ExportService().export_database_excel(self.db.conn, path, summary=[("Net", 1.0)])
+        self.assertEqual(counts["Banka_Hareket"], 25)
+        wb = load_workbook(path, read_only=True)
+        self.assertIn("Ozet", wb.sheetnames)
+        self.assertEqual(sum(1 for _ in wb["Cari_Hareket"].iter_rows()), 26)
+        wb.close()
+        self.assertFalse(os.path.exists(path + ".part"))
+
+
+if __name__ == "__main__":
+    unittest.main()
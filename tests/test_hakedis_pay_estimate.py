@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from kasapro.db.main_db import DB
+
+
+class PayEstimateCalculateTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DB(os.path.join(self.tmpdir.name, "hakedis.db"))
+        self.repo = self.db.hakedis
+        self.cid = 1
+        self.project_id = self.repo.project_create(self.cid, "Proje", "PRJ-1")
+        self.contract_id = self.repo.contract_create(
+            self.cid, self.project_id, None, "CNT-1", "birim_fiyat", retention_rate=0.1
+        )
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def _measure(self, period_id: int, boq_id: int, qty: float, tarih: str) -> None:
+        self.repo.measurement_add(self.cid, self.project_id, self.contract_id, period_id, boq_id, qty, tarih)
+
+    def _status_counts(self) -> list:
+        conn = self.db.conn
+        return [
+            [tuple(r) for r in conn.execute(f"SELECT status, COUNT(*) FROM {table} GROUP BY status")]
+            for table in ("pay_estimate_lines", "deductions")
+        ]
+
+    def test_lines_match_per_position_sums(self) -> None:
+        boqs = [
+            self.repo.boq_add(self.cid, self.project_id, self.contract_id, f"PZ-{i}", f"Kalem {i}", "m", 100, 10 + i)
+            for i in range(4)
+        ]
+        p1 = self.repo.period_create(self.cid, self.project_id, self.contract_id, 1, "2024-01-01", "2024-01-31")
+        p2 = self.repo.period_create(self.cid, self.project_id, self.contract_id, 2, "2024-02-01", "2024-02-29")
+        self._measure(p1, boqs[0], 3, "2024-01-05")
+        self._measure(p1, boqs[0], 2.5, "2024-01-31")
+        self._measure(p2, boqs[0], 4, "2024-02-01")
+        self._measure(p2, boqs[1], 7, "2024-02-29")
+        self._measure(p2, boqs[2], 1, "2024-03-01")
+        self.db.conn.execute("UPDATE measurements SET status='passive' WHERE qty=2.5")
+        self.db.conn.commit()
+
+        timings: dict = {}
+        totals = self.repo.pay_estimate_calculate(self.cid, p2, timings=timings)
+        self.assertEqual(timings["lines"], 4)
+        self.assertTrue({"load_s", "compute_s", "write_s", "total_s"} <= set(timings))
+
+        lines = {int(l["boq_item_id"]): l for l in self.repo.pay_estimate_lines(self.cid, p2)}
+        self.assertEqual(sorted(lines), sorted(boqs))
+        for boq_id, line in lines.items():
+            prev = self.repo._sum_measurement_qty(self.cid, boq_id, None, "2024-02-01")
+            cur = self.repo._sum_measurement_qty(self.cid, boq_id, "2024-02-01", "2024-02-29")
+            self.assertEqual((line["prev_qty"], line["current_qty"], line["cum_qty"]), (prev, cur, prev + cur))
+            self.assertAlmostEqual(line["current_amount"], cur * line["unit_price"])
+        self.assertAlmostEqual(totals["current_total"], 4 * 10 + 7 * 11)
+        self.assertAlmostEqual(totals["prev_total"], 3 * 10)
+        self.assertAlmostEqual(totals["net"], totals["current_total"] * 0.9)
+
+    def test_recalculate_replaces_active_lines(self) -> None:
+        boq = self.repo.boq_add(self.cid, self.project_id, self.contract_id, "PZ-1", "Kalem", "m", 10, 5)
+        p1 = self.repo.period_create(self.cid, self.project_id, self.contract_id, 1, "2024-01-01", "2024-01-31")
+        self._measure(p1, boq, 2, "2024-01-10")
+        self.repo.pay_estimate_calculate(self.cid, p1)
+        self._measure(p1, boq, 1, "2024-01-11")
+        totals = self.repo.pay_estimate_calculate(self.cid, p1)
+        self.assertAlmostEqual(totals["current_total"], 15)
+        self.assertEqual(len(self.repo.pay_estimate_lines(self.cid, p1)), 1)
+        self.assertEqual(len(self.repo.deductions_list(self.cid, p1)), 1)
+        with self.assertRaises(ValueError):
+            self.repo.pay_estimate_calculate(self.cid, 999)
+
+    def test_failed_recalculation_leaves_previous_result(self) -> None:
+        boq = self.repo.boq_add(self.cid, self.project_id, self.contract_id, "PZ-1", "Kalem", "m", 10, 5)
+        p1 = self.repo.period_create(self.cid, self.project_id, self.contract_id, 1, "2024-01-01", "2024-01-31")
+        self._measure(p1, boq, 2, "2024-01-10")
+        self.repo.pay_estimate_calculate(self.cid, p1)
+        before = self._status_counts()
+
+        # Son adım (pay_estimates.updated_at) başarısız olsun
+        self._measure(p1, boq, 1, "2024-01-11")
+        conn = self.db.conn
+        conn.execute(
+            "CREATE TRIGGER fail_pe BEFORE UPDATE ON pay_estimates BEGIN SELECT RAISE(ABORT, 'boom'); END"
+        )
+        conn.commit()
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.repo.pay_estimate_calculate(self.cid, p1)
+
+        self.assertEqual(self._status_counts(), before)
+        self.assertEqual([line["current_qty"] for line in self.repo.pay_estimate_lines(self.cid, p1)], [2])
+        self.assertEqual([d["amount"] for d in self.repo.deductions_list(self.cid, p1)], [1.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
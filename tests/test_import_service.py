@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from kasapro.db.main_db import DB
+from kasapro.services.import_service import ImportCancelled, ImportService
+
+
+class BulkImportTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DB(os.path.join(self.tmpdir.name, "import.db"))
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def test_cari_hareket_and_kasa_resolve_cari_and_belge(self) -> None:
+        self.db.cari_upsert("Mevcut")
+        # tarih, cari, tip, tutar, belge
+        rows = [
+            ("2024-01-05", "Mevcut", "Alacak", 10, ""),
+            ("2024-01-06", "Yeni Cari", "borç", 20, "X-1"),
+            ("2024-01-07", "  ", "Borç", 5, ""),
+            ("2024-01-08", "Mevcut", "Borç", 0, ""),
+            ("2024-01-09", "Yeni Cari", "Borç", 7, None),
+        ]
+        cols = {"tarih": 1, "cari": 2, "tip": 3, "tutar": 4, "belge": 5}
+        progress = []
+        svc = ImportService(self.db, chunk_size=2, progress=lambda s, n: progress.append((s, n)))
+        self.assertEqual(svc.import_cari_hareket(iter(rows), cols, create_missing_cari=True), 3)
+        self.assertEqual(progress, [("cari_hareket", 2), ("cari_hareket", 4), ("cari_hareket", 5)])
+
+        yeni = self.db.cari_get_by_name("Yeni Cari")
+        got = [(r["cari_id"], r["tip"], r["belge"]) for r in self.db.conn.execute("SELECT * FROM cari_hareket ORDER BY id")]
+        self.assertEqual(got[0][1], "Alacak")
+        self.assertEqual(got[1], (int(yeni["id"]), "Borç", "X-1"))
+        self.assertTrue(got[0][2].startswith("C-"))
+        self.assertNotEqual(got[0][2], got[2][2])
+        # Bakiye özeti trigger'la güncel kalır
+        self.assertEqual(self.db.cari_balance_check(), [])
+
+        kasa = [("2024-02-01", "Gelir", 50, "Mevcut"), ("2024-02-02", "Gider", 5, None), ("2024-02-03", "Gider", 1, "Yok")]
+        n = ImportService(self.db).import_kasa(kasa, {"tarih": 1, "tip": 2, "tutar": 3, "cari": 4}, create_missing_cari=False)
+        self.assertEqual(n, 3)
+        cari_ids = [r[0] for r in self.db.conn.execute("SELECT cari_id FROM kasa_hareket ORDER BY id")]
+        self.assertEqual(cari_ids, [int(self.db.cari_get_by_name("Mevcut")["id"]), None, None])
+
+    def test_banka_returns_ids_and_cancel_stops_between_chunks(self) -> None:
+        rows = [("2024-03-01", f"satir {i}", -float(i + 1)) for i in range(10)]
+        cols = {"tarih": 1, "aciklama": 2, "tutar": 3}
+        ids = ImportService(self.db, chunk_size=4).import_banka(rows, cols, "grup-1")
+        self.assertEqual(len(ids), 10)
+        got = self.db.conn.execute(
+            f"SELECT COUNT(*), MIN(tip), MAX(tip) FROM banka_hareket WHERE id IN ({','.join('?' * len(ids))}) AND import_grup='grup-1'",
+            ids,
+        ).fetchone()
+        self.assertEqual(tuple(got), (10, "Çıkış", "Çıkış"))
+
+        cancel = threading.Event()
+        svc = ImportService(self.db, chunk_size=4, progress=lambda s, n: cancel.set(), cancel_event=cancel)
+        with self.assertRaises(ImportCancelled):
+            svc.import_banka(rows, cols, "grup-2")
+        self.assertEqual(self.db.conn.execute("SELECT COUNT(*) FROM banka_hareket WHERE import_grup='grup-2'").fetchone()[0], 4)
+
+    def test_failed_chunk_leaves_nothing_from_that_chunk(self) -> None:
+        self.db.conn.execute(
+            "CREATE TRIGGER fail_kasa BEFORE INSERT ON kasa_hareket WHEN NEW.aciklama='boom' BEGIN SELECT RAISE(ABORT, 'boom'); END"
+        )
+        self.db.conn.commit()
+        seq_before = self.db.sequences.current("belge")
+        # tarih, tip, tutar, cari, aciklama, belge
+        rows = [
+            ("2024-04-01", "Gelir", 10, "Ilk Cari", "", "K-1"),
+            ("2024-04-02", "Gelir", 20, "Ilk Cari", "", "K-2"),
+            ("2024-04-03", "Gider", 5, "Yarim Cari", "", ""),
+            ("2024-04-04", "Gider", 6, "Yarim Cari", "boom", ""),
+        ]
+        cols = {"tarih": 1, "tip": 2, "tutar": 3, "cari": 4, "aciklama": 5, "belge": 6}
+        svc = ImportService(self.db, chunk_size=2)
+        with self.assertRaises(sqlite3.IntegrityError):
+            svc.import_kasa(rows, cols, create_missing_cari=True)
+
+        # Önceki parça kalır; başarısız parçanın carisi, numarası ve hareketi yazılmaz
+        self.assertEqual([r[0] for r in self.db.conn.execute("SELECT belge FROM kasa_hareket ORDER BY id")], ["K-1", "K-2"])
+        self.assertIsNotNone(self.db.cari_get_by_name("Ilk Cari"))
+        self.assertIsNone(self.db.cari_get_by_name("Yarim Cari"))
+        self.assertEqual(self.db.sequences.current("belge"), seq_before)
+
+        # Aynı servisle tekrar: önbellekte geri alınmış cari id'si kalmamalı
+        self.assertEqual(svc.import_kasa(rows[2:3], cols, create_missing_cari=True), 1)
+        yarim = self.db.cari_get_by_name("Yarim Cari")
+        got = self.db.conn.execute("SELECT cari_id FROM kasa_hareket WHERE tutar=5").fetchone()[0]
+        self.assertEqual(got, int(yarim["id"]))
+
+    def test_cariler_upsert_many(self) -> None:
+        self.db.cari_upsert("A", tur="eski")
+        rows = [("A", "musteri", "1"), ("B", "", ""), (None, "x", "y")]
+        self.assertEqual(ImportService(self.db).import_cariler(rows, {"ad": 1, "tur": 2, "telefon": 3}), 2)
+        self.assertEqual(self.db.cari_get_by_name("A")["tur"], "musteri")
+        self.assertIsNotNone(self.db.cari_get_by_name("B"))
+
+    def test_reserve_belge_nos_continues_sequence(self) -> None:
+        first = self.db.next_belge_no("K")
+        block = self.db.reserve_belge_nos("B", 3)
+        n = int(first.split("-")[1])
+        self.assertEqual(block, [f"B-{n + 1:06d}", f"B-{n + 2:06d}", f"B-{n + 3:06d}"])
+        self.assertEqual(self.db.next_belge_no("K"), f"K-{n + 4:06d}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,10 @@ import csv
 import json
 from pathlib import Path
 
+import pytest
+
 from kasapro.db.main_db import DB
+from kasapro.modules.integrations.bank import BankTransactionRow, detect_statement_format, iter_statement
 from kasapro.modules.integrations.service import IntegrationService
 from kasapro.modules.integrations.repo import IntegrationRepo
 from kasapro.modules.integrations.notifications import MockEmailProvider
@@ -168,6 +171,98 @@ def test_bank_statement_unique_hash(tmp_path: Path):
     assert count == 1
 
 
+def test_bank_import_streams_chunks_and_counts_duplicates(tmp_path: Path):
+    service = make_service(tmp_path)
+    company_id = service._company_id()
+    rows = (
+        BankTransactionRow("2024-01-%02d" % (1 + i % 50 % 28), float(i % 50), f"Hareket {i % 50}")
+        for i in range(120)
+    )
+    _sid, inserted, skipped = service.bank.import_statement(company_id, "Banka", "2024-01-01", "2024-01-31", rows, chunk_size=7)
+    assert (inserted, skipped) == (50, 70)
+    # Aynı hareketler ikinci ekstrede tümüyle atlanır
+    again = [BankTransactionRow("2024-01-01", 0.0, " hareket 0 "), BankTransactionRow("2024-02-01", 1.0, "Yeni")]
+    _sid, inserted, skipped = service.bank.import_statement(company_id, "Banka", "2024-01-01", "2024-02-29", again)
+    assert (inserted, skipped) == (1, 1)
+    assert service.db.conn.execute("SELECT COUNT(*) FROM bank_transactions").fetchone()[0] == 51
+
+
+def test_bank_import_rolls_back_on_parse_error(tmp_path: Path):
+    service = make_service(tmp_path)
+    csv_path = tmp_path / "bank.csv"
+    csv_path.write_text("tarih,tutar,aciklama\n2024-01-10,100,Ok\n2024-01-11,abc,Bozuk\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        service.import_bank_csv("TestBank", "2024-01-01", "2024-01-31", csv_path)
+    conn = service.db.conn
+    assert conn.execute("SELECT COUNT(*) FROM bank_transactions").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM bank_statements").fetchone()[0] == 0
+
+
+def test_bank_import_mt940_and_camt053(tmp_path: Path):
+    service = make_service(tmp_path)
+    mt940 = tmp_path / "ekstre.sta"
+    mt940.write_text(
+        "{1:F01TESTBANK}{4:\n:20:STMT1\n:25:TR000001\n:60F:C240101TRY1000,00\n"
+        ":61:2401100110C150,25NTRFREF1//B1\n:86:HAVALE ACME\nFTR-0001\n"
+        ":61:240111D40,NCHGNONREF\n"
+        ":62F:C240131TRY1110,25\n-}\n",
+        encoding="utf-8",
+    )
+    camt = tmp_path / "ekstre.xml"
+    camt.write_text(
+        '<?xml version="1.0"?>'
+        '<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02"><BkToCstmrStmt><Stmt>'
+        '<Ntry><Amt Ccy="TRY">75.50</Amt><CdtDbtInd>DBIT</CdtDbtInd><BookgDt><Dt>2024-01-12</Dt></BookgDt>'
+        "<NtryDtls><TxDtls><RmtInf><Ustrd>Kira</Ustrd><Ustrd>Ocak</Ustrd></RmtInf></TxDtls></NtryDtls></Ntry>"
+        '<Ntry><Amt Ccy="TRY">10</Amt><CdtDbtInd>CRDT</CdtDbtInd><BookgDt><DtTm>2024-01-13T10:00:00</DtTm></BookgDt>'
+        "<AddtlNtryInf>Faiz</AddtlNtryInf></Ntry>"
+        "</Stmt></BkToCstmrStmt></Document>",
+        encoding="utf-8",
+    )
+    assert detect_statement_format(mt940) == "mt940"
+    assert detect_statement_format(camt) == "camt053"
+    assert [vars(r) for r in iter_statement(mt940)] == [
+        {"transaction_date": "2024-01-10", "amount": 150.25, "description": "HAVALE ACME FTR-0001"},
+        {"transaction_date": "2024-01-11", "amount": -40.0, "description": "NCHGNONREF"},
+    ]
+    assert [vars(r) for r in iter_statement(camt)] == [
+        {"transaction_date": "2024-01-12", "amount": -75.5, "description": "Kira Ocak"},
+        {"transaction_date": "2024-01-13", "amount": 10.0, "description": "Faiz"},
+    ]
+    assert service.import_bank_file("Banka", "2024-01-01", "2024-01-31", mt940)[1:] == (2, 0)
+    assert service.import_bank_file("Banka", "2024-01-01", "2024-01-31", camt)[1:] == (2, 0)
+    with pytest.raises(ValueError):
+        iter_statement(camt, fmt="qif")
+
+
+def test_bank_txt_statement_is_detected_from_content(tmp_path: Path):
+    service = make_service(tmp_path)
+    mt940 = tmp_path / "ekstre.txt"
+    mt940.write_text(
+        ":20:STMT1\n:25:TR000001\n:60F:C240101TRY0,00\n:61:2401100110C150,25NTRFREF1\n:86:HAVALE\n-\n",
+        encoding="utf-8",
+    )
+    csv_txt = tmp_path / "liste.txt"
+    csv_txt.write_text("tarih,tutar,aciklama\n10.01.2024,\"12,5\",Nakit\n", encoding="utf-8")
+    assert detect_statement_format(mt940) == "mt940"
+    assert detect_statement_format(csv_txt) == "csv"
+    assert [vars(r) for r in iter_statement(csv_txt)] == [
+        {"transaction_date": "2024-01-10", "amount": 12.5, "description": "Nakit"}
+    ]
+    assert service.import_bank_file("Banka", "2024-01-01", "2024-01-31", mt940)[1:] == (1, 0)
+    row = service.db.conn.execute("SELECT transaction_date, amount FROM bank_transactions").fetchone()
+    assert tuple(row) == ("2024-01-10", 150.25)
+
+    # MT940 zorla CSV olarak okunursa uydurma satır üretmez, reddedilir
+    with pytest.raises(ValueError):
+        list(iter_statement(mt940, fmt="csv"))
+    missing_date = tmp_path / "bozuk.csv"
+    missing_date.write_text("tarih,tutar,aciklama\n,100,Tarihsiz\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        service.import_bank_file("Banka", "2024-01-01", "2024-01-31", missing_date)
+    assert service.db.conn.execute("SELECT COUNT(*) FROM bank_transactions").fetchone()[0] == 1
+
+
 def test_auto_reconcile(tmp_path: Path):
     service = make_service(tmp_path)
     seed_invoice_data(service.db)
@@ -186,6 +281,34 @@ def test_auto_reconcile(tmp_path: Path):
     assert row[0] == 1
 
 
+def test_auto_reconcile_is_one_to_one_and_prefers_matching_description(tmp_path: Path):
+    service = make_service(tmp_path)
+    seed_invoice_data(service.db)
+    conn = service.db.conn
+    conn.execute("INSERT INTO fatura(tarih, fatura_no, cari_ad, genel_toplam) VALUES ('2024-01-10', 'FTR-0002', 'Beta', 100)")
+    fid = conn.execute("SELECT id FROM fatura WHERE fatura_no = 'FTR-0002'").fetchone()[0]
+    conn.execute("INSERT INTO fatura_odeme(fatura_id, tarih, tutar) VALUES (?, '2024-01-12', 100.0)", (fid,))
+    conn.commit()
+
+    csv_path = tmp_path / "bank.csv"
+    with csv_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["tarih", "tutar", "aciklama"])
+        writer.writerow(["2024-01-12", "100", "Tahsilat BETA"])
+        writer.writerow(["2024-01-13", "100", "Tahsilat"])
+        writer.writerow(["2024-01-13", "100", "Tahsilat 3"])
+        writer.writerow(["2024-01-30", "100,00", "Pencere dışı"])
+
+    service.import_bank_csv("TestBank", "2024-01-01", "2024-01-31", csv_path)
+    assert service.auto_reconcile() == 2
+    refs = dict(conn.execute("SELECT description, matched_ref FROM bank_transactions WHERE matched = 1").fetchall())
+    beta_pay = conn.execute("SELECT id FROM fatura_odeme WHERE fatura_id = ?", (fid,)).fetchone()[0]
+    assert refs["Tahsilat BETA"] == f"payment:{beta_pay}"
+    assert len(set(refs.values())) == 2
+    # Kullanılan ödemeler ikinci çalıştırmada tekrar bağlanmaz
+    assert service.auto_reconcile() == 0
+
+
 def test_manual_reconcile(tmp_path: Path):
     service = make_service(tmp_path)
     csv_path = tmp_path / "bank.csv"
@@ -202,6 +325,22 @@ def test_manual_reconcile(tmp_path: Path):
     assert row[1] == "manual:1"
 
 
+def test_mark_matched_many_counts_only_updated_rows(tmp_path: Path):
+    service = make_service(tmp_path)
+    csv_path = tmp_path / "bank.csv"
+    csv_path.write_text("tarih,tutar,aciklama\n2024-01-12,50,A\n2024-01-13,60,B\n", encoding="utf-8")
+    service.import_bank_csv("TestBank", "2024-01-01", "2024-01-31", csv_path)
+    first, second = [r[0] for r in service.db.conn.execute("SELECT id FROM bank_transactions ORDER BY id")]
+    service.manual_reconcile(first, "manual:1")
+
+    repo = service.repo
+    # Zaten eşleşmiş ve olmayan hareket sayılmaz
+    assert repo.bank_transactions_mark_matched_many([(first, "payment:1"), (second, "payment:2"), (9999, "payment:3")]) == 1
+    assert repo.bank_transactions_mark_matched_many([(second, "payment:4")]) == 0
+    refs = [r[0] for r in service.db.conn.execute("SELECT matched_ref FROM bank_transactions ORDER BY id")]
+    assert refs == ["manual:1", "payment:2"]
+
+
 def test_api_token_validation_and_scope(tmp_path: Path):
     service = make_service(tmp_path)
     token, _token_id = service.create_api_token("default", ["customers"])
@@ -238,3 +377,175 @@ def test_audit_log_entries(tmp_path: Path):
     actions = {r[0] for r in rows}
     assert "emit_event" in actions
     assert "create_token" in actions
+
+
+def test_worker_wakes_on_enqueue_and_respects_type_limits(tmp_path: Path):
+    import threading
+    import time
+
+    from kasapro.modules.integrations.worker import IntegrationWorker
+
+    service = make_service(tmp_path)
+    lock = threading.Lock()
+    running = {"slow": 0}
+    peak = {"slow": 0}
+    done = []
+
+    def handle(job):
+        job_type = job["job_type"]
+        if job_type == "slow":
+            with lock:
+                running["slow"] += 1
+                peak["slow"] = max(peak["slow"], running["slow"])
+            time.sleep(0.02)
+            with lock:
+                running["slow"] -= 1
+        with lock:
+            done.append(int(job["job_id"]))
+        return True
+
+    service._handle_job = handle
+    # Uzun poll aralığı: işler yalnızca uyandırma sinyaliyle hızlı bitebilir
+    worker = IntegrationWorker(service, poll_interval=30, max_workers=4, type_limits={"slow": 1})
+    worker.start()
+    try:
+        for i in range(6):
+            service.enqueue_job("slow", {}, f"slow-{i}")
+            service.enqueue_job("fast", {}, f"fast-{i}")
+        deadline = time.time() + 10
+        while len(done) < 12 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        worker.stop(wait=True)
+
+    assert len(done) == 12
+    assert peak["slow"] == 1
+    statuses = {r[0] for r in service.db.conn.execute("SELECT DISTINCT status FROM jobs")}
+    assert statuses == {"done"}
+
+
+def test_worker_releases_claims_it_cannot_submit(tmp_path: Path):
+    from kasapro.modules.integrations.worker import IntegrationWorker
+
+    service = make_service(tmp_path)
+    for i in range(3):
+        service.enqueue_job("fast", {}, f"release-{i}")
+    worker = IntegrationWorker(service, max_workers=3, worker_id="w-test")
+    submitted = []
+
+    class StoppingPool:
+        def submit(self, fn, job):
+            # İlk işten sonra stop() gelmiş gibi
+            submitted.append(int(job["job_id"]))
+            worker._stop.set()
+
+    worker._pool = StoppingPool()
+    assert worker._dispatch() == 1
+    rows = service.db.conn.execute("SELECT job_id, status, locked_by FROM jobs ORDER BY job_id").fetchall()
+    assert [(r["status"], r["locked_by"]) for r in rows if r["job_id"] not in submitted] == [("pending", None)] * 2
+
+    class ClosedPool:
+        def submit(self, fn, job):
+            raise RuntimeError("cannot schedule new futures after shutdown")
+
+    worker._stop.clear()
+    worker._in_flight = 0
+    worker._running_ids.clear()
+    worker._running_by_type.clear()
+    worker._pool = ClosedPool()
+    assert worker._dispatch() == 0
+    assert (worker._in_flight, worker._running_ids, worker._running_by_type.get("fast", 0)) == (0, set(), 0)
+    pending = service.db.conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'pending' AND locked_by IS NULL").fetchone()[0]
+    assert pending == 2
+
+
+def test_job_claim_lease_renew_and_reap(tmp_path: Path):
+    import sqlite3
+    import threading
+
+    service = make_service(tmp_path)
+    for i in range(40):
+        service.enqueue_job("fast", {}, f"lease-{i}")
+
+    # İki ayrı bağlantı (ayrı süreç gibi) aynı anda ayırır: kesişim olmamalı
+    claimed = {}
+
+    def claim(worker_id: str):
+        conn = sqlite3.connect(str(tmp_path / "test.db"), timeout=5)
+        repo = IntegrationRepo(conn)
+        got = []
+        while True:
+            rows = repo.job_claim_due(1, limit=3, worker_id=worker_id)
+            if not rows:
+                break
+            got += [int(r["job_id"]) for r in rows]
+        claimed[worker_id] = got
+        conn.close()
+
+    threads = [threading.Thread(target=claim, args=(f"w{i}",)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not set(claimed["w0"]) & set(claimed["w1"])
+    assert len(claimed["w0"]) + len(claimed["w1"]) == 40
+
+    repo = service.repo
+    w0_ids = claimed["w0"] or claimed["w1"]
+    owner = "w0" if claimed["w0"] else "w1"
+    assert repo.job_renew_leases(w0_ids, owner, 120) == len(w0_ids)
+    assert repo.job_renew_leases(w0_ids, "someone-else", 120) == 0
+
+    # Süresi dolmuş kira: iş tekrar kuyruğa döner ve deneme sayılır
+    conn = service.db.conn
+    conn.execute("UPDATE jobs SET lease_until = datetime('now', '-1 seconds') WHERE job_id = ?", (w0_ids[0],))
+    conn.commit()
+    assert service.reap_expired_jobs() == 1
+    row = repo.job_get(w0_ids[0])
+    assert row["status"] == "pending"
+    assert row["attempts"] == 1
+    assert row["locked_by"] is None
+    again = service.claim_jobs(limit=5, worker_id="w2")
+    assert [int(r["job_id"]) for r in again] == [w0_ids[0]]
+    assert again[0]["locked_by"] == "w2"
+
+
+def test_process_outbox_batches_fan_out(tmp_path: Path, monkeypatch):
+    service = make_service(tmp_path)
+    # Önceden kuyruğa alınmış iş aynı anahtarla tekrar oluşmamalı
+    service.enqueue_job("notification_dispatch", {"event_type": "x", "payload": {}}, "inv-2")
+    for i in range(5):
+        service.emit_event("invoice.created", {"id": i, "ad": "Çağrı"}, f"inv-{i}")
+
+    conn = service.db.conn
+    commits = []
+    real_commit = conn.commit
+    monkeypatch.setattr(conn, "commit", lambda: (commits.append(1), real_commit()))
+    assert service.process_outbox(limit=3) == 6
+    assert len(commits) == 1
+    monkeypatch.undo()
+
+    assert service.process_outbox() == 4
+    assert service.process_outbox() == 0
+    assert conn.execute("SELECT COUNT(*) FROM event_outbox WHERE processed_at IS NULL").fetchone()[0] == 0
+    rows = conn.execute("SELECT job_type, payload_json FROM jobs WHERE idempotency_key = 'webhook:inv-4'").fetchall()
+    assert len(rows) == 1
+    assert json.loads(rows[0]["payload_json"]) == {"event_type": "invoice.created", "payload": {"id": 4, "ad": "Çağrı"}}
+    assert conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 10
+
+
+def test_process_outbox_quarantines_invalid_payload(tmp_path: Path):
+    service = make_service(tmp_path)
+    repo = service.repo
+    repo.outbox_add(1, "invoice.created", "{bozuk", "bad-1")
+    repo.outbox_add(1, "invoice.created", "", "empty-1")
+    service.emit_event("invoice.created", {"id": 7}, "ok-1")
+
+    assert service.process_outbox() == 4
+    conn = service.db.conn
+    assert conn.execute("SELECT COUNT(*) FROM event_outbox WHERE processed_at IS NULL").fetchone()[0] == 0
+    payloads = [json.loads(r[0]) for r in conn.execute("SELECT payload_json FROM jobs ORDER BY job_id")]
+    assert [p["payload"] for p in payloads] == [{}, {}, {"id": 7}, {"id": 7}]
+    dead = conn.execute("SELECT job_type, payload_json, idempotency_key, last_error FROM dead_letter_jobs").fetchall()
+    assert [tuple(r)[:3] for r in dead] == [("event:invoice.created", "{bozuk", "bad-1")]
+    assert dead[0]["last_error"].startswith("invalid payload_json")
@@ -3,12 +3,15 @@
 from __future__ import annotations
 
 import os
+import queue
 import tempfile
+import time
 import unittest
 from datetime import datetime, timedelta
 
 from kasapro.db.main_db import DB
 from kasapro.db.users_db import UsersDB
+from kasapro.modules.notes_reminders.scheduler import DueHeap, ReminderScheduler
 from kasapro.modules.notes_reminders.service import NotesRemindersService, RecurrenceRule
 
 
@@ -221,3 +224,97 @@ class NotesRemindersTests(unittest.TestCase):
         )
         rows = list(self.db.conn.execute("SELECT * FROM audit_log WHERE entity_id=?", (note_id,)))
         self.assertTrue(rows)
+
+
+class _App:
+    root = None
+    active_company_id = 1
+
+    def get_active_user_id(self) -> int:
+        return 1
+
+
+def _fmt(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class DueHeapTests(unittest.TestCase):
+    def test_pops_in_order_and_skips_stale_entries(self) -> None:
+        heap = DueHeap()
+        heap.load([("2024-01-03 09:00:00", 3), ("2024-01-01 09:00:00", 1), ("2024-01-02 09:00:00", 2)])
+        heap.set(1, "2024-01-05 09:00:00")  # ertelendi
+        heap.set(2, None)  # tamamlandı
+        heap.set(4, "2024-01-02 12:00:00")
+        self.assertEqual(heap.peek(), "2024-01-02 12:00:00")
+        self.assertEqual(heap.pop_due("2024-01-04 00:00:00"), [4, 3])
+        self.assertEqual(len(heap), 1)
+        self.assertEqual(heap.pop_due("2024-01-05 09:00:00"), [1])
+        self.assertIsNone(heap.peek())
+
+
+class ReminderSchedulerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DB(os.path.join(self.tmpdir.name, "company.db"))
+        self.usersdb = UsersDB(self.tmpdir.name)
+        self.service = NotesRemindersService(self.db, self.usersdb)
+        self.scheduler = ReminderScheduler(_App(), self.service, max_sleep_seconds=86400)
+
+    def tearDown(self) -> None:
+        self.scheduler.stop()
+        if self.scheduler._thread:
+            self.scheduler._thread.join(2)
+        self.db.close()
+        self.usersdb.close()
+        self.tmpdir.cleanup()
+
+    def _create(self, title: str, due: datetime) -> int:
+        return self.service.create_reminder(1, 1, title, "", _fmt(due), "normal")
+
+    def _next_notify(self, timeout: float = 4.0) -> dict:
+        deadline = time.monotonic() + timeout
+        while True:
+            msg = self.scheduler._queue.get(timeout=max(0.01, deadline - time.monotonic()))
+            if msg["type"] == "notify":
+                return msg["payload"]
+
+    def test_tick_loads_once_fires_batch_and_sleeps_until_next(self) -> None:
+        now = datetime.now()
+        past = [self._create(f"Geçmiş {i}", now - timedelta(minutes=i + 1)) for i in range(3)]
+        self._create("Gelecek", now + timedelta(hours=1))
+
+        timeout = self.scheduler._tick()
+        self.assertAlmostEqual(timeout, 3600, delta=5)
+        notified = [int(m["payload"]["id"]) for m in list(self.scheduler._queue.queue) if m["type"] == "notify"]
+        self.assertEqual(sorted(notified), sorted(past))
+        self.assertEqual(self.service.overdue_count(1, 1), 3)
+
+        # Tetiklenenler yığından çıktı; ikinci tur yeniden bildirmez
+        self.scheduler._queue.queue.clear()
+        self.scheduler._tick()
+        self.assertFalse([m for m in self.scheduler._queue.queue if m["type"] == "notify"])
+
+    def test_service_changes_update_heap(self) -> None:
+        rid = self._create("Ertelenecek", datetime.now() + timedelta(hours=2))
+        self.scheduler._tick()
+        self.assertAlmostEqual(self.scheduler._tick(), 7200, delta=5)
+
+        self.service.snooze_reminder(rid, -150, 1, 1)  # 30 dk öncesine çekildi
+        self.scheduler._tick()
+        self.assertEqual(self.db.notes_reminders.get_reminder(rid)["status"], "overdue")
+
+        other = self._create("İptal", datetime.now() + timedelta(minutes=10))
+        self.scheduler._tick()
+        self.service.cancel_reminder(other, 1, 1)
+        self.assertEqual(self.scheduler._tick(), self.scheduler.max_sleep_seconds)
+
+    def test_thread_fires_within_a_second_of_due(self) -> None:
+        self.scheduler.start()
+        due = datetime.now().replace(microsecond=0) + timedelta(seconds=2)
+        rid = self._create("Yakında", due)
+        payload = self._next_notify()
+        lag = datetime.now() - due
+        self.assertEqual(int(payload["id"]), rid)
+        self.assertLess(lag, timedelta(seconds=1))
+        with self.assertRaises(queue.Empty):
+            self._next_notify(timeout=0.3)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+
+from kasapro.db.main_db import DB
+from kasapro.ui.widgets import ListGridSource, PagedGridSource
+
+
+class KeysetPagingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DB(os.path.join(self.tmpdir.name, "paging.db"))
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def test_kasa_pages_match_full_list(self) -> None:
+        for i in range(53):
+            # Aynı tarihte birden fazla satır: imleç id ile ayrışmalı
+            self.db.kasa_add(f"2024-01-{(i % 7) + 1:02d}", "Gelir" if i % 2 else "Gider", 10 + i, "TL", "Nakit", "Genel", None, f"satir {i}", "", "")
+
+        full = [int(r["id"]) for r in self.db.kasa_list()]
+        paged = []
+        after = None
+        while True:
+            page = self.db.kasa_list_page(after=after, limit=10)
+            if not page:
+                break
+            paged += [int(r["id"]) for r in page]
+            after = (page[-1]["tarih"], int(page[-1]["id"]))
+        self.assertEqual(paged, full)
+
+        chunks = list(self.db.kasa_iter(chunk_size=20, tip="Gelir"))
+        self.assertEqual([len(c) for c in chunks], [20, 6])
+        self.assertEqual([int(r["id"]) for c in chunks for r in c], [int(r["id"]) for r in self.db.kasa_list(tip="Gelir")])
+
+        tot = self.db.kasa_list_totals(tip="Gelir")
+        self.assertEqual(tot["adet"], 26)
+
+    def test_cari_hareket_and_banka_pages(self) -> None:
+        cid = self.db.cari_upsert("Sayfa Cari")
+        for i in range(12):
+            self.db.cari_hareket_add("2024-03-01", cid, "Borç", 1.0, "TL", "", "", "", "")
+            self.db.banka_add("2024-03-01", "B", "H", "Giriş", 1.0, "TL", "", "", "", "")
+
+        first = self.db.cari_hareket_list_page(limit=5, cari_id=cid)
+        second = self.db.cari_hareket_list_page(after=(first[-1]["tarih"], int(first[-1]["id"])), limit=5, cari_id=cid)
+        self.assertEqual(len(first), 5)
+        self.assertTrue(int(second[0]["id"]) < int(first[-1]["id"]))
+
+        self.assertEqual(sum(len(c) for c in self.db.banka_iter(chunk_size=5)), 12)
+
+
+    def test_paged_grid_source_loads_lazily(self) -> None:
+        for i in range(30):
+            self.db.kasa_add(f"2024-02-{(i % 5) + 1:02d}", "Gelir", float(i), "TL", "Nakit", "Genel", None, f"kalem {i}", "", "")
+
+        calls = []
+
+        def fetch(after, limit):
+            calls.append(after)
+            return self.db.kasa_list_page(after=after, limit=limit)
+
+        src = PagedGridSource(fetch, total=30, page_size=8)
+        self.assertEqual(len(src), 30)
+        self.assertEqual(calls, [])
+        self.assertEqual(len(src.rows(0, 10)), 10)
+        self.assertEqual(len(calls), 2)
+
+        # Sıralama modelde yapılır; kalan sayfalar okunur
+        src.sort("tutar", descending=True)
+        self.assertEqual([r["tutar"] for r in src.rows(0, 3)], [29.0, 28.0, 27.0])
+        src.set_filter("KALEM 1")
+        self.assertEqual(len(src), 11)
+        top = src.rows(0, 1)[0]
+        self.assertEqual(src.index_of(top["id"]), 0)
+
+    def test_list_grid_source_sort_filter(self) -> None:
+        rows = [{"id": i, "ad": ad, "tutar": t} for i, (ad, t) in enumerate([("Şeker", 5), ("ışık", None), ("Çay", 12.5)], 1)]
+        src = ListGridSource(rows)
+        src.sort("tutar")
+        self.assertEqual([r["id"] for r in src.rows(0, 10)], [1, 3, 2])
+        src.set_filter("seker")
+        self.assertEqual([r["id"] for r in src.rows(0, 10)], [1])
+        self.assertEqual(src.index_of(3), -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+
+from kasapro.db.main_db import DB
+from kasapro.db.repos.satis_rapor_repo import _month_split
+
+
+class SatisRaporCubeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DB(os.path.join(self.tmpdir.name, "rapor.db"))
+        self.cari = self.db.cari_upsert("Müşteri")
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def _fatura(self, no: str, tarih: str, toplam: float, kalemler, tur: str = "Satış", temsilci: str = "Ali") -> int:
+        header = {
+            "tarih": tarih, "tur": tur, "durum": "Kesildi", "fatura_no": no, "sube": "Merkez",
+            "satis_temsilcisi": temsilci, "cari_id": self.cari, "genel_toplam": toplam,
+        }
+        lines = [{"urun": u, "kategori": k, "miktar": m, "toplam": t, "maliyet": c} for u, k, m, t, c in kalemler]
+        return self.db.fatura_create(header, lines)
+
+    def _cube_days(self) -> int:
+        return int(self.db.conn.execute("SELECT COUNT(DISTINCT tarih) FROM satis_kup_fatura").fetchone()[0])
+
+    def test_reports_follow_invoice_changes(self) -> None:
+        f1 = self._fatura("F1", "2024-01-10", 100, [("Elma", "Meyve", 2, 100, 30)])
+        self._fatura("F2", "2024-01-10", 50, [("Armut", "", 1, 50, 20)], temsilci="")
+        self._fatura("F3", "2024-02-03", 40, [("Elma", "Meyve", 1, 40, 30)], tur="İade")
+        self.db.fatura_odeme_add(fid=f1, tarih="2024-01-12", tutar=60, para="TL", odeme="Nakit")
+
+        daily = self.db.satis_rapor_gunluk({}, 10, 0)
+        self.assertEqual(daily["total"], 2)
+        jan = daily["rows"][1]
+        self.assertEqual((jan["tarih"], jan["ciro"], jan["satis_adet"]), ("2024-01-10", 150.0, 2))
+
+        kpi = self.db.satis_rapor_kpi({})
+        self.assertAlmostEqual(kpi["net_ciro"], 110.0)
+        self.assertEqual(kpi["top_products"][0]["urun"], "Elma")
+        self.assertAlmostEqual(kpi["top_products"][0]["ciro"], 60.0)
+
+        musteri = self.db.satis_rapor_musteri({}, 10, 0)["rows"][0]
+        self.assertAlmostEqual(musteri["tahsilat"], 60.0)
+        self.assertAlmostEqual(musteri["bakiye"], 50.0)
+
+        temsilci = {r["temsilci"]: r["satis"] for r in self.db.satis_rapor_temsilci({}, 10, 0)["rows"]}
+        self.assertEqual(temsilci, {"Ali": 100.0, "(Belirsiz)": 50.0})
+
+        urun = self.db.satis_rapor_urun({"date_from": "2024-01-05", "date_to": "2024-02-29"}, 10, 0)
+        self.assertEqual({(r["urun"], r["kategori"]): r["kar"] for r in urun["rows"]},
+                         {("Elma", "Meyve"): 30.0, ("Armut", "(Bilinmeyen)"): 30.0})
+
+        # Silme / güncelleme yalnızca etkilenen günleri işaretler ve okumada yansır
+        self.db.fatura_delete(f1)
+        self.db.conn.execute("UPDATE fatura SET tarih='2024-03-01' WHERE fatura_no='F2'")
+        self.db.conn.commit()
+        pending = {r[0] for r in self.db.conn.execute("SELECT tarih FROM satis_kup_bekleyen")}
+        self.assertEqual(pending, {"2024-01-10", "2024-03-01"})
+        daily = self.db.satis_rapor_gunluk({}, 10, 0)
+        self.assertEqual([r["tarih"] for r in daily["rows"]], ["2024-03-01", "2024-02-03"])
+        self.assertEqual(self._cube_days(), 2)
+
+    def test_product_filter_keeps_invoice_level_semantics(self) -> None:
+        self._fatura("F1", "2024-01-10", 150, [("Elma", "Meyve", 1, 100, 0), ("Armut", "Meyve", 1, 50, 0)])
+        self._fatura("F2", "2024-01-11", 70, [("Armut", "Meyve", 1, 70, 0)])
+        # Ürün filtresi faturayı seçer; günlük ciro fatura toplamıdır
+        daily = self.db.satis_rapor_gunluk({"urun": "Elma"}, 10, 0)
+        self.assertEqual([(r["tarih"], r["ciro"]) for r in daily["rows"]], [("2024-01-10", 150.0)])
+        self.assertEqual(self.db.satis_rapor_urun({"urun": "Elma"}, 10, 0)["total"], 2)
+
+    def test_data_warnings_use_daily_counts(self) -> None:
+        fid = self._fatura("F1", "2024-01-10", 100, [("Elma", "", 1, 90, 0)])
+        self.db.fatura_odeme_add(fid=fid, tarih="2024-01-10", tutar=150, para="TL", odeme="Nakit")
+        warnings = self.db.satis_rapor_warnings()
+        self.assertIn("Toplamı aşan tahsilat/ödeme: 1 fatura.", warnings)
+        self.assertIn("Kalem toplamı ile genel toplam uyuşmayan: 1 fatura.", warnings)
+        self.db.conn.execute("UPDATE fatura SET durum='İptal' WHERE id=?", (fid,))
+        self.db.conn.commit()
+        self.assertFalse([w for w in self.db.satis_rapor_warnings() if "fatura." in w])
+
+    def test_month_split(self) -> None:
+        self.assertEqual(_month_split("", ""), (("0000-01", "9999-12"), []))
+        self.assertEqual(
+            _month_split("2023-01-15", "2023-03-10"),
+            (("2023-02", "2023-02"), [("2023-01-15", "2023-01-31"), ("2023-03-01", "2023-03-10")]),
+        )
+        self.assertEqual(_month_split("2024-02-01", "2024-02-29"), (("2024-02", "2024-02"), []))
+        self.assertEqual(_month_split("2023-01-15", "2023-01-20"), (None, [("2023-01-15", "2023-01-20")]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from kasapro.db import schema
+from kasapro.db.main_db import DB
+from kasapro.db.schema import SCHEMA_FINGERPRINT, read_schema_state, schema_version
+
+
+class SchemaLedgerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "ledger.db")
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_fresh_db_runs_full_pass_then_fast_path(self) -> None:
+        db = DB(self.db_path)
+        try:
+            self.assertEqual(db.schema_state, "repaired")
+            self.assertEqual(read_schema_state(db.conn), (schema_version(), SCHEMA_FINGERPRINT))
+        finally:
+            db.close()
+
+        db = DB(self.db_path)
+        try:
+            self.assertEqual(db.schema_state, "current")
+            # Fast path tabloları kullanılabilir bırakmalı
+            cid = db.cari_upsert("Ledger Cari")
+            self.assertIsNotNone(db.cari_get(cid))
+        finally:
+            db.close()
+
+    def test_fingerprint_change_triggers_repair(self) -> None:
+        db = DB(self.db_path)
+        try:
+            db.conn.execute("UPDATE schema_migrations SET fingerprint='stale'")
+            db.conn.commit()
+        finally:
+            db.close()
+
+        db = DB(self.db_path)
+        try:
+            self.assertEqual(db.schema_state, "repaired")
+            self.assertEqual(read_schema_state(db.conn)[1], SCHEMA_FINGERPRINT)
+        finally:
+            db.close()
+
+    def test_forced_repair(self) -> None:
+        db = DB(self.db_path)
+        try:
+            db.conn.execute("DROP INDEX IF EXISTS idx_kasa_hareket_tarih")
+            db.conn.commit()
+            self.assertEqual(db.repair_schema(), "repaired")
+            row = db.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='index' AND name='idx_kasa_hareket_tarih'"
+            ).fetchone()
+            self.assertIsNotNone(row)
+        finally:
+            db.close()
+
+    def test_newer_db_is_left_alone(self) -> None:
+        db = DB(self.db_path)
+        try:
+            db.conn.execute(f"PRAGMA user_version = {schema_version() + 3}")
+            db.conn.execute("UPDATE schema_migrations SET fingerprint='newer-app'")
+            db.conn.commit()
+        finally:
+            db.close()
+
+        db = DB(self.db_path)
+        try:
+            self.assertEqual(db.schema_state, "current")
+            self.assertEqual(read_schema_state(db.conn), (schema_version() + 3, "newer-app"))
+        finally:
+            db.close()
+
+    def test_fingerprint_without_source_uses_bytecode(self) -> None:
+        with mock.patch.object(schema.inspect, "getsource", side_effect=OSError):
+            first = schema._schema_fingerprint()
+            second = schema._schema_fingerprint()
+        self.assertTrue(first.startswith("code:"))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, SCHEMA_FINGERPRINT)
+
+    def test_missing_fingerprint_forces_full_pass(self) -> None:
+        with mock.patch.object(schema, "SCHEMA_FINGERPRINT", ""):
+            for _ in range(2):
+                db = DB(self.db_path)
+                try:
+                    self.assertEqual(db.schema_state, "repaired")
+                finally:
+                    db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
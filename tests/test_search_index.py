@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+
+from kasapro.db.main_db import DB
+
+
+class SearchIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DB(os.path.join(self.tmpdir.name, "search.db"))
+        if not self.db.search.has_index():
+            self.skipTest("SQLite FTS5 desteği yok")
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def test_turkish_normalized_prefix_search(self) -> None:
+        cid = self.db.cari_upsert("Işıklar Gıda Ltd", telefon="555")
+        self.db.cari_hareket_add("2024-01-02", cid, "Borç", 100.0, "TL", "Şubat faturası", "", "F-1", "")
+        self.db.kasa_add("2024-01-03", "Gider", 50.0, "TL", "Nakit", "Kırtasiye", None, "kağıt alımı", "", "")
+
+        res = self.db.global_search("isik")
+        self.assertEqual([int(r["id"]) for r in res["cariler"]], [cid])
+        # Cari adıyla eşleşen hareketler de gelir
+        self.assertEqual(len(res["cari_hareket"]), 1)
+
+        res = self.db.global_search("KIRTAS")
+        self.assertEqual(len(res["kasa"]), 1)
+        self.assertEqual(res["kasa"][0]["kategori"], "Kırtasiye")
+
+    def test_triggers_follow_update_and_delete(self) -> None:
+        bid = self.db.banka_add("2024-02-01", "Ziraat", "TR1", "Giriş", 10.0, "TL", "EFT Öztürk", "", "", "")
+        self.assertEqual(len(self.db.global_search("ozturk")["banka"]), 1)
+
+        self.db.banka_update(bid, "2024-02-01", "Ziraat", "TR1", "Giriş", 10.0, "TL", "Havale Çelik", "", "", "")
+        self.assertEqual(self.db.global_search("ozturk")["banka"], [])
+        self.assertEqual(len(self.db.global_search("celik")["banka"]), 1)
+
+        self.db.banka_delete(bid)
+        self.assertEqual(self.db.global_search("celik")["banka"], [])
+
+    def test_rebuild_index(self) -> None:
+        self.db.cari_upsert("Yeniden Cari")
+        self.db.conn.execute("DELETE FROM search_fts")
+        self.db.conn.commit()
+        self.assertEqual(self.db.global_search("yeniden")["cariler"], [])
+        self.assertGreaterEqual(self.db.search_rebuild_index(), 1)
+        self.assertEqual(len(self.db.global_search("yeniden")["cariler"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import unittest
+
+from kasapro.db.main_db import DB
+from kasapro.db.repos.sequence_repo import SequenceRepo, reserve_doc_no
+
+
+class SequenceTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DB(os.path.join(self.tmpdir.name, "seq.db"))
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def test_belge_counter_seeds_once_from_legacy_setting(self) -> None:
+        self.db.set_setting("belge_seq_global", "41")
+        self.assertEqual(self.db.next_belge_no("K"), "K-000042")
+        self.assertEqual(self.db.reserve_belge_nos("B", 3), ["B-000043", "B-000044", "B-000045"])
+        # Ayar artık yalnızca ilk değer; sayaç sequences tablosunda ilerler
+        self.db.set_setting("belge_seq_global", "5")
+        self.assertEqual(self.db.next_belge_no("C"), "C-000046")
+        self.assertEqual(self.db.reserve_belge_nos("C", 0), [])
+
+    def test_fatura_no_continues_legacy_counter_and_follows_series_edit(self) -> None:
+        self.db.conn.execute(
+            "INSERT INTO fatura_seri(seri,yil,prefix,last_no,padding,format,aktif) VALUES('A',2024,'FTR',7,4,'{yil}{seri}{no_pad}',1)"
+        )
+        self.db.conn.commit()
+        self.assertEqual(self.db.fatura_next_no("A", 2024), "2024A0008")
+        self.assertEqual(self.db.fatura_next_no("A", 2024), "2024A0009")
+        row = self.db.conn.execute("SELECT last_no FROM fatura_seri WHERE seri='A' AND yil=2024").fetchone()
+        self.assertEqual(int(row["last_no"]), 9)
+
+        self.db.fatura_seri_upsert(seri="A", yil=2024, prefix="FTR", last_no=100, padding=4, fmt="{yil}{seri}{no_pad}", aktif=1)
+        self.assertEqual(self.db.fatura_next_no("A", 2024), "2024A0101")
+        self.assertEqual(self.db.fatura_next_no("B", 2024), "2024B000001")
+
+    def test_doc_no_uses_series_format_and_rolls_back_with_document(self) -> None:
+        cur = self.db.conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        self.assertEqual(reserve_doc_no(cur, 1, "INV", 2024), "INV-2024-000001")
+        cur.execute("ROLLBACK")
+        cur.execute("BEGIN IMMEDIATE")
+        self.assertEqual(reserve_doc_no(cur, 1, "INV", 2024), "INV-2024-000001")
+        self.assertEqual(reserve_doc_no(cur, 2, "INV", 2024), "INV-2024-000001")
+        cur.execute("COMMIT")
+
+    def test_concurrent_threads_get_unique_numbers(self) -> None:
+        seqs = [self.db.sequences, SequenceRepo(self.db.conn, block_size=16)]
+        got: list = []
+        lock = threading.Lock()
+
+        def worker(repo: SequenceRepo) -> None:
+            nums = [repo.next("t") for _ in range(50)]
+            with lock:
+                got.extend(nums)
+
+        threads = [threading.Thread(target=worker, args=(seqs[i % 2],)) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(got), 300)
+        self.assertEqual(len(set(got)), 300)
+
+    def test_block_cache_is_dropped_after_set(self) -> None:
+        repo = SequenceRepo(self.db.conn, block_size=10)
+        self.assertEqual([repo.next("blk") for _ in range(3)], [1, 2, 3])
+        self.assertEqual(repo.current("blk"), 10)
+        repo.set("blk", 500)
+        self.assertEqual(repo.next("blk"), 501)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from kasapro.ui import frames
+from kasapro.ui.navigation import LazyFactory, ScreenRegistry
+from kasapro.ui.plugins import loader
+
+PLUGIN_SRC = '''
+PLUGIN_META = {{"key": "{key}", "nav_text": "{key} menü", "page_title": "{key} başlık", "order": {order}}}
+
+
+def build(master, app):
+    return "{key}-frame"
+'''
+
+
+class _Container:
+    """Tk'siz test için after/after_idle'ı hemen çalıştırır."""
+
+    def after(self, _ms, fn):
+        fn()
+        return "job"
+
+    def after_idle(self, fn):
+        fn()
+
+    def after_cancel(self, _job):
+        pass
+
+
+class _Frame:
+    def __init__(self, master, app):
+        self.packed = False
+
+    def pack(self, **_kw):
+        self.packed = True
+
+    def pack_forget(self):
+        self.packed = False
+
+
+class PluginManifestTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pkg = "kp_manifest_test_pkg"
+        self.pkg_dir = os.path.join(self.tmpdir.name, self.pkg)
+        os.makedirs(self.pkg_dir)
+        open(os.path.join(self.pkg_dir, "__init__.py"), "w").close()
+        self._write("beta", 20)
+        self._write("alfa", 10)
+        with open(os.path.join(self.pkg_dir, "yardimci.py"), "w", encoding="utf-8") as f:
+            f.write("X = 1\n")
+        self.manifest = os.path.join(self.tmpdir.name, "ui_manifest.json")
+        sys.path.insert(0, self.tmpdir.name)
+
+    def tearDown(self) -> None:
+        sys.path.remove(self.tmpdir.name)
+        for name in [m for m in sys.modules if m.startswith(self.pkg)]:
+            del sys.modules[name]
+        self.tmpdir.cleanup()
+
+    def _write(self, key: str, order: int, mtime_ns: int = 0) -> None:
+        path = os.path.join(self.pkg_dir, f"{key}.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(PLUGIN_SRC.format(key=key, order=order))
+        if mtime_ns:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def _discover(self):
+        return loader.discover_ui_plugins(self.manifest, self.pkg_dir, self.pkg)
+
+    def test_discovery_reads_manifest_without_importing(self) -> None:
+        plugins = self._discover()
+        self.assertEqual([(p.key, p.order, p.module) for p in plugins],
+                         [("alfa", 10, f"{self.pkg}.alfa"), ("beta", 20, f"{self.pkg}.beta")])
+        self.assertNotIn(f"{self.pkg}.alfa", sys.modules)
+
+        entries = loader.read_manifest(self.manifest)["plugins"]
+        self.assertEqual(entries[f"{self.pkg}.beta"]["meta"]["page_title"], "beta başlık")
+        self.assertIsNone(entries[f"{self.pkg}.yardimci"]["meta"])
+
+        # Frame ilk build çağrısında import edilir
+        self.assertEqual(plugins[0].build("master", None), "alfa-frame")
+        self.assertIn(f"{self.pkg}.alfa", sys.modules)
+
+    def test_only_changed_files_are_reparsed(self) -> None:
+        self._discover()
+        with mock.patch.object(loader, "_read_plugin_meta", wraps=loader._read_plugin_meta) as read:
+            self._discover()
+            self.assertEqual(read.call_count, 0)
+            self._write("beta", 5, mtime_ns=10**18)
+            os.remove(os.path.join(self.pkg_dir, "alfa.py"))
+            plugins = self._discover()
+            self.assertEqual(read.call_count, 1)
+        self.assertEqual([(p.key, p.order) for p in plugins], [("beta", 5)])
+        self.assertNotIn(f"{self.pkg}.alfa", loader.read_manifest(self.manifest)["plugins"])
+
+    def test_update_manifest_keeps_other_sections(self) -> None:
+        self._discover()
+        loader.update_manifest(self.manifest, usage={"kasa": 3})
+        data = loader.read_manifest(self.manifest)
+        self.assertEqual(data["usage"], {"kasa": 3})
+        self.assertIn("plugins", data)
+        self.assertEqual(loader.read_manifest(os.path.join(self.tmpdir.name, "yok.json")), {})
+
+
+class LazyScreenTests(unittest.TestCase):
+    def test_frames_package_resolves_lazily(self) -> None:
+        self.assertEqual(frames.frame_module("KasaFrame"), "kasapro.ui.frames.kasa")
+        with self.assertRaises(AttributeError):
+            getattr(frames, "YokFrame")
+
+    def test_registry_creates_on_show_and_prefetches_by_usage(self) -> None:
+        registry = ScreenRegistry(_Container(), controller=None)
+        created = []
+        registry.on_created = lambda key, frame: created.append(key)
+        loads = []
+        for key in ("a", "b", "c"):
+            factory = mock.Mock(side_effect=_Frame)
+            factory.load = mock.Mock(side_effect=lambda k=key: loads.append(k))
+            registry.register(key, factory, create=False)
+        self.assertEqual(registry.frames, {})
+
+        registry.show("b")
+        self.assertEqual(created, ["b"])
+        self.assertTrue(registry.frames["b"].packed)
+
+        registry.usage.update({"c": 5})
+        self.assertEqual(registry.most_used(2, default=("a", "zz")), ["c", "a"])
+        registry.prefetch(registry.most_used(2, default=("a",)))
+        self.assertEqual(loads, ["c", "a"])
+        self.assertNotIn("c", registry.frames)
+
+        registry.prefetch(["c"], build=True)
+        self.assertIn("c", registry.frames)
+        self.assertFalse(registry.frames["c"].packed)
+
+    def test_lazy_factory_imports_on_call(self) -> None:
+        factory = LazyFactory("kasapro.ui.plugins.loader", "UIPlugin")
+        self.assertIs(factory.load(), loader.UIPlugin)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -394,3 +394,103 @@ class WmsStockTests(unittest.TestCase):
         rows = self.db.wms_list_ledger_masked_cost(self.viewer_id, self.company_id, self.branch_id, self.wh1)
         self.assertTrue(rows)
         self.assertIsNone(rows[0]["cost"])
+
+    def _draft(self, doc_type: str, lines, doc_date: str = "2024-03-01") -> int:
+        return self.db.wms_create_doc(
+            {
+                "company_id": self.company_id,
+                "branch_id": self.branch_id,
+                "doc_type": doc_type,
+                "doc_date": doc_date,
+                "warehouse_id": self.wh1,
+            },
+            lines,
+        )
+
+    def test_post_docs_batch_aggregates_balances(self) -> None:
+        grn1 = self._draft("GRN", [{"item_id": self.item_id, "qty": 3, "unit_price": 5, "target_location_id": self.loc1}] * 4)
+        grn2 = self._draft("GRN", [{"item_id": self.item_id, "qty": 2, "unit_price": 6, "target_location_id": self.loc1}])
+        # Aynı partide önceki fişin girişini kullanan çıkış
+        ship = self._draft("SHIP", [{"item_id": self.item_id, "qty": 13, "source_location_id": self.loc1}])
+
+        posted = self.db.wms_post_docs([grn1, grn2, ship, grn1])
+        self.assertEqual(posted, [grn1, grn2, ship])
+        self.assertEqual(self.db.wms_get_on_hand(self.company_id, self.branch_id, self.wh1, self.loc1, self.item_id), 1)
+        n_ledger = self.db.conn.execute("SELECT COUNT(*) FROM stock_ledger WHERE item_id=?", (self.item_id,)).fetchone()[0]
+        self.assertEqual(n_ledger, 6)
+        n_balance = self.db.conn.execute("SELECT COUNT(*) FROM stock_balance WHERE item_id=?", (self.item_id,)).fetchone()[0]
+        self.assertEqual(n_balance, 1)
+        # Zaten işlenmiş fişler atlanır
+        self.assertEqual(self.db.wms_post_docs([grn1, ship]), [])
+
+    def test_post_docs_batch_is_all_or_nothing(self) -> None:
+        grn = self._draft("GRN", [{"item_id": self.item_id, "qty": 2, "target_location_id": self.loc1}])
+        ship = self._draft("SHIP", [{"item_id": self.item_id, "qty": 5, "source_location_id": self.loc1}])
+        with self.assertRaises(ValueError):
+            self.db.wms_post_docs([grn, ship])
+        statuses = [r[0] for r in self.db.conn.execute("SELECT status FROM docs WHERE id IN (?,?)", (grn, ship))]
+        self.assertNotIn("POSTED", statuses)
+        self.assertEqual(self.db.wms_get_on_hand(self.company_id, self.branch_id, self.wh1, self.loc1, self.item_id), 0)
+
+    def test_cost_layers_consumed_and_reversed(self) -> None:
+        self._post_grn(self.item_id, 5, self.loc1)  # 5 @ 10
+        grn2 = self._draft("GRN", [{"item_id": self.item_id, "qty": 5, "unit_price": 12, "target_location_id": self.loc1}])
+        self.db.wms_post_doc(grn2)
+        ship = self._draft("SHIP", [{"item_id": self.item_id, "qty": 7, "source_location_id": self.loc1}])
+        self.db.wms_post_doc(ship)
+
+        layers = self.db.wms_cost_layers(self.company_id, warehouse_id=self.wh1, item_id=self.item_id)
+        self.assertEqual([(r["qty_remaining"], r["unit_cost"]) for r in layers], [(3, 12)])
+        self.assertEqual(self.db.wms_fifo_cost(self.company_id, self.branch_id, self.wh1, self.item_id, 2), 24)
+        val = self.db.wms_stock_valuation(self.company_id, warehouse_id=self.wh1)
+        self.assertAlmostEqual(val[0]["value"], 36)
+
+        # Void çıkışı katmanlara iade eder
+        self.db.wms_void_doc(ship)
+        layers = self.db.wms_cost_layers(self.company_id, warehouse_id=self.wh1, item_id=self.item_id)
+        self.assertEqual([r["qty_remaining"] for r in layers], [5, 5])
+        n = self.db.conn.execute("SELECT COUNT(*) FROM cost_layer_consumption").fetchone()[0]
+        self.assertEqual(n, 0)
+
+        # Void girişi kendi katmanını kapatır
+        self.db.wms_void_doc(grn2)
+        self.assertAlmostEqual(self.db.wms_wa_cost(self.company_id, self.branch_id, self.wh1, self.item_id), 10)
+
+    def test_void_does_not_revive_voided_layer(self) -> None:
+        self._post_grn(self.item_id, 5, self.loc1)  # 5 @ 10
+        grn2 = self._draft("GRN", [{"item_id": self.item_id, "qty": 5, "unit_price": 12, "target_location_id": self.loc1}])
+        self.db.wms_post_doc(grn2)
+        ship = self._draft("SHIP", [{"item_id": self.item_id, "qty": 7, "source_location_id": self.loc1}])
+        self.db.wms_post_doc(ship)
+
+        # Önce giriş iptal edilir (katmanı kapanır), sonra onu tüketen çıkış
+        self.db.wms_void_doc(grn2)
+        self.db.wms_void_doc(ship)
+        row = self.db.conn.execute("SELECT qty_remaining, is_void FROM cost_layers WHERE doc_id=?", (grn2,)).fetchone()
+        self.assertEqual((row["qty_remaining"], row["is_void"]), (0, 1))
+        self.assertEqual(self.db.wms_fifo_cost(self.company_id, self.branch_id, self.wh1, self.item_id, 7), 50)
+        self.assertAlmostEqual(self.db.wms_wa_cost(self.company_id, self.branch_id, self.wh1, self.item_id), 10)
+
+    def test_transfer_carries_layer_cost_and_rebuild_matches(self) -> None:
+        self._post_grn(self.item_id, 4, self.loc1)  # 4 @ 10
+        trf = self.db.wms_create_doc(
+            {"company_id": self.company_id, "branch_id": self.branch_id, "doc_type": "TRF", "doc_date": "2024-01-05", "warehouse_id": self.wh1},
+            [
+                {
+                    "item_id": self.item_id,
+                    "qty": 3,
+                    "source_warehouse_id": self.wh1,
+                    "target_warehouse_id": self.wh2,
+                    "source_location_id": self.loc1,
+                    "target_location_id": self.loc2,
+                }
+            ],
+        )
+        self.db.wms_post_doc(trf)
+        tgt = self.db.wms_cost_layers(self.company_id, warehouse_id=self.wh2, item_id=self.item_id)
+        self.assertEqual([(r["qty_remaining"], r["unit_cost"]) for r in tgt], [(3, 10)])
+
+        before = [(r["warehouse_id"], r["qty_remaining"], r["unit_cost"]) for r in self.db.wms_cost_layers(self.company_id)]
+        self.db.wms_rebuild_cost_layers()
+        after = [(r["warehouse_id"], r["qty_remaining"], r["unit_cost"]) for r in self.db.wms_cost_layers(self.company_id)]
+        self.assertEqual(before, after)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""Şirket değiştirme süresi: havuzsuz (kapat + DB + Services.build) vs CompanyPool.
+
+Kullanım: python tools/bench_company_switch.py [şirket_sayısı] [geçiş_sayısı]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kasapro.db.main_db import DB  # noqa: E402
+from kasapro.db.users_db import UsersDB  # noqa: E402
+from kasapro.services import CompanyPool, Services  # noqa: E402
+
+
+def _stats(samples: List[float]) -> Dict[str, float]:
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "mean_ms": round(statistics.mean(ms), 3),
+        "p50_ms": round(ms[len(ms) // 2], 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def main() -> None:
+    companies = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    switches = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as tmp:
+        usersdb = UsersDB(tmp)
+        try:
+            uid = int(usersdb.list_users()[0]["id"])
+            for i in range(1, companies):
+                usersdb.add_company(uid, f"Şirket {i + 1}")
+            paths = [usersdb.get_company_db_path(c) for c in usersdb.list_companies(uid)]
+
+            def open_company(path: str):
+                db = DB(path)
+                return db, Services.build(db, usersdb, context_provider=lambda: None)
+
+            # Havuzsuz: eski switch_company yolu
+            db, _services = open_company(paths[0])
+            cold: List[float] = []
+            for n in range(switches):
+                t0 = time.perf_counter()
+                db.close()
+                db, _services = open_company(paths[(n + 1) % len(paths)])
+                db.get_setting("backup_keep")
+                cold.append(time.perf_counter() - t0)
+            db.close()
+
+            # Havuzlu: ön yükleme sonrası gidip gelme
+            pool = CompanyPool(open_company, capacity=len(paths))
+            t0 = time.perf_counter()
+            pool.acquire(paths[0])
+            pool.prewarm(paths[1:], background=False)
+            warm_up = time.perf_counter() - t0
+            pooled: List[float] = []
+            for n in range(switches):
+                t0 = time.perf_counter()
+                handle = pool.acquire(paths[(n + 1) % len(paths)])
+                handle.db.get_setting("backup_keep")
+                pooled.append(time.perf_counter() - t0)
+            pool.close()
+        finally:
+            usersdb.close()
+
+    print(
+        json.dumps(
+            {
+                "companies": len(paths),
+                "switches": switches,
+                "without_pool": _stats(cold),
+                "with_pool": _stats(pooled),
+                "prewarm_s": round(warm_up, 4),
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
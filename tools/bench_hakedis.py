@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""Hakediş hesaplama süresi: küme tabanlı motor vs eski poz başına döngü.
+
+Kullanım: python tools/bench_hakedis.py [poz_sayısı] [poz_başına_metraj]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kasapro.db.main_db import DB  # noqa: E402
+from kasapro.modules.hakedis.repo import HakedisRepo  # noqa: E402
+
+
+def _seed(repo: HakedisRepo, positions: int, per_position: int):
+    company_id = 1
+    project_id = repo.project_create(company_id, "Bench Proje", "PRJ-B")
+    contract_id = repo.contract_create(company_id, project_id, None, "CNT-B", "birim_fiyat", retention_rate=0.05)
+    conn = repo.conn
+    now = repo._now()
+    rnd = random.Random(11)
+    conn.executemany(
+        """
+        INSERT INTO boq_items(company_id, project_id, contract_id, poz_code, name, unit, qty_contract, unit_price,
+                              status, created_at, updated_at)
+        VALUES (?,?,?,?,?,?,?,?,?,?,?)
+        """,
+        [
+            (company_id, project_id, contract_id, f"PZ-{i:05d}", f"Kalem {i}", "m3", 100.0,
+             round(rnd.uniform(1, 500), 2), "active", now, now)
+            for i in range(positions)
+        ],
+    )
+    periods = [
+        repo.period_create(company_id, project_id, contract_id, m, f"2024-{m:02d}-01", f"2024-{m:02d}-28")
+        for m in range(1, 4)
+    ]
+    boq_ids = [r[0] for r in conn.execute("SELECT id FROM boq_items WHERE contract_id=?", (contract_id,))]
+    conn.executemany(
+        """
+        INSERT INTO measurements(company_id, project_id, contract_id, period_id, boq_item_id, qty, tarih,
+                                 status, created_at)
+        VALUES (?,?,?,?,?,?,?,?,?)
+        """,
+        [
+            (company_id, project_id, contract_id, periods[k % 3], b, round(rnd.uniform(0, 10), 3),
+             f"2024-{k % 3 + 1:02d}-{rnd.randint(1, 28):02d}", "active", now)
+            for b in boq_ids
+            for k in range(per_position)
+        ],
+    )
+    conn.commit()
+    return company_id, contract_id, periods[-1]
+
+
+def _legacy_lines(repo: HakedisRepo, company_id: int, contract_id: int, period_id: int) -> float:
+    """Eski yol: her poz için iki ayrı SUM sorgusu (yalnızca okuma); dönem toplamını döndürür."""
+    period = repo.period_get(company_id, period_id)
+    start, end = str(period["start_date"]), str(period["end_date"])
+    current_total = 0.0
+    for row in repo.boq_list(company_id, contract_id):
+        price = float(row["unit_price"] or 0)
+        repo._sum_measurement_qty(company_id, int(row["id"]), None, start)
+        current_total += repo._sum_measurement_qty(company_id, int(row["id"]), start, end) * price
+    return current_total
+
+
+def main() -> None:
+    positions = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    per_position = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DB(os.path.join(tmp, "bench.db"))
+        try:
+            repo = db.hakedis
+            company_id, contract_id, period_id = _seed(repo, positions, per_position)
+
+            # Eski döngü, metraj indeksi (migrasyon 8) olmadan ve varken
+            db.conn.execute("DROP INDEX IF EXISTS idx_measurements_boq")
+            t0 = time.perf_counter()
+            _legacy_lines(repo, company_id, contract_id, period_id)
+            legacy_noindex_s = time.perf_counter() - t0
+            db.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_measurements_boq ON measurements(company_id, boq_item_id, tarih)"
+            )
+            t0 = time.perf_counter()
+            legacy_total = _legacy_lines(repo, company_id, contract_id, period_id)
+            legacy_s = time.perf_counter() - t0
+
+            timings: Dict[str, float] = {}
+            totals = repo.pay_estimate_calculate(company_id, period_id, timings=timings)
+        finally:
+            db.close()
+
+    print(
+        json.dumps(
+            {
+                "positions": positions,
+                "measurements": positions * per_position,
+                "legacy_read_noindex_s": round(legacy_noindex_s, 4),
+                "legacy_read_s": round(legacy_s, 4),
+                "engine": timings,
+                "current_total_match": abs(legacy_total - totals["current_total"]) < 1e-6 * max(1.0, legacy_total),
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
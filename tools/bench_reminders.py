@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""Hatırlatma zamanlayıcısı: yığın yükleme, değişiklik işleme ve tetikleme gecikmesi.
+
+Kullanım: python tools/bench_reminders.py [hatırlatma_sayısı] [tetiklenecek_sayı]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kasapro.db.main_db import DB  # noqa: E402
+from kasapro.db.users_db import UsersDB  # noqa: E402
+from kasapro.modules.notes_reminders.scheduler import ReminderScheduler  # noqa: E402
+from kasapro.modules.notes_reminders.service import NotesRemindersService  # noqa: E402
+
+
+class _App:
+    root = None
+    active_company_id = 1
+
+    def get_active_user_id(self) -> int:
+        return 1
+
+
+def _seed(db: DB, count: int) -> None:
+    now = datetime.now()
+    ts = now.strftime("%Y-%m-%d %H:%M:%S")
+    db.conn.executemany(
+        """
+        INSERT INTO reminders(company_id, owner_user_id, title, body, due_at, priority, status, created_at, updated_at)
+        VALUES (1, 1, ?, '', ?, 'normal', 'scheduled', ?, ?)
+        """,
+        [
+            (f"Hatırlatma {i}", (now + timedelta(hours=1, seconds=i * 7)).strftime("%Y-%m-%d %H:%M:%S"), ts, ts)
+            for i in range(count)
+        ],
+    )
+    db.conn.commit()
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    fire = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DB(os.path.join(tmp, "bench.db"))
+        usersdb = UsersDB(tmp)
+        service = NotesRemindersService(db, usersdb)
+        scheduler = ReminderScheduler(_App(), service)
+        try:
+            _seed(db, count)
+
+            # Eski yol: her turda vadesi gelenleri tarayan sorgu
+            t0 = time.perf_counter()
+            service.db.notes_reminders.list_due_reminders(1, 1, "scheduled", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            service.db.notes_reminders.list_overdue(1, 1)
+            legacy_poll_query_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            scheduler._tick()
+            load_s = time.perf_counter() - t0
+
+            rid = service.create_reminder(1, 1, "Tekil", "", "2099-01-01 00:00:00", "normal")
+            t0 = time.perf_counter()
+            scheduler._tick()
+            change_s = time.perf_counter() - t0
+            service.cancel_reminder(rid, 1, 1)
+
+            # Gerçek thread: saniye sınırına denk gelen hatırlatmalar ne kadar geç bildiriliyor
+            scheduler.start()
+            base = datetime.now().replace(microsecond=0) + timedelta(seconds=2)
+            for i in range(fire):
+                service.create_reminder(1, 1, f"Yakın {i}", "", (base + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S"), "normal")
+            lags: List[float] = []
+            deadline = time.monotonic() + fire + 10
+            while len(lags) < fire and time.monotonic() < deadline:
+                try:
+                    msg = scheduler._queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if msg["type"] == "notify":
+                    due = datetime.strptime(msg["payload"]["due_at"], "%Y-%m-%d %H:%M:%S")
+                    lags.append((datetime.now() - due).total_seconds())
+        finally:
+            scheduler.stop()
+            db.close()
+            usersdb.close()
+
+    print(
+        json.dumps(
+            {
+                "reminders": count,
+                "legacy_poll_query_s": round(legacy_poll_query_s, 4),
+                "heap_load_s": round(load_s, 4),
+                "change_tick_s": round(change_s, 5),
+                "fired": len(lags),
+                "max_lag_s": round(max(lags), 3) if lags else None,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
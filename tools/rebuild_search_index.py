@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""Şirket DB'lerinin global arama (FTS5) indeksini yeniden oluştur.
+
+Kullanım:
+    python tools/rebuild_search_index.py <sirket.db> [<sirket2.db> ...]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if repo_root not in sys.path:
+    sys.path.insert(0, repo_root)
+
+
+def main(argv=None) -> int:
+    from kasapro.db.main_db import DB
+
+    paths = list(argv if argv is not None else sys.argv[1:])
+    if not paths:
+        print(__doc__)
+        return 2
+    results = {}
+    for path in paths:
+        started = time.perf_counter()
+        db = DB(path)
+        try:
+            rows = db.search_rebuild_index()
+        finally:
+            db.close()
+        results[path] = {"rows": rows, "seconds": round(time.perf_counter() - started, 3)}
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())